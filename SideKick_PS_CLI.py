@@ -11,9 +11,20 @@ Compile with::
         --hidden-import=upload_ghl_media   ^
         --hidden-import=cardly_preview_gui ^
         --hidden-import=cardly_send_card   ^
+        --hidden-import=cardly_campaign    ^
         --hidden-import=write_psa_payments ^
         --hidden-import=read_psa_payments  ^
         --hidden-import=read_psa_images    ^
+        --hidden-import=ghl_media_ledger   ^
+        --hidden-import=ghl_media_folders  ^
+        --hidden-import=ghl_sync_ledger    ^
+        --hidden-import=proselect_export   ^
+        --hidden-import=cardly_thumb_cache ^
+        --hidden-import=cardly_order_mirror ^
+        --hidden-import=ghl_custom_fields  ^
+        --hidden-import=sidekick_config    ^
+        --hidden-import=payment_schedule   ^
+        --hidden-import=psa_receivables    ^
         --hidden-import=read_supplier_status_db ^
         --hidden-import=sync_supplier_status_to_ghl ^
         SideKick_PS_CLI.py
@@ -21,7 +32,12 @@ Compile with::
 Copyright (c) 2026 GuyMayer.  All rights reserved.
 """
 
+import multiprocessing
+
 from sidekick_ps.cli import main
 
 if __name__ == "__main__":
+    # Process pool workers (e.g. receivables, Cardly campaigns) re-launch this exe; let them
+    # run their task instead of the CLI dispatcher.
+    multiprocessing.freeze_support()
     main()
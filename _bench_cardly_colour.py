@@ -0,0 +1,115 @@
+"""Benchmark Cardly colour management: per-image ICC rebuild vs cached transforms.
+
+Compares the old path (parse the embedded profile, check its description
+and build a fresh LittleCMS transform for every image via profileToProfile)
+with cardly_send_card's colour stage, which reuses transforms from the
+srgb_transform() cache and converts RGB images in place.
+
+Images are decoded before timing starts, so only colour management is
+measured. The synthetic set mixes sRGB-tagged, untagged and two non-sRGB
+tagged RGB images (the sRGB profile with its description renamed, which
+forces a full transform build).
+
+Usage:
+    python _bench_cardly_colour.py                   # synthetic, 40 images
+    python _bench_cardly_colour.py --count 100 --size 3000
+    python _bench_cardly_colour.py --folder "E:\\Shoot Archive\\P26001P\\Originals"
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from PIL import Image, ImageCms
+
+import cardly_send_card
+from cardly_send_card import _colour_manage, _decode_source, _SRGB_PROFILE
+
+
+def _renamed_srgb(name: str) -> bytes:
+    """sRGB profile bytes with a non-sRGB description of the same length."""
+    data = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+    return data.replace('sRGB'.encode('utf-16-be'), name.encode('utf-16-be'), 1)
+
+
+def synthetic_images(count: int, size: int) -> list:
+    """Mixed-profile RGB images (mostly wide-gamut tagged, like ProSelect exports)."""
+    srgb = ImageCms.ImageCmsProfile(_SRGB_PROFILE).tobytes()
+    profiles = [_renamed_srgb('wRGB'), _renamed_srgb('wRGB'), _renamed_srgb('cRGB'), srgb, None]
+    height = size * 2 // 3
+    images = []
+    for i in range(count):
+        img = Image.new('RGB', (size, height), ((i * 37) % 256, (i * 11) % 256, 128))
+        icc = profiles[i % len(profiles)]
+        if icc:
+            img.info['icc_profile'] = icc
+        images.append(img)
+    return images
+
+
+def folder_images(folder: str) -> list:
+    """Decode every image in a folder the way the Cardly pipeline does."""
+    images = []
+    for name in sorted(os.listdir(folder)):
+        if os.path.splitext(name)[1].lower() in ('.jpg', '.jpeg', '.tif', '.tiff', '.png'):
+            images.append(_decode_source(os.path.join(folder, name)))
+    return images
+
+
+def _old_colour_manage(img: Image.Image) -> Image.Image:
+    """The previous RGB/CMYK → sRGB code: profile parsed and transform built per call."""
+    src_icc = img.info.get('icc_profile')
+    if not src_icc or img.mode not in ('RGB', 'CMYK'):
+        return img
+    src_prof = ImageCms.ImageCmsProfile(io.BytesIO(src_icc))
+    if img.mode == 'RGB':
+        prof_desc = ImageCms.getProfileDescription(src_prof).strip()
+        if not prof_desc or 'srgb' in prof_desc.lower():
+            return img
+    return ImageCms.profileToProfile(img, src_prof, _SRGB_PROFILE,
+                                     renderingIntent=ImageCms.Intent.PERCEPTUAL, outputMode='RGB')
+
+
+def _run(images: list, fn) -> float:
+    """Colour-manage copies of every image; copying is not timed."""
+    elapsed = 0.0
+    for img in images:
+        work = img.copy()
+        work.info = dict(img.info)
+        start = time.perf_counter()
+        fn(work)
+        elapsed += time.perf_counter() - start
+    return elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--folder', default='', help='Folder of real originals (default: synthetic)')
+    parser.add_argument('--count', type=int, default=40, help='Synthetic image count')
+    parser.add_argument('--size', type=int, default=1500, help='Synthetic image width in pixels')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per mode (best time reported)')
+    args = parser.parse_args()
+
+    images = folder_images(args.folder) if args.folder else synthetic_images(args.count, args.size)
+    if not images:
+        print(f"No images found in {args.folder}")
+        return 1
+    tagged = sum(1 for img in images if img.info.get('icc_profile'))
+    print(f"{len(images)} images, {tagged} with an embedded profile")
+
+    modes = (
+        ('rebuild', _old_colour_manage),
+        ('cached', _colour_manage),
+    )
+    for label, fn in modes:
+        cardly_send_card._icc_transforms.clear()
+        best = min(_run(images, fn) for _ in range(max(1, args.repeat)))
+        print(f"  {label:<8} {best * 1000:8.1f} ms  {best * 1000 / len(images):6.2f} ms/image")
+    print(f"  transforms cached: {len(cardly_send_card._icc_transforms)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Benchmark ProSelect export parsing: legacy per-module ET.parse vs the shared model.
+
+Legacy path (as a sync with a contact sheet used to run): sync_ps_invoice
+ET.parse + get_text per item field, then create_ghl_contactsheet ET.parse of
+the same file for image labels. Shared path: proselect_export.load_export()
+once, with the second consumer hitting the per-process memo.
+
+Also checks that both paths extract identical items, payments and labels.
+Reports best wall time and peak Python memory (tracemalloc).
+
+Usage:
+    python _bench_export_parse.py                   # synthetic, 200/500/1000 items
+    python _bench_export_parse.py --items 2000 --repeat 5
+    python _bench_export_parse.py --xml "C:\\...\\2026-04-21_233724_P26034P_1.xml"
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import proselect_export
+
+
+def build_export(path: str, items: int, images_per_item: int = 4, payments: int = 12) -> None:
+    """Write a synthetic export shaped like a large ProSelect order."""
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n<Client>',
+        '<Client_ID>P26034</Client_ID><First_Name>Jane</First_Name><Last_Name>Field</Last_Name>',
+        '<Email_Address>jane@example.com</Email_Address><Cell_Phone>07700900000</Cell_Phone>',
+        '<Album_Name>P26034P_Field_8IWxk5M0PvbNf1w3npQU</Album_Name><Album_Path>D:\\Shoot_Archive\\P26034P</Album_Path>',
+        '<Street>1 High St</Street><City>York</City><Zip_Code>YO1 1AA</Zip_Code><Country>UK</Country>',
+        '<Order><Info><Date>04/21/2026</Date></Info><DateSQL>2026-04-21</DateSQL><Album_ID>998</Album_ID>',
+        f'<Total_Amount>{items * 45.0:.2f}</Total_Amount><Ordered_Items>',
+    ]
+    for i in range(items):
+        layout = ''.join(
+            f'<Layout_Image><Ordered_Image>thumb_{i}_{k}.jpg</Ordered_Image>'
+            f'<Image_Name>P26034P{(i * images_per_item + k) % 900:05d}.tif</Image_Name></Layout_Image>'
+            for k in range(images_per_item)
+        )
+        parts.append(
+            f'<Ordered_Item><ItemType>{"Wall Art" if i % 3 else "Print"}</ItemType>'
+            f'<Description>{escape(f"Item {i} & frame")}</Description><Product_Name>Product {i % 40}</Product_Name>'
+            f'<Product_Code>SKU{i % 40:03d}</Product_Code><ID>{1000 + i}</ID><Size>10.0x8.0</Size>'
+            f'<Template_Name>Template {i % 7}</Template_Name><Extended_Price>45.00</Extended_Price>'
+            f'<Quantity>1</Quantity><Tax taxable="true">7.50</Tax>'
+            f'<Tax1 label="VAT (20%)" rate="20" priceIncludesTax="true">7.50</Tax1>'
+            f'<ProductLineName code="A">Studio Pricing</ProductLineName>'
+            f'<Ordered_Layout>layout_{i}.jpg</Ordered_Layout>{layout}'
+            f'<Images><Ordered_Image>img_{i}.jpg</Ordered_Image><Image_Name>P26034P{i:05d}.tif</Image_Name></Images>'
+            f'</Ordered_Item>'
+        )
+    parts.append('</Ordered_Items><Payments>')
+    for k in range(payments):
+        parts.append(
+            f'<Payment id="{k}"><DateSQL>2026-{(k % 12) + 1:02d}-01</DateSQL><Amount>{items * 45.0 / payments:.2f}</Amount>'
+            f'<MethodName>GoCardless DD</MethodName><Type>{"OD" if k else "FP"}</Type></Payment>'
+        )
+    parts.append('</Payments></Order></Client>\n')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(''.join(parts))
+
+
+# ---------------------------------------------------------------------------
+# Legacy extraction (what the two modules did before the shared model)
+# ---------------------------------------------------------------------------
+
+def _get_text(element, tag, default=''):
+    child = element.find(tag)
+    return child.text if child is not None and child.text else default
+
+
+def _get_stripped(elem, path, default=''):
+    el = elem.find(path) if elem is not None else None
+    return el.text.strip() if el is not None and el.text else default
+
+
+def legacy_invoice_parse(xml_path: str) -> dict:
+    root = ET.parse(xml_path).getroot()
+    order = root.find('Order')
+    items, payments = [], []
+    for item in order.findall('.//Ordered_Item'):
+        tax_elem = item.find('Tax')
+        tax1_elem = item.find('Tax1')
+        product_line_elem = item.find('ProductLineName')
+        items.append({
+            'type': _get_text(item, 'ItemType'),
+            'description': _get_text(item, 'Description'),
+            'product': _get_text(item, 'Product_Name'),
+            'sku': _get_text(item, 'Product_Code'),
+            'ps_item_id': _get_text(item, 'ID'),
+            'size': _get_text(item, 'Size'),
+            'template': _get_text(item, 'Template_Name'),
+            'price': float(_get_text(item, 'Extended_Price', '0')),
+            'quantity': int(_get_text(item, 'Quantity', '1')),
+            'taxable': tax_elem.get('taxable', 'false').lower() == 'true' if tax_elem is not None else False,
+            'vat_amount': float(_get_text(item, 'Tax', '0')),
+            'tax_label': tax1_elem.get('label', '') if tax1_elem is not None else '',
+            'tax_rate': float(tax1_elem.get('rate', '0')) if tax1_elem is not None else 0.0,
+            'price_includes_tax': tax1_elem.get('priceIncludesTax', 'false').lower() == 'true' if tax1_elem is not None else False,
+            'product_line': _get_text(item, 'ProductLineName'),
+            'product_line_code': product_line_elem.get('code', '') if product_line_elem is not None else '',
+        })
+    for payment in order.findall('.//Payment'):
+        payments.append({
+            'id': payment.get('id'),
+            'date': _get_text(payment, 'DateSQL'),
+            'amount': float(_get_text(payment, 'Amount', '0')),
+            'method': _get_text(payment, 'MethodName'),
+            'type': _get_text(payment, 'Type'),
+        })
+    return {'album_name': _get_text(root, 'Album_Name'), 'date': _get_text(order, 'DateSQL'),
+            'total_amount': float(_get_text(order, 'Total_Amount', '0')), 'items': items, 'payments': payments}
+
+
+def legacy_contactsheet_labels(xml_path: str) -> dict:
+    root = ET.parse(xml_path).getroot()
+    order = root.find('Order')
+    labels = {}
+    for item in order.findall('.//Ordered_Item'):
+        description = _get_stripped(item, 'Description')
+        pairs = [(_get_stripped(li, 'Ordered_Image'), _get_stripped(li, 'Image_Name'))
+                 for li in item.findall('.//Layout_Image')]
+        images_elem = item.find('Images')
+        if images_elem is not None:
+            pairs += [(_get_stripped(oi, '.'), _get_stripped(nm, '.')) for oi, nm in
+                      zip(images_elem.findall('Ordered_Image'), images_elem.findall('Image_Name'))]
+        for ordered_img, image_name in pairs:
+            if ordered_img and image_name:
+                labels[ordered_img] = f"{image_name}-{description}"
+        layout = _get_stripped(item, './/Ordered_Layout')
+        if layout:
+            labels[layout] = description or 'Layout'
+    return labels
+
+
+# ---------------------------------------------------------------------------
+# Shared model
+# ---------------------------------------------------------------------------
+
+def shared_invoice_parse(xml_path: str) -> dict:
+    export = proselect_export.load_export(xml_path)
+    order = export.order
+    return {'album_name': export.client.album_name, 'date': order.date, 'total_amount': order.total_amount,
+            'items': [i.as_dict() for i in order.items], 'payments': [p.as_dict() for p in order.payments]}
+
+
+def shared_contactsheet_labels(xml_path: str) -> dict:
+    labels = {}
+    for item in proselect_export.load_export(xml_path).order.items:
+        description = item.description.strip()
+        for ordered_img, image_name in item.layout_images + item.images:
+            labels[ordered_img] = f"{image_name}-{description}"
+        if item.ordered_layout:
+            labels[item.ordered_layout] = description or 'Layout'
+    return labels
+
+
+def _measure(fn, xml_path: str, repeat: int) -> dict:
+    best = None
+    peak = 0
+    for _ in range(max(1, repeat)):
+        proselect_export.clear_cache()
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(xml_path)
+        elapsed = time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best = elapsed if best is None else min(best, elapsed)
+    return {'seconds': best, 'peak_bytes': peak}
+
+
+def run(xml_path: str, repeat: int) -> None:
+    if legacy_invoice_parse(xml_path) != shared_invoice_parse(xml_path):
+        raise SystemExit(f"[FAIL] Invoice data differs for {xml_path}")
+    if legacy_contactsheet_labels(xml_path) != shared_contactsheet_labels(xml_path):
+        raise SystemExit(f"[FAIL] Contact sheet labels differ for {xml_path}")
+
+    def legacy(path):
+        legacy_invoice_parse(path)
+        legacy_contactsheet_labels(path)
+
+    def shared(path):
+        shared_invoice_parse(path)
+        shared_contactsheet_labels(path)
+
+    items = len(proselect_export.load_export(xml_path).order.items)
+    size_kb = os.path.getsize(xml_path) / 1024
+    print(f"{os.path.basename(xml_path)}: {items} items, {size_kb:,.0f} KB  (outputs identical)")
+    results = {}
+    for label, fn in (('legacy x2', legacy), ('shared', shared), ('memo hit', shared_invoice_parse)):
+        if label == 'memo hit':
+            proselect_export.clear_cache()
+            proselect_export.load_export(xml_path)
+            start = time.perf_counter()
+            for _ in range(max(1, repeat)):
+                fn(xml_path)
+            results[label] = {'seconds': (time.perf_counter() - start) / max(1, repeat), 'peak_bytes': 0}
+        else:
+            results[label] = _measure(fn, xml_path, repeat)
+        r = results[label]
+        print(f"  {label:<10} {r['seconds'] * 1000:8.1f} ms  peak {r['peak_bytes'] / 1024 / 1024:6.2f} MB")
+    speedup = results['legacy x2']['seconds'] / results['shared']['seconds'] if results['shared']['seconds'] else 0
+    print(f"  speed-up   {speedup:8.2f}x")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--xml', default='', help='Real ProSelect export to benchmark (default: synthetic)')
+    parser.add_argument('--items', type=int, nargs='*', default=[200, 500, 1000], help='Synthetic item counts')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per mode (best time reported)')
+    args = parser.parse_args()
+
+    if args.xml:
+        run(args.xml, args.repeat)
+        return 0
+
+    work_dir = tempfile.mkdtemp(prefix='ps_export_bench_')
+    try:
+        for count in args.items:
+            xml_path = os.path.join(work_dir, f'export_{count}.xml')
+            build_export(xml_path, count)
+            run(xml_path, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Benchmark PSA thumbnail access: temp-folder extraction vs in-memory iteration.
+
+Compares the old path (extract_thumbnails() into a temp folder, then re-open
+each file, as the contact sheet and Cardly GUI used to do) with the
+iter_thumbnails() provider that hands blobs straight to the decoder.
+
+Reports wall time, files/bytes written to temp, and peak Python memory
+(tracemalloc). If Pillow is installed each thumbnail is also decoded, so
+the numbers include the renderer's side of the work.
+
+Usage:
+    python _bench_psa_thumbnails.py                 # synthetic album, 300 thumbs
+    python _bench_psa_thumbnails.py --count 1000
+    python _bench_psa_thumbnails.py --psa "E:\\Shoot Archive\\...\\album.psa"
+"""
+import argparse
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from read_psa_images import extract_thumbnails, iter_thumbnails, get_album_info
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+def _fake_jpeg(index: int, size: int) -> bytes:
+    """Return a JPEG-looking blob (real JPEG when Pillow is available)."""
+    if Image is not None:
+        buf = io.BytesIO()
+        Image.new('RGB', (320, 240), ((index * 37) % 256, (index * 11) % 256, 128)).save(buf, 'JPEG', quality=85)
+        return buf.getvalue()
+    return b'\xff\xd8' + os.urandom(size - 4) + b'\xff\xd9'
+
+
+def build_synthetic_psa(path: str, count: int, size: int) -> None:
+    """Create a minimal .psa with an ImageList and type-1 thumbnails."""
+    conn = sqlite3.connect(path)
+    conn.execute('CREATE TABLE BigStrings (buffCode TEXT, buffer BLOB)')
+    conn.execute('CREATE TABLE Thumbnails (id INTEGER PRIMARY KEY, imageID INTEGER, '
+                 'thumbnailType INTEGER, imageData BLOB)')
+    images = ''.join(
+        f'<image name="P26001P{i:04d}.tif" sourceFoldIndex="1"><albumimage id="{i}"/></image>'
+        for i in range(1, count + 1)
+    )
+    conn.execute('INSERT INTO BigStrings VALUES (?, ?)', ('ImageList', f'<ImageList>{images}</ImageList>'))
+    conn.executemany(
+        'INSERT INTO Thumbnails (imageID, thumbnailType, imageData) VALUES (?, 1, ?)',
+        ((i, _fake_jpeg(i, size)) for i in range(1, count + 1))
+    )
+    conn.commit()
+    conn.close()
+
+
+def _decode(data) -> None:
+    """Decode one thumbnail the way the renderers do (no-op without Pillow)."""
+    if Image is None:
+        return
+    with Image.open(io.BytesIO(data) if not isinstance(data, str) else data) as img:
+        img.load()
+
+
+def bench_temp_folder(psa_path: str) -> dict:
+    """Old path: extract to a temp folder, then open every file."""
+    temp_dir = tempfile.mkdtemp(prefix="psa_thumbs_bench_")
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = extract_thumbnails(psa_path, temp_dir)
+        for name in result.get('files', []):
+            _decode(os.path.join(temp_dir, name))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        files = os.listdir(temp_dir)
+        written = sum(os.path.getsize(os.path.join(temp_dir, f)) for f in files)
+        return {'seconds': elapsed, 'peak_bytes': peak, 'temp_files': len(files),
+                'temp_bytes': written, 'count': result.get('count', 0)}
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def bench_in_memory(psa_path: str) -> dict:
+    """New path: decode blobs straight from SQLite."""
+    image_ids = get_album_info(psa_path).get('image_ids', {})
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = 0
+    for _name, data in iter_thumbnails(psa_path, image_ids):
+        _decode(data)
+        count += 1
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'peak_bytes': peak, 'temp_files': 0, 'temp_bytes': 0, 'count': count}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--psa', default='', help='Real .psa album to benchmark (default: synthetic)')
+    parser.add_argument('--count', type=int, default=300, help='Synthetic thumbnail count')
+    parser.add_argument('--size', type=int, default=22000, help='Synthetic thumbnail size in bytes (no Pillow)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per mode (best time reported)')
+    args = parser.parse_args()
+
+    work_dir = None
+    psa_path = args.psa
+    if not psa_path:
+        work_dir = tempfile.mkdtemp(prefix="psa_bench_")
+        psa_path = os.path.join(work_dir, 'bench.psa')
+        build_synthetic_psa(psa_path, args.count, args.size)
+
+    try:
+        print(f"Album: {psa_path}  (decode: {'Pillow' if Image else 'skipped, Pillow not installed'})")
+        for label, fn in (('temp folder', bench_temp_folder), ('in-memory', bench_in_memory)):
+            runs = [fn(psa_path) for _ in range(max(1, args.repeat))]
+            best = min(runs, key=lambda r: r['seconds'])
+            print(f"  {label:<12} {best['count']:>5} thumbs  {best['seconds'] * 1000:8.1f} ms  "
+                  f"peak {best['peak_bytes'] / 1024 / 1024:6.2f} MB  "
+                  f"temp {best['temp_files']:>5} files / {best['temp_bytes'] / 1024 / 1024:6.2f} MB")
+    finally:
+        if work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
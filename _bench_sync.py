@@ -0,0 +1,389 @@
+"""Benchmark sync_ps_invoice end to end against the local mock GHL API.
+
+Builds synthetic ProSelect XML exports plus matching shoot folders/PSA
+files, seeds _mock_ghl_server with the contacts, opportunities and
+products they reference, then drives the real sync code:
+
+    process  - _process_sync() once per XML (the single-shoot GUI path)
+    batch    - run_batch_sync_month() over the XML folder (month batch),
+               followed by a second pass to time the "already synced" skip
+
+For each shoot it reports API calls, wall time and the p95 request
+latency; the summary adds per-shoot p50/p95, request status counts
+(409/429 included) and the busiest routes.
+
+Nothing leaves the machine: requests aimed at the GHL host are redirected
+to the mock and any other host is refused.
+
+Usage:
+    python _bench_sync.py                                   # 10 shoots, both modes
+    python _bench_sync.py --shoots 40 --latency 150 --jitter 100
+    python _bench_sync.py --mode batch --conflict-rate 0.2 --burst-limit 100
+    python _bench_sync.py --sleep-scale 0 --json bench_sync.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _mock_ghl_server import (ClientRecorder, MockGHLServer, MockGHLState, MOCK_LOCATION_ID,
+                              _percentile, redirect_requests_to)
+
+SURNAMES = ['Atkins', 'Barker', 'Collins', 'Dunkley', 'Ellis', 'Fletcher', 'Grant', 'Hughes',
+            'Irving', 'Jarvis', 'Kemp', 'Lowe', 'Martin', 'Norris', 'Oakley', 'Parker']
+FIRST_NAMES = ['Claire', 'Louise', 'Helen', 'Sarah', 'Emma', 'Kate', 'Amy', 'Jo']
+
+# (Product_Name, Product_Code, price) - seeded in GHL and used on the orders
+CATALOGUE = [
+    ('Fine Art Print 10x8', 'FAP108', 95.0),
+    ('Fine Art Print 14x11', 'FAP1411', 185.0),
+    ('Canvas Gallery Block 20x16', 'CGB2016', 450.0),
+    ('Image Box 20 Mats', 'IBX20', 895.0),
+    ('Digital Files Collection', 'DIG10', 350.0),
+    ('Framed Print 16x12', 'FRM1612', 325.0),
+    ('Album 10x10 20 Pages', 'ALB1010', 1250.0),
+    ('Black Image Box Mat', 'MAT01', 25.0),
+]
+
+# Contact custom field used by find_ghl_contact() (session_job_no)
+SESSION_JOB_NO_FIELD = '82WRQe9Rl6o8uJQ8cgZV'
+
+
+class _ScaledTime:
+    """Stand-in for the time module whose sleep() is scaled (other calls pass through)."""
+
+    def __init__(self, scale: float):
+        self._scale = scale
+
+    def sleep(self, seconds: float) -> None:
+        if self._scale > 0:
+            time.sleep(seconds * self._scale)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class ShootTracker:
+    """Split the client-side request log into one segment per shoot."""
+
+    def __init__(self, recorder: ClientRecorder):
+        self.recorder = recorder
+        self.rows: list[dict] = []
+        self._open = None
+
+    def mark(self, label: str) -> None:
+        """Close the current segment and start one for label."""
+        self.close()
+        self._open = (label, time.perf_counter(), len(self.recorder))
+
+    def close(self) -> None:
+        if not self._open:
+            return
+        label, start, index = self._open
+        self._open = None
+        calls = self.recorder.since(index)
+        latencies = [seconds for _route, _status, seconds in calls]
+        self.rows.append({
+            'shoot': label,
+            'seconds': time.perf_counter() - start,
+            'api_calls': len(calls),
+            'errors': sum(1 for _r, status, _s in calls if status >= 400),
+            'http_409': sum(1 for _r, status, _s in calls if status == 409),
+            'http_429': sum(1 for _r, status, _s in calls if status == 429),
+            'p95_request_ms': _percentile(latencies, 95) * 1000,
+        })
+
+
+# -- fixtures ------------------------------------------------------------------
+
+def _write_psa(psa_path: str) -> None:
+    """Create a minimal .psa (SQLite) so PSA metadata can be written."""
+    os.makedirs(os.path.dirname(psa_path), exist_ok=True)
+    conn = sqlite3.connect(psa_path)
+    conn.execute('CREATE TABLE BigStrings (buffCode TEXT, buffer BLOB)')
+    conn.execute('INSERT INTO BigStrings VALUES (?, ?)', ('ImageList', '<ImageList></ImageList>'))
+    conn.commit()
+    conn.close()
+
+
+def _add_months(value: date, months: int) -> date:
+    month = value.month - 1 + months
+    return date(value.year + month // 12, month % 12 + 1, min(value.day, 28))
+
+
+def _xml_escape(value: str) -> str:
+    return value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+
+
+def build_fixtures(root: str, count: int, state: MockGHLState, lookup_every: int = 5) -> tuple[str, str]:
+    """Write count XML exports + shoot folders and seed matching GHL state.
+
+    Every lookup_every-th shoot has no GHL ID in its album name, so the sync
+    has to find the contact through /contacts/search. Every third contact has
+    no opportunity, so the sync creates one in the Production pipeline.
+
+    Returns:
+        tuple[str, str]: (xml folder, batch month 'YYYY-MM')
+    """
+    xml_dir = os.path.join(root, 'xml')
+    archive_dir = os.path.join(root, 'archive')
+    os.makedirs(xml_dir, exist_ok=True)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    for name, sku, price in CATALOGUE:
+        state.add_product(name, sku, price)
+
+    today = date.today()
+    year_code = today.year % 100
+    for i in range(1, count + 1):
+        shoot_no = f'P{year_code:02d}{i:03d}P'
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last = f'{SURNAMES[i % len(SURNAMES)]}{chr(65 + (i // len(SURNAMES)) % 26).lower()}'
+        contact_id = f'BenchContact{i:08d}'
+        email = f'{first.lower()}.{last.lower()}@example.com'
+        direct_id = not (lookup_every and i % lookup_every == 0)
+        album_name = f'{shoot_no}_{last}_{contact_id}' if direct_id else f'{shoot_no}_{last}'
+
+        state.add_contact(contact_id, first, last, email, job_no=shoot_no, custom_field_id=SESSION_JOB_NO_FIELD)
+        if i % 3:
+            state.add_opportunity(contact_id, f'{shoot_no} - {first} {last}')
+
+        shoot_dir = os.path.join(archive_dir, f'{shoot_no}_{last}')
+        _write_psa(os.path.join(shoot_dir, 'Unprocessed', f'{album_name}.psa'))
+
+        order_date = date(today.year, today.month, 1 + (i % today.day))
+        items = [CATALOGUE[(i + k) % len(CATALOGUE)] for k in range(2 + i % 3)]
+        total = sum(price for _name, _sku, price in items)
+        deposit = round(total * 0.25, 2)
+        instalments = 1 + i % 4
+        per_instalment = round((total - deposit) / instalments, 2)
+        payments = [(order_date, deposit, 'OD')]
+        payments += [(_add_months(order_date, k), per_instalment, 'FP' if k == instalments else 'OD')
+                     for k in range(1, instalments + 1)]
+
+        item_xml = ''.join(
+            f'<Ordered_Item><ItemType>Print</ItemType><Description>{_xml_escape(name)}</Description>'
+            f'<Product_Name>{_xml_escape(name)}</Product_Name><Product_Code>{sku}</Product_Code>'
+            f'<ID>{i}{k}</ID><Extended_Price>{price:.2f}</Extended_Price><Quantity>1</Quantity>'
+            f'<Tax taxable="true">{price / 6:.2f}</Tax>'
+            f'<Tax1 label="VAT (20%)" rate="20" priceIncludesTax="true">{price / 6:.2f}</Tax1>'
+            f'<ProductLineName code="A">Studio Pricing</ProductLineName></Ordered_Item>'
+            for k, (name, sku, price) in enumerate(items)
+        )
+        payment_xml = ''.join(
+            f'<Payment id="{k}"><DateSQL>{paid_on.isoformat()}</DateSQL><Amount>{amount:.2f}</Amount>'
+            f'<MethodName>GoCardless DD</MethodName><Type>{ptype}</Type></Payment>'
+            for k, (paid_on, amount, ptype) in enumerate(payments, 1)
+        )
+        xml = (
+            f'<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<Client format="xmlstd" proselectversion="25.1.2">'
+            f'<Album_Name>{album_name}</Album_Name><Client_ID>{shoot_no}</Client_ID>'
+            f'<Email_Address>{email}</Email_Address><First_Name>{first}</First_Name><Last_Name>{last}</Last_Name>'
+            f'<Cell_Phone>+447700900{i:03d}</Cell_Phone><Street>{i} High Street</Street><City>Testville</City>'
+            f'<Zip_Code>AB1 2CD</Zip_Code><Country>GB</Country><Album_Path>{_xml_escape(shoot_dir)}</Album_Path>'
+            f'<Order><DateSQL>{order_date.isoformat()}</DateSQL><Album_ID>{album_name}-1</Album_ID>'
+            f'<Total_Amount>{total:.2f}</Total_Amount><Ordered_Items>{item_xml}</Ordered_Items>'
+            f'<Payments>{payment_xml}</Payments></Order></Client>'
+        )
+        xml_name = f'{order_date.isoformat()}_{100000 + i}_{shoot_no}_1.xml'
+        with open(os.path.join(xml_dir, xml_name), 'w', encoding='utf-8') as f:
+            f.write(xml)
+
+    return xml_dir, f'{today.year:04d}-{today.month:02d}'
+
+
+# -- runs ----------------------------------------------------------------------
+
+def _shoot_label(xml_path: str) -> str:
+    """Return the shoot number from an export name like 2026-04-21_233724_P26034P_1.xml."""
+    parts = os.path.basename(xml_path).split('_')
+    return parts[2] if len(parts) > 2 else os.path.basename(xml_path)
+
+
+def _configure_sync_module(sip, root: str, sleep_scale: float) -> None:
+    """Point sync_ps_invoice's module config at the mock location and fixture archive."""
+    sip.API_KEY = 'mock-api-key'
+    sip.LOCATION_ID = MOCK_LOCATION_ID
+    sip.CONFIG = {
+        'API_KEY': sip.API_KEY,
+        'LOCATION_ID': MOCK_LOCATION_ID,
+        'SYNC_TAG': 'PS Invoice',
+        'OPPORTUNITY_TAGS': ['ProSelect', 'Invoice Synced'],
+        'AUTO_ADD_CONTACT_TAGS': True,
+        'AUTO_ADD_OPP_TAGS': True,
+    }
+    sip._BUSINESS_DETAILS_CACHE = None
+    sip._ghl_products_cache = {}
+    sip._ghl_products_cache_time = 0
+    sip.ARCHIVE_ROOTS = [os.path.join(root, 'archive')]
+    sip._ADDITIONAL_ARCHIVES_FILE = os.path.join(root, '_Additional_Archives.txt')
+    sip.time = _ScaledTime(sleep_scale)
+
+
+def _quiet(verbose: bool):
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def run_mode(sip, mode: str, args) -> dict:
+    """Build fresh fixtures + mock state and time one sync mode."""
+    root = tempfile.mkdtemp(prefix=f'sk_bench_sync_{mode}_')
+    state = MockGHLState()
+    xml_dir, batch_month = build_fixtures(root, args.shoots, state, args.lookup_every)
+    _configure_sync_module(sip, root, args.sleep_scale)
+
+    server = MockGHLServer(state, latency_ms=args.latency, jitter_ms=args.jitter,
+                           conflict_rate=args.conflict_rate, rate_limit_rate=args.rate_limit_rate,
+                           burst_limit=args.burst_limit, seed=args.seed)
+    recorder = ClientRecorder()
+    tracker = ShootTracker(recorder)
+    passes = []
+
+    original_parse = sip.parse_proselect_xml
+
+    def traced_parse(xml_path):
+        if mode == 'batch':
+            tracker.mark(_shoot_label(xml_path))
+        return original_parse(xml_path)
+
+    # Private APPDATA per mode: the sync/media ledgers must not leak between
+    # modes (or into the real profile) or later modes skip every shoot.
+    # TEMP/TMP too, so the progress file lands in the fixture root, not the cwd.
+    temp_dir = os.path.join(root, 'temp')
+    os.makedirs(temp_dir, exist_ok=True)
+    saved_env = {name: os.environ.get(name) for name in ('APPDATA', 'TEMP', 'TMP')}
+    saved_progress_file = sip.PROGRESS_FILE
+    os.environ['APPDATA'] = os.path.join(root, 'appdata')
+    os.environ['TEMP'] = os.environ['TMP'] = temp_dir
+    sip.PROGRESS_FILE = os.path.join(temp_dir, os.path.basename(saved_progress_file))  # resolved at import
+
+    sip.parse_proselect_xml = traced_parse
+    try:
+        with server, redirect_requests_to(server.base_url, recorder):
+            if mode == 'process':
+                start = time.perf_counter()
+                failures = 0
+                for name in sorted(os.listdir(xml_dir)):
+                    tracker.mark(_shoot_label(name))
+                    try:
+                        with _quiet(args.verbose):
+                            result = sip._process_sync(
+                                os.path.join(xml_dir, name), financials_only=False, create_invoice=True,
+                                create_contact_sheet=False, open_browser=False, skip_zero_extras=True,
+                                supplier_sync_enabled=False,
+                            )
+                    except SystemExit:
+                        result = {'success': False}
+                    failures += 0 if result.get('success') else 1
+                tracker.close()
+                passes.append({'label': 'process', 'seconds': time.perf_counter() - start,
+                               'failed': failures, 'shoots': tracker.rows})
+            else:
+                for label in ('batch (cold)', 'batch (re-run)'):
+                    tracker.rows = []
+                    start = time.perf_counter()
+                    with _quiet(args.verbose):
+                        summary = sip.run_batch_sync_month(
+                            batch_month, xml_dir, open_browser=False, skip_zero_extras=True,
+                            supplier_sync_enabled=False, skip_existing_invoices=True,
+                        )
+                    tracker.close()
+                    passes.append({'label': label, 'seconds': time.perf_counter() - start,
+                                   'failed': summary.get('failed', 0), 'processed': summary.get('processed', 0),
+                                   'skipped_synced': summary.get('skipped_synced', 0), 'shoots': tracker.rows})
+    finally:
+        sip.parse_proselect_xml = original_parse
+        sip.PROGRESS_FILE = saved_progress_file
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    request_seconds = [seconds for _r, _s, seconds in recorder.calls]
+    return {
+        'mode': mode,
+        'fixtures': root if args.keep else '',
+        'passes': passes,
+        'requests': len(recorder.calls),
+        'request_p50_ms': _percentile(request_seconds, 50) * 1000,
+        'request_p95_ms': _percentile(request_seconds, 95) * 1000,
+        'server': server.stats.as_dict(),
+        'state': state.snapshot(),
+    }
+
+
+def print_report(report: dict, top_routes: int = 8) -> None:
+    """Print per-shoot rows and a summary for one mode."""
+    print(f"\n=== {report['mode']} ===")
+    for run in report['passes']:
+        shoots = run['shoots']
+        print(f"\n-- {run['label']}: {len(shoots)} shoot(s) in {run['seconds']:.2f} s, failed {run.get('failed', 0)}")
+        print(f"  {'shoot':<12} {'calls':>6} {'wall s':>8} {'p95 req ms':>11} {'409':>4} {'429':>4} {'errors':>6}")
+        for row in shoots:
+            print(f"  {row['shoot']:<12} {row['api_calls']:>6} {row['seconds']:>8.2f} {row['p95_request_ms']:>11.1f} "
+                  f"{row['http_409']:>4} {row['http_429']:>4} {row['errors']:>6}")
+        if shoots:
+            walls = [r['seconds'] for r in shoots]
+            calls = [r['api_calls'] for r in shoots]
+            print(f"  per shoot: wall p50 {_percentile(walls, 50):.2f} s / p95 {_percentile(walls, 95):.2f} s, "
+                  f"API calls mean {sum(calls) / len(calls):.1f} / max {max(calls)}")
+
+    server = report['server']
+    print(f"\n  requests: {report['requests']}  (client p50 {report['request_p50_ms']:.1f} ms, "
+          f"p95 {report['request_p95_ms']:.1f} ms)  statuses: {server['by_status']}")
+    print(f"  mock state after run: {report['state']}")
+    print("  busiest routes:")
+    for route, entry in list(server['routes'].items())[:top_routes]:
+        print(f"    {entry['count']:>5}  {route:<45} {entry['statuses']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mode', choices=['process', 'batch', 'both'], default='both')
+    parser.add_argument('--shoots', type=int, default=10, help='Synthetic shoots to sync')
+    parser.add_argument('--lookup-every', type=int, default=5,
+                        help='Every Nth shoot has no GHL ID in its album name (0 = never)')
+    parser.add_argument('--latency', type=float, default=80.0, help='Mock API latency per request (ms)')
+    parser.add_argument('--jitter', type=float, default=40.0, help='Extra random latency 0..N ms')
+    parser.add_argument('--conflict-rate', type=float, default=0.0, help='record-payment 409 probability')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Random 429 probability')
+    parser.add_argument('--burst-limit', type=int, default=0, help='Max requests per 10 s (0 = off)')
+    parser.add_argument('--sleep-scale', type=float, default=1.0,
+                        help="Scale the sync's own time.sleep() pauses (0 = skip them)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', default='', help='Also write the full report to this file')
+    parser.add_argument('--keep', action='store_true', help='Keep fixture folders for inspection')
+    parser.add_argument('--verbose', action='store_true', help="Show the sync's own console output")
+    args = parser.parse_args()
+
+    import sync_ps_invoice as sip
+
+    modes = ['process', 'batch'] if args.mode == 'both' else [args.mode]
+    print(f"Mock GHL: latency {args.latency:.0f}+{args.jitter:.0f} ms, 409 rate {args.conflict_rate}, "
+          f"429 rate {args.rate_limit_rate}, burst limit {args.burst_limit or 'off'}, sleep scale {args.sleep_scale}")
+    reports = []
+    for mode in modes:
+        report = run_mode(sip, mode, args)
+        print_report(report)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'reports': reports}, f, indent=2)
+        print(f"\nReport written to {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,939 @@
+"""Local stand-in for the GoHighLevel v2 API, for offline sync benchmarks.
+
+Serves the endpoints sync_ps_invoice.py talks to (contacts, opportunities,
+pipelines, products/prices, invoices, schedules, record-payment, medias,
+location settings) from in-memory state, plus the custom-field, pipeline and
+stage creation used by build_ghl_production_pipeline.py, with:
+
+    - configurable per-request latency (+ jitter)
+    - 409 injection on record-payment (GHL's payment race) and random 429s
+    - a GHL-style burst limiter (N requests per rolling 10 s window -> 429)
+    - per-route request accounting (count, status codes, server time)
+
+The state is seeded by the caller (see _bench_sync.py) or with a small
+demo data set when run standalone. sync_ps_invoice.py has the production
+API host hard-coded, so in-process callers use redirect_requests_to() to
+point the `requests` library at the mock.
+
+Usage:
+    python _mock_ghl_server.py --port 8765 --latency 120 --conflict-rate 0.1
+    curl http://127.0.0.1:8765/opportunities/pipelines
+    curl http://127.0.0.1:8765/_stats
+"""
+import argparse
+import contextlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+GHL_API_BASE = 'https://services.leadconnectorhq.com'
+MOCK_LOCATION_ID = 'mockLocation00000001'
+
+# Pipeline names/stages used by move_contact_opportunity_to_production()
+PRODUCTION_PIPELINE_NAME = 'Boudoir Production Pipeline'
+PRODUCTION_STAGES = [
+    'New Order', 'Retouching', 'Design', 'Proofing', 'With Supplier',
+    'QC / Delivery Prep', 'Ready for Collection', 'Collected', 'On Hold',
+    'Complete', 'No Sale',
+]
+SALES_PIPELINE_NAME = 'Sales Pipeline'
+SALES_STAGES = ['Enquiry', 'Booked', 'Shoot Done', 'Viewing']
+
+# Opportunity custom fields resolved by name in _resolve_optional_opp_financial_field_ids()
+OPP_FINANCIAL_FIELDS = [
+    'Order Total Value', 'Total Paid To Date', 'Paid Ratio Percent',
+    'Payments Count', 'Amount Remaining',
+]
+
+
+def _new_id() -> str:
+    """Return a 24-char hex ID like GHL's Mongo-style IDs."""
+    return uuid.uuid4().hex[:24]
+
+
+def _now_iso() -> str:
+    """Return the current UTC time in GHL's ISO format."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def _percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class MockGHLState:
+    """In-memory GHL location: contacts, opportunities, products, invoices, media."""
+
+    def __init__(self, location_id: str = MOCK_LOCATION_ID):
+        self.location_id = location_id
+        self.lock = threading.RLock()
+        self.contacts: dict[str, dict] = {}
+        self.opportunities: dict[str, dict] = {}
+        self.products: list[dict] = []
+        self.prices: dict[str, list[dict]] = {}
+        self.invoices: dict[str, dict] = {}
+        self.schedules: dict[str, dict] = {}
+        self.medias: dict[str, dict] = {}
+        self.notes: list[dict] = []
+        self.invoice_counter = 1000
+        self.pipelines = [
+            self._make_pipeline(PRODUCTION_PIPELINE_NAME, PRODUCTION_STAGES),
+            self._make_pipeline(SALES_PIPELINE_NAME, SALES_STAGES),
+        ]
+        self.custom_fields = [
+            {'id': _new_id(), 'name': name, 'model': 'opportunity', 'dataType': 'NUMERICAL'}
+            for name in OPP_FINANCIAL_FIELDS
+        ]
+
+    @staticmethod
+    def _make_pipeline(name: str, stages: list) -> dict:
+        return {
+            'id': _new_id(),
+            'name': name,
+            'stages': [{'id': _new_id(), 'name': stage, 'position': i} for i, stage in enumerate(stages)],
+        }
+
+    def pipeline(self, name: str) -> dict | None:
+        """Return the pipeline with this name."""
+        return next((p for p in self.pipelines if p['name'] == name), None)
+
+    # -- seeding -----------------------------------------------------------
+
+    def add_contact(self, contact_id: str, first_name: str, last_name: str, email: str,
+                    job_no: str = '', custom_field_id: str = '') -> dict:
+        """Seed a contact (optionally with the session_job_no custom field)."""
+        contact = {
+            'id': contact_id,
+            'locationId': self.location_id,
+            'firstName': first_name,
+            'lastName': last_name,
+            'contactName': f'{first_name} {last_name}'.strip(),
+            'email': email,
+            'phone': '+447700900000',
+            'address1': '1 High Street',
+            'city': 'Testville',
+            'postalCode': 'AB1 2CD',
+            'country': 'GB',
+            'tags': [],
+            'customFields': [{'id': custom_field_id, 'value': job_no}] if custom_field_id and job_no else [],
+        }
+        with self.lock:
+            self.contacts[contact_id] = contact
+        return contact
+
+    def add_opportunity(self, contact_id: str, title: str, pipeline_name: str = SALES_PIPELINE_NAME,
+                        stage_name: str = 'Viewing', status: str = 'open') -> dict:
+        """Seed an opportunity for a contact."""
+        pipeline = self.pipeline(pipeline_name) or self.pipelines[0]
+        stage = next((s for s in pipeline['stages'] if s['name'] == stage_name), pipeline['stages'][0])
+        opp = {
+            'id': _new_id(),
+            'name': title,
+            'contactId': contact_id,
+            'pipelineId': pipeline['id'],
+            'pipelineStageId': stage['id'],
+            'status': status,
+            'monetaryValue': 0,
+            'customFields': [],
+            'createdAt': _now_iso(),
+            'updatedAt': _now_iso(),
+        }
+        with self.lock:
+            self.opportunities[opp['id']] = opp
+        return opp
+
+    def add_product(self, name: str, sku: str, amount: float) -> dict:
+        """Seed a product with one SKU'd price."""
+        product = {'_id': _new_id(), 'name': name, 'description': name, 'productType': 'PHYSICAL',
+                   'locationId': self.location_id, 'variants': []}
+        with self.lock:
+            self.products.append(product)
+            self.prices[product['_id']] = [{'_id': _new_id(), 'name': name, 'sku': sku,
+                                            'amount': amount, 'currency': 'GBP'}]
+        return product
+
+    # -- helpers -----------------------------------------------------------
+
+    def contact_search(self, filters: list) -> list:
+        """Evaluate /contacts/search 'eq' filters (email or customFields.<id>)."""
+        results = []
+        with self.lock:
+            for contact in self.contacts.values():
+                ok = True
+                for flt in filters or []:
+                    field = str(flt.get('field', ''))
+                    value = str(flt.get('value', '')).lower()
+                    if field == 'email':
+                        ok = ok and contact.get('email', '').lower() == value
+                    elif field.startswith('customFields.'):
+                        fid = field.split('.', 1)[1]
+                        ok = ok and any(cf.get('id') == fid and str(cf.get('value', '')).lower() == value
+                                        for cf in contact.get('customFields', []))
+                    else:
+                        ok = ok and str(contact.get(field, '')).lower() == value
+                if ok:
+                    results.append(contact)
+        return results
+
+    def snapshot(self) -> dict:
+        """Return object counts (for reports)."""
+        with self.lock:
+            return {
+                'contacts': len(self.contacts),
+                'opportunities': len(self.opportunities),
+                'invoices': len(self.invoices),
+                'payments_recorded': sum(len(i.get('recordPayment', [])) for i in self.invoices.values()),
+                'schedules': len(self.schedules),
+                'medias': len(self.medias),
+            }
+
+
+class RequestStats:
+    """Thread-safe request accounting keyed by route template."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.total = 0
+            self.by_route: dict[str, dict] = {}
+            self.by_status: dict[int, int] = {}
+
+    def record(self, route: str, status: int, seconds: float) -> None:
+        with self.lock:
+            self.total += 1
+            entry = self.by_route.setdefault(route, {'count': 0, 'statuses': {}, 'seconds': []})
+            entry['count'] += 1
+            entry['statuses'][status] = entry['statuses'].get(status, 0) + 1
+            entry['seconds'].append(seconds)
+            self.by_status[status] = self.by_status.get(status, 0) + 1
+
+    def as_dict(self) -> dict:
+        with self.lock:
+            routes = {}
+            for route, entry in sorted(self.by_route.items(), key=lambda kv: -kv[1]['count']):
+                routes[route] = {
+                    'count': entry['count'],
+                    'statuses': {str(k): v for k, v in sorted(entry['statuses'].items())},
+                    'p50_ms': round(_percentile(entry['seconds'], 50) * 1000, 1),
+                    'p95_ms': round(_percentile(entry['seconds'], 95) * 1000, 1),
+                }
+            return {
+                'total': self.total,
+                'by_status': {str(k): v for k, v in sorted(self.by_status.items())},
+                'routes': routes,
+            }
+
+
+class MockGHLServer:
+    """Threaded HTTP server hosting a MockGHLState.
+
+    Args:
+        state: Seeded state (a fresh empty one when omitted).
+        host/port: Bind address; port 0 picks a free port.
+        latency_ms: Added server-side delay per request.
+        jitter_ms: Extra uniform random delay (0..jitter_ms) per request.
+        conflict_rate: Probability a record-payment call returns 409.
+        rate_limit_rate: Probability any call returns 429.
+        burst_limit: Max requests per rolling 10 s window (0 = unlimited), like
+            GHL's per-location burst limit; excess requests get 429.
+        seed: RNG seed so fault injection is reproducible.
+    """
+
+    def __init__(self, state: MockGHLState | None = None, host: str = '127.0.0.1', port: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, conflict_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, burst_limit: int = 0, seed: int = 1):
+        self.state = state or MockGHLState()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.conflict_rate = conflict_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.burst_limit = burst_limit
+        self.stats = RequestStats()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._window = deque()
+        self._window_lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'MockGHLServer':
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-ghl', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'MockGHLServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # -- fault injection ---------------------------------------------------
+
+    def _chance(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._rng_lock:
+            return self._rng.random() < rate
+
+    def _delay(self) -> float:
+        delay = self.latency_ms
+        if self.jitter_ms > 0:
+            with self._rng_lock:
+                delay += self._rng.uniform(0, self.jitter_ms)
+        return delay / 1000.0
+
+    def _burst_exceeded(self) -> bool:
+        if self.burst_limit <= 0:
+            return False
+        now = time.monotonic()
+        with self._window_lock:
+            while self._window and now - self._window[0] > 10.0:
+                self._window.popleft()
+            if len(self._window) >= self.burst_limit:
+                return True
+            self._window.append(now)
+            return False
+
+    def injected_status(self, route: str) -> int:
+        """Return 429/409 if this request should fail, else 0."""
+        if self._burst_exceeded() or self._chance(self.rate_limit_rate):
+            return 429
+        if route == 'POST /invoices/{id}/record-payment' and self._chance(self.conflict_rate):
+            return 409
+        return 0
+
+
+# -- route handlers -----------------------------------------------------------
+# Each handler takes (server, match, query, body) and returns (status, payload).
+
+def _h_location(srv, m, q, body):
+    return 200, {'location': {
+        'id': m.group(1), 'name': 'Mock Photography Studio', 'email': 'studio@example.com',
+        'phone': '+441234567890', 'address': '1 Studio Lane, Testville',
+        'website': 'https://example.com', 'logoUrl': '',
+    }}
+
+
+def _h_custom_fields(srv, m, q, body):
+    model = (q.get('model') or [''])[0]
+    fields = [f for f in srv.state.custom_fields if not model or f['model'] == model]
+    return 200, {'customFields': fields}
+
+
+def _h_custom_field_create(srv, m, q, body):
+    body = body if isinstance(body, dict) else {}
+    field_key = body.get('fieldKey', '')
+    with srv.state.lock:
+        existing = next((f for f in srv.state.custom_fields if field_key and f.get('fieldKey') == field_key), None)
+        if existing:
+            return 400, {'message': 'Field key already exists', 'meta': {'existingId': existing['id']}}
+        field = {'id': _new_id(), 'name': body.get('name', ''), 'fieldKey': field_key,
+                 'model': body.get('model', 'contact'), 'dataType': body.get('dataType', 'TEXT')}
+        srv.state.custom_fields.append(field)
+    return 201, {'customField': field}
+
+
+def _h_custom_field_delete(srv, m, q, body):
+    with srv.state.lock:
+        before = len(srv.state.custom_fields)
+        srv.state.custom_fields = [f for f in srv.state.custom_fields if f['id'] != m.group(2)]
+        if len(srv.state.custom_fields) == before:
+            return 404, {'message': 'Custom field not found'}
+    return 200, {'succeded': True}
+
+
+def _h_products(srv, m, q, body):
+    limit = int((q.get('limit') or ['100'])[0])
+    offset = int((q.get('offset') or ['0'])[0])
+    with srv.state.lock:
+        page = srv.state.products[offset:offset + limit]
+        total = len(srv.state.products)
+    return 200, {'products': page, 'total': [{'total': total}]}
+
+
+def _h_product_prices(srv, m, q, body):
+    with srv.state.lock:
+        prices = srv.state.prices.get(m.group(1))
+    if prices is None:
+        return 404, {'message': 'Product not found'}
+    return 200, {'prices': prices, 'total': len(prices)}
+
+
+def _h_contact_get(srv, m, q, body):
+    with srv.state.lock:
+        contact = srv.state.contacts.get(m.group(1))
+    if not contact:
+        return 400, {'message': 'Contact not found'}
+    return 200, {'contact': contact}
+
+
+def _h_contact_put(srv, m, q, body):
+    with srv.state.lock:
+        contact = srv.state.contacts.get(m.group(1))
+        if not contact:
+            return 400, {'message': 'Contact not found'}
+        for cf in (body or {}).get('customFields', []):
+            fid = cf.get('id')
+            value = cf.get('field_value', cf.get('value'))
+            existing = next((c for c in contact['customFields'] if c.get('id') == fid), None)
+            if existing:
+                existing['value'] = value
+            else:
+                contact['customFields'].append({'id': fid, 'value': value})
+        for key, value in (body or {}).items():
+            if key != 'customFields':
+                contact[key] = value
+    return 200, {'succeded': True, 'contact': contact}
+
+
+def _h_contact_tags(srv, m, q, body):
+    with srv.state.lock:
+        contact = srv.state.contacts.get(m.group(1))
+        if not contact:
+            return 400, {'message': 'Contact not found'}
+        for tag in (body or {}).get('tags', []):
+            if tag not in contact['tags']:
+                contact['tags'].append(tag)
+        return 201, {'tags': list(contact['tags'])}
+
+
+def _h_contact_notes(srv, m, q, body):
+    note = {'id': _new_id(), 'contactId': m.group(1), 'body': (body or {}).get('body', ''), 'dateAdded': _now_iso()}
+    with srv.state.lock:
+        srv.state.notes.append(note)
+    return 201, {'note': note}
+
+
+def _h_contact_search(srv, m, q, body):
+    contacts = srv.state.contact_search((body or {}).get('filters', []))
+    return 200, {'contacts': contacts, 'total': len(contacts)}
+
+
+def _h_contact_query(srv, m, q, body):
+    term = (q.get('query') or [''])[0].strip().lower()
+    limit = int((q.get('limit') or ['20'])[0])
+    with srv.state.lock:
+        hits = [c for c in srv.state.contacts.values()
+                if term and (term in c['contactName'].lower() or term == c.get('email', '').lower())]
+    return 200, {'contacts': hits[:limit], 'meta': {'total': len(hits)}}
+
+
+def _h_opp_search(srv, m, q, body):
+    contact_id = (q.get('contact_id') or [''])[0] or (body or {}).get('contactId', '')
+    with srv.state.lock:
+        opps = [o for o in srv.state.opportunities.values() if not contact_id or o['contactId'] == contact_id]
+    return 200, {'opportunities': opps, 'meta': {'total': len(opps)}}
+
+
+def _h_pipelines(srv, m, q, body):
+    return 200, {'pipelines': srv.state.pipelines}
+
+
+def _h_pipeline_create(srv, m, q, body):
+    body = body if isinstance(body, dict) else {}
+    stages = [row.get('name', '') for row in body.get('stages', []) if isinstance(row, dict)]
+    pipeline = MockGHLState._make_pipeline(body.get('name', ''), stages)
+    with srv.state.lock:
+        srv.state.pipelines.append(pipeline)
+    return 201, {'pipeline': pipeline}
+
+
+def _h_stage_create(srv, m, q, body):
+    body = body if isinstance(body, dict) else {}
+    with srv.state.lock:
+        pipeline = next((p for p in srv.state.pipelines if p['id'] == m.group(1)), None)
+        if pipeline is None:
+            return 404, {'message': 'Pipeline not found'}
+        stage = {'id': _new_id(), 'name': body.get('name', ''), 'position': len(pipeline['stages'])}
+        pipeline['stages'].append(stage)
+    return 201, {'stage': stage}
+
+
+def _h_opp_create(srv, m, q, body):
+    body = body or {}
+    if not body.get('contactId') or not body.get('pipelineId'):
+        return 422, {'message': 'contactId and pipelineId are required'}
+    with srv.state.lock:
+        opp = {
+            'id': _new_id(), 'name': body.get('title') or body.get('name', ''),
+            'contactId': body['contactId'], 'pipelineId': body['pipelineId'],
+            'pipelineStageId': body.get('pipelineStageId', ''), 'status': body.get('status', 'open'),
+            'monetaryValue': body.get('monetaryValue', 0), 'customFields': body.get('customFields', []),
+            'createdAt': _now_iso(), 'updatedAt': _now_iso(),
+        }
+        srv.state.opportunities[opp['id']] = opp
+    return 201, {'opportunity': opp}
+
+
+def _h_opp_get(srv, m, q, body):
+    with srv.state.lock:
+        opp = srv.state.opportunities.get(m.group(1))
+    if not opp:
+        return 404, {'message': 'Opportunity not found'}
+    return 200, {'opportunity': opp}
+
+
+def _h_opp_put(srv, m, q, body):
+    with srv.state.lock:
+        opp = srv.state.opportunities.get(m.group(1))
+        if not opp:
+            return 404, {'message': 'Opportunity not found'}
+        for key, value in (body or {}).items():
+            if key == 'title':
+                opp['name'] = value
+            else:
+                opp[key] = value
+        opp['updatedAt'] = _now_iso()
+    return 200, {'opportunity': opp}
+
+
+def _invoice_totals(invoice: dict) -> None:
+    total = sum(float(i.get('amount', 0)) * float(i.get('qty', 1)) for i in invoice.get('invoiceItems', []))
+    discount = invoice.get('discount') or {}
+    if discount.get('type') == 'fixed':
+        total -= float(discount.get('value', 0) or 0)
+    paid = sum(float(p.get('amount', 0)) for p in invoice.get('recordPayment', []))
+    invoice['total'] = round(total, 2)
+    invoice['amountPaid'] = round(paid, 2)
+    invoice['amountDue'] = round(max(total - paid, 0), 2)
+    if invoice['status'] not in ('void', 'draft') and total > 0 and paid >= total:
+        invoice['status'] = 'paid'
+
+
+def _h_invoice_list(srv, m, q, body):
+    contact_id = (q.get('contactId') or [''])[0]
+    search = (q.get('search') or [''])[0].lower()
+    with srv.state.lock:
+        invoices = [i for i in srv.state.invoices.values()
+                    if (not contact_id or i['contactDetails'].get('id') == contact_id)
+                    and (not search or search in i['name'].lower())]
+    return 200, {'invoices': invoices, 'total': len(invoices)}
+
+
+def _h_invoice_create(srv, m, q, body):
+    body = body or {}
+    contact = body.get('contactDetails') or {}
+    if not contact.get('id'):
+        return 422, {'message': 'contactDetails.id is required'}
+    with srv.state.lock:
+        if contact['id'] not in srv.state.contacts:
+            return 404, {'message': 'Contact not found'}
+        srv.state.invoice_counter += 1
+        invoice = {
+            '_id': _new_id(), 'invoiceNumber': str(srv.state.invoice_counter),
+            'name': body.get('name', ''), 'status': 'draft', 'currency': body.get('currency', 'GBP'),
+            'altId': body.get('altId', srv.state.location_id), 'altType': 'location',
+            'contactDetails': contact, 'businessDetails': body.get('businessDetails', {}),
+            'issueDate': body.get('issueDate', ''), 'dueDate': body.get('dueDate', ''),
+            'invoiceItems': body.get('items', []), 'discount': body.get('discount'),
+            'paymentSchedule': body.get('paymentSchedule'), 'recordPayment': [],
+            'createdAt': _now_iso(), 'updatedAt': _now_iso(),
+        }
+        _invoice_totals(invoice)
+        srv.state.invoices[invoice['_id']] = invoice
+    return 200, invoice
+
+
+def _h_invoice_get(srv, m, q, body):
+    with srv.state.lock:
+        invoice = srv.state.invoices.get(m.group(1))
+    if not invoice:
+        return 404, {'message': 'Invoice not found'}
+    return 200, invoice
+
+
+def _h_invoice_put(srv, m, q, body):
+    with srv.state.lock:
+        invoice = srv.state.invoices.get(m.group(1))
+        if not invoice:
+            return 404, {'message': 'Invoice not found'}
+        body = body or {}
+        if 'items' in body:
+            invoice['invoiceItems'] = body['items']
+        for key in ('name', 'dueDate', 'issueDate', 'discount', 'status', 'paymentSchedule'):
+            if key in body:
+                invoice[key] = body[key]
+        invoice['updatedAt'] = _now_iso()
+        _invoice_totals(invoice)
+    return 200, invoice
+
+
+def _h_invoice_delete(srv, m, q, body):
+    with srv.state.lock:
+        invoice = srv.state.invoices.get(m.group(1))
+        if not invoice:
+            return 404, {'message': 'Invoice not found'}
+        if invoice['status'] != 'draft':
+            return 422, {'message': 'Only draft invoices can be deleted'}
+        del srv.state.invoices[m.group(1)]
+    return 200, {'success': True}
+
+
+def _h_invoice_send(srv, m, q, body):
+    with srv.state.lock:
+        invoice = srv.state.invoices.get(m.group(1))
+        if not invoice:
+            return 404, {'message': 'Invoice not found'}
+        if invoice['status'] == 'paid':
+            return 422, {'message': 'Invoice is already paid'}
+        invoice['status'] = 'sent'
+    return 200, {'invoice': invoice}
+
+
+def _h_invoice_void(srv, m, q, body):
+    with srv.state.lock:
+        invoice = srv.state.invoices.get(m.group(1))
+        if not invoice:
+            return 404, {'message': 'Invoice not found'}
+        invoice['status'] = 'void'
+    return 200, invoice
+
+
+def _h_record_payment(srv, m, q, body):
+    with srv.state.lock:
+        invoice = srv.state.invoices.get(m.group(1))
+        if not invoice:
+            return 404, {'message': 'Invoice not found'}
+        if invoice['status'] == 'void':
+            return 422, {'message': 'Invoice is void'}
+        payment = {'_id': _new_id(), 'amount': float((body or {}).get('amount', 0)),
+                   'mode': (body or {}).get('mode', 'other'), 'notes': (body or {}).get('notes', ''),
+                   'createdAt': _now_iso()}
+        invoice['recordPayment'].append(payment)
+        _invoice_totals(invoice)
+    return 200, {'success': True, 'invoice': invoice}
+
+
+def _h_record_payment_delete(srv, m, q, body):
+    with srv.state.lock:
+        invoice = srv.state.invoices.get(m.group(1))
+        if not invoice:
+            return 404, {'message': 'Invoice not found'}
+        before = len(invoice['recordPayment'])
+        invoice['recordPayment'] = [p for p in invoice['recordPayment'] if p['_id'] != m.group(2)]
+        if len(invoice['recordPayment']) == before:
+            return 404, {'message': 'Payment not found'}
+        _invoice_totals(invoice)
+    return 200, {'success': True}
+
+
+def _h_schedule_list(srv, m, q, body):
+    contact_id = (q.get('contactId') or [''])[0]
+    with srv.state.lock:
+        schedules = [s for s in srv.state.schedules.values()
+                     if not contact_id or s['contactDetails'].get('id') == contact_id]
+    return 200, {'schedules': schedules, 'total': len(schedules)}
+
+
+def _h_schedule_create(srv, m, q, body):
+    body = body or {}
+    schedule = {
+        '_id': _new_id(), 'name': body.get('name', ''), 'status': 'active',
+        'contactDetails': body.get('contactDetails', {}), 'items': body.get('items', []),
+        'schedule': body.get('schedule', {}), 'liveMode': body.get('liveMode', False),
+        'createdAt': _now_iso(),
+    }
+    with srv.state.lock:
+        srv.state.schedules[schedule['_id']] = schedule
+    return 200, schedule
+
+
+def _h_schedule_delete(srv, m, q, body):
+    with srv.state.lock:
+        if srv.state.schedules.pop(m.group(1), None) is None:
+            return 404, {'message': 'Schedule not found'}
+    return 200, {'success': True}
+
+
+def _h_schedule_patch(srv, m, q, body):
+    with srv.state.lock:
+        schedule = srv.state.schedules.get(m.group(1))
+        if not schedule:
+            return 404, {'message': 'Schedule not found'}
+        schedule.update(body or {})
+    return 200, schedule
+
+
+def _h_media_upload(srv, m, q, body):
+    media = {'_id': _new_id(), 'fileId': '', 'url': '', 'type': 'file', 'size': len(body or b''),
+             'createdAt': _now_iso()}
+    media['fileId'] = media['_id']
+    media['url'] = f'https://storage.example.com/mock/{media["_id"]}.jpg'
+    with srv.state.lock:
+        srv.state.medias[media['_id']] = media
+    return 200, {'fileId': media['fileId'], 'url': media['url']}
+
+
+def _h_media_list(srv, m, q, body):
+    kind = (q.get('type') or [''])[0]
+    limit = int((q.get('limit') or ['100'])[0])
+    offset = int((q.get('offset') or ['0'])[0])
+    with srv.state.lock:
+        files = [f for f in srv.state.medias.values() if not kind or f.get('type') == kind]
+    return 200, {'files': files[offset:offset + limit], 'total': len(files)}
+
+
+def _h_media_folder_create(srv, m, q, body):
+    body = body if isinstance(body, dict) else {}
+    folder = {'_id': _new_id(), 'name': body.get('name', ''), 'type': 'folder',
+              'parentId': body.get('parentId', ''), 'createdAt': _now_iso()}
+    with srv.state.lock:
+        srv.state.medias[folder['_id']] = folder
+    return 201, folder
+
+
+def _h_message(srv, m, q, body):
+    return 200, {'conversationId': _new_id(), 'messageId': _new_id()}
+
+
+# (method, path regex, route label, handler). Order matters: specific first.
+ROUTES = [
+    ('GET', r'/locations/([^/]+)/customFields', 'GET /locations/{id}/customFields', _h_custom_fields),
+    ('POST', r'/locations/([^/]+)/customFields', 'POST /locations/{id}/customFields', _h_custom_field_create),
+    ('DELETE', r'/locations/([^/]+)/customFields/([^/]+)', 'DELETE /locations/{id}/customFields/{id}',
+     _h_custom_field_delete),
+    ('GET', r'/locations/([^/]+)', 'GET /locations/{id}', _h_location),
+    ('GET', r'/products/?', 'GET /products/', _h_products),
+    ('GET', r'/products/([^/]+)/price', 'GET /products/{id}/price', _h_product_prices),
+    ('POST', r'/contacts/search', 'POST /contacts/search', _h_contact_search),
+    ('GET', r'/contacts/?', 'GET /contacts/?query', _h_contact_query),
+    ('POST', r'/contacts/([^/]+)/tags', 'POST /contacts/{id}/tags', _h_contact_tags),
+    ('POST', r'/contacts/([^/]+)/notes', 'POST /contacts/{id}/notes', _h_contact_notes),
+    ('GET', r'/contacts/([^/]+)', 'GET /contacts/{id}', _h_contact_get),
+    ('PUT', r'/contacts/([^/]+)', 'PUT /contacts/{id}', _h_contact_put),
+    ('GET', r'/opportunities/search', 'GET /opportunities/search', _h_opp_search),
+    ('POST', r'/opportunities/search', 'POST /opportunities/search', _h_opp_search),
+    ('GET', r'/opportunities/pipelines', 'GET /opportunities/pipelines', _h_pipelines),
+    ('POST', r'/opportunities/pipelines', 'POST /opportunities/pipelines', _h_pipeline_create),
+    ('POST', r'/opportunities/pipelines/([^/]+)/stages', 'POST /opportunities/pipelines/{id}/stages',
+     _h_stage_create),
+    ('POST', r'/opportunities/?', 'POST /opportunities/', _h_opp_create),
+    ('GET', r'/opportunities/([^/]+)', 'GET /opportunities/{id}', _h_opp_get),
+    ('PUT', r'/opportunities/([^/]+)', 'PUT /opportunities/{id}', _h_opp_put),
+    ('GET', r'/invoices/schedule/?', 'GET /invoices/schedule/', _h_schedule_list),
+    ('POST', r'/invoices/schedule/?', 'POST /invoices/schedule/', _h_schedule_create),
+    ('DELETE', r'/invoices/schedule/([^/]+)', 'DELETE /invoices/schedule/{id}', _h_schedule_delete),
+    ('PATCH', r'/invoices/schedule/([^/]+)', 'PATCH /invoices/schedule/{id}', _h_schedule_patch),
+    ('GET', r'/invoices/?', 'GET /invoices/', _h_invoice_list),
+    ('POST', r'/invoices/?', 'POST /invoices/', _h_invoice_create),
+    ('POST', r'/invoices/([^/]+)/record-payment', 'POST /invoices/{id}/record-payment', _h_record_payment),
+    ('DELETE', r'/invoices/([^/]+)/record-payment/([^/]+)', 'DELETE /invoices/{id}/record-payment/{id}',
+     _h_record_payment_delete),
+    ('POST', r'/invoices/([^/]+)/send', 'POST /invoices/{id}/send', _h_invoice_send),
+    ('POST', r'/invoices/([^/]+)/void', 'POST /invoices/{id}/void', _h_invoice_void),
+    ('GET', r'/invoices/([^/]+)', 'GET /invoices/{id}', _h_invoice_get),
+    ('PUT', r'/invoices/([^/]+)', 'PUT /invoices/{id}', _h_invoice_put),
+    ('DELETE', r'/invoices/([^/]+)', 'DELETE /invoices/{id}', _h_invoice_delete),
+    ('POST', r'/medias/upload-file', 'POST /medias/upload-file', _h_media_upload),
+    ('GET', r'/medias/files', 'GET /medias/files', _h_media_list),
+    ('POST', r'/medias/files', 'POST /medias/files', _h_media_folder_create),
+    ('POST', r'/conversations/messages', 'POST /conversations/messages', _h_message),
+]
+_COMPILED_ROUTES = [(method, re.compile(f'^{pattern}$'), label, handler) for method, pattern, label, handler in ROUTES]
+
+
+def match_route(method: str, path: str):
+    """Return (route label, handler, match) for a request, or (None, None, None)."""
+    for route_method, regex, label, handler in _COMPILED_ROUTES:
+        if route_method == method:
+            m = regex.match(path)
+            if m:
+                return label, handler, m
+    return None, None, None
+
+
+def _make_handler(server: MockGHLServer):
+    """Build a request handler class bound to one MockGHLServer."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # silence per-request stderr logging
+            pass
+
+        def _send(self, status: int, payload) -> None:
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            if status == 429:
+                self.send_header('Retry-After', '1')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self, method: str) -> None:
+            start = time.perf_counter()
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+
+            if parts.path == '/_stats' and method == 'GET':
+                self._send(200, {'requests': server.stats.as_dict(), 'state': server.state.snapshot()})
+                return
+
+            label, handler, m = match_route(method, parts.path)
+            if handler is None:
+                label = f'{method} (unmatched) {parts.path}'
+                status, payload = 404, {'message': f'Mock GHL has no route for {method} {parts.path}'}
+            else:
+                delay = server._delay()
+                if delay:
+                    time.sleep(delay)
+                status = server.injected_status(label)
+                if status == 429:
+                    payload = {'statusCode': 429, 'message': 'Too Many Requests'}
+                elif status == 409:
+                    payload = {'statusCode': 409, 'message': 'Payment recording already in progress'}
+                else:
+                    body = raw
+                    if 'json' in (self.headers.get('Content-Type') or ''):
+                        try:
+                            body = json.loads(raw.decode('utf-8')) if raw else {}
+                        except ValueError:
+                            body = {}
+                    status, payload = handler(server, m, query, body)
+
+            self._send(status, payload)
+            server.stats.record(label, status, time.perf_counter() - start)
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+        def do_PUT(self):
+            self._dispatch('PUT')
+
+        def do_PATCH(self):
+            self._dispatch('PATCH')
+
+        def do_DELETE(self):
+            self._dispatch('DELETE')
+
+    return Handler
+
+
+class ClientRecorder:
+    """Client-side per-request timings captured by redirect_requests_to()."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: list[tuple[str, int, float]] = []  # (route label, status, seconds)
+
+    def record(self, route: str, status: int, seconds: float) -> None:
+        with self.lock:
+            self.calls.append((route, status, seconds))
+
+    def __len__(self) -> int:
+        with self.lock:
+            return len(self.calls)
+
+    def since(self, index: int) -> list:
+        with self.lock:
+            return list(self.calls[index:])
+
+
+@contextlib.contextmanager
+def redirect_requests_to(base_url: str, recorder: ClientRecorder | None = None):
+    """Send every `requests` call aimed at the GHL API host to base_url instead.
+
+    Patches requests.Session.request (which the module-level requests.get/
+    post/put helpers go through) for the duration of the block. Calls to
+    any other host are refused, so nothing leaks to live services.
+
+    Args:
+        base_url: Mock server URL, e.g. MockGHLServer.base_url.
+        recorder: Optional ClientRecorder receiving (route, status, seconds)
+            for each call, measured on the client side.
+    """
+    import requests
+
+    original = requests.Session.request
+
+    def _redirected(session, method, url, *args, **kwargs):
+        url = str(url)
+        if not url.startswith(GHL_API_BASE):
+            raise requests.exceptions.ConnectionError(f'Blocked non-GHL request during mock run: {url}')
+        local_url = base_url.rstrip('/') + url[len(GHL_API_BASE):]
+        start = time.perf_counter()
+        response = original(session, method, local_url, *args, **kwargs)
+        if recorder is not None:
+            label, _handler, _m = match_route(method.upper(), urlsplit(local_url).path)
+            recorder.record(label or f'{method.upper()} (unmatched)', response.status_code, time.perf_counter() - start)
+        return response
+
+    requests.Session.request = _redirected
+    try:
+        yield
+    finally:
+        requests.Session.request = original
+
+
+def seed_demo_state(state: MockGHLState, count: int = 3) -> None:
+    """Seed a few contacts/opportunities/products for manual poking."""
+    state.add_product('Fine Art Print 10x8', 'FAP108', 95.0)
+    state.add_product('Canvas Gallery Block', 'CGB2016', 450.0)
+    for i in range(1, count + 1):
+        contact_id = f'MockContact{i:09d}'
+        state.add_contact(contact_id, 'Demo', f'Client{i}', f'demo{i}@example.com')
+        state.add_opportunity(contact_id, f'P26{i:03d}P - Demo Client{i}')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Per-request latency in ms')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Extra random latency 0..N ms')
+    parser.add_argument('--conflict-rate', type=float, default=0.0, help='record-payment 409 probability')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Random 429 probability')
+    parser.add_argument('--burst-limit', type=int, default=0, help='Max requests per 10 s (0 = off)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    state = MockGHLState()
+    seed_demo_state(state)
+    server = MockGHLServer(state, args.host, args.port, args.latency, args.jitter,
+                           args.conflict_rate, args.rate_limit_rate, args.burst_limit, args.seed)
+    print(f"Mock GHL API listening on {server.base_url} (GET /_stats for request accounting)")
+    server.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        print(json.dumps(server.stats.as_dict(), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -223,7 +223,8 @@ $scriptNameMap = @{
 # Hidden imports: scripts that import other local modules at runtime
 # PySide6 Qt plugins must be explicitly listed for PyInstaller --onefile to bundle them
 $hiddenImports = @{
-    "cardly_preview_gui" = @("cardly_send_card")
+    "cardly_preview_gui" = @("cardly_send_card", "read_psa_images", "cardly_thumb_cache", "cardly_order_mirror", "ghl_custom_fields")
+    "cardly_send_card" = @("cardly_campaign", "ghl_custom_fields")
 }
 
 # GUI scripts that should use --noconsole (no terminal window).
@@ -302,7 +303,18 @@ if (!$SkipPythonCompile) {
             "cardly_send_card",
             "write_psa_payments",
             "read_psa_payments",
-            "read_psa_images"
+            "read_psa_images",
+            "ghl_media_ledger",
+            "ghl_sync_ledger",
+            "proselect_export",
+            "cardly_thumb_cache",
+            "payment_schedule",
+            "psa_receivables",
+            "ghl_media_folders",
+            "cardly_campaign",
+            "cardly_order_mirror",
+            "ghl_custom_fields",
+            "sidekick_config"
         )
         $hiArgs = ($allHiddenImports | ForEach-Object { "--hidden-import=$_" }) -join " "
 
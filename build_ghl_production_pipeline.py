@@ -1,27 +1,59 @@
 """
 Build GHL production pipeline + custom fields and print ID registry.
 
+Works as plan/apply: one concurrent read of the location's pipelines and
+custom fields is diffed against STAGES/FIELD_SPECS into a list of actions
+(delete contact-level duplicates, create pipeline, create stages, create
+fields). --dry-run prints the plan; --apply runs it. Deletions go first,
+then the pipeline. Stage creations then run in order on one worker while
+field creations run in parallel on the others. A shared rate limiter paces
+every request. 429 responses are retried with backoff, and so are 5xx
+responses to reads, updates and deletes. A create (POST) that fails with
+a 5xx or a network error is not retried or sent to another endpoint
+variant, since GHL may already have committed it; the action is marked
+failed and the next --apply diffs against live state before creating.
+
+The plan is written to %APPDATA%\\SideKick_PS\\ghl_pipeline_plan_<location>.json
+and updated as each action finishes, as a record of the last run. A failed
+action does not stop the others. Resuming needs no saved state: re-running
+--apply diffs against live state again, so completed work is not repeated
+and only unfinished actions run.
+
 Usage:
   python build_ghl_production_pipeline.py --apply
   python build_ghl_production_pipeline.py --dry-run
+  python build_ghl_production_pipeline.py --apply --workers 6 --rate 10
 """
 
 from __future__ import annotations
 
 import argparse
 import base64
-import configparser
 import json
 import os
+import random
 import sys
-from dataclasses import dataclass
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
 from typing import Any
 
 import requests
 
+import sidekick_config
+
 BASE_URL = "https://services.leadconnectorhq.com"
 API_VERSION = "2021-07-28"
 PIPELINE_NAME = "Boudoir Production Pipeline"
+APPLY_WORKERS = 4
+APPLY_RATE = 8.0  # requests per second across all workers (GHL bursts at 100 per 10 s)
+APPLY_RETRIES = 3
+RETRY_BACKOFF = 1.0
+# Safe to resend after a 5xx: repeating them cannot create a duplicate
+_IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE"}
+PLAN_FILENAME = "ghl_pipeline_plan_{location_id}.json"
 
 STAGES = [
     "Order Confirmed",
@@ -152,11 +184,10 @@ def _load_config(api_key_arg: str | None, location_id_arg: str | None) -> tuple[
 
     if not api_key:
         for path in cred_paths:
-            if not os.path.exists(path):
+            data = sidekick_config.read_json(path)
+            if not data:
                 continue
             try:
-                with open(path, "r", encoding="utf-8-sig") as f:
-                    data = json.load(f)
                 enc = data.get("api_key_b64", "")
                 if enc:
                     api_key = base64.b64decode(enc).decode("utf-8")
@@ -167,21 +198,15 @@ def _load_config(api_key_arg: str | None, location_id_arg: str | None) -> tuple[
             except Exception:
                 continue
 
-    ini_paths = [
-        os.path.join(script_dir, "SideKick_PS.ini"),
-        os.path.join(os.path.dirname(script_dir), "SideKick_PS.ini"),
-        os.path.join(appdata, "SideKick_PS", "SideKick_PS.ini"),
-    ]
     if (not api_key) or (not location_id):
-        for path in ini_paths:
+        for path in sidekick_config.ini_paths(script_dir):
             if not os.path.exists(path):
                 continue
-            parser = configparser.ConfigParser()
             try:
-                parser.read(path, encoding="utf-8-sig")
-            except Exception:
+                ini = sidekick_config.load_ini(path)
+            except (OSError, ValueError):
                 continue
-            ghl = parser["GHL"] if parser.has_section("GHL") else {}
+            ghl = ini.get("GHL", {})
             if not api_key:
                 api_b64 = ghl.get("API_Key_V2_B64") or ghl.get("API_Key_B64") or ""
                 if api_b64:
@@ -210,34 +235,119 @@ def _headers(api_key: str) -> dict[str, str]:
     }
 
 
+class _RateLimiter:
+    """Spaces requests at least 1/rate seconds apart across all threads (rate 0 = unpaced)."""
+
+    def __init__(self, rate: float = 0.0) -> None:
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_limiter = _RateLimiter()
+_thread_local = threading.local()
+# Index of the endpoint variant that last succeeded, per operation
+_working_candidate: dict[str, int] = {}
+_candidate_lock = threading.Lock()
+
+
+def _session() -> requests.Session:
+    """Per-thread keep-alive session (requests.Session is not thread-safe)."""
+    session = getattr(_thread_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _thread_local.session = session
+    return session
+
+
+def _send(
+    method: str,
+    api_key: str,
+    path: str,
+    params: dict[str, Any] | None,
+    payload: dict[str, Any] | None,
+) -> requests.Response:
+    """One paced request, retrying 429 (and 5xx for idempotent methods) with backoff.
+
+    Honours Retry-After.
+    """
+    retry_5xx = method.upper() in _IDEMPOTENT_METHODS
+    for attempt in range(APPLY_RETRIES + 1):
+        _limiter.wait()
+        response = _session().request(
+            method,
+            f"{BASE_URL}{path}",
+            headers=_headers(api_key),
+            params=params,
+            json=payload,
+            timeout=30,
+        )
+        retryable = response.status_code == 429 or (retry_5xx and response.status_code >= 500)
+        if not retryable or attempt == APPLY_RETRIES:
+            return response
+        delay = RETRY_BACKOFF * (2 ** attempt) * (1 + random.random() / 2)
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        time.sleep(delay)
+    return response
+
+
 def _try_request(
     method: str,
     api_key: str,
     candidates: list[tuple[str, dict[str, Any] | None, dict[str, Any] | None]],
+    operation: str = "",
 ) -> tuple[requests.Response | None, str | None]:
+    """Try endpoint variants in turn until one answers.
+
+    When operation is given, the variant that succeeded is remembered and
+    tried first next time, so repeated calls skip the probing. A create
+    (POST) stops at a 5xx or network error instead of trying the next
+    variant, as the server may have committed it.
+    """
+    idempotent = method.upper() in _IDEMPOTENT_METHODS
     last_response: requests.Response | None = None
     last_error: str | None = None
 
-    for path, params, payload in candidates:
-        url = f"{BASE_URL}{path}"
+    order = list(range(len(candidates)))
+    if operation:
+        with _candidate_lock:
+            known = _working_candidate.get(operation)
+        if known is not None and known < len(candidates):
+            order.remove(known)
+            order.insert(0, known)
+
+    for index in order:
+        path, params, payload = candidates[index]
         try:
-            response = requests.request(
-                method,
-                url,
-                headers=_headers(api_key),
-                params=params,
-                json=payload,
-                timeout=30,
-            )
+            response = _send(method, api_key, path, params, payload)
         except Exception as exc:
             last_error = f"{path}: {exc}"
+            if not idempotent:
+                return None, f"{last_error} (not retried: the create may have gone through)"
             continue
 
-        if response.status_code in (200, 201):
+        if response.status_code in (200, 201, 204):
+            if operation:
+                with _candidate_lock:
+                    _working_candidate[operation] = index
             return response, None
 
         if response.status_code in (400, 401, 403, 422):
             return response, None
+        if response.status_code >= 500 and not idempotent:
+            return response, None
 
         last_response = response
         last_error = f"{path}: HTTP {response.status_code}"
@@ -260,7 +370,7 @@ def fetch_custom_fields(api_key: str, location_id: str) -> list[dict[str, Any]]:
         (f"/locations/{location_id}/customFields", None, None),
         ("/custom-fields", {"locationId": location_id}, None),
     ]
-    response, err = _try_request("GET", api_key, candidates)
+    response, err = _try_request("GET", api_key, candidates, "read_fields")
     if response is None:
         raise RuntimeError(f"Unable to query custom fields: {err}")
     if response.status_code != 200:
@@ -302,7 +412,7 @@ def create_custom_field(api_key: str, location_id: str, spec: FieldSpec) -> str:
         candidates.append((f"/locations/{location_id}/customFields", None, payload))
         candidates.append(("/custom-fields", {"locationId": location_id}, payload))
 
-    response, err = _try_request("POST", api_key, candidates)
+    response, err = _try_request("POST", api_key, candidates, "create_field")
     if response is None:
         raise RuntimeError(f"Create custom field failed for {spec.key}: {err}")
     if response.status_code == 400:
@@ -331,7 +441,7 @@ def delete_custom_field(api_key: str, location_id: str, field_id: str, field_nam
         (f"/locations/{location_id}/customFields/{field_id}", None, None),
         (f"/custom-fields/{field_id}", {"locationId": location_id}, None),
     ]
-    response, err = _try_request("DELETE", api_key, candidates)
+    response, err = _try_request("DELETE", api_key, candidates, "delete_field")
     if response is None:
         print(f"  ⚠ Delete failed for {field_name} ({field_id}): {err}")
         return False
@@ -347,7 +457,7 @@ def fetch_pipelines(api_key: str, location_id: str) -> list[dict[str, Any]]:
         ("/opportunities/pipelines", None, None),
         ("/pipelines", {"locationId": location_id}, None),
     ]
-    response, err = _try_request("GET", api_key, candidates)
+    response, err = _try_request("GET", api_key, candidates, "read_pipelines")
     if response is None:
         raise RuntimeError(f"Unable to query pipelines: {err}")
     if response.status_code != 200:
@@ -369,7 +479,7 @@ def create_pipeline(api_key: str, location_id: str, name: str, stages: list[str]
         candidates.append(("/opportunities/pipelines", {"locationId": location_id}, payload))
         candidates.append(("/pipelines", {"locationId": location_id}, payload))
 
-    response, err = _try_request("POST", api_key, candidates)
+    response, err = _try_request("POST", api_key, candidates, "create_pipeline")
     if response is None:
         raise RuntimeError(f"Create pipeline failed: {err}")
     if response.status_code not in (200, 201):
@@ -395,7 +505,7 @@ def create_stage(api_key: str, location_id: str, pipeline_id: str, stage_name: s
         candidates.append((f"/pipelines/{pipeline_id}/stages", None, payload))
         candidates.append((f"/pipelines/{pipeline_id}/stages", {"locationId": location_id}, payload))
 
-    response, err = _try_request("POST", api_key, candidates)
+    response, err = _try_request("POST", api_key, candidates, "create_stage")
     if response is None:
         raise RuntimeError(f"Create stage failed for {stage_name}: {err}")
     if response.status_code not in (200, 201):
@@ -411,66 +521,100 @@ def create_stage(api_key: str, location_id: str, pipeline_id: str, stage_name: s
     return stage_id
 
 
-def upsert_pipeline(api_key: str, location_id: str, apply_changes: bool) -> tuple[str | None, dict[str, str], list[str]]:
+@dataclass
+class PlanAction:
+    op: str  # delete_field | create_pipeline | create_stage | create_field
+    key: str  # FieldSpec key, stage name or pipeline name
+    name: str = ""
+    target_id: str = ""  # field ID to delete
+    status: str = "pending"  # pending | done | failed
+    result_id: str = ""
+    error: str = ""
+
+    def describe(self) -> str:
+        if self.op == "delete_field":
+            return f"Delete contact-level duplicate: {self.name} ({self.target_id})"
+        if self.op == "create_pipeline":
+            return f"Create pipeline: {self.key} with {len(STAGES)} stages"
+        if self.op == "create_stage":
+            return f"Create stage: {self.key}"
+        return f"Create field: {self.key}"
+
+
+@dataclass
+class Plan:
+    location_id: str
+    pipeline_id: str | None = None
+    stage_ids: dict[str, str] = field(default_factory=dict)
+    field_ids: dict[str, str] = field(default_factory=dict)
+    actions: list[PlanAction] = field(default_factory=list)
+    pipeline_logs: list[str] = field(default_factory=list)
+    field_logs: list[str] = field(default_factory=list)
+    created_at: str = ""
+
+    def pending(self, op: str | None = None) -> list[PlanAction]:
+        return [a for a in self.actions if a.status != "done" and (op is None or a.op == op)]
+
+    def failed(self) -> list[PlanAction]:
+        return [a for a in self.actions if a.status == "failed"]
+
+
+def fetch_location_state(api_key: str, location_id: str) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Read pipelines and custom fields concurrently (the only reads a plan needs)."""
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        pipelines = pool.submit(fetch_pipelines, api_key, location_id)
+        fields = pool.submit(fetch_custom_fields, api_key, location_id)
+        return pipelines.result(), fields.result()
+
+
+def diff_pipeline(pipelines: list[dict[str, Any]]) -> tuple[str | None, dict[str, str], list[PlanAction], list[str]]:
+    """Compare live pipelines with PIPELINE_NAME/STAGES.
+
+    Returns:
+        (pipeline ID or None, existing stage IDs by name, actions, log lines)
+    """
     logs: list[str] = []
     stages_out: dict[str, str] = {}
 
-    pipelines = fetch_pipelines(api_key, location_id)
     found = None
     for item in pipelines:
         if item.get("name", "").strip().lower() == PIPELINE_NAME.lower():
             found = item
             break
 
-    if found:
-        pipeline_id = str(found.get("id", "")).strip() or None
-        logs.append(f"Pipeline exists: {PIPELINE_NAME} ({pipeline_id or 'ID unknown'})")
-        stage_list = _extract_list(found, ["stages"])
-        for row in stage_list:
-            name = str(row.get("name", "")).strip()
-            sid = str(row.get("id", "")).strip()
-            if name and sid:
-                stages_out[name] = sid
-        missing = [name for name in STAGES if name not in stages_out]
-        if missing:
-            logs.append("Missing stages on existing pipeline: " + ", ".join(missing))
-            if apply_changes and pipeline_id:
-                for stage_name in missing:
-                    try:
-                        stage_id = create_stage(api_key, location_id, pipeline_id, stage_name)
-                        stages_out[stage_name] = stage_id
-                        logs.append(f"Stage created: {stage_name} ({stage_id})")
-                    except RuntimeError as exc:
-                        logs.append(str(exc))
-        return pipeline_id, stages_out, logs
-
-    logs.append(f"Pipeline missing: {PIPELINE_NAME}")
-    if not apply_changes:
-        logs.append("Dry-run mode: pipeline creation skipped")
-        return None, stages_out, logs
-
-    created = create_pipeline(api_key, location_id, PIPELINE_NAME, STAGES)
-    pipeline_id = str(created.get("id", "")).strip() or None
-    if not pipeline_id:
-        logs.append("Pipeline created but response had no ID; re-run with --debug after checking GHL UI")
-    else:
-        logs.append(f"Pipeline created: {PIPELINE_NAME} ({pipeline_id})")
-
-    created_stages = _extract_list(created, ["stages"])
-    for row in created_stages:
+    if not found:
+        logs.append(f"Pipeline missing: {PIPELINE_NAME}")
+        return None, stages_out, [PlanAction("create_pipeline", PIPELINE_NAME)], logs
+
+    pipeline_id = str(found.get("id", "")).strip() or None
+    logs.append(f"Pipeline exists: {PIPELINE_NAME} ({pipeline_id or 'ID unknown'})")
+    for row in _extract_list(found, ["stages"]):
         name = str(row.get("name", "")).strip()
         sid = str(row.get("id", "")).strip()
         if name and sid:
             stages_out[name] = sid
+    missing = [name for name in STAGES if name not in stages_out]
+    actions: list[PlanAction] = []
+    if missing:
+        logs.append("Missing stages on existing pipeline: " + ", ".join(missing))
+        if pipeline_id:
+            actions = [PlanAction("create_stage", name) for name in missing]
+    return pipeline_id, stages_out, actions, logs
 
-    return pipeline_id, stages_out, logs
 
+def diff_fields(existing: list[dict[str, Any]]) -> tuple[dict[str, str], list[PlanAction], list[str]]:
+    """Compare live custom fields with FIELD_SPECS.
 
-def upsert_fields(api_key: str, location_id: str, apply_changes: bool) -> tuple[dict[str, str], list[str]]:
+    Contact-level copies of spec fields (left by older builds) are scheduled
+    for deletion and ignored when matching opportunity fields.
+
+    Returns:
+        (field IDs by spec key, actions, log lines)
+    """
     logs: list[str] = []
+    actions: list[PlanAction] = []
     id_map: dict[str, str] = dict(KNOWN_FIELDS)
 
-    existing = fetch_custom_fields(api_key, location_id)
     by_key: dict[str, str] = {}
     for row in existing:
         fid = str(row.get("id", "")).strip()
@@ -484,32 +628,21 @@ def upsert_fields(api_key: str, location_id: str, apply_changes: bool) -> tuple[
             by_key[name] = fid
 
     # --- Clean up old contact-level duplicates ---
-    contact_fields_to_delete: list[tuple[str, str]] = []
     for spec in FIELD_SPECS:
         # GHL double-prefixes: fieldKey "contact.book_status" becomes "contact.contactbook_status"
         contact_key = f"contact.{spec.key}".lower()
         contact_key_double = f"contact.contact{spec.key}".lower()
         contact_id = by_key.get(contact_key_double) or by_key.get(contact_key)
         if contact_id:
-            contact_fields_to_delete.append((contact_id, spec.name))
-
-    if contact_fields_to_delete and apply_changes:
-        logs.append(f"Deleting {len(contact_fields_to_delete)} old contact-level duplicate fields...")
-        for fid, fname in contact_fields_to_delete:
-            if delete_custom_field(api_key, location_id, fid, fname):
-                logs.append(f"  Deleted contact-level: {fname} ({fid})")
-            else:
-                logs.append(f"  ⚠ Could not delete: {fname} ({fid})")
-        # Remove deleted entries from by_key so they don't block opportunity creation
-        for spec in FIELD_SPECS:
-            contact_key = f"contact.{spec.key}".lower()
-            contact_key_double = f"contact.contact{spec.key}".lower()
-            by_key.pop(contact_key_double, None)
-            by_key.pop(contact_key, None)
-            by_key.pop(spec.name.lower(), None)
-            by_key.pop(spec.key.lower(), None)
-    elif contact_fields_to_delete:
-        logs.append(f"Would delete {len(contact_fields_to_delete)} old contact-level duplicate fields (dry-run)")
+            actions.append(PlanAction("delete_field", spec.key, spec.name, target_id=contact_id))
+    if actions:
+        logs.append(f"Old contact-level duplicate fields to delete: {len(actions)}")
+        # Deleted entries must not block opportunity field creation
+        for action in actions:
+            by_key.pop(f"contact.contact{action.key}".lower(), None)
+            by_key.pop(f"contact.{action.key}".lower(), None)
+            by_key.pop(action.name.lower(), None)
+            by_key.pop(action.key.lower(), None)
 
     # --- Create/map opportunity-level fields ---
     for spec in FIELD_SPECS:
@@ -521,16 +654,133 @@ def upsert_fields(api_key: str, location_id: str, apply_changes: bool) -> tuple[
             id_map[spec.key] = existing_id
             logs.append(f"Field exists: {spec.key} ({existing_id})")
             continue
-
         logs.append(f"Field missing: {spec.key}")
-        if not apply_changes:
-            continue
+        actions.append(PlanAction("create_field", spec.key, spec.name))
+
+    return id_map, actions, logs
+
+
+def compute_plan(api_key: str, location_id: str) -> Plan:
+    """Diff the live location against the pipeline and field definitions."""
+    pipelines, fields = fetch_location_state(api_key, location_id)
+    pipeline_id, stage_ids, pipeline_actions, pipeline_logs = diff_pipeline(pipelines)
+    field_ids, field_actions, field_logs = diff_fields(fields)
+    return Plan(
+        location_id=location_id,
+        pipeline_id=pipeline_id,
+        stage_ids=stage_ids,
+        field_ids=field_ids,
+        actions=[a for a in field_actions if a.op == "delete_field"] + pipeline_actions
+        + [a for a in field_actions if a.op == "create_field"],
+        pipeline_logs=pipeline_logs,
+        field_logs=field_logs,
+        created_at=datetime.now().isoformat(timespec="seconds"),
+    )
 
-        created_id = create_custom_field(api_key, location_id, spec)
-        id_map[spec.key] = created_id
-        logs.append(f"Field created: {spec.key} ({created_id})")
 
-    return id_map, logs
+def plan_path(location_id: str) -> str:
+    """Default plan file for a location."""
+    return os.path.join(sidekick_config.get_output_dir(), PLAN_FILENAME.format(location_id=location_id))
+
+
+def save_plan(plan: Plan, path: str) -> None:
+    """Write the plan atomically (best effort: an unwritable file never stops apply)."""
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(plan), f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def apply_plan(api_key: str, plan: Plan, path: str = "", workers: int = APPLY_WORKERS) -> Plan:
+    """Run a plan's pending actions, recording each outcome in the plan (and its file).
+
+    Deletions run concurrently, then the pipeline is created if missing.
+    Stages are then created in STAGES order on one worker while fields are
+    created on the rest. The first field is created on its own so the
+    working endpoint variant is learned once rather than by every worker.
+    """
+    lock = threading.Lock()
+    location_id = plan.location_id
+    specs = {spec.key: spec for spec in FIELD_SPECS}
+
+    def _finish(action: PlanAction, result_id: str = "", error: str = "") -> None:
+        with lock:
+            action.status = "failed" if error else "done"
+            action.result_id = result_id
+            action.error = error
+            if action.op == "create_field" and result_id:
+                plan.field_ids[action.key] = result_id
+                plan.field_logs.append(f"Field created: {action.key} ({result_id})")
+            elif action.op == "create_stage" and result_id:
+                plan.stage_ids[action.key] = result_id
+                plan.pipeline_logs.append(f"Stage created: {action.key} ({result_id})")
+            elif action.op == "delete_field" and not error:
+                plan.field_logs.append(f"  Deleted contact-level: {action.name} ({action.target_id})")
+            if error:
+                (plan.pipeline_logs if action.op in ("create_pipeline", "create_stage") else plan.field_logs).append(error)
+            if path:
+                save_plan(plan, path)
+
+    def _delete(action: PlanAction) -> None:
+        if delete_custom_field(api_key, location_id, action.target_id, action.name):
+            _finish(action)
+        else:
+            _finish(action, error=f"  ⚠ Could not delete: {action.name} ({action.target_id})")
+
+    def _create_field(action: PlanAction) -> None:
+        try:
+            _finish(action, create_custom_field(api_key, location_id, specs[action.key]))
+        except (RuntimeError, requests.RequestException, ValueError) as exc:
+            _finish(action, error=str(exc))
+
+    def _create_stages(actions: list[PlanAction]) -> None:
+        for action in actions:
+            try:
+                _finish(action, create_stage(api_key, location_id, plan.pipeline_id or "", action.key))
+            except (RuntimeError, requests.RequestException, ValueError) as exc:
+                _finish(action, error=str(exc))
+
+    workers = max(1, workers)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        deletes = plan.pending("delete_field")
+        if deletes:
+            plan.field_logs.append(f"Deleting {len(deletes)} old contact-level duplicate fields...")
+            list(pool.map(_delete, deletes))
+
+        for action in plan.pending("create_pipeline"):
+            try:
+                created = create_pipeline(api_key, location_id, PIPELINE_NAME, STAGES)
+            except (RuntimeError, requests.RequestException, ValueError) as exc:
+                _finish(action, error=str(exc))
+                continue
+            plan.pipeline_id = str(created.get("id", "")).strip() or None
+            for row in _extract_list(created, ["stages"]):
+                name = str(row.get("name", "")).strip()
+                sid = str(row.get("id", "")).strip()
+                if name and sid:
+                    plan.stage_ids[name] = sid
+            if plan.pipeline_id:
+                plan.pipeline_logs.append(f"Pipeline created: {PIPELINE_NAME} ({plan.pipeline_id})")
+            else:
+                plan.pipeline_logs.append("Pipeline created but response had no ID; re-run with --debug after checking GHL UI")
+            _finish(action, plan.pipeline_id or "")
+
+        stage_job = None
+        stages = plan.pending("create_stage")
+        if stages and plan.pipeline_id:
+            stage_job = pool.submit(_create_stages, stages)
+
+        fields = plan.pending("create_field")
+        if fields:
+            pool.submit(_create_field, fields[0]).result()
+            list(pool.map(_create_field, fields[1:]))
+        if stage_job is not None:
+            stage_job.result()
+
+    return plan
 
 
 def print_scope_requirements() -> None:
@@ -575,6 +825,9 @@ def main() -> int:
     parser.add_argument("--location-id", help="GHL Location ID")
     parser.add_argument("--apply", action="store_true", help="Apply changes in GHL")
     parser.add_argument("--dry-run", action="store_true", help="Inspect only; do not create anything")
+    parser.add_argument("--workers", type=int, default=APPLY_WORKERS, help="Concurrent API calls during --apply")
+    parser.add_argument("--rate", type=float, default=APPLY_RATE, help="Max API requests per second (0 = unpaced)")
+    parser.add_argument("--plan-file", default="", help="Plan file (default: %%APPDATA%%\\SideKick_PS\\ghl_pipeline_plan_<location>.json)")
     parser.add_argument("--debug", action="store_true", help="Verbose output")
     args = parser.parse_args()
 
@@ -592,33 +845,57 @@ def main() -> int:
         print(f"ERROR: {exc}", file=sys.stderr)
         return 2
 
+    global _limiter
+    _limiter = _RateLimiter(args.rate)
+    path = args.plan_file or plan_path(location_id)
+
     print_scope_requirements()
     print(f"\nMode: {'APPLY' if apply_changes else 'DRY-RUN'}")
     print(f"Location ID: {location_id}")
 
+    start = time.perf_counter()
     try:
-        pipeline_id, stage_ids, pipeline_logs = upsert_pipeline(api_key, location_id, apply_changes)
-        field_ids, field_logs = upsert_fields(api_key, location_id, apply_changes)
-    except RuntimeError as exc:
+        plan = compute_plan(api_key, location_id)
+    except (RuntimeError, requests.RequestException, ValueError) as exc:
         print(f"\nERROR: {exc}", file=sys.stderr)
         print("If this is a 403, update your Private Integration scopes and re-run.")
         return 1
 
+    print(f"\nPlan ({len(plan.actions)} action{'s' if len(plan.actions) != 1 else ''}):")
+    for action in plan.actions:
+        print(f"- {action.describe()}")
+    if not plan.actions:
+        print("- Nothing to do: location matches the definitions")
+    save_plan(plan, path)
+
+    if apply_changes and plan.actions:
+        apply_plan(api_key, plan, path, args.workers)
+    elif plan.actions:
+        plan.pipeline_logs.append("Dry-run mode: no changes made")
+
     print("\nPipeline:")
-    for row in pipeline_logs:
+    for row in plan.pipeline_logs:
         print(f"- {row}")
 
     print("\nFields:")
-    for row in field_logs:
+    for row in plan.field_logs:
         print(f"- {row}")
 
-    print_registry(location_id, pipeline_id, stage_ids, field_ids)
+    print_registry(location_id, plan.pipeline_id, plan.stage_ids, plan.field_ids)
 
     if args.debug:
         print("\nDebug summary:")
         print(f"- Base URL: {BASE_URL}")
         print(f"- API version header: {API_VERSION}")
+        print(f"- Plan file: {path}")
+        print(f"- Endpoint variants: {_working_candidate}")
+        print(f"- Elapsed: {time.perf_counter() - start:.1f}s")
 
+    failed = plan.failed()
+    if failed:
+        print(f"\nERROR: {len(failed)} action(s) failed; re-run --apply to retry them", file=sys.stderr)
+        print("If this is a 403, update your Private Integration scopes and re-run.")
+        return 1
     return 0
 
 
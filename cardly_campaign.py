@@ -0,0 +1,497 @@
+"""
+Cardly Campaign Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Bulk card sends (anniversary, birthday, seasonal) from a manifest.
+
+Usage:
+  cardly_send_card.py --campaign manifest.csv [--workers N] [--order-workers N]
+                      [--retries N] [--template ID] [--arrival YYYY-MM-DD]
+                      [--ledger PATH] [--duplicate-days N] [--dry-run]
+
+Manifest (CSV with a header row, or a JSON list of objects):
+  contact_id, image                      required
+  message, first_name                    optional card text
+  crop_x, crop_y, zoom, rotation         optional crop (as cardly_send_card)
+  sticker, sticker_x, sticker_y, sticker_zoom
+  card_width, card_height, template_id, requested_arrival
+
+A run has three stages:
+1. Render – each distinct image/crop/sticker/card size is rendered once,
+   in a process pool, with resize_image_for_cardly.
+2. Artwork – one Cardly artwork per rendered card (create_cardly_artwork).
+   Rows that share an image and sticker share the artwork.
+3. Orders – GHL contact fetch and place_cardly_order, on a bounded thread
+   pool. Rate limits and gateway errors are retried with backoff; an order
+   is only resent after a 429, or a 503 carrying Retry-After.
+
+Progress goes to a results ledger (JSON in the SideKick_PS folder, named
+after the manifest). Orders are keyed by campaign (the manifest name) and
+contact, so a contact gets one card per campaign however often its image
+is re-exported. A rerun skips contacts that already have an order and
+reuses artwork already created, so an interrupted campaign can be resumed.
+Before ordering, the local Cardly order mirror (cardly_order_mirror) is
+refreshed and checked: a recipient sent a card in the last
+--duplicate-days days is skipped, even if the ledger was lost.
+A read timeout, dropped connection or any other 5xx (including a gateway
+502/504) while placing an order is recorded as "uncertain" and is not
+retried automatically, because the card may already have been sent. Check the Cardly dashboard, then rerun with
+--retry-uncertain. Errors raised before the request was sent (no API key,
+connection refused, connect timeout) are plain failures and a rerun retries
+them.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import cardly_order_mirror
+import cardly_send_card
+from cardly_send_card import (
+    resize_image_for_cardly, create_cardly_artwork, place_cardly_order,
+    get_ghl_contact, recipient_from_contact, _get_output_dir,
+)
+
+RENDER_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+ORDER_WORKERS = 4
+RETRIES = 3
+RETRY_BACKOFF = 2.0
+DUPLICATE_DAYS = 30
+# Safe to resend for reads and artwork uploads (a duplicate artwork is harmless)
+_RETRY_STATUSES = {429, 502, 503, 504}
+
+
+@dataclass(slots=True)
+class CampaignCard:
+    """One manifest row."""
+    row: int
+    contact_id: str
+    image: str
+    campaign: str = ''
+    message: str = ''
+    first_name: str = ''
+    crop_x: int = 50
+    crop_y: int = 50
+    zoom: int = 100
+    rotation: int = 0
+    sticker: str = ''
+    sticker_x: int = 75
+    sticker_y: int = 75
+    sticker_zoom: int = 50
+    card_width: int = 0
+    card_height: int = 0
+    template_id: str = ''
+    requested_arrival: str = ''
+    render_key: str = field(default='', repr=False)
+
+    @property
+    def key(self) -> str:
+        """Ledger key: one card per contact per campaign (not per image file)."""
+        return f"{self.campaign}|{self.contact_id}"
+
+    def render_args(self) -> dict:
+        """Keyword arguments for resize_image_for_cardly."""
+        return {
+            'crop_x': self.crop_x, 'crop_y': self.crop_y, 'zoom': self.zoom, 'rotation': self.rotation,
+            'sticker_path': self.sticker or None, 'sticker_x': self.sticker_x,
+            'sticker_y': self.sticker_y, 'sticker_zoom': self.sticker_zoom,
+            'card_width': self.card_width or None, 'card_height': self.card_height or None,
+        }
+
+
+def _file_stamp(path: str) -> str:
+    try:
+        st = os.stat(path)
+        return f"{os.path.abspath(path)}:{st.st_size}:{st.st_mtime_ns}"
+    except OSError:
+        return path
+
+
+def _render_key(card: CampaignCard) -> str:
+    """Hash of everything that changes the artwork (image, crop, sticker, size, template)."""
+    parts = [_file_stamp(card.image), _file_stamp(card.sticker) if card.sticker else '',
+             card.crop_x, card.crop_y, card.zoom, card.rotation, card.sticker_x, card.sticker_y,
+             card.sticker_zoom, card.card_width, card.card_height, card.template_id]
+    return hashlib.sha1('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()[:16]
+
+
+def load_campaign(path: str, template_id: str = '', requested_arrival: str = '',
+                  campaign: str = '') -> list[CampaignCard]:
+    """Read a campaign manifest (CSV or JSON list) into CampaignCard rows.
+
+    campaign names the send for the ledger; it defaults to the manifest's
+    file name without extension.
+
+    Raises:
+        ValueError: On a missing column or a non-numeric crop/sticker value.
+    """
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            data = json.load(f)
+        rows = data.get('cards', []) if isinstance(data, dict) else data
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+
+    campaign = campaign or os.path.splitext(os.path.basename(path))[0]
+    int_fields = ('crop_x', 'crop_y', 'zoom', 'rotation', 'sticker_x', 'sticker_y',
+                  'sticker_zoom', 'card_width', 'card_height')
+    cards = []
+    for number, raw in enumerate(rows, start=1):
+        values = {k.strip().lower(): (v.strip() if isinstance(v, str) else v)
+                  for k, v in raw.items() if k}
+        if not values.get('contact_id') or not values.get('image'):
+            raise ValueError(f"Row {number}: contact_id and image are required")
+        card = CampaignCard(row=number, contact_id=str(values['contact_id']), image=str(values['image']),
+                            campaign=campaign)
+        for name in ('message', 'first_name', 'sticker', 'template_id', 'requested_arrival'):
+            if values.get(name) and str(values[name]).lower() != 'none':
+                setattr(card, name, str(values[name]).replace('\\n', '\n'))
+        for name in int_fields:
+            if values.get(name) not in (None, ''):
+                try:
+                    setattr(card, name, int(float(values[name])))
+                except (TypeError, ValueError):
+                    raise ValueError(f"Row {number}: {name} must be a number, got {values[name]!r}")
+        card.template_id = card.template_id or template_id or cardly_send_card.CARDLY_MEDIA_ID
+        card.requested_arrival = card.requested_arrival or requested_arrival
+        card.render_key = _render_key(card)
+        cards.append(card)
+    return cards
+
+
+class CampaignLedger:
+    """Resumable campaign results: created artwork and per-row order status.
+
+    Saved (atomically) after every change, from any worker thread.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        self.artwork = data.get('artwork', {})
+        self.orders = data.get('orders', {})
+
+    def _save(self) -> None:
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'artwork': self.artwork, 'orders': self.orders}, f, indent=1)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[WARN] Campaign ledger not saved: {e}")
+
+    def record_artwork(self, render_key: str, artwork_id: str) -> None:
+        with self.lock:
+            self.artwork[render_key] = {'artwork_id': artwork_id,
+                                        'created_at': datetime.now().isoformat(timespec='seconds')}
+            self._save()
+
+    def record_order(self, card: CampaignCard, status: str, **details) -> None:
+        with self.lock:
+            self.orders[card.key] = {'row': card.row, 'contact_id': card.contact_id, 'status': status,
+                                     'updated_at': datetime.now().isoformat(timespec='seconds'), **details}
+            self._save()
+
+
+def _order_retryable(result: dict) -> bool:
+    """True if a failed order was certainly refused, so resending can't duplicate the card.
+
+    A gateway 502/504 only means the proxy gave up; Cardly may still have
+    placed the order.
+    """
+    status = result.get('status')
+    return status == 429 or (status == 503 and bool(str(result.get('retry_after') or '').strip()))
+
+
+def _with_retry(call, retries: int, retry_on_error: bool = True, retryable=None) -> dict:
+    """Run call() until it succeeds, retrying 429/gateway statuses with backoff.
+
+    Results without a status (exceptions inside call) are retried only when
+    retry_on_error is True. retryable(result) overrides which statuses are
+    retried. A numeric Retry-After is honoured as the minimum delay.
+    """
+    result = {}
+    for attempt in range(retries + 1):
+        result = call()
+        status = result.get('status')
+        if result.get('success'):
+            break
+        if status is None and not retry_on_error:
+            break
+        if status is not None and not (retryable(result) if retryable else status in _RETRY_STATUSES):
+            break
+        if attempt < retries:
+            delay = RETRY_BACKOFF * (2 ** attempt) * (1 + random.random() / 2)
+            retry_after = str(result.get('retry_after') or '').strip()
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+            time.sleep(delay)
+    result['attempts'] = attempt + 1
+    return result
+
+
+def _render_job(job: tuple) -> tuple:
+    """Process-pool worker: render one distinct card design to PNG."""
+    render_key, image_path, output_path, kwargs = job
+    start = time.perf_counter()
+    try:
+        resize_image_for_cardly(image_path, output_path=output_path, **kwargs)
+        return render_key, output_path, '', time.perf_counter() - start
+    except Exception as e:
+        return render_key, '', str(e) or type(e).__name__, time.perf_counter() - start
+
+
+def _render_all(cards: list[CampaignCard], out_dir: str, workers: int) -> tuple[dict, dict]:
+    """Render each distinct design once; returns ({render_key: path}, {render_key: error})."""
+    jobs = {}
+    for card in cards:
+        if card.render_key not in jobs:
+            jobs[card.render_key] = (card.render_key, card.image,
+                                     os.path.join(out_dir, f"{card.render_key}.png"), card.render_args())
+    rendered, errors = {}, {}
+    if not jobs:
+        return rendered, errors
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_render_job, jobs.values()))
+    else:
+        results = [_render_job(job) for job in jobs.values()]
+    for render_key, path, error, seconds in results:
+        if path:
+            rendered[render_key] = path
+            print(f"[OK] Rendered {render_key} in {seconds:.1f}s")
+        else:
+            errors[render_key] = error
+            print(f"[FAIL] Render {render_key}: {error}")
+    return rendered, errors
+
+
+def run_campaign(cards: list[CampaignCard], ledger: CampaignLedger, render_workers: int = RENDER_WORKERS,
+                 order_workers: int = ORDER_WORKERS, retries: int = RETRIES, dry_run: bool = False,
+                 retry_uncertain: bool = False, duplicate_days: int = DUPLICATE_DAYS) -> dict:
+    """Render, upload and order every pending card of a campaign.
+
+    Recipients with a Cardly order in the last duplicate_days days (per the
+    order mirror) are skipped; 0 turns the check off.
+
+    Returns:
+        dict: success, cards (per-row results) and stats (counts and seconds per stage).
+    """
+    stats = {'cards': len(cards), 'ordered': 0, 'skipped': 0, 'failed': 0, 'uncertain': 0,
+             'designs': 0, 'artwork_created': 0, 'artwork_reused': 0}
+    results = {}
+    skip_statuses = {'ordered'} | (set() if retry_uncertain else {'uncertain'})
+
+    pending = []
+    seen_keys = set()
+    for card in cards:
+        earlier = ledger.orders.get(card.key, {})
+        if earlier.get('status') in skip_statuses or card.key in seen_keys:
+            why = 'duplicate row' if card.key in seen_keys else f"already {earlier['status']}"
+            results[card.row] = {'row': card.row, 'contact_id': card.contact_id, 'status': 'skipped',
+                                 'order_id': earlier.get('order_id', ''), 'error': why}
+            stats['skipped'] += 1
+            continue
+        seen_keys.add(card.key)
+        if not os.path.exists(card.image):
+            results[card.row] = {'row': card.row, 'contact_id': card.contact_id, 'status': 'failed',
+                                 'error': f"Image not found: {card.image}"}
+            stats['failed'] += 1
+            print(f"[FAIL] Row {card.row} {card.contact_id}: Image not found: {card.image}")
+            continue
+        pending.append(card)
+
+    # Stage 1: render designs that have no artwork yet
+    start = time.perf_counter()
+    out_dir = os.path.join(_get_output_dir(), 'cardly_campaign')
+    os.makedirs(out_dir, exist_ok=True)
+    needs_render = [c for c in pending if dry_run or c.render_key not in ledger.artwork]
+    rendered, render_errors = _render_all(needs_render, out_dir, render_workers)
+    stats['render_seconds'] = round(time.perf_counter() - start, 2)
+    stats['designs'] = len({c.render_key for c in pending})
+
+    # Stage 2: one artwork per design (shared by every row that uses it)
+    start = time.perf_counter()
+    print_lock = threading.Lock()
+    artwork_ids = {key: entry['artwork_id'] for key, entry in ledger.artwork.items()}
+    stats['artwork_reused'] = len({c.render_key for c in pending if c.render_key in artwork_ids})
+    to_upload = {c.render_key: c for c in pending if c.render_key in rendered and c.render_key not in artwork_ids}
+    artwork_errors = dict(render_errors)
+
+    def _upload(card: CampaignCard) -> None:
+        result = _with_retry(lambda: create_cardly_artwork(
+            rendered[card.render_key], name=f"Campaign card {card.render_key}",
+            media_id_override=card.template_id), retries)
+        if result.get('success') and result.get('artwork_id'):
+            artwork_ids[card.render_key] = result['artwork_id']
+            ledger.record_artwork(card.render_key, result['artwork_id'])
+            with print_lock:
+                print(f"[OK] Artwork {card.render_key}: {result['artwork_id']}", flush=True)
+        else:
+            artwork_errors[card.render_key] = f"Artwork creation failed: {result.get('error')}"
+            with print_lock:
+                print(f"[FAIL] Artwork {card.render_key}: {result.get('error')}", flush=True)
+
+    if not dry_run and to_upload:
+        with ThreadPoolExecutor(max_workers=max(1, order_workers)) as pool:
+            list(pool.map(_upload, to_upload.values()))
+        stats['artwork_created'] = sum(1 for key in to_upload if key in artwork_ids)
+    stats['artwork_seconds'] = round(time.perf_counter() - start, 2)
+
+    # Stage 3: recipients and orders
+    start = time.perf_counter()
+    api_key = cardly_send_card.CARDLY_API_KEY
+    cutoff = ''
+    if duplicate_days > 0 and pending:
+        sync = cardly_order_mirror.sync_orders(api_key)
+        if sync.get('success') or cardly_order_mirror.mirror_age(api_key) is not None:
+            if not sync.get('success'):
+                print(f"[WARN] Cardly order history not refreshed ({sync.get('error')}); checking the last copy")
+            cutoff = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(time.time() - duplicate_days * 86400))
+        else:
+            print(f"[WARN] No Cardly order history available ({sync.get('error')}); duplicate check skipped")
+
+    def _recent_order(recipient: dict) -> dict | None:
+        if not cutoff:
+            return None
+        for order in cardly_order_mirror.find_orders(api_key, name=recipient['name'],
+                                                     address1=recipient['address1'],
+                                                     postcode=recipient['postcode']):
+            if (order.get('created') or '')[:19] >= cutoff:
+                return order
+        return None
+
+    def _order(card: CampaignCard) -> dict:
+        entry = {'row': card.row, 'contact_id': card.contact_id, 'status': 'failed', 'order_id': '',
+                 'artwork_id': artwork_ids.get(card.render_key, ''), 'error': ''}
+        if card.render_key in artwork_errors:
+            entry['error'] = artwork_errors[card.render_key]
+        elif not dry_run and not entry['artwork_id']:
+            entry['error'] = 'No artwork'
+        else:
+            contact_result = _with_retry(lambda: get_ghl_contact(card.contact_id), retries)
+            if not contact_result.get('success'):
+                entry['error'] = f"Failed to get contact: {contact_result.get('error')}"
+            else:
+                contact = contact_result['data'].get('contact', {})
+                recipient = recipient_from_contact(contact)
+                has_address = bool(recipient['address1'] and recipient['postcode'])
+                recent = _recent_order(recipient) if has_address else None
+                if not has_address:
+                    entry['error'] = 'Contact missing address or postcode'
+                elif recent is not None:
+                    entry.update(status='skipped', order_id=recent.get('order_id', ''),
+                                 error=f"Cardly order sent to this recipient on {(recent.get('created') or '')[:10]}")
+                elif dry_run:
+                    entry.update(status='dry-run', name=recipient['name'])
+                else:
+                    first_name = card.first_name or contact.get('firstName', '') or \
+                        (recipient['name'].split() or [''])[0]
+                    order = _with_retry(lambda: place_cardly_order(
+                        entry['artwork_id'], recipient, message=card.message, first_name=first_name,
+                        template_id=card.template_id, requested_arrival=card.requested_arrival or None),
+                        retries, retry_on_error=False, retryable=_order_retryable)
+                    if order.get('success'):
+                        data = order.get('data', {})
+                        inner = data.get('data', data) if isinstance(data, dict) else {}
+                        entry.update(status='ordered', order_id=str(inner.get('id', '')))
+                    else:
+                        # Sent but no status (read timeout) or a 5xx we don't retry: Cardly may have the order
+                        status = order.get('status')
+                        sent = order.get('sent', True)
+                        if sent and (status is None or (status >= 500 and not _order_retryable(order))):
+                            entry['status'] = 'uncertain'
+                        entry['error'] = f"Order failed: {order.get('error')}"
+        if entry['status'] not in ('dry-run', 'skipped'):
+            ledger.record_order(card, entry['status'], order_id=entry['order_id'],
+                                artwork_id=entry['artwork_id'], error=entry['error'])
+        with print_lock:
+            label = {'ordered': 'OK', 'dry-run': 'DRY', 'uncertain': 'WARN',
+                     'skipped': 'SKIP'}.get(entry['status'], 'FAIL')
+            detail = entry['order_id'] or entry['error'] or entry.get('name', '')
+            print(f"[{label}] Row {card.row} {card.contact_id}: {detail}", flush=True)
+        return entry
+
+    with ThreadPoolExecutor(max_workers=max(1, order_workers)) as pool:
+        for entry in pool.map(_order, pending):
+            results[entry['row']] = entry
+            if entry['status'] in stats:
+                stats[entry['status']] += 1
+            elif entry['status'] == 'dry-run':
+                stats['dry_run'] = stats.get('dry_run', 0) + 1
+    stats['order_seconds'] = round(time.perf_counter() - start, 2)
+
+    return {'success': stats['failed'] == 0 and stats['uncertain'] == 0,
+            'cards': [results[row] for row in sorted(results)], 'stats': stats}
+
+
+def main(argv: list[str] | None = None) -> int:
+    """CLI entry point for cardly_send_card.py --campaign."""
+    parser = argparse.ArgumentParser(prog='cardly_send_card.py --campaign',
+                                     description='Send a Cardly campaign from a manifest')
+    parser.add_argument('--campaign', required=True, metavar='MANIFEST', help='Campaign CSV or JSON')
+    parser.add_argument('--workers', type=int, default=RENDER_WORKERS,
+                        help=f'Image render processes (default: {RENDER_WORKERS})')
+    parser.add_argument('--order-workers', type=int, default=ORDER_WORKERS,
+                        help=f'Concurrent artwork uploads / orders (default: {ORDER_WORKERS})')
+    parser.add_argument('--retries', type=int, default=RETRIES, help=f'Retries per API call (default: {RETRIES})')
+    parser.add_argument('--template', default='', help='Template/media ID for rows without template_id')
+    parser.add_argument('--arrival', default='', help='Requested arrival YYYY-MM-DD for rows without one')
+    parser.add_argument('--ledger', default='', help='Results ledger path (default: per manifest, in app data)')
+    parser.add_argument('--duplicate-days', type=int, default=DUPLICATE_DAYS,
+                        help=f'Skip recipients sent a Cardly card in this many days, 0 = off (default: {DUPLICATE_DAYS})')
+    parser.add_argument('--dry-run', action='store_true', help='Render and check recipients, send nothing')
+    parser.add_argument('--retry-uncertain', action='store_true',
+                        help='Also resend rows whose order outcome was unknown')
+    parser.add_argument('--debug', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    try:
+        cards = load_campaign(args.campaign, args.template, args.arrival)
+    except (OSError, ValueError) as e:
+        print(f"[FAIL] {e}")
+        return 1
+    if not cards:
+        print(f"[FAIL] No cards in {args.campaign}")
+        return 1
+
+    stem = os.path.splitext(os.path.basename(args.campaign))[0]
+    ledger_path = args.ledger or os.path.join(_get_output_dir(), f"cardly_campaign_{stem}.json")
+    ledger = CampaignLedger(ledger_path)
+    print(f"[INFO] {len(cards)} cards, ledger: {ledger_path}{' (dry run)' if args.dry_run else ''}")
+
+    result = run_campaign(cards, ledger, args.workers, args.order_workers, args.retries,
+                          dry_run=args.dry_run, retry_uncertain=args.retry_uncertain,
+                          duplicate_days=args.duplicate_days)
+    stats = result['stats']
+    print(f"\n{stats['ordered']} ordered, {stats['skipped']} skipped, {stats['failed']} failed, "
+          f"{stats['uncertain']} uncertain - {stats['designs']} designs "
+          f"({stats['artwork_created']} new artwork, {stats['artwork_reused']} reused)")
+    print(f"Render {stats['render_seconds']:.1f}s, artwork {stats['artwork_seconds']:.1f}s, "
+          f"orders {stats['order_seconds']:.1f}s")
+
+    output_file = os.path.join(_get_output_dir(), "cardly_campaign_result.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(f"Result saved to: {output_file}")
+    return 0 if result['success'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
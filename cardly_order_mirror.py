@@ -0,0 +1,301 @@
+"""
+Cardly Order Mirror Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Local SQLite copy of the Cardly order history, for duplicate-card checks.
+
+GET /orders returns 25 orders per page, newest first. The first sync pages
+through the whole history. Later syncs stop once they reach orders created
+more than REFRESH_WINDOW_DAYS before the newest order already mirrored.
+That window is re-read each time so lodged/shipped status changes on
+recent cards are picked up.
+
+Every order item is stored with its recipient name normalised (case,
+punctuation, spacing) and its address reduced to address line 1 + postcode.
+Both are indexed, so find_orders() answers from the full history with no
+API call. Callers keep it current with refresh_in_background().
+
+The mirror lives in %APPDATA%\\SideKick_PS\\cardly_orders.db, one history
+per Cardly account (keyed by a hash of the API key). SQLite errors are
+swallowed and treated as "nothing mirrored".
+"""
+
+import calendar
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import sidekick_config
+
+MIRROR_FILENAME = 'cardly_orders.db'
+CARDLY_BASE_URL = "https://api.card.ly/v2"
+PAGE_LIMIT = 25
+MAX_PAGES = 2000
+REFRESH_WINDOW_DAYS = 21
+REFRESH_MAX_AGE = 15 * 60
+REQUEST_TIMEOUT = 30
+
+_sync_lock = threading.Lock()
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def get_mirror_path() -> str:
+    """Return the path of the order mirror database."""
+    return os.path.join(sidekick_config.get_output_dir(), MIRROR_FILENAME)
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the mirror database, creating tables on first use."""
+    conn = sqlite3.connect(get_mirror_path(), timeout=10)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS orders (
+            account TEXT NOT NULL,
+            order_id TEXT NOT NULL,
+            status TEXT,
+            created TEXT,
+            PRIMARY KEY (account, order_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS order_items (
+            account TEXT NOT NULL,
+            order_id TEXT NOT NULL,
+            item_index INTEGER NOT NULL,
+            recipient_name TEXT,
+            name_key TEXT,
+            address_key TEXT,
+            details TEXT,
+            PRIMARY KEY (account, order_id, item_index)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            account TEXT PRIMARY KEY,
+            synced_at REAL NOT NULL,
+            complete INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_items_name ON order_items (account, name_key)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_items_address ON order_items (account, address_key)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (account, created)')
+    return conn
+
+
+def _account(api_key: str) -> str:
+    return hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:16]
+
+
+def normalise_name(name: str) -> str:
+    """'  Mrs. Jane  SMITH ' -> 'mrs jane smith'."""
+    return ' '.join(_NON_ALNUM.sub(' ', (name or '').lower()).split())
+
+
+def address_key(address1: str, postcode: str) -> str:
+    """First address line + postcode with case, spacing and punctuation removed."""
+    line = _NON_ALNUM.sub('', (address1 or '').lower())
+    code = _NON_ALNUM.sub('', (postcode or '').lower())
+    return f"{line}|{code}" if line and code else ''
+
+
+def _recipient_name(recip: dict) -> str:
+    name = recip.get('name', '')
+    if not name:
+        name = f"{recip.get('firstName', '')} {recip.get('lastName', '')}".strip()
+    return name
+
+
+def _order_rows(account: str, order: dict) -> tuple[tuple, list[tuple]]:
+    """Convert one API order into an orders row and its order_items rows."""
+    order_id = str(order.get('id', ''))
+    created = order.get('timings', {}).get('created') or ''
+    items = []
+    for index, item in enumerate(order.get('items', [])):
+        recip = item.get('recipient', {})
+        name = _recipient_name(recip)
+        timings = item.get('timings', {})
+        delivery = item.get('delivery', {})
+        details = {
+            'label': item.get('label', ''),
+            'scheduled_date': item.get('scheduledDate'),
+            'lodged': timings.get('lodged'),
+            'shipped': timings.get('shipped'),
+            'held': timings.get('held'),
+            'dispatch': delivery.get('dispatch'),
+            'est_min_arrival': delivery.get('estimatedMinArrival'),
+            'est_max_arrival': delivery.get('estimatedMaxArrival'),
+        }
+        addr = address_key(recip.get('address') or recip.get('address1', ''),
+                           recip.get('postcode') or recip.get('postCode', ''))
+        items.append((account, order_id, index, name, normalise_name(name), addr, json.dumps(details)))
+    return (account, order_id, order.get('status', ''), created), items
+
+
+def _store_page(conn: sqlite3.Connection, account: str, orders: list[dict]) -> None:
+    with conn:
+        for order in orders:
+            order_row, item_rows = _order_rows(account, order)
+            if not order_row[1]:
+                continue
+            conn.execute('INSERT OR REPLACE INTO orders (account, order_id, status, created) VALUES (?, ?, ?, ?)',
+                         order_row)
+            conn.execute('DELETE FROM order_items WHERE account = ? AND order_id = ?', (account, order_row[1]))
+            conn.executemany(
+                'INSERT INTO order_items (account, order_id, item_index, recipient_name, name_key, '
+                'address_key, details) VALUES (?, ?, ?, ?, ?, ?, ?)', item_rows)
+
+
+def _stop_before(conn: sqlite3.Connection, account: str) -> str:
+    """Created timestamp below which an incremental sync can stop ('' = full sync)."""
+    row = conn.execute('SELECT complete FROM sync_state WHERE account = ?', (account,)).fetchone()
+    if not row or not row[0]:
+        return ''
+    newest = conn.execute('SELECT MAX(created) FROM orders WHERE account = ?', (account,)).fetchone()[0]
+    if not newest:
+        return ''
+    try:
+        newest_epoch = calendar.timegm(time.strptime(newest[:19], '%Y-%m-%dT%H:%M:%S'))
+    except ValueError:
+        return ''  # unfamiliar timestamp format: fall back to a full sync
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(newest_epoch - REFRESH_WINDOW_DAYS * 86400))
+
+
+def sync_orders(api_key: str, full: bool = False) -> dict:
+    """Bring the mirror up to date with the Cardly order history.
+
+    Args:
+        api_key: Cardly API key (also selects which account's history).
+        full: Re-read the entire history instead of just the recent window.
+
+    Returns:
+        dict: success, orders (fetched this run), pages and error (on failure).
+    """
+    import requests
+
+    if not api_key:
+        return {"success": False, "error": "Cardly API key not configured"}
+
+    account = _account(api_key)
+    headers = {"API-Key": api_key}
+    fetched = pages = 0
+    with _sync_lock:
+        try:
+            conn = _connect()
+        except sqlite3.Error as e:
+            return {"success": False, "error": str(e)}
+        try:
+            stop_before = '' if full else _stop_before(conn, account)
+            reached_end = False
+            for page in range(MAX_PAGES):
+                resp = requests.get(f"{CARDLY_BASE_URL}/orders",
+                                    params={'limit': PAGE_LIMIT, 'offset': page * PAGE_LIMIT},
+                                    headers=headers, timeout=REQUEST_TIMEOUT)
+                if resp.status_code != 200:
+                    return {"success": False, "orders": fetched, "pages": pages,
+                            "error": f"Cardly returned status {resp.status_code}"}
+                body = resp.json().get('data', {})
+                results = body.get('results', [])
+                pages += 1
+                fetched += len(results)
+                _store_page(conn, account, results)
+                total_records = body.get('meta', {}).get('totalRecords', 0)
+                if not results or (page + 1) * PAGE_LIMIT >= total_records:
+                    reached_end = True
+                    break
+                oldest = min((o.get('timings', {}).get('created') or '' for o in results), default='')
+                if stop_before and oldest and oldest[:19] < stop_before:
+                    break
+            with conn:
+                conn.execute(
+                    'INSERT INTO sync_state (account, synced_at, complete) VALUES (?, ?, ?) '
+                    'ON CONFLICT(account) DO UPDATE SET synced_at = excluded.synced_at, '
+                    'complete = MAX(sync_state.complete, excluded.complete)',
+                    (account, time.time(), 1 if reached_end else 0))
+        except (requests.RequestException, ValueError, sqlite3.Error) as e:
+            return {"success": False, "orders": fetched, "pages": pages, "error": str(e)}
+        finally:
+            conn.close()
+    return {"success": True, "orders": fetched, "pages": pages}
+
+
+def mirror_age(api_key: str) -> float | None:
+    """Seconds since the account's last successful sync, or None if never synced."""
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute('SELECT synced_at FROM sync_state WHERE account = ?',
+                               (_account(api_key),)).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return max(0.0, time.time() - row[0]) if row else None
+
+
+def find_orders(api_key: str, name: str = '', address1: str = '', postcode: str = '') -> list[dict]:
+    """Mirrored orders sent to a recipient, newest first.
+
+    Matches on the exact normalised name, or on address line 1 + postcode.
+    One entry per order (its first matching item), in the same shape as
+    cardly_send_card.list_recent_orders.
+    """
+    account = _account(api_key)
+    name_key = normalise_name(name)
+    addr_key = address_key(address1, postcode)
+    if not name_key and not addr_key:
+        return []
+    try:
+        conn = _connect()
+        try:
+            rows = conn.execute(
+                'SELECT o.order_id, o.status, o.created, i.recipient_name, i.details '
+                'FROM order_items i JOIN orders o ON o.account = i.account AND o.order_id = i.order_id '
+                'WHERE i.account = ? AND (i.name_key = ? OR (? != \'\' AND i.address_key = ?)) '
+                'ORDER BY o.created DESC, i.item_index',
+                (account, name_key, addr_key, addr_key)
+            ).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return []
+
+    matching = []
+    seen = set()
+    for order_id, status, created, recipient_name, details in rows:
+        if order_id in seen:
+            continue
+        seen.add(order_id)
+        entry = {"order_id": order_id, "order_status": status or '', "recipient_name": recipient_name or ''}
+        entry.update(json.loads(details or '{}'))
+        entry["created"] = created or None
+        matching.append(entry)
+    return matching
+
+
+def refresh_in_background(api_key: str, max_age: float = REFRESH_MAX_AGE, on_done=None) -> threading.Thread | None:
+    """Sync in a daemon thread if the mirror is older than max_age.
+
+    Args:
+        api_key: Cardly API key.
+        max_age: Skip the sync if the last one is more recent than this (seconds).
+        on_done: Optional callback receiving the sync_orders() result.
+
+    Returns:
+        threading.Thread | None: The running thread, or None if no sync was needed.
+    """
+    age = mirror_age(api_key)
+    if age is not None and age < max_age:
+        return None
+
+    def _worker():
+        result = sync_orders(api_key)
+        if on_done is not None:
+            on_done(result)
+
+    thread = threading.Thread(target=_worker, name='cardly-order-sync', daemon=True)
+    thread.start()
+    return thread
@@ -22,6 +22,7 @@ import subprocess
 import sys
 import os
 import json
+import tempfile
 import math
 import re as _re
 import calendar as _calendar
@@ -248,22 +249,25 @@ def install_dependencies() -> None:
 install_dependencies()
 
 import io as _io
-from PIL import Image, ImageTk, ImageCms
+from PIL import Image, ImageTk
 import requests
 
-# sRGB profile for display colour management
-_SRGB_PROFILE = ImageCms.createProfile('sRGB')
-
 # Import from existing cardly module
 script_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, script_dir)
 
+from read_psa_images import iter_thumbnails
+from cardly_thumb_cache import AlbumThumbCache
+from ghl_custom_fields import get_field_definitions, parse_field_date
+from cardly_order_mirror import (find_orders, mirror_age, sync_orders, refresh_in_background,
+                                 REFRESH_MAX_AGE)
+
 try:
     from cardly_send_card import (
-        resize_image_for_cardly, create_cardly_artwork, place_cardly_order,
+        CardImagePipeline, create_cardly_artwork, place_cardly_order,
         get_ghl_contact, upload_to_ghl_photos, update_ghl_contact_field,
         _enrich_contact_address, save_to_album_folder, list_recent_orders,
-        sanitize_recipient,
+        sanitize_recipient, to_srgb, sticker_source, sticker_tile,
         CARDLY_API_KEY, CARDLY_MEDIA_ID, CARDLY_CONFIG, GHL_API_KEY,
         CARDLY_WIDTH, CARDLY_HEIGHT, CARDLY_BASE_URL, debug_print, DEBUG
     )
@@ -314,6 +318,12 @@ class CardPreviewGUI:
 
         # Image list
         self.images = []
+        # PSA thumbnails held in memory, keyed by their (virtual) path in self.images;
+        # only written to disk by _materialise_thumb() when a file is really needed
+        self._thumb_buffers = {}
+        self._thumb_ids = {}      # virtual thumb path -> PSA imageID (for lazy reads)
+        self._thumb_keys = {}     # image path -> filmstrip cache key
+        self._thumb_cache = None  # AlbumThumbCache, created on first PSA load
         self.current_index = 0
         self.current_image = None
         self.current_photo = None
@@ -541,7 +551,7 @@ class CardPreviewGUI:
                     spath = os.path.join(self.sticker_folder, self.sticker_name)
                     if os.path.exists(spath):
                         self.sticker_path = spath
-                        self.sticker_image = Image.open(spath)
+                        self.sticker_image = sticker_source(spath)
                     else:
                         self.sticker_name = 'None'
         except Exception:
@@ -638,7 +648,6 @@ class CardPreviewGUI:
         Also resolves original hi-res source paths where available.
         """
         import sqlite3
-        import tempfile
 
         selected_stems = {os.path.splitext(n)[0] for n in self.selected_images}
         selected_names = set(self.selected_images)
@@ -702,40 +711,16 @@ class CardPreviewGUI:
                 if resolved:
                     self._psa_source_paths[name] = resolved
 
-            # Extract matching thumbnails to temp folder
-            temp_dir = os.path.join(tempfile.gettempdir(), 'sidekick_ps_cardly')
-            os.makedirs(temp_dir, exist_ok=True)
-            self._temp_thumb_dir = temp_dir
-
-            # Build placeholders for SQL IN clause
-            id_list = list(image_ids.keys())
-            placeholders = ','.join('?' for _ in id_list)
-            cursor.execute(f'''
-                SELECT imageID, imageData
-                FROM Thumbnails
-                WHERE thumbnailType = 1
-                  AND imageData IS NOT NULL
-                  AND imageID IN ({placeholders})
-            ''', id_list)
-
-            for image_id, data in cursor.fetchall():
-                if not data or data[:2] != b'\xff\xd8':
-                    continue
+            conn.close()
 
+            for image_id, thumb_path in self._psa_thumbnail_paths(image_ids, subset=True):
                 name = image_ids[image_id]
-                base_name = os.path.splitext(name)[0]
-                thumb_path = os.path.join(temp_dir, f"{base_name}.jpg")
-
-                with open(thumb_path, 'wb') as f:
-                    f.write(data)
-
                 # Prefer hi-res original on disk if available
                 if name in self._psa_source_paths:
-                    self.images.append(self._psa_source_paths[name])
+                    self._add_original_image(image_id, self._psa_source_paths[name])
                 else:
                     self.images.append(thumb_path)
 
-            conn.close()
             self.images.sort()
             print(f"Loaded {len(self.images)} selected images from PSA (of {len(self.selected_images)} requested)")
 
@@ -750,7 +735,6 @@ class CardPreviewGUI:
         PSA SQLite database's Thumbnails table.
         """
         import sqlite3
-        import tempfile
 
         # Parse XML for ordered image names
         ordered_names = set()
@@ -807,46 +791,109 @@ class CardPreviewGUI:
                 if name in ordered_names or os.path.splitext(name)[0] in ordered_stems:
                     image_ids[album_id] = name
 
-            # Extract matching thumbnails to temp folder
-            temp_dir = os.path.join(tempfile.gettempdir(), 'sidekick_ps_cardly')
-            os.makedirs(temp_dir, exist_ok=True)
-            self._temp_thumb_dir = temp_dir
-
-            cursor.execute('''
-                SELECT imageID, imageData
-                FROM Thumbnails
-                WHERE thumbnailType = 1 AND imageData IS NOT NULL
-            ''')
-
-            for image_id, data in cursor.fetchall():
-                if not data or data[:2] != b'\xff\xd8':
-                    continue
-                if image_id not in image_ids:
-                    continue
+            conn.close()
 
+            for image_id, thumb_path in self._psa_thumbnail_paths(image_ids, subset=True):
                 name = image_ids[image_id]
-                base_name = os.path.splitext(name)[0]
-                thumb_path = os.path.join(temp_dir, f"{base_name}.jpg")
-
-                with open(thumb_path, 'wb') as f:
-                    f.write(data)
 
                 # Check for hi-res original and prefer it if available
                 if name in self._original_image_paths:
                     orig_path = self._original_image_paths[name]
                     if os.path.exists(orig_path):
-                        self.images.append(orig_path)
+                        self._add_original_image(image_id, orig_path)
                         continue
 
                 self.images.append(thumb_path)
 
-            conn.close()
             self.images.sort()
             print(f"Loaded {len(self.images)} ordered images from PSA")
 
         except Exception as e:
             print(f"Error extracting PSA thumbnails: {e}")
 
+    def _get_thumb_cache(self):
+        """Return the persistent filmstrip cache for this album (None if unavailable)."""
+        if self._thumb_cache is None and self.psa_path:
+            try:
+                self._thumb_cache = AlbumThumbCache(self.psa_path)
+            except Exception as e:
+                print(f"Thumbnail cache unavailable: {e}")
+        return self._thumb_cache
+
+    def _psa_thumbnail_paths(self, image_ids: dict, subset: bool) -> list:
+        """Return [(imageID, virtual thumb path)] for the album's JPEG thumbnails.
+
+        On a warm open (cache container matches the PSA's mtime) the list
+        comes from the cache and no thumbnail blobs are read; blobs are then
+        fetched one at a time only if an image is previewed. On a cold open
+        the Thumbnails table is read once and the blobs kept in memory.
+
+        Args:
+            image_ids: albumimage ID -> image name for the images wanted.
+            subset: True to read only image_ids; False for every thumbnail.
+        """
+        temp_dir = os.path.join(tempfile.gettempdir(), 'sidekick_ps_cardly')
+        self._temp_thumb_dir = temp_dir
+        cache = self._get_thumb_cache()
+
+        if cache is not None and cache.loaded:
+            known = cache.thumbs
+            if (subset and (cache.complete or set(image_ids) <= set(known))) or (not subset and cache.complete):
+                found = [(i, name) for i, name in known.items() if name and (not subset or i in image_ids)]
+                print(f"Thumbnail cache hit: {len(found)} thumbnails (PSA not read)")
+            else:
+                found = None
+        else:
+            found = None
+
+        if found is None:
+            ids_by_file = {f"{os.path.splitext(n)[0]}.jpg": i for i, n in image_ids.items()}
+            found = []
+            for filename, data in iter_thumbnails(self.psa_path, image_ids,
+                                                  only_ids=image_ids.keys() if subset else None):
+                image_id = ids_by_file.get(filename)
+                if image_id is None:
+                    m = _re.match(r'^thumb_(\d+)\.jpg$', filename)
+                    if not m:
+                        continue
+                    image_id = int(m.group(1))
+                found.append((image_id, filename))
+                self._thumb_buffers[os.path.join(temp_dir, filename)] = data
+            if cache is not None:
+                # Remember IDs without a JPEG thumbnail too ('' = none) so subsets stay warm
+                known = dict(found)
+                if subset:
+                    for image_id in image_ids:
+                        known.setdefault(image_id, '')
+                cache.set_thumbs(known, complete=not subset)
+
+        result = []
+        for image_id, filename in found:
+            thumb_path = os.path.join(temp_dir, filename)
+            self._thumb_ids[thumb_path] = image_id
+            self._thumb_keys[thumb_path] = f"t{image_id}"
+            result.append((image_id, thumb_path))
+        return result
+
+    def _add_original_image(self, image_id: int, orig_path: str) -> None:
+        """Add a hi-res original to the image list with its filmstrip cache key."""
+        try:
+            stamp = int(os.path.getmtime(orig_path))
+        except OSError:
+            stamp = 0
+        self._thumb_keys[orig_path] = f"o{image_id}:{stamp}"
+        self.images.append(orig_path)
+
+    def _thumb_data(self, path: str):
+        """Return in-memory thumbnail bytes for a virtual path, reading the PSA lazily."""
+        data = self._thumb_buffers.get(path)
+        if data is None and path in self._thumb_ids and self.psa_path:
+            image_id = self._thumb_ids[path]
+            for _filename, blob in iter_thumbnails(self.psa_path, {}, only_ids=[image_id]):
+                data = self._thumb_buffers[path] = blob
+                break
+        return data
+
     def _extract_client_from_psa(self) -> dict | None:
         """Extract client details from PSA OrderList XML.
 
@@ -1045,33 +1092,11 @@ class CardPreviewGUI:
             if self._psa_source_paths:
                 print(f"Mapped {len(self._psa_source_paths)} images to original files on disk")
 
-            # Extract all type-1 thumbnails to temp folder
-            temp_dir = os.path.join(tempfile.gettempdir(), 'sidekick_ps_cardly')
-            os.makedirs(temp_dir, exist_ok=True)
-            self._temp_thumb_dir = temp_dir
-
-            cursor.execute('''
-                SELECT imageID, imageData
-                FROM Thumbnails
-                WHERE thumbnailType = 1 AND imageData IS NOT NULL
-            ''')
-
-            for image_id, data in cursor.fetchall():
-                if not data or data[:2] != b'\xff\xd8':
-                    continue
-
-                if image_id in image_ids:
-                    base_name = os.path.splitext(image_ids[image_id])[0]
-                    filename = f"{base_name}.jpg"
-                else:
-                    filename = f"thumb_{image_id:04d}.jpg"
+            conn.close()
 
-                thumb_path = os.path.join(temp_dir, filename)
-                with open(thumb_path, 'wb') as f:
-                    f.write(data)
+            for _image_id, thumb_path in self._psa_thumbnail_paths(image_ids, subset=False):
                 self.images.append(thumb_path)
 
-            conn.close()
             self.images.sort()
             print(f"Loaded {len(self.images)} thumbnails from PSA (all images)")
 
@@ -1215,13 +1240,19 @@ class CardPreviewGUI:
         self.thumb_images = []  # Keep references
         self.thumb_labels = []
 
+        thumb_cache = self._thumb_cache
         for i, img_path in enumerate(self.images):
             try:
-                img = Image.open(img_path)
-                # Scale to fit height of 100px (taller filmstrip)
-                ratio = 100 / img.height
-                new_w = int(img.width * ratio)
-                img = img.resize((new_w, 100), Image.Resampling.LANCZOS)
+                cache_key = self._thumb_keys.get(img_path)
+                img = thumb_cache.get(cache_key) if thumb_cache is not None and cache_key else None
+                if img is None:
+                    img = self._open_image(img_path)
+                    # Scale to fit height of 100px (taller filmstrip)
+                    ratio = 100 / img.height
+                    new_w = int(img.width * ratio)
+                    img = img.resize((new_w, 100), Image.Resampling.LANCZOS)
+                    if thumb_cache is not None and cache_key:
+                        thumb_cache.put(cache_key, img)
                 photo = ImageTk.PhotoImage(img)
                 self.thumb_images.append(photo)
 
@@ -1236,6 +1267,13 @@ class CardPreviewGUI:
             except Exception as e:
                 print(f"Error loading thumbnail {img_path}: {e}")
 
+        # Persist newly decoded filmstrip images for the next open of this album
+        if thumb_cache is not None:
+            try:
+                thumb_cache.save()
+            except Exception as e:
+                print(f"Could not save thumbnail cache: {e}")
+
         # Update scroll region
         self.film_inner.update_idletasks()
         self.film_canvas.configure(scrollregion=self.film_canvas.bbox('all'))
@@ -1603,18 +1641,9 @@ class CardPreviewGUI:
         """Pre-populate date dropdown with Birthday (always shown) and any derivable dates."""
         from datetime import datetime, date
         # Always show Birthday — with date or Unknown
-        dob = getattr(self, '_ghl_birthday', None)
-        if dob:
-            for fmt in ('%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%SZ',
-                        '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
-                try:
-                    d = datetime.strptime(dob, fmt).date()
-                    self._date_options.append(f"Birthday \u2014 {self._format_local_date(d)}")
-                    break
-                except (ValueError, TypeError):
-                    continue
-            else:
-                self._date_options.append("Birthday \u2014 Unknown")
+        d = parse_field_date(getattr(self, '_ghl_birthday', None))
+        if d is not None:
+            self._date_options.append(f"Birthday \u2014 {self._format_local_date(d)}")
         else:
             self._date_options.append("Birthday \u2014 Unknown")
 
@@ -1657,88 +1686,95 @@ class CardPreviewGUI:
                 self._date_info_label.config(text="Card will be dispatched immediately")
 
     def _refresh_ghl_dates(self):
-        """Fetch date-type custom fields from GHL contact and add to dropdown."""
-        from datetime import datetime, date
+        """Fetch date-type custom fields from GHL contact and add to dropdown.
+
+        The GHL calls run on a background thread; the dropdown is rebuilt on
+        the Tk thread when they finish, so the window never freezes.
+        """
+        import threading
         if not self.contact_id:
             messagebox.showinfo("No Contact", "No GHL contact ID available.")
             return
 
         self._date_refresh_btn.config(state='disabled', text="...")
-        self.root.update_idletasks()
 
-        try:
-            contact_result = get_ghl_contact(self.contact_id)
-            if not contact_result.get('success'):
-                messagebox.showwarning("GHL Error",
-                    f"Could not fetch contact: {contact_result.get('error', 'Unknown')}")
-                return
+        def _worker():
+            try:
+                outcome = self._collect_ghl_dates()
+            except Exception as e:
+                outcome = {'error': f"Failed to fetch dates: {e}"}
+            self.root.after(0, lambda: self._apply_ghl_dates(outcome))
 
-            ghl_data = contact_result.get('data', {})
-            contact = ghl_data.get('contact', ghl_data)
+        threading.Thread(target=_worker, daemon=True).start()
 
-            # Collect date fields from customFields
-            found_dates = {}
-            custom_fields = contact.get('customFields', [])
+    def _collect_ghl_dates(self) -> dict:
+        """Read the contact's date fields from GHL (background thread, no Tk calls).
 
-            # Also fetch field definitions to get human-readable names
-            field_names = {}
-            try:
-                from cardly_send_card import GHL_BASE_URL, GHL_LOCATION_ID
-                if GHL_API_KEY and GHL_LOCATION_ID:
-                    headers = {
-                        "Authorization": f"Bearer {GHL_API_KEY}",
-                        "Version": "2021-07-28"
-                    }
-                    url = f"{GHL_BASE_URL}/locations/{GHL_LOCATION_ID}/customFields"
-                    resp = requests.get(url, headers=headers, timeout=10)
-                    if resp.status_code == 200:
-                        for cf in resp.json().get('customFields', []):
-                            field_names[cf['id']] = cf.get('name', cf.get('fieldKey', ''))
-            except Exception as e:
-                print(f"Could not fetch field names: {e}")
+        Returns {'dates': {label: locale date}} or {'error': message}.
+        """
+        contact_result = get_ghl_contact(self.contact_id)
+        if not contact_result.get('success'):
+            return {'error': f"Could not fetch contact: {contact_result.get('error', 'Unknown')}"}
 
-            for cf in custom_fields:
-                cf_id = cf.get('id', '')
-                cf_val = cf.get('value', '')
-                if not cf_val:
-                    continue
-                # Try to parse as date (GHL stores dates as ISO strings or YYYY-MM-DD)
-                for fmt in ('%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%SZ',
-                            '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
-                    try:
-                        d = datetime.strptime(cf_val, fmt).date()
-                        label = field_names.get(cf_id, cf_id)
-                        # Clean up label
-                        label = label.replace('contact.', '').replace('_', ' ').title()
-                        # Abbreviate & adjust known date types
-                        low = label.lower()
-                        if 'session' in low or 'shoot' in low:
-                            label = 'Shoot Anniversary'
-                            try:
-                                d = d.replace(year=d.year + 1)
-                            except ValueError:
-                                d = d.replace(month=3, day=1, year=d.year + 1)
-                        elif 'wedding' in low:
-                            label = label.lower().replace('wedding', 'WD').title()
-                        found_dates[label] = self._format_local_date(d)
-                        break
-                    except (ValueError, TypeError):
-                        continue
+        ghl_data = contact_result.get('data', {})
+        contact = ghl_data.get('contact', ghl_data)
 
-            # Also check standard contact date fields
-            for key, label in [('dateOfBirth', 'Birthday'),
-                               ('dateAdded', 'Date Added')]:
-                val = contact.get(key)
-                if val:
-                    for fmt in ('%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%SZ',
-                                '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
-                        try:
-                            d = datetime.strptime(val, fmt).date()
-                            found_dates[label] = self._format_local_date(d)
-                            break
-                        except (ValueError, TypeError):
-                            continue
+        # Collect date fields from customFields
+        found_dates = {}
+        custom_fields = contact.get('customFields', [])
 
+        # Field definitions (human-readable names) come from the shared disk cache
+        field_names = {}
+        try:
+            from cardly_send_card import GHL_LOCATION_ID
+            if GHL_API_KEY and GHL_LOCATION_ID:
+                headers = {
+                    "Authorization": f"Bearer {GHL_API_KEY}",
+                    "Version": "2021-07-28"
+                }
+                for cf_id, field in get_field_definitions(headers, GHL_LOCATION_ID).items():
+                    field_names[cf_id] = field.get('name') or field.get('field_key', '')
+        except Exception as e:
+            print(f"Could not fetch field names: {e}")
+
+        for cf in custom_fields:
+            cf_id = cf.get('id', '')
+            # GHL stores dates as ISO strings or YYYY-MM-DD
+            d = parse_field_date(cf.get('value', ''))
+            if d is None:
+                continue
+            label = field_names.get(cf_id, cf_id)
+            # Clean up label
+            label = label.replace('contact.', '').replace('_', ' ').title()
+            # Abbreviate & adjust known date types
+            low = label.lower()
+            if 'session' in low or 'shoot' in low:
+                label = 'Shoot Anniversary'
+                try:
+                    d = d.replace(year=d.year + 1)
+                except ValueError:
+                    d = d.replace(month=3, day=1, year=d.year + 1)
+            elif 'wedding' in low:
+                label = label.lower().replace('wedding', 'WD').title()
+            found_dates[label] = self._format_local_date(d)
+
+        # Also check standard contact date fields
+        for key, label in [('dateOfBirth', 'Birthday'),
+                           ('dateAdded', 'Date Added')]:
+            d = parse_field_date(contact.get(key))
+            if d is not None:
+                found_dates[label] = self._format_local_date(d)
+
+        return {'dates': found_dates}
+
+    def _apply_ghl_dates(self, outcome: dict):
+        """Rebuild the date dropdown from _collect_ghl_dates results (Tk thread)."""
+        try:
+            if 'error' in outcome:
+                messagebox.showwarning("GHL Error", outcome['error'])
+                return
+
+            found_dates = outcome['dates']
             self.ghl_date_fields = found_dates
 
             # Rebuild dropdown options — Birthday is always present
@@ -1761,16 +1797,23 @@ class CardPreviewGUI:
                     text=f"Found {count} date field{'s' if count != 1 else ''} from GHL")
             else:
                 self._date_info_label.config(text="No date fields found on this contact")
-
-        except Exception as e:
-            messagebox.showwarning("Error", f"Failed to fetch dates: {e}")
         finally:
             self._date_refresh_btn.config(state='normal', text="\u21bb")
 
     # ── Pending card check ─────────────────────────────────────────────────
 
+    def _mirrored_orders(self) -> list:
+        """Orders for this recipient from the local Cardly order mirror (no API call)."""
+        recip = self.recipient or {}
+        return find_orders(CARDLY_API_KEY, name=recip.get('name', '') or self.first_name,
+                           address1=recip.get('address1', ''), postcode=recip.get('postcode', ''))
+
     def _check_pending_cards_bg(self):
-        """Check Cardly for existing orders for this recipient (runs in background thread)."""
+        """Check for existing orders for this recipient (runs in background thread).
+
+        Answers from the local order mirror straight away, then refreshes the
+        mirror from Cardly and updates the button if anything changed.
+        """
         import threading
 
         recip_name = ""
@@ -1784,8 +1827,24 @@ class CardPreviewGUI:
         # Use full name for exact match when available; first name only used as API search needle
         full_name = recip_name.strip().lower()
 
+        def _show(orders):
+            self._pending_orders = orders
+            self.root.after(0, lambda: self._update_pending_btn(orders))
+
         def _worker():
             try:
+                age = mirror_age(CARDLY_API_KEY)
+                mirrored = age is not None
+                if mirrored:
+                    _show(self._mirrored_orders())
+                    if age < REFRESH_MAX_AGE:
+                        return
+                sync = sync_orders(CARDLY_API_KEY)
+                if sync.get('success') or mirrored:
+                    _show(self._mirrored_orders())
+                    return
+                debug_print(f"Cardly order sync failed: {sync.get('error')}")
+                # Never mirrored and Cardly sync failed: fall back to the recent pages
                 result = list_recent_orders(recipient_name=recip_name)
                 if result.get('success'):
                     orders = result.get('orders', [])
@@ -1795,8 +1854,7 @@ class CardPreviewGUI:
                     if full_name:
                         orders = [o for o in orders
                                   if o.get('recipient_name', '').strip().lower() == full_name]
-                    self._pending_orders = orders
-                    self.root.after(0, lambda: self._update_pending_btn(orders))
+                    _show(orders)
             except Exception as e:
                 debug_print(f"Pending card check failed: {e}")
 
@@ -2058,7 +2116,7 @@ class CardPreviewGUI:
             # Auto-swap orientation to match image if alt template available
             if self.has_alt_orientation:
                 try:
-                    img = Image.open(self.images[index])
+                    img = self._open_image(self.images[index])
                     img_w, img_h = img.size
                     img.close()
                     img_is_portrait = img_h > img_w
@@ -2073,29 +2131,12 @@ class CardPreviewGUI:
 
     def _icc_to_srgb(self, img):
         """Convert image from embedded ICC profile to sRGB for display.
-        If no profile is embedded, assume sRGB (no conversion needed)."""
-        src_icc = img.info.get('icc_profile')
-        if not src_icc or img.mode not in ('RGB', 'CMYK'):
-            return img
+        If no profile is embedded, assume sRGB (no conversion needed).
+        Transforms are built once per profile (see cardly_send_card.to_srgb)."""
         try:
-            src_prof = ImageCms.ImageCmsProfile(_io.BytesIO(src_icc))
-            if img.mode == 'CMYK':
-                img = ImageCms.profileToProfile(
-                    img, src_prof, _SRGB_PROFILE,
-                    renderingIntent=ImageCms.Intent.PERCEPTUAL,
-                    outputMode='RGB'
-                )
-            else:
-                prof_desc = ImageCms.getProfileDescription(src_prof).strip()
-                if prof_desc and 'srgb' not in prof_desc.lower():
-                    img = ImageCms.profileToProfile(
-                        img, src_prof, _SRGB_PROFILE,
-                        renderingIntent=ImageCms.Intent.PERCEPTUAL,
-                        outputMode='RGB'
-                    )
+            return to_srgb(img)
         except Exception:
-            pass  # on failure, display as-is
-        return img
+            return img  # on failure, display as-is
 
     def update_preview(self):
         """Update the preview canvas with current image and crop."""
@@ -2105,7 +2146,7 @@ class CardPreviewGUI:
         try:
             # Load current image (never rotated — rotation is applied to the crop border)
             img_path = self.images[self.current_index]
-            img = Image.open(img_path)
+            img = self._open_image(img_path)
 
             # Store original dimensions
             orig_w, orig_h = img.size
@@ -2253,11 +2294,8 @@ class CardPreviewGUI:
                     sticker_px = int(cx_d + off_x * cos_r - off_y * sin_r - sticker_w / 2)
                     sticker_py = int(cy_d + off_x * sin_r + off_y * cos_r - sticker_h / 2)
 
-                    # Rotate sticker image to match crop rotation
-                    resized_sticker = self.sticker_image.resize((sticker_w, sticker_h), Image.Resampling.LANCZOS)
-                    rotated_stk = resized_sticker.rotate(-self.rotation,
-                                                         resample=Image.Resampling.BICUBIC,
-                                                         expand=True)
+                    # Rotate sticker image to match crop rotation (scaled/rotated tiles are cached)
+                    rotated_stk = sticker_tile(self.sticker_path, (sticker_w, sticker_h), self.rotation)
                     # Adjust anchor for expanded size
                     sticker_px -= (rotated_stk.width - sticker_w) // 2
                     sticker_py -= (rotated_stk.height - sticker_h) // 2
@@ -2269,8 +2307,8 @@ class CardPreviewGUI:
                     sticker_px = rect_x1 + int(max_sx * rel_sx)
                     sticker_py = rect_y1 + int(max_sy * rel_sy)
 
-                    # Resize and draw sticker
-                    resized_sticker = self.sticker_image.resize((sticker_w, sticker_h), Image.Resampling.LANCZOS)
+                    # Resize and draw sticker (scaled tiles are cached per size)
+                    resized_sticker = sticker_tile(self.sticker_path, (sticker_w, sticker_h))
                     self.sticker_photo = ImageTk.PhotoImage(resized_sticker)
                     self.preview_canvas.create_image(sticker_px, sticker_py,
                                                     anchor='nw', image=self.sticker_photo)
@@ -2426,7 +2464,7 @@ class CardPreviewGUI:
         else:
             self.sticker_path = os.path.join(self.sticker_folder, selection)
             try:
-                self.sticker_image = Image.open(self.sticker_path)
+                self.sticker_image = sticker_source(self.sticker_path)
             except Exception as e:
                 print(f"Error loading sticker: {e}")
                 self.sticker_image = None
@@ -2550,8 +2588,31 @@ class CardPreviewGUI:
         if big_path:
             return big_path
 
-        # 5. Fall back to the displayed thumbnail
-        return display_path
+        # 5. Fall back to the displayed thumbnail (written to disk only now)
+        return self._materialise_thumb(display_path)
+
+    def _open_image(self, path: str) -> Image.Image:
+        """Open an image from the in-memory PSA thumbnails, or from disk."""
+        data = self._thumb_data(path)
+        if data is not None:
+            return Image.open(_io.BytesIO(data))
+        return Image.open(path)
+
+    def _materialise_thumb(self, path: str) -> str:
+        """Write an in-memory PSA thumbnail to its path so file-based tools can use it.
+
+        Returns the path unchanged (also for images that already live on disk).
+        """
+        data = self._thumb_data(path)
+        if data is not None:
+            # Always rewrite: the shared temp folder may hold another album's file
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+            except OSError as e:
+                print(f"Error writing thumbnail {path}: {e}")
+        return path
 
     def _extract_bigimage_for(self, base_name: str) -> str | None:
         """Extract a single image from BigImages table as a fallback.
@@ -2710,7 +2771,8 @@ class CardPreviewGUI:
         """
         from datetime import datetime, timedelta
 
-        orders = getattr(self, '_pending_orders', None)
+        # Re-read the mirror: a background refresh may have finished since opening
+        orders = self._mirrored_orders() or getattr(self, '_pending_orders', None)
         if not orders:
             return True
 
@@ -2888,19 +2950,24 @@ class CardPreviewGUI:
             print(f"[Cardly Send] sticker_x={self.sticker_x}  sticker_y={self.sticker_y}  "
                   f"sticker_zoom={self.sticker_zoom}")
 
-            processed_path = resize_image_for_cardly(
+            # Decode/colour-manage/crop the hi-res original once; the sticker
+            # artwork and the clean postcard are both derived from it.
+            pipeline = CardImagePipeline(
                 hires_path,
                 crop_x=int(self.crop_x),
                 crop_y=int(self.crop_y),
                 zoom=self.zoom,
-                sticker_path=self.sticker_path,
-                sticker_x=int(self.sticker_x),
-                sticker_y=int(self.sticker_y),
-                sticker_zoom=self.sticker_zoom,
                 card_width=self.card_width,
                 card_height=self.card_height,
                 rotation=self.rotation
             )
+            processed_path = pipeline.render(
+                sticker_path=self.sticker_path,
+                sticker_x=int(self.sticker_x),
+                sticker_y=int(self.sticker_y),
+                sticker_zoom=self.sticker_zoom
+            )
+            print(f"[Cardly Send] Artwork render: {pipeline.timing_summary()}")
 
             # Save a proof copy
             if processed_path and os.path.exists(processed_path) and self.postcard_folder:
@@ -2943,23 +3010,14 @@ class CardPreviewGUI:
                 )
                 if not order_result.get('success'):
                     raise Exception(f"Failed to place order: {order_result.get('error')}")
+                # Pull the new order into the local mirror for later duplicate checks
+                refresh_in_background(CARDLY_API_KEY, max_age=0)
 
             # --- Post-send: save JPG to postcard folder & upload to GHL ---
             q.put(('status', 'Saving postcard...'))
             try:
-                clean_path = resize_image_for_cardly(
-                    hires_path,
-                    crop_x=int(self.crop_x),
-                    crop_y=int(self.crop_y),
-                    zoom=self.zoom,
-                    sticker_path=None,
-                    sticker_x=0,
-                    sticker_y=0,
-                    sticker_zoom=0,
-                    card_width=self.card_width,
-                    card_height=self.card_height,
-                    rotation=self.rotation
-                )
+                clean_path = pipeline.render(sticker_path=None)
+                print(f"[Cardly Send] Total render: {pipeline.timing_summary()}")
 
                 from PIL import Image as _PILImg
                 clean_img = _PILImg.open(clean_path)
@@ -32,7 +32,11 @@ import os
 import io
 import math
 import base64
+import hashlib
 import re
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
 
 # Auto-install dependencies
@@ -51,6 +55,9 @@ import requests
 from PIL import Image, ImageCms
 from PIL.ExifTags import Base as ExifBase
 
+import ghl_custom_fields
+import sidekick_config
+
 # sRGB ICC profile for colour-accurate output
 _SRGB_PROFILE = ImageCms.createProfile('sRGB')
 
@@ -84,33 +91,27 @@ def _load_cardly_credentials():
     ]
 
     for cred_path in possible_paths:
-        if os.path.exists(cred_path):
-            try:
-                with open(cred_path, 'r', encoding='utf-8-sig') as f:
-                    content = f.read()
-
-                # Try new format (base64 encoded in shared credentials.json)
-                cardly_key_match = re.search(r'"cardly_api_key_b64"\s*:\s*"([^"]*)"', content)
-                if cardly_key_match:
-                    api_key = _decode_api_key(cardly_key_match.group(1)) if cardly_key_match.group(1) else ''
-                    media_match = re.search(r'"cardly_media_id"\s*:\s*"([^"]*)"', content)
-                    media_id = media_match.group(1) if media_match else ''
-                    dash_match = re.search(r'"cardly_dashboard_url"\s*:\s*"([^"]*)"', content)
-                    dashboard_url = dash_match.group(1) if dash_match else ''
-                    if api_key:
-                        return api_key, media_id, {'dashboard_url': dashboard_url}
-
-                # Legacy format (plain api_key in cardly_credentials.json)
-                data = json.loads(content)
-                api_key = data.get('api_key', '')
-                if api_key.startswith('live_') or api_key.startswith('test_'):
-                    return api_key, data.get('media_id', ''), data
-                elif api_key:
-                    return _decode_api_key(api_key), data.get('media_id', ''), data
-
-            except Exception as e:
-                print(f"[WARN] Error loading {cred_path}: {e}")
-                continue
+        data = sidekick_config.read_json(cred_path)
+        if not data:
+            continue
+        try:
+            # Try new format (base64 encoded in shared credentials.json)
+            if 'cardly_api_key_b64' in data:
+                encoded = data.get('cardly_api_key_b64') or ''
+                api_key = _decode_api_key(encoded) if encoded else ''
+                if api_key:
+                    return api_key, data.get('cardly_media_id', ''), {'dashboard_url': data.get('cardly_dashboard_url', '')}
+
+            # Legacy format (plain api_key in cardly_credentials.json)
+            api_key = data.get('api_key', '')
+            if api_key.startswith('live_') or api_key.startswith('test_'):
+                return api_key, data.get('media_id', ''), dict(data)
+            elif api_key:
+                return _decode_api_key(api_key), data.get('media_id', ''), dict(data)
+
+        except Exception as e:
+            print(f"[WARN] Error loading {cred_path}: {e}")
+            continue
     return '', '', {}
 
 def _load_ghl_credentials():
@@ -124,18 +125,13 @@ def _load_ghl_credentials():
     ]
 
     for cred_path in possible_paths:
-        if os.path.exists(cred_path):
-            try:
-                with open(cred_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                api_match = re.search(r'"api_key_b64"\s*:\s*"([^"]+)"', content)
-                api_key = _decode_api_key(api_match.group(1)) if api_match else ''
-                loc_match = re.search(r'"location_id"\s*:\s*"([^"]+)"', content)
-                location_id = loc_match.group(1) if loc_match else ''
-                if api_key:
-                    return api_key, location_id
-            except Exception:
-                continue
+        creds = sidekick_config.read_json(cred_path)
+        if not creds:
+            continue
+        api_key = _decode_api_key(str(creds.get('api_key_b64') or ''))
+        location_id = str(creds.get('location_id') or '')
+        if api_key:
+            return api_key, location_id
     return '', ''
 
 # Load credentials
@@ -163,11 +159,12 @@ GHL_BASE_URL = "https://services.leadconnectorhq.com"
 _ghl_address_field_ids = {}  # e.g. {"address2": "9ZaP...", "address3": "LtIw..."}
 
 def _get_ghl_address_field_ids() -> dict:
-    """Fetch and cache GHL custom field IDs for Address2 and Address3.
+    """Look up (and cache) GHL custom field IDs for Address2 and Address3.
 
     GHL stores address2/address3 as custom fields (fieldKey: contact.address2,
-    contact.address3) rather than standard contact fields. This function calls
-    the custom fields API once per session to look up their IDs.
+    contact.address3) rather than standard contact fields. Their IDs come from
+    the shared, disk-cached field definitions (ghl_custom_fields), so the
+    custom fields API is called at most once per FIELD_TTL across tools.
     """
     global _ghl_address_field_ids
     if _ghl_address_field_ids:
@@ -181,15 +178,12 @@ def _get_ghl_address_field_ids() -> dict:
             "Authorization": f"Bearer {GHL_API_KEY}",
             "Version": "2021-07-28"
         }
-        url = f"{GHL_BASE_URL}/locations/{GHL_LOCATION_ID}/customFields"
-        resp = requests.get(url, headers=headers, timeout=10)
-        if resp.status_code == 200:
-            for cf in resp.json().get('customFields', []):
-                fk = cf.get('fieldKey', '')
-                if fk == 'contact.address2':
-                    _ghl_address_field_ids['address2'] = cf['id']
-                elif fk == 'contact.address3':
-                    _ghl_address_field_ids['address3'] = cf['id']
+        fields = ghl_custom_fields.get_field_definitions(headers, GHL_LOCATION_ID)
+        by_key = ghl_custom_fields.field_ids_by_key(fields, 'contact.address2', 'contact.address3')
+        if 'contact.address2' in by_key:
+            _ghl_address_field_ids['address2'] = by_key['contact.address2']
+        if 'contact.address3' in by_key:
+            _ghl_address_field_ids['address3'] = by_key['contact.address3']
     except Exception:
         pass  # Silently fail — address2/3 won't be available but core works
 
@@ -235,6 +229,441 @@ def debug_print(msg):
 # Image Processing
 # =============================================================================
 
+# Built source-profile → sRGB transforms, keyed by (profile hash, mode, intent).
+# Nearly every original carries the same Adobe RGB or camera profile, so the
+# profile is parsed and the LittleCMS transform built once, not per image.
+ICC_CACHE_SIZE = 16
+_icc_transforms = OrderedDict()
+_icc_lock = threading.Lock()
+
+
+def srgb_transform(src_icc: bytes, mode: str = 'RGB',
+                   intent=ImageCms.Intent.PERCEPTUAL) -> tuple:
+    """
+    Cached transform from an embedded ICC profile to sRGB.
+
+    Returns (transform, description, error):
+    - transform is None when no conversion is needed (RGB already tagged
+      sRGB) or the profile is unusable (error says why)
+    - the sRGB check and failures are cached along with built transforms
+    """
+    key = (hashlib.sha1(src_icc).digest(), mode, int(intent))
+    with _icc_lock:
+        entry = _icc_transforms.get(key)
+        if entry is not None:
+            _icc_transforms.move_to_end(key)
+            return entry
+
+    try:
+        src_prof = ImageCms.ImageCmsProfile(io.BytesIO(src_icc))
+        prof_desc = ImageCms.getProfileDescription(src_prof).strip()
+        if mode == 'RGB' and (not prof_desc or 'srgb' in prof_desc.lower()):
+            entry = (None, prof_desc, '')
+        else:
+            transform = ImageCms.buildTransform(src_prof, _SRGB_PROFILE, mode, 'RGB',
+                                                renderingIntent=intent)
+            entry = (transform, prof_desc, '')
+    except Exception as e:
+        entry = (None, '', str(e) or type(e).__name__)
+
+    with _icc_lock:
+        _icc_transforms[key] = entry
+        while len(_icc_transforms) > ICC_CACHE_SIZE:
+            _icc_transforms.popitem(last=False)
+    return entry
+
+
+def to_srgb(img: Image.Image) -> Image.Image:
+    """
+    Convert an RGB or CMYK image from its embedded profile to sRGB.
+
+    RGB images are transformed in place (no second full-size buffer); CMYK
+    gets a new RGB image. The embedded profile is dropped from img.info once
+    converted. Images without a profile, already sRGB, or with an unusable
+    profile are returned unchanged.
+    """
+    src_icc = img.info.get('icc_profile')
+    if not src_icc or img.mode not in ('RGB', 'CMYK'):
+        return img
+    transform, _desc, _error = srgb_transform(src_icc, img.mode)
+    if transform is None:
+        return img
+    img.load()
+    if img.mode == 'RGB':
+        ImageCms.applyTransform(img, transform, inPlace=True)
+    else:
+        img = ImageCms.applyTransform(img, transform)
+    img.info.pop('icc_profile', None)
+    return img
+
+# Sticker PNGs decoded to RGBA once, and LANCZOS-scaled (optionally rotated)
+# tiles of them, keyed by (path, mtime, size, pixel size, rotation). The GUI
+# preview redraws the sticker on every slider tick and a campaign reuses
+# the same sticker for every card, so both hit this cache.
+STICKER_CACHE_SIZE = 32
+_sticker_tiles = OrderedDict()
+_sticker_lock = threading.Lock()
+
+
+def _sticker_cached(key: tuple, build) -> Image.Image:
+    with _sticker_lock:
+        tile = _sticker_tiles.get(key)
+        if tile is not None:
+            _sticker_tiles.move_to_end(key)
+            return tile
+    tile = build()
+    with _sticker_lock:
+        _sticker_tiles[key] = tile
+        while len(_sticker_tiles) > STICKER_CACHE_SIZE:
+            _sticker_tiles.popitem(last=False)
+    return tile
+
+
+def sticker_source(sticker_path: str) -> Image.Image:
+    """The sticker file decoded as RGBA (cached until the file changes).
+
+    Raises:
+        OSError: If the file cannot be read or decoded.
+    """
+    st = os.stat(sticker_path)
+    key = (os.path.abspath(sticker_path), st.st_mtime_ns, st.st_size)
+
+    def _load():
+        with Image.open(sticker_path) as sticker:
+            return sticker.convert('RGBA')  # convert() always returns a loaded copy
+
+    return _sticker_cached(key, _load)
+
+
+def sticker_tile(sticker_path: str, size: tuple, rotation: int = 0) -> Image.Image:
+    """The sticker scaled to size (w, h) with LANCZOS, optionally rotated.
+
+    Tiles are shared: callers must not modify the returned image.
+    Pillow resamples RGBA in premultiplied form, so edges don't pick up dark
+    fringes from transparent pixels.
+    """
+    source = sticker_source(sticker_path)
+    st = os.stat(sticker_path)
+    key = (os.path.abspath(sticker_path), st.st_mtime_ns, st.st_size, tuple(size), rotation)
+
+    def _scale():
+        tile = source.resize(tuple(size), Image.Resampling.LANCZOS)
+        if rotation:
+            tile = tile.rotate(-rotation, resample=Image.Resampling.BICUBIC, expand=True)
+        return tile
+
+    return _sticker_cached(key, _scale)
+
+
+def _decode_source(image_path: str) -> Image.Image:
+    """Stage 1 – open the original and apply its EXIF orientation."""
+    with Image.open(image_path) as src:
+        # ── Auto-orient from EXIF ("Don't rotate any images") ──
+        # Apply EXIF orientation so the image is upright before processing.
+        # Cardly says: "provide them in the same orientation as you would view them."
+        try:
+            from PIL import ImageOps
+            img = ImageOps.exif_transpose(src)
+        except Exception:
+            img = None  # no EXIF or unsupported – carry on
+        if img is None or img is src:
+            src.load()
+            img = src.copy()
+            img.info = dict(src.info)
+    return img
+
+
+def _colour_manage(img: Image.Image, skip_icc: bool = False) -> Image.Image:
+    """Stage 2 – convert to RGB, with an ICC-aware transform to sRGB."""
+    # ── Colour-space conversion to RGB / sRGB ──
+    # Cardly requires RGB colour, not CMYK.  We use ICC-aware transforms
+    # when the source image embeds a colour profile for accurate conversion.
+    src_icc = img.info.get('icc_profile')
+
+    if img.mode == 'CMYK':
+        # CMYK must always be converted to RGB (ICC-aware when possible)
+        if src_icc and not skip_icc:
+            transform, _desc, error = srgb_transform(src_icc, 'CMYK')
+            if transform is not None:
+                img = ImageCms.applyTransform(img, transform)
+                debug_print("CMYK → sRGB via embedded ICC profile")
+            else:
+                debug_print(f"[WARN] ICC transform failed, falling back to naive convert: {error}")
+                img = img.convert('RGB')
+        else:
+            debug_print("CMYK image – naive convert to RGB (skip_icc={})" .format(skip_icc))
+            img = img.convert('RGB')
+
+    elif img.mode in ('RGBA', 'LA', 'P'):
+        # Flatten transparency onto white (Cardly prints on white stock)
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        if img.mode == 'P':
+            img = img.convert('RGBA')
+        background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
+        img = background
+        debug_print(f"Flattened transparency onto white background")
+
+    elif img.mode != 'RGB':
+        # L, I, F, etc.
+        img = img.convert('RGB')
+        debug_print(f"Converted {img.mode} → RGB")
+
+    # ── Convert non-sRGB RGB images (e.g. Adobe RGB) → sRGB ──
+    # ProSelect may export in Adobe RGB (1998) which has a wider gamut.
+    # A direct pass-through would cause washed-out / shifted colours on
+    # Cardly's sRGB print pipeline, so we do an ICC-aware transform.
+    if not skip_icc and img.mode == 'RGB' and src_icc:
+        # Only transform if the profile is NOT already sRGB (cached per profile)
+        transform, prof_desc, error = srgb_transform(src_icc, 'RGB')
+        if transform is not None:
+            # In place: the decoded image is ours, no second full-size buffer
+            ImageCms.applyTransform(img, transform, inPlace=True)
+            debug_print(f"Converted '{prof_desc}' → sRGB via ICC transform")
+        elif error:
+            debug_print(f"[WARN] ICC profile read/transform failed, using as-is: {error}")
+        else:
+            debug_print(f"Source already sRGB ('{prof_desc}') – no conversion needed")
+    elif skip_icc:
+        debug_print("Skipping ICC profile conversion (skip_icc=True)")
+
+    # Strip any leftover ICC profile – we embed sRGB on save instead
+    if 'icc_profile' in img.info:
+        del img.info['icc_profile']
+    return img
+
+
+def _fit_to_card(img: Image.Image, target_w: int, target_h: int, crop_x: int = 50, crop_y: int = 50,
+                 zoom: int = 100, rotation: int = 0) -> Image.Image:
+    """Stage 3 – rotate, crop and LANCZOS-resize to the card size."""
+    # ── Apply rotation before cropping ──
+    # The preview shows a rotated crop border on the unrotated image.
+    # To produce the same result here we:
+    #   1. Compute the crop on the original (unrotated) image
+    #   2. Shrink the crop so its rotated bounding box stays within bounds
+    #   3. Rotate the image (expand=True) and crop the matching area
+    rot_scale = 1.0
+    if rotation != 0:
+        angle_rad = math.radians(abs(rotation))
+        cos_a = math.cos(angle_rad)
+        sin_a = math.sin(angle_rad)
+
+    orig_w, orig_h = img.size
+    target_ratio = target_w / target_h
+
+    # Calculate zoom-adjusted crop area
+    # At zoom=100, we take the largest area that matches card ratio
+    # At zoom=200, we take half that area (2x zoom in)
+    zoom_factor = zoom / 100.0
+
+    # Determine the crop area size based on source image orientation
+    orig_ratio = orig_w / orig_h
+
+    if orig_ratio >= target_ratio:
+        # Image is wider than card ratio - constrain by height
+        base_crop_h = orig_h
+        base_crop_w = base_crop_h * target_ratio
+    else:
+        # Image is taller than card ratio - constrain by width
+        base_crop_w = orig_w
+        base_crop_h = base_crop_w / target_ratio
+
+    # Apply zoom (zoom in = smaller crop area)
+    crop_w = base_crop_w / zoom_factor
+    crop_h = base_crop_h / zoom_factor
+
+    # Calculate crop position based on crop_x and crop_y percentages
+    # crop_x/y: 0=left/top edge, 50=center, 100=right/bottom edge
+    max_offset_x = orig_w - crop_w
+    max_offset_y = orig_h - crop_h
+
+    # Clamp crop_x and crop_y to 0-100
+    crop_x = max(0, min(100, crop_x))
+    crop_y = max(0, min(100, crop_y))
+
+    crop_left = max_offset_x * (crop_x / 100.0)
+    crop_top = max_offset_y * (crop_y / 100.0)
+
+    # ── Rotation shrink: keep rotated crop inside image bounds ──
+    if rotation != 0:
+        crop_cx = crop_left + crop_w / 2
+        crop_cy = crop_top + crop_h / 2
+        hw = crop_w / 2
+        hh = crop_h / 2
+        bbox_hw = hw * cos_a + hh * sin_a
+        bbox_hh = hw * sin_a + hh * cos_a
+        space_x = min(crop_cx, orig_w - crop_cx)
+        space_y = min(crop_cy, orig_h - crop_cy)
+        if bbox_hw > 0:
+            rot_scale = min(rot_scale, space_x / bbox_hw)
+        if bbox_hh > 0:
+            rot_scale = min(rot_scale, space_y / bbox_hh)
+        crop_w *= rot_scale
+        crop_h *= rot_scale
+        crop_left = crop_cx - crop_w / 2
+        crop_top = crop_cy - crop_h / 2
+        debug_print(f"Rotation {rotation}° → shrink factor {rot_scale:.4f}, "
+                    f"crop {crop_w:.0f}x{crop_h:.0f}")
+
+        # Now rotate the image and adjust crop coordinates
+        img = img.rotate(-rotation, resample=Image.Resampling.BICUBIC,
+                         expand=True, fillcolor=(0, 0, 0))
+        new_w, new_h = img.size
+        # The original centre shifted by the expand padding
+        dx = (new_w - orig_w) / 2
+        dy = (new_h - orig_h) / 2
+        crop_left += dx
+        crop_top += dy
+
+    debug_print(f"Original: {orig_w}x{orig_h}, Crop area: {crop_w:.0f}x{crop_h:.0f}")
+    debug_print(f"Crop position: left={crop_left:.0f}, top={crop_top:.0f}")
+
+    # Crop the selected region
+    img = img.crop((
+        int(crop_left),
+        int(crop_top),
+        int(crop_left + crop_w),
+        int(crop_top + crop_h)
+    ))
+
+    # Resize cropped area to target dimensions
+    img = img.resize((target_w, target_h), Image.Resampling.LANCZOS)
+
+    debug_print(f"Final size: {img.size}")
+    return img
+
+
+def _apply_sticker(img: Image.Image, sticker_path: str = None, sticker_x: int = 75,
+                   sticker_y: int = 75, sticker_zoom: int = 50) -> Image.Image:
+    """Variant stage – composite a sticker overlay onto a copy of the card."""
+    target_w, target_h = img.size
+    if sticker_path and os.path.exists(sticker_path):
+        print(f"[Sticker] Applying: {os.path.basename(sticker_path)} "
+              f"pos=({sticker_x}%, {sticker_y}%) zoom={sticker_zoom}%")
+        try:
+            sticker_w, sticker_h = sticker_source(sticker_path).size
+
+            # Scale sticker based on sticker_zoom (percentage of card width)
+            sticker_pct = sticker_zoom / 100.0
+            max_sticker_size = int(target_w * sticker_pct)
+
+            # Scale proportionally
+            scale = min(max_sticker_size / sticker_w, max_sticker_size / sticker_h)
+            new_sticker_w = int(sticker_w * scale)
+            new_sticker_h = int(sticker_h * scale)
+            sticker = sticker_tile(sticker_path, (new_sticker_w, new_sticker_h))
+
+            # Calculate sticker position (percentage of card dimensions)
+            # Position is center of sticker, clamped to keep sticker mostly on card
+            pos_x = int((target_w - new_sticker_w) * (sticker_x / 100.0))
+            pos_y = int((target_h - new_sticker_h) * (sticker_y / 100.0))
+
+            # Blend only the sticker's footprint, on a copy so the shared
+            # base is left untouched (no RGB→RGBA→RGB round trip of the card)
+            img = img.copy()
+            img.paste(sticker, (pos_x, pos_y), sticker)
+
+            print(f"[Sticker] Composited OK: {new_sticker_w}x{new_sticker_h} "
+                  f"at pixel ({pos_x}, {pos_y})")
+        except Exception as e:
+            print(f"[Sticker] ** FAILED to apply sticker: {e} **")
+    elif sticker_path:
+        print(f"[Sticker] ** Path not found: {sticker_path} **")
+    else:
+        print("[Sticker] No sticker requested for this image")
+    return img
+
+
+def _save_card_png(img: Image.Image, output_path: str, skip_icc: bool = False) -> str:
+    """Variant stage – write Cardly-ready PNG artwork (sRGB embedded)."""
+    # ── Embed sRGB ICC profile for colour-accurate printing ──
+    if skip_icc:
+        srgb_bytes = None
+    else:
+        srgb_bytes = ImageCms.ImageCmsProfile(_SRGB_PROFILE).tobytes()
+
+    # Cardly only accepts PNG artwork – save as optimised PNG.
+    save_kwargs = {'optimize': True}
+    if srgb_bytes:
+        save_kwargs['icc_profile'] = srgb_bytes
+    img.save(output_path, 'PNG', **save_kwargs)
+    file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    debug_print(f"PNG size: {file_size_mb:.2f} MB{' (sRGB embedded)' if srgb_bytes else ' (no ICC)'}")
+
+    if file_size_mb > CARDLY_MAX_SIZE_MB:
+        # Re-save with maximum PNG compression (zlib level 9)
+        img.save(output_path, 'PNG', compress_level=9, **save_kwargs)
+        file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
+        debug_print(f"PNG (compress_level=9): {file_size_mb:.2f} MB")
+
+    if file_size_mb > CARDLY_MAX_SIZE_MB:
+        print(f"[WARN] PNG is {file_size_mb:.2f} MB – exceeds {CARDLY_MAX_SIZE_MB} MB limit")
+
+    return output_path
+
+
+class CardImagePipeline:
+    """
+    Staged Cardly render: decode → colour-manage → geometric, then variants.
+
+    The three shared stages run once, on first use, and leave a card-sized
+    sRGB base image. Each render() call derives one output from that base
+    (optionally with a sticker), so the artwork and the clean postcard no
+    longer re-open and re-process the full-resolution original.
+
+    Per-stage timings (seconds) accumulate in self.timings:
+    decode, colour, geometry, then sticker and encode summed over variants.
+    """
+
+    def __init__(self, image_path: str, crop_x: int = 50, crop_y: int = 50, zoom: int = 100,
+                 card_width: int = None, card_height: int = None,
+                 skip_icc: bool = False, rotation: int = 0):
+        self.image_path = image_path
+        self.crop_x = crop_x
+        self.crop_y = crop_y
+        self.zoom = zoom
+        self.rotation = rotation
+        self.skip_icc = skip_icc
+        # Use supplied dimensions or fall back to module defaults
+        self.target_w = int(card_width) if card_width else CARDLY_WIDTH
+        self.target_h = int(card_height) if card_height else CARDLY_HEIGHT
+        self.timings = {}
+        self._base = None
+
+    def _timed(self, stage: str, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - start
+        return result
+
+    @property
+    def base(self) -> Image.Image:
+        """Card-sized sRGB image shared by every variant (built on first use)."""
+        if self._base is None:
+            debug_print(f"Processing image: {self.image_path}")
+            debug_print(f"Crop settings: x={self.crop_x}%, y={self.crop_y}%, zoom={self.zoom}%, "
+                        f"rotation={self.rotation}°")
+            debug_print(f"Target card size: {self.target_w}x{self.target_h}px")
+            img = self._timed('decode', _decode_source, self.image_path)
+            img = self._timed('colour', _colour_manage, img, self.skip_icc)
+            self._base = self._timed('geometry', _fit_to_card, img, self.target_w, self.target_h,
+                                     self.crop_x, self.crop_y, self.zoom, self.rotation)
+        return self._base
+
+    def render(self, output_path: str = None, sticker_path: str = None, sticker_x: int = 75,
+               sticker_y: int = 75, sticker_zoom: int = 50) -> str:
+        """Write one PNG variant of the card and return its path."""
+        if output_path is None:
+            output_path = os.path.join(_get_output_dir(), "cardly_processed.png")
+        img = self._timed('sticker', _apply_sticker, self.base, sticker_path,
+                          sticker_x, sticker_y, sticker_zoom)
+        return self._timed('encode', _save_card_png, img, output_path, self.skip_icc)
+
+    def timing_summary(self) -> str:
+        """One-line 'stage=ms' breakdown for logs."""
+        parts = [f"{stage}={secs * 1000:.0f}ms" for stage, secs in self.timings.items()]
+        return ', '.join(parts) + f" (total {sum(self.timings.values()) * 1000:.0f}ms)"
+
+
 def resize_image_for_cardly(image_path: str, output_path: str = None,
                             crop_x: int = 50, crop_y: int = 50, zoom: int = 100,
                             sticker_path: str = None, sticker_x: int = 75, sticker_y: int = 75,
@@ -262,255 +691,17 @@ def resize_image_for_cardly(image_path: str, output_path: str = None,
     - card_width: Target width in pixels (from Cardly API art.px.width)
     - card_height: Target height in pixels (from Cardly API art.px.height)
 
+    Single-output wrapper around CardImagePipeline; use the pipeline directly
+    when more than one variant of the same crop is needed.
+
     Returns path to processed image.
     """
-    if output_path is None:
-        output_dir = _get_output_dir()
-        output_path = os.path.join(output_dir, "cardly_processed.png")
-
-    debug_print(f"Processing image: {image_path}")
-    debug_print(f"Crop settings: x={crop_x}%, y={crop_y}%, zoom={zoom}%, rotation={rotation}°")
-
-    # Use supplied dimensions or fall back to module defaults
-    target_w = int(card_width) if card_width else CARDLY_WIDTH
-    target_h = int(card_height) if card_height else CARDLY_HEIGHT
-    debug_print(f"Target card size: {target_w}x{target_h}px")
-
-    with Image.open(image_path) as img:
-        # ── Auto-orient from EXIF ("Don't rotate any images") ──
-        # Apply EXIF orientation so the image is upright before processing.
-        # Cardly says: "provide them in the same orientation as you would view them."
-        try:
-            from PIL import ImageOps
-            img = ImageOps.exif_transpose(img)
-        except Exception:
-            pass  # no EXIF or unsupported – carry on
-
-        # ── Colour-space conversion to RGB / sRGB ──
-        # Cardly requires RGB colour, not CMYK.  We use ICC-aware transforms
-        # when the source image embeds a colour profile for accurate conversion.
-        src_icc = img.info.get('icc_profile')
-
-        if img.mode == 'CMYK':
-            # CMYK must always be converted to RGB (ICC-aware when possible)
-            if src_icc and not skip_icc:
-                try:
-                    src_prof = ImageCms.ImageCmsProfile(io.BytesIO(src_icc))
-                    img = ImageCms.profileToProfile(
-                        img, src_prof, _SRGB_PROFILE,
-                        renderingIntent=ImageCms.Intent.PERCEPTUAL,
-                        outputMode='RGB'
-                    )
-                    debug_print("CMYK → sRGB via embedded ICC profile")
-                except Exception as e:
-                    debug_print(f"[WARN] ICC transform failed, falling back to naive convert: {e}")
-                    img = img.convert('RGB')
-            else:
-                debug_print("CMYK image – naive convert to RGB (skip_icc={})" .format(skip_icc))
-                img = img.convert('RGB')
-
-        elif img.mode in ('RGBA', 'LA', 'P'):
-            # Flatten transparency onto white (Cardly prints on white stock)
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode in ('RGBA', 'LA') else None)
-            img = background
-            debug_print(f"Flattened transparency onto white background")
-
-        elif img.mode != 'RGB':
-            # L, I, F, etc.
-            img = img.convert('RGB')
-            debug_print(f"Converted {img.mode} → RGB")
-
-        # ── Convert non-sRGB RGB images (e.g. Adobe RGB) → sRGB ──
-        # ProSelect may export in Adobe RGB (1998) which has a wider gamut.
-        # A direct pass-through would cause washed-out / shifted colours on
-        # Cardly's sRGB print pipeline, so we do an ICC-aware transform.
-        if not skip_icc and img.mode == 'RGB' and src_icc:
-            try:
-                src_prof = ImageCms.ImageCmsProfile(io.BytesIO(src_icc))
-                prof_desc = ImageCms.getProfileDescription(src_prof).strip()
-                # Only transform if the profile is NOT already sRGB
-                if prof_desc and 'srgb' not in prof_desc.lower():
-                    img = ImageCms.profileToProfile(
-                        img, src_prof, _SRGB_PROFILE,
-                        renderingIntent=ImageCms.Intent.PERCEPTUAL,
-                        outputMode='RGB'
-                    )
-                    debug_print(f"Converted '{prof_desc}' → sRGB via ICC transform")
-                else:
-                    debug_print(f"Source already sRGB ('{prof_desc}') – no conversion needed")
-            except Exception as e:
-                debug_print(f"[WARN] ICC profile read/transform failed, using as-is: {e}")
-        elif skip_icc:
-            debug_print("Skipping ICC profile conversion (skip_icc=True)")
-
-        # Strip any leftover ICC profile – we embed sRGB on save instead
-        if 'icc_profile' in img.info:
-            del img.info['icc_profile']
-
-        # ── Apply rotation before cropping ──
-        # The preview shows a rotated crop border on the unrotated image.
-        # To produce the same result here we:
-        #   1. Compute the crop on the original (unrotated) image
-        #   2. Shrink the crop so its rotated bounding box stays within bounds
-        #   3. Rotate the image (expand=True) and crop the matching area
-        rot_scale = 1.0
-        if rotation != 0:
-            angle_rad = math.radians(abs(rotation))
-            cos_a = math.cos(angle_rad)
-            sin_a = math.sin(angle_rad)
-
-        orig_w, orig_h = img.size
-        target_ratio = target_w / target_h
-
-        # Calculate zoom-adjusted crop area
-        # At zoom=100, we take the largest area that matches card ratio
-        # At zoom=200, we take half that area (2x zoom in)
-        zoom_factor = zoom / 100.0
-
-        # Determine the crop area size based on source image orientation
-        orig_ratio = orig_w / orig_h
-
-        if orig_ratio >= target_ratio:
-            # Image is wider than card ratio - constrain by height
-            base_crop_h = orig_h
-            base_crop_w = base_crop_h * target_ratio
-        else:
-            # Image is taller than card ratio - constrain by width
-            base_crop_w = orig_w
-            base_crop_h = base_crop_w / target_ratio
-
-        # Apply zoom (zoom in = smaller crop area)
-        crop_w = base_crop_w / zoom_factor
-        crop_h = base_crop_h / zoom_factor
-
-        # Calculate crop position based on crop_x and crop_y percentages
-        # crop_x/y: 0=left/top edge, 50=center, 100=right/bottom edge
-        max_offset_x = orig_w - crop_w
-        max_offset_y = orig_h - crop_h
-
-        # Clamp crop_x and crop_y to 0-100
-        crop_x = max(0, min(100, crop_x))
-        crop_y = max(0, min(100, crop_y))
-
-        crop_left = max_offset_x * (crop_x / 100.0)
-        crop_top = max_offset_y * (crop_y / 100.0)
-
-        # ── Rotation shrink: keep rotated crop inside image bounds ──
-        if rotation != 0:
-            crop_cx = crop_left + crop_w / 2
-            crop_cy = crop_top + crop_h / 2
-            hw = crop_w / 2
-            hh = crop_h / 2
-            bbox_hw = hw * cos_a + hh * sin_a
-            bbox_hh = hw * sin_a + hh * cos_a
-            space_x = min(crop_cx, orig_w - crop_cx)
-            space_y = min(crop_cy, orig_h - crop_cy)
-            if bbox_hw > 0:
-                rot_scale = min(rot_scale, space_x / bbox_hw)
-            if bbox_hh > 0:
-                rot_scale = min(rot_scale, space_y / bbox_hh)
-            crop_w *= rot_scale
-            crop_h *= rot_scale
-            crop_left = crop_cx - crop_w / 2
-            crop_top = crop_cy - crop_h / 2
-            debug_print(f"Rotation {rotation}° → shrink factor {rot_scale:.4f}, "
-                        f"crop {crop_w:.0f}x{crop_h:.0f}")
-
-            # Now rotate the image and adjust crop coordinates
-            img = img.rotate(-rotation, resample=Image.Resampling.BICUBIC,
-                             expand=True, fillcolor=(0, 0, 0))
-            new_w, new_h = img.size
-            # The original centre shifted by the expand padding
-            dx = (new_w - orig_w) / 2
-            dy = (new_h - orig_h) / 2
-            crop_left += dx
-            crop_top += dy
-
-        debug_print(f"Original: {orig_w}x{orig_h}, Crop area: {crop_w:.0f}x{crop_h:.0f}")
-        debug_print(f"Crop position: left={crop_left:.0f}, top={crop_top:.0f}")
-
-        # Crop the selected region
-        img = img.crop((
-            int(crop_left),
-            int(crop_top),
-            int(crop_left + crop_w),
-            int(crop_top + crop_h)
-        ))
-
-        # Resize cropped area to target dimensions
-        img = img.resize((target_w, target_h), Image.Resampling.LANCZOS)
-
-        debug_print(f"Final size: {img.size}")
-
-        # Composite sticker overlay if provided
-        _sticker_applied = False
-        if sticker_path and os.path.exists(sticker_path):
-            print(f"[Sticker] Applying: {os.path.basename(sticker_path)} "
-                  f"pos=({sticker_x}%, {sticker_y}%) zoom={sticker_zoom}%")
-            try:
-                with Image.open(sticker_path) as sticker:
-                    # Ensure sticker has alpha channel for transparency
-                    if sticker.mode != 'RGBA':
-                        sticker = sticker.convert('RGBA')
-
-                    # Scale sticker based on sticker_zoom (percentage of card width)
-                    sticker_pct = sticker_zoom / 100.0
-                    max_sticker_size = int(target_w * sticker_pct)
-                    sticker_w, sticker_h = sticker.size
-
-                    # Scale proportionally
-                    scale = min(max_sticker_size / sticker_w, max_sticker_size / sticker_h)
-                    new_sticker_w = int(sticker_w * scale)
-                    new_sticker_h = int(sticker_h * scale)
-                    sticker = sticker.resize((new_sticker_w, new_sticker_h), Image.Resampling.LANCZOS)
-
-                    # Calculate sticker position (percentage of card dimensions)
-                    # Position is center of sticker, clamped to keep sticker mostly on card
-                    pos_x = int((target_w - new_sticker_w) * (sticker_x / 100.0))
-                    pos_y = int((target_h - new_sticker_h) * (sticker_y / 100.0))
-
-                    # Convert img to RGBA for compositing, then back to RGB
-                    img = img.convert('RGBA')
-                    img.paste(sticker, (pos_x, pos_y), sticker)
-                    img = img.convert('RGB')
-                    _sticker_applied = True
-
-                    print(f"[Sticker] Composited OK: {new_sticker_w}x{new_sticker_h} "
-                          f"at pixel ({pos_x}, {pos_y})")
-            except Exception as e:
-                print(f"[Sticker] ** FAILED to apply sticker: {e} **")
-        elif sticker_path:
-            print(f"[Sticker] ** Path not found: {sticker_path} **")
-        else:
-            print("[Sticker] No sticker requested for this image")
-
-        # ── Embed sRGB ICC profile for colour-accurate printing ──
-        if skip_icc:
-            srgb_bytes = None
-        else:
-            srgb_bytes = ImageCms.ImageCmsProfile(_SRGB_PROFILE).tobytes()
-
-        # Cardly only accepts PNG artwork – save as optimised PNG.
-        save_kwargs = {'optimize': True}
-        if srgb_bytes:
-            save_kwargs['icc_profile'] = srgb_bytes
-        img.save(output_path, 'PNG', **save_kwargs)
-        file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
-        debug_print(f"PNG size: {file_size_mb:.2f} MB{' (sRGB embedded)' if srgb_bytes else ' (no ICC)'}")
-
-        if file_size_mb > CARDLY_MAX_SIZE_MB:
-            # Re-save with maximum PNG compression (zlib level 9)
-            img.save(output_path, 'PNG', compress_level=9, **save_kwargs)
-            file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
-            debug_print(f"PNG (compress_level=9): {file_size_mb:.2f} MB")
-
-        if file_size_mb > CARDLY_MAX_SIZE_MB:
-            print(f"[WARN] PNG is {file_size_mb:.2f} MB – exceeds {CARDLY_MAX_SIZE_MB} MB limit")
-
-        return output_path
+    pipeline = CardImagePipeline(image_path, crop_x=crop_x, crop_y=crop_y, zoom=zoom,
+                                 card_width=card_width, card_height=card_height,
+                                 skip_icc=skip_icc, rotation=rotation)
+    output_path = pipeline.render(output_path, sticker_path, sticker_x, sticker_y, sticker_zoom)
+    debug_print(f"Render timings: {pipeline.timing_summary()}")
+    return output_path
 
 def image_to_base64(image_path: str) -> str:
     """Convert image file to base64 string."""
@@ -803,10 +994,12 @@ def place_cardly_order(artwork_id: str, recipient: dict, message: str = "",
         requested_arrival: Optional YYYY-MM-DD date for requested card arrival (None = ASAP)
 
     Returns:
-        dict with order details on success
+        dict with order details on success. Failures that happened before the
+        request reached Cardly carry "sent": False, so the order was
+        certainly not placed.
     """
     if not CARDLY_API_KEY:
-        return {"success": False, "error": "Cardly API key not configured"}
+        return {"success": False, "error": "Cardly API key not configured", "sent": False}
 
     headers = {
         "API-Key": CARDLY_API_KEY,
@@ -893,11 +1086,32 @@ def place_cardly_order(artwork_id: str, recipient: dict, message: str = "",
         if response.status_code in (200, 201):
             return {"success": True, "data": response.json()}
         else:
-            return {"success": False, "error": response.text, "status": response.status_code}
+            return {"success": False, "error": response.text, "status": response.status_code,
+                    "retry_after": response.headers.get("Retry-After", "")}
 
     except Exception as e:
+        if _request_never_sent(e):
+            return {"success": False, "error": str(e), "sent": False}
         return {"success": False, "error": str(e)}
 
+
+def _request_never_sent(exc: Exception) -> bool:
+    """True if requests failed before the request could reach the server.
+
+    Covers connect timeouts, refused connections, DNS failures and malformed
+    URLs/headers. Read timeouts and dropped connections are not included,
+    since the server may already have acted on the request.
+    """
+    if isinstance(exc, (requests.exceptions.ConnectTimeout, requests.exceptions.InvalidURL,
+                        requests.exceptions.MissingSchema, requests.exceptions.InvalidSchema,
+                        requests.exceptions.InvalidHeader)):
+        return True
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        from urllib3.exceptions import NewConnectionError
+        reason = getattr(exc.args[0], 'reason', None) if exc.args else None
+        return isinstance(reason, NewConnectionError)
+    return False
+
 def get_ghl_contact(contact_id: str) -> dict:
     """Fetch contact details from GHL.
 
@@ -968,6 +1182,18 @@ def save_to_album_folder(processed_image: str, original_image: str, album_folder
 # Main Workflow
 # =============================================================================
 
+def recipient_from_contact(contact_data: dict) -> dict:
+    """Build a Cardly recipient dict from a GHL contact record."""
+    return {
+        "name": contact_data.get("name", ""),
+        "address1": contact_data.get("address1", ""),
+        "address2": contact_data.get("address2", ""),
+        "city": contact_data.get("city", ""),
+        "state": contact_data.get("state", ""),
+        "postcode": contact_data.get("postalCode", ""),
+        "country": contact_data.get("country", "GB")  # Default to UK
+    }
+
 def send_card(image_path: str, contact_id: str, message: str = "",
               crop_x: int = 50, crop_y: int = 50, zoom: int = 100,
               sticker_path: str = None, sticker_x: int = 75, sticker_y: int = 75,
@@ -1040,15 +1266,7 @@ def send_card(image_path: str, contact_id: str, message: str = "",
     print(f"[OK] Contact: {contact_data.get('name', 'Unknown')}")
 
     # Build recipient from GHL contact
-    recipient = {
-        "name": contact_data.get("name", ""),
-        "address1": contact_data.get("address1", ""),
-        "address2": contact_data.get("address2", ""),
-        "city": contact_data.get("city", ""),
-        "state": contact_data.get("state", ""),
-        "postcode": contact_data.get("postalCode", ""),
-        "country": contact_data.get("country", "GB")  # Default to UK
-    }
+    recipient = recipient_from_contact(contact_data)
 
     # Validate address
     if not recipient["address1"] or not recipient["postcode"]:
@@ -1123,6 +1341,9 @@ def send_card(image_path: str, contact_id: str, message: str = "",
 def list_recent_orders(recipient_name: str = "", limit: int = 25, max_pages: int = 4) -> dict:
     """Fetch recent Cardly orders and optionally filter by recipient name.
 
+    Only scans the newest limit x max_pages orders; for duplicate checks
+    over the full history use cardly_order_mirror.find_orders.
+
     Args:
         recipient_name: If provided, filter results to orders whose recipient
                         name contains this string (case-insensitive).
@@ -1145,7 +1366,7 @@ def list_recent_orders(recipient_name: str = "", limit: int = 25, max_pages: int
         offset = page * limit
         try:
             url = f"{CARDLY_BASE_URL}/orders?limit={limit}&offset={offset}"
-            resp = requests.get(url, headers=headers)
+            resp = requests.get(url, headers=headers, timeout=30)
             if resp.status_code != 200:
                 debug_print(f"list_recent_orders page {page} failed: {resp.status_code}")
                 break
@@ -1227,7 +1448,9 @@ Cardly Card Sending Tool
 Usage:
   cardly_send_card.py <image_path> <contact_id> [message] [crop_x] [crop_y] [zoom] [sticker] [sticker_x] [sticker_y] [album_folder] [--debug]
   cardly_send_card.py --test                    Test API connection
-  cardly_send_card.py --process <image_path>   Process image only
+  cardly_send_card.py --process <image_path>   Process image only (prints stage timings)
+  cardly_send_card.py --campaign <manifest.csv> [--dry-run] [--workers N] [--order-workers N]
+                                                Send a card to every row of a campaign manifest
 
 Arguments:
   image_path    Path to source image
@@ -1260,6 +1483,10 @@ def main() -> int:
     """Parse CLI arguments and execute the requested Cardly operation."""
     args = [a for a in sys.argv[1:] if not a.startswith('--')]
 
+    if '--campaign' in sys.argv:
+        import cardly_campaign
+        return cardly_campaign.main(sys.argv[1:])
+
     if '--test' in sys.argv:
         print("Testing Cardly connection...")
         result = test_connection()
@@ -1273,8 +1500,10 @@ def main() -> int:
             crop_x = int(args[1]) if len(args) > 1 else 50
             crop_y = int(args[2]) if len(args) > 2 else 50
             zoom = int(args[3]) if len(args) > 3 else 100
-            output = resize_image_for_cardly(args[0], crop_x=crop_x, crop_y=crop_y, zoom=zoom)
+            pipeline = CardImagePipeline(args[0], crop_x=crop_x, crop_y=crop_y, zoom=zoom)
+            output = pipeline.render()
             print(f"Processed image saved to: {output}")
+            print(f"Stage timings: {pipeline.timing_summary()}")
             return 0
         except Exception as e:
             print(f"Error: {e}")
@@ -1318,4 +1547,7 @@ def main() -> int:
     return 0 if result["success"] else 1
 
 if __name__ == "__main__":
+    # Campaign render workers re-launch a frozen exe; let them run their task
+    import multiprocessing
+    multiprocessing.freeze_support()
     sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Cardly Thumbnail Cache Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Persistent cache of filmstrip-sized, already-decoded thumbnails for the
+Cardly preview GUI, so reopening an album skips the PSA Thumbnails table
+and all JPEG/TIFF decoding.
+
+One container file per album, stored in
+%APPDATA%\\SideKick_PS\\cardly_thumb_cache\\<hash of PSA path>.sktc.
+The container is only valid while the PSA's mtime and size are unchanged.
+Layout:
+    MAGIC | uint32 header length | JSON header | zlib-compressed raw pixels...
+The header maps each entry key to [offset, length, width, height, mode].
+It also lists the album's known thumbnails as (imageID, filename) pairs in
+Thumbnails-table order, so the GUI can build its image list without
+reading blobs.
+
+Containers are evicted least-recently-used first, once the folder grows
+past CACHE_MAX_BYTES. The container mtime is the last-use timestamp.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+from PIL import Image
+
+CACHE_DIR_NAME = 'cardly_thumb_cache'
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CONTAINER_EXT = '.sktc'
+_MAGIC = b'SKTC\x01'
+_HEADER_LEN = struct.Struct('<I')
+_SUPPORTED_MODES = ('RGB', 'RGBA', 'L')
+
+
+def get_cache_dir() -> str:
+    """Return (and create) the thumbnail cache folder."""
+    appdata = os.environ.get('APPDATA')
+    base = os.path.join(appdata, 'SideKick_PS') if appdata else os.environ.get('TEMP', os.path.dirname(os.path.abspath(__file__)))
+    cache_dir = os.path.join(base, CACHE_DIR_NAME)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def enforce_cache_limit(cache_dir: str, max_bytes: int = CACHE_MAX_BYTES, keep: str = '') -> int:
+    """Delete least-recently-used containers until the folder fits max_bytes.
+
+    Args:
+        cache_dir: Cache folder.
+        max_bytes: Total size budget for all containers.
+        keep: Container path never to evict (the one just written).
+
+    Returns:
+        int: Number of containers removed.
+    """
+    try:
+        containers = []
+        for name in os.listdir(cache_dir):
+            if not name.endswith(CONTAINER_EXT):
+                continue
+            path = os.path.join(cache_dir, name)
+            st = os.stat(path)
+            containers.append((st.st_mtime, st.st_size, path))
+    except OSError:
+        return 0
+
+    total = sum(size for _, size, _ in containers)
+    removed = 0
+    for _, size, path in sorted(containers):
+        if total <= max_bytes:
+            break
+        if keep and os.path.normcase(path) == os.path.normcase(keep):
+            continue
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class AlbumThumbCache:
+    """Filmstrip thumbnail container for one PSA album."""
+
+    def __init__(self, psa_path: str, cache_dir: str | None = None, max_bytes: int = CACHE_MAX_BYTES):
+        self.psa_path = os.path.abspath(psa_path)
+        self.cache_dir = cache_dir or get_cache_dir()
+        self.max_bytes = max_bytes
+        key = hashlib.sha1(os.path.normcase(self.psa_path).encode('utf-8')).hexdigest()
+        self.container_path = os.path.join(self.cache_dir, key + CONTAINER_EXT)
+        try:
+            st = os.stat(self.psa_path)
+            self.psa_stamp = [int(st.st_mtime_ns), int(st.st_size)]
+        except OSError:
+            self.psa_stamp = None
+        self.complete = False       # thumbs list covers every thumbnail in the album
+        self.thumbs = {}            # imageID -> thumbnail filename in album order ('' = no JPEG)
+        self._entries = {}          # key -> [offset, length, w, h, mode] in container
+        self._payload_offset = 0
+        self._pending = {}          # key -> (compressed bytes, w, h, mode)
+        self._dirty = False
+        self.loaded = self._load()
+
+    def _load(self) -> bool:
+        """Read the container header; returns True when it matches the PSA."""
+        if self.psa_stamp is None or not os.path.exists(self.container_path):
+            return False
+        try:
+            with open(self.container_path, 'rb') as f:
+                if f.read(len(_MAGIC)) != _MAGIC:
+                    return False
+                (header_len,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+                header = json.loads(f.read(header_len).decode('utf-8'))
+            if header.get('psa_stamp') != self.psa_stamp:
+                return False
+            if os.path.normcase(header.get('psa_path', '')) != os.path.normcase(self.psa_path):
+                return False
+            self.complete = bool(header.get('complete'))
+            self.thumbs = {int(i): name for i, name in header.get('thumbs', [])}
+            self._entries = header.get('entries', {})
+            self._payload_offset = len(_MAGIC) + _HEADER_LEN.size + header_len
+            os.utime(self.container_path)  # mark as recently used for LRU
+            return True
+        except (OSError, ValueError, struct.error):
+            self._entries = {}
+            return False
+
+    def has(self, key: str) -> bool:
+        """True if a filmstrip image is cached (or pending) for key."""
+        return key in self._entries or key in self._pending
+
+    def get(self, key: str) -> Image.Image | None:
+        """Return the cached filmstrip image for key, or None."""
+        pending = self._pending.get(key)
+        if pending:
+            data, w, h, mode = pending
+            return Image.frombytes(mode, (w, h), zlib.decompress(data))
+        entry = self._entries.get(key)
+        if not entry:
+            return None
+        offset, length, w, h, mode = entry
+        try:
+            with open(self.container_path, 'rb') as f:
+                f.seek(self._payload_offset + offset)
+                data = f.read(length)
+            return Image.frombytes(mode, (w, h), zlib.decompress(data))
+        except (OSError, ValueError, zlib.error):
+            return None
+
+    def put(self, key: str, image: Image.Image) -> None:
+        """Queue a filmstrip-sized image for the next save()."""
+        if image.mode not in _SUPPORTED_MODES:
+            image = image.convert('RGB')
+        self._pending[key] = (zlib.compress(image.tobytes(), 1), image.width, image.height, image.mode)
+        self._dirty = True
+
+    def set_thumbs(self, thumbs: dict, complete: bool = False) -> None:
+        """Record which imageIDs have JPEG thumbnails (merged with existing)."""
+        merged = dict(self.thumbs)
+        merged.update({int(i): name for i, name in thumbs.items()})
+        if merged != self.thumbs or (complete and not self.complete):
+            self.thumbs = merged
+            self.complete = self.complete or complete
+            self._dirty = True
+
+    def save(self) -> bool:
+        """Rewrite the container with existing + pending entries, then apply LRU limit."""
+        if not self._dirty or self.psa_stamp is None:
+            return False
+
+        blobs = []
+        entries = {}
+        offset = 0
+        try:
+            if self._entries and os.path.exists(self.container_path):
+                with open(self.container_path, 'rb') as f:
+                    for key, (old_off, length, w, h, mode) in self._entries.items():
+                        if key in self._pending:
+                            continue
+                        f.seek(self._payload_offset + old_off)
+                        blobs.append(f.read(length))
+                        entries[key] = [offset, length, w, h, mode]
+                        offset += length
+            for key, (data, w, h, mode) in self._pending.items():
+                blobs.append(data)
+                entries[key] = [offset, len(data), w, h, mode]
+                offset += len(data)
+
+            header = json.dumps({
+                'version': 1,
+                'psa_path': self.psa_path,
+                'psa_stamp': self.psa_stamp,
+                'complete': self.complete,
+                'thumbs': [[i, name] for i, name in self.thumbs.items()],
+                'entries': entries,
+            }, separators=(',', ':')).encode('utf-8')
+
+            tmp_path = self.container_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(_MAGIC)
+                f.write(_HEADER_LEN.pack(len(header)))
+                f.write(header)
+                for data in blobs:
+                    f.write(data)
+            os.replace(tmp_path, self.container_path)
+        except OSError:
+            return False
+
+        self._entries = entries
+        self._payload_offset = len(_MAGIC) + _HEADER_LEN.size + len(header)
+        self._pending = {}
+        self._dirty = False
+        enforce_cache_limit(self.cache_dir, self.max_bytes, keep=self.container_path)
+        return True
@@ -5,6 +5,8 @@ Usage:
   python check_shoot_status.py P25097P_Field
   python check_shoot_status.py P25097P_Field --json
   python check_shoot_status.py P25097P_Field --ssh-host toypi.tail009b36.ts.net
+  python check_shoot_status.py P25097P_Field P25101P_Jones --json
+  python check_shoot_status.py --all
 """
 
 from __future__ import annotations
@@ -14,6 +16,9 @@ import base64
 import json
 import os
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 
 # ---------------------------------------------------------------------------
 # Supplier DB (toypi SSH)
@@ -21,8 +26,10 @@ import sys
 
 DEFAULT_SSH_HOST = "toypi.tail009b36.ts.net"
 DEFAULT_REMOTE_DB = "/home/guy/.openclaw/data/supplier_status.db"
+DEFAULT_PROBE_TIMEOUT = 30
 
-def _check_suppliers(job_ref: str, ssh_host: str, remote_db: str, shoot_no: str = "", last_name: str = "") -> dict:
+def _check_suppliers(job_ref: str, ssh_host: str, remote_db: str, shoot_no: str = "", last_name: str = "",
+                     timeout: float = DEFAULT_PROBE_TIMEOUT) -> dict:
     """Query toypi supplier_orders for all rows matching job_ref."""
     try:
         from read_supplier_status_db import _query_remote, _query_local
@@ -31,7 +38,8 @@ def _check_suppliers(job_ref: str, ssh_host: str, remote_db: str, shoot_no: str
 
     try:
         if ssh_host:
-            rows = _query_remote(ssh_host, remote_db, job_ref, limit=20, shoot_no=shoot_no, last_name=last_name)
+            rows = _query_remote(ssh_host, remote_db, job_ref, limit=20, shoot_no=shoot_no, last_name=last_name,
+                                 timeout=timeout)
         else:
             rows = _query_local(remote_db, job_ref, limit=20, shoot_no=shoot_no, last_name=last_name)
     except Exception as exc:
@@ -99,15 +107,15 @@ def _check_gocardless(email: str = "", shoot_no: str = "", client_name: str = ""
 
     mandate_result = None
     used_strategy = None
-    
+
+    # One strategy at a time: most lookups are answered by the email search,
+    # so the later ones usually cost no API calls at all.
     for strategy_type, search_term in search_strategies:
-        if not search_term:
-            continue
         mandate_result = check_customer_mandate_by_name(search_term, cfg)
         if mandate_result.has_mandate:
             used_strategy = strategy_type
             break
-    
+
     if mandate_result is None or mandate_result.error:
         return {"error": mandate_result.error if mandate_result else "No search strategies available"}
 
@@ -288,65 +296,27 @@ def _psconsole_loadordergroup(contact: dict) -> bool:
         return False
 
 
-def _extract_psa_client_data(job_ref: str) -> dict:
+def _extract_psa_client_data(job_ref: str, catalogue=None) -> dict:
     """Find PSA file and extract client data.
     
+    Resolved through the PSA catalogue (cached archive index) instead of walking
+    the archive roots on every call.
     From filename: shoot_no, last_name, ghl_contact_id (if present).
-    From PSA SQLite OrderList: email, client_code.
+    From PSA SQLite OrderList: email, client_code (cached until the PSA changes).
     Always returns psa_path, last_name, ghl_contact_id (may be "").
     """
-    import re
-    archive_paths = [
-        os.path.expanduser("~/Pictures/Shoots/Archive"),
-        os.path.expanduser("~/Pictures/Shoots/Processed"),
-        os.path.expanduser("~/Pictures/Shoots"),
-        r"C:\Users\guy\Pictures\Shoots\Archive",
-    ]
-    
-    for archive_path in archive_paths:
-        if not os.path.isdir(archive_path):
-            continue
-        for root, dirs, files in os.walk(archive_path):
-            for fname in files:
-                if not fname.endswith(".psa") or job_ref not in fname:
-                    continue
-                psa_path = os.path.join(root, fname)
-                stem = fname[:-4]  # strip .psa
-                parts = stem.split("_")
-                # Parts: [shoot_no, last_name, ghl_contact_id?, ...]
-                last_name = parts[1] if len(parts) > 1 else ""
-                # GHL contact IDs are 20+ alphanumeric chars
-                ghl_id_from_filename = next(
-                    (p for p in parts[2:] if re.match(r'^[A-Za-z0-9]{20,}$', p) and p != "test"),
-                    ""
-                )
-                
-                # Read email + client_code from PSA SQLite
-                email, client_code = "", ""
-                try:
-                    conn = sqlite3.connect(psa_path)
-                    cur = conn.cursor()
-                    cur.execute("SELECT buffer FROM BigStrings WHERE buffCode='OrderList' LIMIT 1")
-                    row = cur.fetchone()
-                    conn.close()
-                    if row:
-                        xml_str = str(row[0])
-                        m = re.search(r'<email>([^<]+)</email>', xml_str, re.IGNORECASE)
-                        email = m.group(1) if m else ""
-                        m = re.search(r'<clientCode>([^<]+)</clientCode>', xml_str, re.IGNORECASE)
-                        client_code = m.group(1) if m else ""
-                except Exception:
-                    pass
-                
-                return {
-                    "psa_path": psa_path,
-                    "last_name": last_name,
-                    "ghl_contact_id": ghl_id_from_filename,
-                    "email": email,
-                    "client_code": client_code,
-                }
-    
-    return {"psa_path": "", "last_name": "", "ghl_contact_id": "", "email": "", "client_code": ""}
+    from psa_catalogue import PsaCatalogue
+
+    catalogue = catalogue or PsaCatalogue()
+    record = catalogue.lookup(job_ref)
+    catalogue.save()
+    return {
+        "psa_path": record["psa_path"],
+        "last_name": record["last_name"],
+        "ghl_contact_id": record["ghl_contact_id"],
+        "email": record["email"],
+        "client_code": record["client_code"],
+    }
 
 
 def _get_ghl_contact(ghl_id: str = "", email: str = "", client_code: str = "", last_name: str = "") -> dict:
@@ -428,21 +398,242 @@ def _rename_album_file(old_path: str, new_name: str) -> bool:
         return False
 
 
+# ---------------------------------------------------------------------------
+# Concurrent probes
+# ---------------------------------------------------------------------------
+
+class _Probe:
+    """One network probe running on a worker thread, with its own deadline.
+
+    The deadline clock starts when a worker picks the probe up, not when it
+    is queued, so waiting for a free worker never counts against it.
+
+    The deadline is soft: once it passes, the report goes ahead with a
+    "timed out" error, but the probe itself cannot be cancelled. It keeps
+    its worker until its own call returns, and the process waits for it
+    before exiting. Only the supplier SSH query has a hard limit of its own
+    (the ssh subprocess timeout).
+    """
+
+    def __init__(self, pool: ThreadPoolExecutor, name: str, fn, *args, **kwargs):
+        self.name = name
+        self.started = 0.0
+        self.finished = 0.0
+        self._running = threading.Event()
+        self.future = pool.submit(self._run, fn, *args, **kwargs)
+
+    def _run(self, fn, *args, **kwargs):
+        self.started = time.perf_counter()
+        self._running.set()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            return {"error": str(exc)}
+        finally:
+            self.finished = time.perf_counter()
+
+    def result(self, timeout: float) -> tuple[object, float]:
+        """Wait until started + timeout; returns (result, seconds taken)."""
+        self._running.wait()
+        remaining = max(0.0, self.started + timeout - time.perf_counter())
+        try:
+            result = self.future.result(timeout=remaining)
+        except FutureTimeout:
+            return {"error": f"{self.name} timed out after {timeout:g}s"}, round(timeout, 3)
+        return result, round(self.finished - self.started, 3)
+
+
+def _last_name_from(job_ref: str, psa_last_name: str = "") -> str:
+    """Client last name: from the PSA file name, else the job ref (P25097P_Field -> Field)."""
+    if psa_last_name:
+        return psa_last_name
+    return job_ref.split("_", 1)[1].split("_")[0] if "_" in job_ref else job_ref
+
+
+def _latency_ms(timings: dict) -> dict:
+    """Probe timings in whole milliseconds for JSON output."""
+    return {name: round(seconds * 1000) for name, seconds in timings.items()}
+
+
+def _print_timings(timings: dict) -> None:
+    """Print one line of per-probe timings under a report."""
+    print("  Timings     : " + "  ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items()))
+
+
+def _check_jobs(job_refs: list[str], args) -> int:
+    """Check several shoots at once: every probe for every job shares one worker pool.
+
+    Supplier probes start straight after the PSA lookups; each GoCardless probe
+    starts as soon as that job's GHL contact (and so its email) is resolved.
+    """
+    from psa_catalogue import PsaCatalogue
+
+    catalogue = PsaCatalogue()
+    jobs = []
+    for job_ref in job_refs:
+        start = time.perf_counter()
+        psa_data = _extract_psa_client_data(job_ref, catalogue)
+        jobs.append({
+            "job_ref": job_ref,
+            "shoot_no": job_ref.split("_")[0],
+            "psa": psa_data,
+            "last_name": _last_name_from(job_ref, psa_data["last_name"]),
+            "timings": {"psa": round(time.perf_counter() - start, 3)},
+        })
+
+    pool = ThreadPoolExecutor(max_workers=min(32, 3 * len(jobs)))
+    try:
+        for job in jobs:
+            job["suppliers_probe"] = _Probe(pool, "suppliers", _check_suppliers, job["job_ref"], args.ssh_host,
+                                            args.remote_db, shoot_no=job["shoot_no"], last_name=job["last_name"],
+                                            timeout=args.timeout)
+            job["contact_probe"] = _Probe(pool, "ghl_contact", _get_ghl_contact,
+                                          ghl_id=job["psa"]["ghl_contact_id"], email=job["psa"]["email"],
+                                          client_code=job["psa"]["client_code"], last_name=job["last_name"])
+        for job in jobs:
+            contact, job["timings"]["ghl_contact"] = job["contact_probe"].result(args.timeout)
+            contact = contact if isinstance(contact, dict) and "error" not in contact else {}
+            job["email"] = contact.get("email", job["psa"]["email"])
+            job["full_name"] = f"{contact.get('firstName', '')} {job['last_name']}".strip()
+            job["gc_probe"] = _Probe(pool, "gocardless", _check_gocardless, email=job["email"],
+                                     shoot_no=job["shoot_no"], client_name=job["full_name"])
+        for job in jobs:
+            suppliers, job["timings"]["suppliers"] = job["suppliers_probe"].result(args.timeout)
+            if "error" in suppliers:
+                suppliers = {"_error": suppliers["error"]}
+            job["suppliers"] = suppliers
+            job["gocardless"], job["timings"]["gocardless"] = job["gc_probe"].result(args.timeout)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)  # don't wait here for probes that timed out
+    catalogue.save()
+
+    if args.as_json:
+        print(json.dumps([{
+            "job_ref": job["job_ref"],
+            "psa_path": job["psa"]["psa_path"],
+            "suppliers": job["suppliers"],
+            "gocardless": job["gocardless"],
+            "latency_ms": _latency_ms(job["timings"]),
+        } for job in jobs], indent=2))
+        return 0
+
+    for job in jobs:
+        psa_path = job["psa"]["psa_path"]
+        _print_report(job["job_ref"], job["suppliers"], job["gocardless"], psa_path=psa_path,
+                      album_name=os.path.basename(psa_path) if psa_path else "")
+        _print_timings(job["timings"])
+    return 0
+
+
+def _is_closed(suppliers: dict) -> bool:
+    """A shoot is closed once every supplier order on record has been received."""
+    orders = [v for k, v in suppliers.items() if not k.startswith("_") and isinstance(v, dict)]
+    return bool(orders) and all(o.get("status") == "received" for o in orders)
+
+
+def _gc_summary(gc: dict) -> str:
+    """One-line GoCardless status for the --all table."""
+    if "error" in gc:
+        return f"error: {gc['error']}"
+    if not gc.get("has_mandate"):
+        return "no mandate"
+    plans = gc.get("plans", [])
+    active = sum(1 for p in plans if p.get("status") == "active")
+    return f"{gc.get('mandate_status', '')} ({active}/{len(plans)} plan(s) active)"
+
+
+def _check_all_shoots(args) -> int:
+    """Report supplier + GoCardless status for every open shoot in the archive.
+
+    One catalogue refresh covers all shoots (latest non-test album per shoot
+    number). Supplier probes for every shoot run concurrently; shoots whose
+    supplier orders are all received are counted as closed and skipped unless
+    --include-closed is given, the rest get a GoCardless probe.
+    """
+    from psa_catalogue import PsaCatalogue
+
+    print("Refreshing PSA catalogue...", flush=True)
+    catalogue = PsaCatalogue()
+    stats = catalogue.refresh()
+    shoots = catalogue.shoots()
+    print(f"  {len(shoots)} shoot(s) in {stats['dirs']} folder(s) ({stats['listed']} re-listed)", flush=True)
+
+    results = []
+    closed = []
+    pool = ThreadPoolExecutor(max_workers=max(1, args.workers))
+    try:
+        for shoot in shoots:
+            shoot["job_ref"] = "_".join(filter(None, [shoot["shoot_no"], shoot["last_name"]]))
+            shoot["suppliers_probe"] = _Probe(pool, "suppliers", _check_suppliers, shoot["job_ref"], args.ssh_host,
+                                              args.remote_db, shoot_no=shoot["shoot_no"],
+                                              last_name=shoot["last_name"], timeout=args.timeout)
+        open_shoots = []
+        for shoot in shoots:
+            suppliers, seconds = shoot["suppliers_probe"].result(args.timeout)
+            if "error" in suppliers:
+                suppliers = {"_error": suppliers["error"]}
+            if _is_closed(suppliers) and not args.include_closed:
+                closed.append(shoot["job_ref"])
+                continue
+            shoot["suppliers"] = suppliers
+            shoot["timings"] = {"suppliers": seconds}
+            record = catalogue.describe(shoot["psa_path"])
+            shoot["gc_probe"] = _Probe(pool, "gocardless", _check_gocardless, email=record["email"],
+                                       shoot_no=shoot["shoot_no"], client_name=shoot["last_name"])
+            open_shoots.append(shoot)
+
+        for shoot in open_shoots:
+            gc, shoot["timings"]["gocardless"] = shoot["gc_probe"].result(args.timeout)
+            suppliers = shoot["suppliers"]
+            results.append({"job_ref": shoot["job_ref"], "psa_path": shoot["psa_path"], "suppliers": suppliers,
+                            "gocardless": gc, "latency_ms": _latency_ms(shoot["timings"])})
+            if not args.as_json:
+                lox = suppliers.get("loxleys", {}).get("status", "")
+                nph = suppliers.get("nphoto", {}).get("status", "")
+                print(f"  {shoot['job_ref']:<28} Loxleys: {SUPPLIER_STATUS_LABEL.get(lox, lox):<14} "
+                      f"nphoto: {SUPPLIER_STATUS_LABEL.get(nph, nph):<14} GC: {_gc_summary(gc)}", flush=True)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    catalogue.save()
+
+    if args.as_json:
+        print(json.dumps({"shoots": results, "closed": closed}, indent=2))
+    else:
+        print(f"\n{len(results)} open shoot(s), {len(closed)} closed (all supplier orders received)")
+    return 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Check Loxleys, nphoto, and GoCardless status for a shoot")
-    parser.add_argument("job_ref", help="Shoot job ref, e.g. P25097P_Field")
+    parser.add_argument("job_refs", nargs="*", metavar="job_ref", help="Shoot job ref(s), e.g. P25097P_Field")
+    parser.add_argument("--all", dest="all_shoots", action="store_true", help="Report every open shoot in the archive")
+    parser.add_argument("--include-closed", action="store_true", help="With --all, also list shoots whose orders are all received")
     parser.add_argument("--ssh-host", default=DEFAULT_SSH_HOST, help="Toypi SSH host")
     parser.add_argument("--remote-db", default=DEFAULT_REMOTE_DB, help="Remote supplier DB path")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_PROBE_TIMEOUT, help="Seconds to wait for each probe before reporting it as timed out "
+                             "(a timed-out probe keeps running in the background)")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent probes for --all")
     parser.add_argument("--json", dest="as_json", action="store_true", help="Output raw JSON")
     args = parser.parse_args()
 
-    shoot_no = args.job_ref.split("_")[0]
+    if args.all_shoots:
+        return _check_all_shoots(args)
+    if not args.job_refs:
+        parser.error("job_ref is required unless --all is given")
+    if len(args.job_refs) > 1:
+        return _check_jobs(args.job_refs, args)
+
+    job_ref = args.job_refs[0]
+    shoot_no = job_ref.split("_")[0]
+    timings: dict[str, float] = {}
 
     # ── Step 1: Extract all available data from PSA file ─────────────────────
     print("Checking PSA file...", flush=True)
-    psa_data = _extract_psa_client_data(args.job_ref)
+    start = time.perf_counter()
+    psa_data = _extract_psa_client_data(job_ref)
+    timings["psa"] = round(time.perf_counter() - start, 3)
     psa_path         = psa_data["psa_path"]
-    last_name        = psa_data["last_name"] or args.job_ref.split("_", 1)[1].split("_")[0] if "_" in args.job_ref else args.job_ref
+    last_name        = _last_name_from(job_ref, psa_data["last_name"])
     ghl_id_from_file = psa_data["ghl_contact_id"]
     email            = psa_data["email"]
     client_code      = psa_data["client_code"]
@@ -451,16 +642,25 @@ def main() -> int:
         print(f"  PSA found: {os.path.basename(psa_path)}", flush=True)
         print(f"  Name: {last_name}  |  GHL ID in file: {ghl_id_from_file or '(none)'}  |  Email: {email or '(none)'}", flush=True)
     else:
-        print(f"  No PSA file found for {args.job_ref}", flush=True)
+        print(f"  No PSA file found for {job_ref}", flush=True)
+
+    pool = ThreadPoolExecutor(max_workers=2)
 
-    # ── Step 2: Resolve GHL contact ───────────────────────────────────────────
-    print("\nResolving GHL contact...", flush=True)
+    # ── Step 2: Supplier orders (runs while the GHL contact is resolved) ─────
+    print("\nChecking supplier orders...", flush=True)
+    suppliers_probe = _Probe(pool, "suppliers", _check_suppliers, job_ref, args.ssh_host, args.remote_db,
+                             shoot_no=shoot_no, last_name=last_name, timeout=args.timeout)
+
+    # ── Step 3: Resolve GHL contact ───────────────────────────────────────────
+    print("Resolving GHL contact...", flush=True)
+    start = time.perf_counter()
     contact = _get_ghl_contact(
         ghl_id=ghl_id_from_file,
         email=email,
         client_code=client_code,
         last_name=last_name,
     )
+    timings["ghl_contact"] = round(time.perf_counter() - start, 3)
 
     album_name = os.path.basename(psa_path) if psa_path else ""
 
@@ -470,42 +670,44 @@ def main() -> int:
         first_name     = contact.get("firstName", "")
         full_name      = f"{first_name} {last_name}".strip()
         print(f"  Found: {full_name} <{email}>  (ID: {ghl_contact_id})", flush=True)
-
-        # Update ProSelect client data via psconsole (+ album rename)
-        if psa_path:
-            print("\nUpdating ProSelect client data...", flush=True)
-            updated = _psconsole_loadordergroup(contact)
-
-            # Reconstruct correct album name and rename file if needed
-            correct_name = _reconstruct_album_name(shoot_no, last_name, ghl_contact_id)
-            current_name = os.path.basename(psa_path)
-            if current_name.lower() != correct_name.lower():
-                if _rename_album_file(psa_path, correct_name):
-                    print(f"  Album renamed: {current_name} → {correct_name}", flush=True)
-                    psa_path   = os.path.join(os.path.dirname(psa_path), correct_name)
-                    album_name = correct_name
-                else:
-                    print(f"  [WARN] Could not rename album to {correct_name}", flush=True)
     else:
         ghl_contact_id = ghl_id_from_file
         full_name      = last_name
         print("  No GHL contact found.", flush=True)
 
-    # ── Step 3: Supplier orders ───────────────────────────────────────────────
-    print("\nChecking supplier orders...", flush=True)
-    suppliers = _check_suppliers(args.job_ref, args.ssh_host, args.remote_db, shoot_no=shoot_no, last_name=last_name)
+    # ── Step 4: GoCardless (needs the contact's email) ────────────────────────
+    print("Checking GoCardless...", flush=True)
+    gc_probe = _Probe(pool, "gocardless", _check_gocardless, email=email, shoot_no=shoot_no, client_name=full_name)
+
+    # Update ProSelect client data via psconsole (+ album rename) while the probes run
+    if contact and psa_path:
+        print("\nUpdating ProSelect client data...", flush=True)
+        updated = _psconsole_loadordergroup(contact)
+
+        # Reconstruct correct album name and rename file if needed
+        correct_name = _reconstruct_album_name(shoot_no, last_name, ghl_contact_id)
+        current_name = os.path.basename(psa_path)
+        if current_name.lower() != correct_name.lower():
+            if _rename_album_file(psa_path, correct_name):
+                print(f"  Album renamed: {current_name} → {correct_name}", flush=True)
+                psa_path   = os.path.join(os.path.dirname(psa_path), correct_name)
+                album_name = correct_name
+            else:
+                print(f"  [WARN] Could not rename album to {correct_name}", flush=True)
+
+    suppliers, timings["suppliers"] = suppliers_probe.result(args.timeout)
     if "error" in suppliers:
         suppliers = {"_error": suppliers["error"]}
-
-    # ── Step 4: GoCardless ────────────────────────────────────────────────────
-    print("Checking GoCardless...", flush=True)
-    gc = _check_gocardless(email=email, shoot_no=shoot_no, client_name=full_name)
+    gc, timings["gocardless"] = gc_probe.result(args.timeout)
+    pool.shutdown(wait=False, cancel_futures=True)
 
     if args.as_json:
-        print(json.dumps({"job_ref": args.job_ref, "suppliers": suppliers, "gocardless": gc}, indent=2))
+        print(json.dumps({"job_ref": job_ref, "suppliers": suppliers, "gocardless": gc,
+                          "latency_ms": _latency_ms(timings)}, indent=2))
         return 0
 
-    _print_report(args.job_ref, suppliers, gc, psa_path=psa_path, album_name=album_name)
+    _print_report(job_ref, suppliers, gc, psa_path=psa_path, album_name=album_name)
+    _print_timings(timings)
     return 0
 
 
@@ -9,9 +9,10 @@ import sys
 import json
 import os
 import glob
+import fnmatch
+import io
 import base64
 import ctypes
-import xml.etree.ElementTree as ET
 from datetime import datetime
 
 # Auto-install dependencies
@@ -33,6 +34,10 @@ install_dependencies()
 import requests
 from PIL import Image, ImageDraw, ImageFont
 
+import ghl_media_folders
+import sidekick_config
+from proselect_export import load_export
+
 # =============================================================================
 # Configuration
 # =============================================================================
@@ -59,66 +64,9 @@ def _get_output_dir():
     return os.environ.get('TEMP', SCRIPT_DIR)
 
 
-def _parse_ini_line(line: str, current_section: str, config: dict) -> str:
-    """Parse a single INI line and update config.
-
-    Args:
-        line: Stripped line from INI file.
-        current_section: Current section name.
-        config: Config dict to update.
-
-    Returns:
-        str: Updated current section name.
-    """
-    if line.startswith('[') and line.endswith(']'):
-        section = line[1:-1]
-        config[section] = {}
-        return section
-    if '=' in line and current_section:
-        key, value = line.split('=', 1)
-        config[current_section][key.strip()] = value.strip()
-    return current_section
-
-
-def _parse_ini_sections(file_path: str) -> dict:
-    """Parse INI file into nested dictionary by section.
-
-    Args:
-        file_path: Path to the INI file.
-
-    Returns:
-        dict: Nested dictionary with sections as keys.
-    """
-    config = {}
-    current_section = None
-
-    # Try multiple encodings (AHK often writes UTF-16)
-    encodings = ['utf-8', 'utf-16', 'utf-16-le', 'cp1252', 'latin-1']
-    content = None
-
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
-            break
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-
-    if content is None:
-        raise ValueError(f"Could not decode INI file: {file_path}")
-
-    for line in content.splitlines():
-        line = line.strip()
-        if not line or line.startswith(';'):
-            continue
-        current_section = _parse_ini_line(line, current_section, config)
-
-    return config
-
-
 def load_config() -> dict:
-    """Load configuration from INI file."""
-    config = _parse_ini_sections(INI_FILE)
+    """Load configuration from INI file (via the shared config snapshot)."""
+    config = sidekick_config.load_ini(INI_FILE)
     ghl = config.get('GHL', {})
 
     # Try new key name first, then fallback to legacy name
@@ -191,21 +139,6 @@ def get_system_date_format() -> tuple:
 # =============================================================================
 # XML Parsing Helpers
 # =============================================================================
-def _get_xml_text(elem, path: str, default: str = '') -> str:
-    """Get text content from XML element.
-
-    Args:
-        elem: Parent XML element.
-        path: Path to child element.
-        default: Default value if not found.
-
-    Returns:
-        str: Text content or default.
-    """
-    el = elem.find(path) if elem is not None else None
-    return el.text.strip() if el is not None and el.text else default
-
-
 def _extract_image_number(filename: str) -> str:
     """Extract trailing digits from filename.
 
@@ -244,56 +177,25 @@ def _parse_order_date(date_str: str) -> datetime:
     return datetime.now()
 
 
-def _process_layout_images(item, description: str, get_text_fn, image_labels: dict) -> None:
-    """Process Layout_Image elements from an ordered item.
+def _label_images(pairs, description: str, image_labels: dict) -> None:
+    """Label ordered thumbnails with their source image number and item description.
 
     Args:
-        item: Ordered_Item XML element.
+        pairs: (ordered thumbnail, source image name) pairs from an ordered item.
         description: Item description.
-        get_text_fn: Function to get text from XML.
         image_labels: Dict to update with labels.
     """
-    for layout_img in item.findall('.//Layout_Image'):
-        ordered_img = get_text_fn(layout_img, 'Ordered_Image')
-        image_name = get_text_fn(layout_img, 'Image_Name')
-
-        if ordered_img and image_name:
-            img_num = _extract_image_number(image_name)
-            label = f"{img_num}-{description}" if description else img_num
-            image_labels[ordered_img] = label
-
+    for ordered_img, image_name in pairs:
+        img_num = _extract_image_number(image_name)
+        label = f"{img_num}-{description}" if description else img_num
+        image_labels[ordered_img] = label
 
-def _process_regular_images(item, description: str, image_labels: dict) -> None:
-    """Process regular Images elements from an ordered item.
 
-    Args:
-        item: Ordered_Item XML element.
-        description: Item description.
-        image_labels: Dict to update with labels.
-    """
-    images_elem = item.find('Images')
-    if images_elem is None:
-        return
-
-    ordered_imgs = images_elem.findall('Ordered_Image')
-    image_names = images_elem.findall('Image_Name')
-
-    for oi, iname in zip(ordered_imgs, image_names):
-        ordered_img = oi.text.strip() if oi.text else ''
-        image_name = iname.text.strip() if iname.text else ''
-
-        if ordered_img and image_name:
-            img_num = _extract_image_number(image_name)
-            label = f"{img_num}-{description}" if description else img_num
-            image_labels[ordered_img] = label
-
-
-def _build_image_labels(order, get_text_fn) -> dict:
+def _build_image_labels(order) -> dict:
     """Build image labels mapping from order items.
 
     Args:
-        order: Order XML element.
-        get_text_fn: Function to get text from XML.
+        order: Order record from the shared export model (or None).
 
     Returns:
         dict: Mapping of thumbnail filename to label.
@@ -303,45 +205,43 @@ def _build_image_labels(order, get_text_fn) -> dict:
     if order is None:
         return image_labels
 
-    for item in order.findall('.//Ordered_Item'):
-        description = get_text_fn(item, 'Description')
+    for item in order.items:
+        description = item.description.strip()
 
-        _process_layout_images(item, description, get_text_fn, image_labels)
-        _process_regular_images(item, description, image_labels)
+        _label_images(item.layout_images, description, image_labels)
+        _label_images(item.images, description, image_labels)
 
         # Handle layout thumbnail
-        ordered_layout = get_text_fn(item, './/Ordered_Layout')
-        if ordered_layout:
-            image_labels[ordered_layout] = description if description else 'Layout'
+        if item.ordered_layout:
+            image_labels[item.ordered_layout] = description if description else 'Layout'
 
     return image_labels
 
 
 def parse_xml(xml_path: str) -> dict:
-    """Parse ProSelect XML and extract order details."""
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
+    """Parse ProSelect XML and extract order details.
 
-    def get_text(elem, path, default='') -> str:
-        """Get text from XML element, wrapper for _get_xml_text."""
-        return _get_xml_text(elem, path, default)
+    Uses the shared export model, so a sync that already parsed this export
+    does not read it again.
+    """
+    export = load_export(xml_path)
+    client = export.client
 
     data: dict = {
-        'contact_id': get_text(root, 'Client_ID'),
-        'first_name': get_text(root, 'First_Name'),
-        'last_name': get_text(root, 'Last_Name'),
-        'album_name': get_text(root, 'Album_Name'),
-        'album_path': get_text(root, 'Album_Path'),
+        'contact_id': client.client_id.strip(),
+        'first_name': client.first_name.strip(),
+        'last_name': client.last_name.strip(),
+        'album_name': client.album_name.strip(),
+        'album_path': client.album_path.strip(),
     }
 
-    order = root.find('Order')
-    data['order_date'] = get_text(order, 'Info/Date') if order is not None else ''
+    data['order_date'] = export.order.info_date if export.order is not None else ''
 
     album = data['album_name']
     data['shoot_no'] = album.split('_')[0] if '_' in album else album
 
     data['order_datetime'] = _parse_order_date(data['order_date'])
-    data['image_labels'] = _build_image_labels(order, get_text)
+    data['image_labels'] = _build_image_labels(export.order)
 
     return data
 
@@ -349,31 +249,9 @@ def parse_xml(xml_path: str) -> dict:
 # GHL Media Folder Functions
 # =============================================================================
 def find_folder_by_name(folder_name: str) -> str | None:
-    """Find a folder ID by name in GHL Media."""
-    headers = get_headers()
-
-    params = {
-        'altId': get_location_id(),
-        'altType': 'location',
-        'sortBy': 'createdAt',
-        'sortOrder': 'desc',
-        'type': 'folder'
-    }
-
+    """Find a folder ID by name in GHL Media (cached folder directory)."""
     try:
-        response = requests.get(
-            f"{BASE_URL}/medias/files",
-            headers=headers,
-            params=params,
-            timeout=30
-        )
-
-        if response.status_code == 200:
-            data = response.json()
-            for item in data.get('files', []):
-                if item.get('name', '').lower() == folder_name.lower():
-                    return item.get('_id')  # GHL uses _id not id
-        return None
+        return ghl_media_folders.find_folder(get_headers(), get_location_id(), folder_name)
     except Exception as e:
         print(f"Error searching for folder: {e}")
         return None
@@ -403,7 +281,10 @@ def create_folder(folder_name: str) -> str | None:
 
         if response.status_code in [200, 201]:
             result = response.json()
-            return result.get('_id') or result.get('id')
+            folder_id = result.get('_id') or result.get('id')
+            if folder_id:
+                ghl_media_folders.remember_folder(get_location_id(), folder_id, folder_name)
+            return folder_id
         else:
             print(f"Failed to create folder ({response.status_code}): {response.text[:200]}")
             return None
@@ -423,8 +304,13 @@ def find_or_create_folder(folder_name: str) -> str | None:
         print(f"   ✓ Created folder ID: {folder_id}")
     return folder_id
 
-def upload_to_folder(file_path: str, folder_id: str | None = None) -> str | None:
-    """Upload a file to GHL Media, optionally to a specific folder."""
+def upload_to_folder(file_path: str, folder_id: str | None = None, retry_folder: bool = True) -> str | None:
+    """Upload a file to GHL Media, optionally to a specific folder.
+
+    If GHL rejects a (cached) folder ID, the folder is dropped from the cache,
+    resolved again from a fresh listing and the upload retried once - into
+    the media root if the folder no longer exists.
+    """
     import mimetypes
 
     mime_type, _ = mimetypes.guess_type(file_path)
@@ -459,6 +345,10 @@ def upload_to_folder(file_path: str, folder_id: str | None = None) -> str | None
             if response.status_code in [200, 201]:
                 result = response.json()
                 return result.get('url', '')
+            elif folder_id and retry_folder and ghl_media_folders.is_folder_error(response.status_code, response.text):
+                print(f"Folder {folder_id} rejected ({response.status_code}) - refreshing folder list")
+                new_folder_id = ghl_media_folders.replace_folder(headers, get_location_id(), folder_id)
+                return upload_to_folder(file_path, new_folder_id, retry_folder=False)
             else:
                 print(f"Upload failed ({response.status_code}): {response.text[:200]}")
                 return None
@@ -527,22 +417,25 @@ def _draw_thumbnail(
     y: int,
     thumb_size: int,
     label_font,
-    image_labels: dict
+    image_labels: dict,
+    img_data=None
 ) -> None:
     """Draw a single thumbnail with label on the canvas.
 
     Args:
         canvas_img: PIL Image canvas.
         draw: ImageDraw object.
-        img_path: Path to thumbnail image.
+        img_path: Path to thumbnail image (or just its filename when img_data is given).
         x: X position.
         y: Y position.
         thumb_size: Thumbnail size in pixels.
         label_font: Font for label.
         image_labels: Dict mapping filename to label.
+        img_data: Optional in-memory JPEG bytes/memoryview to decode instead of img_path.
     """
     try:
-        with Image.open(img_path) as thumb:
+        source = io.BytesIO(img_data) if img_data is not None else img_path
+        with Image.open(source) as thumb:
             thumb.thumbnail((thumb_size, thumb_size), Image.Resampling.LANCZOS)
             thumb_x = x + (thumb_size - thumb.width) // 2
             thumb_y = y + (thumb_size - thumb.height) // 2
@@ -562,31 +455,52 @@ def _draw_thumbnail(
 # =============================================================================
 # JPG Contact Sheet Generation
 # =============================================================================
+def select_contact_sheet_names(names) -> list:
+    """Pick the images a contact sheet shows, in the order it shows them.
+
+    Prefers Product_*.jpg, then Print_*.jpg, then any *.jpg.
+
+    Args:
+        names: Iterable of image filenames (or paths).
+
+    Returns:
+        list: Sorted subset of names.
+    """
+    names = list(names)
+    for pattern in ("Product_*.jpg", "Print_*.jpg", "*.jpg"):
+        matched = sorted(n for n in names if fnmatch.fnmatch(os.path.basename(n), pattern))
+        if matched:
+            return matched
+    return []
+
+
 def create_contact_sheet_jpg(
     image_folder: str,
     output_path: str,
     title: str = "Product Contact Sheet",
     subtitle: str = "",
-    image_labels: dict | None = None
+    image_labels: dict | None = None,
+    thumbnails: dict | None = None
 ) -> str:
     """Create a JPG contact sheet from thumbnail images.
 
     Args:
-        image_folder: Path to folder containing Product_*.jpg files
+        image_folder: Path to folder containing Product_*.jpg files (ignored if thumbnails given)
         output_path: Output JPG file path
         title: Title text for the contact sheet
         subtitle: Subtitle text
         image_labels: Dict mapping filename (e.g. 'Product_Print_1.jpg') to label (e.g. '55-Book Image')
+        thumbnails: Optional in-memory {filename: JPEG bytes/memoryview} map, e.g. from
+                    read_psa_images.load_thumbnails(), decoded without touching disk
     """
     if image_labels is None:
         image_labels = {}
 
     # Look for Product_*.jpg or Print_*.jpg or any jpg in folder
-    images = sorted(glob.glob(os.path.join(image_folder, "Product_*.jpg")))
-    if not images:
-        images = sorted(glob.glob(os.path.join(image_folder, "Print_*.jpg")))
-    if not images:
-        images = sorted(glob.glob(os.path.join(image_folder, "*.jpg")))
+    if thumbnails is not None:
+        images = select_contact_sheet_names(thumbnails.keys())
+    else:
+        images = select_contact_sheet_names(glob.glob(os.path.join(image_folder, "*.jpg")))
     if not images:
         print("No images found!")
         return None
@@ -623,7 +537,8 @@ def create_contact_sheet_jpg(
         row = idx // cols
         x = padding + col * (thumb_size + padding)
         y = header_height + row * (thumb_size + label_height + padding)
-        _draw_thumbnail(canvas_img, draw, img_path, x, y, thumb_size, label_font, image_labels)
+        img_data = thumbnails[img_path] if thumbnails is not None else None
+        _draw_thumbnail(canvas_img, draw, img_path, x, y, thumb_size, label_font, image_labels, img_data)
 
     # Add credit at bottom right
     credit_text = "Created by SideKick_PS"
@@ -21,6 +21,68 @@ import re
 import os
 
 
+def order_group_totals(order_data: str, group_ids) -> dict[int, float]:
+    """Sum the order items (price x qty plus extras) for each order group.
+
+    Args:
+        order_data: OrderList XML from the .psa BigStrings table
+        group_ids: Group IDs to total; items for other groups are ignored
+
+    Returns:
+        Group ID -> order total (unrounded)
+    """
+    group_order_totals = {gid: 0.0 for gid in group_ids}
+
+    # Parse order items - each has groupID and price info
+    # Items have: groupID="N" and prices, extras, etc.
+    for item_match in re.finditer(
+        r'<item\s+[^>]*groupID="(\d+)"[^>]*>(.*?)</item>',
+        order_data,
+        re.DOTALL,
+    ):
+        gid = int(item_match.group(1))
+        item_content = item_match.group(2)
+
+        if gid not in group_order_totals:
+            continue
+
+        # Get base price
+        price_match = re.search(r'<Price\s+[^>]*price="([^"]+)"', item_content)
+        if price_match:
+            try:
+                price = float(price_match.group(1))
+            except ValueError:
+                price = 0.0
+        else:
+            price = 0.0
+
+        # Get qty from the item attributes
+        qty_match = re.search(
+            r'groupID="' + str(gid) + r'"[^>]*\bqty="(\d+)"',
+            item_match.group(0),
+        )
+        qty = int(qty_match.group(1)) if qty_match else 1
+
+        # Calculate line total (price * qty, but ProSelect stores total in price for some items)
+        line_total = price * qty if qty > 0 else price
+
+        # Add extras (discounts, credits, etc.)
+        for extra in re.finditer(
+            r'<extra[^>]+price="([^"]+)"[^>]*/>', item_content
+        ):
+            try:
+                extra_price = float(extra.group(1))
+                extra_qty_match = re.search(r'qty="(\d+)"', extra.group(0))
+                extra_qty = int(extra_qty_match.group(1)) if extra_qty_match else 1
+                line_total += extra_price * extra_qty
+            except ValueError:
+                pass
+
+        group_order_totals[gid] += line_total
+
+    return group_order_totals
+
+
 def detect_group(psa_path: str, target_balance: float) -> str:
     """Detect which order group matches the given balance.
 
@@ -91,56 +153,7 @@ def detect_group(psa_path: str, target_balance: float) -> str:
         # But we can also match by finding the group whose balance matches
         #
         # Parse order items to calculate totals per group
-        group_order_totals = {}
-        for g in groups:
-            group_order_totals[g["id"]] = 0.0
-
-        # Parse order items - each has groupID and price info
-        # Items have: groupID="N" and prices, extras, etc.
-        for item_match in re.finditer(
-            r'<item\s+[^>]*groupID="(\d+)"[^>]*>(.*?)</item>',
-            order_data,
-            re.DOTALL,
-        ):
-            gid = int(item_match.group(1))
-            item_content = item_match.group(2)
-
-            if gid not in group_order_totals:
-                continue
-
-            # Get base price
-            price_match = re.search(r'<Price\s+[^>]*price="([^"]+)"', item_content)
-            if price_match:
-                try:
-                    price = float(price_match.group(1))
-                except ValueError:
-                    price = 0.0
-            else:
-                price = 0.0
-
-            # Get qty from the item attributes
-            qty_match = re.search(
-                r'groupID="' + str(gid) + r'"[^>]*\bqty="(\d+)"',
-                item_match.group(0),
-            )
-            qty = int(qty_match.group(1)) if qty_match else 1
-
-            # Calculate line total (price * qty, but ProSelect stores total in price for some items)
-            line_total = price * qty if qty > 0 else price
-
-            # Add extras (discounts, credits, etc.)
-            for extra in re.finditer(
-                r'<extra[^>]+price="([^"]+)"[^>]*/>', item_content
-            ):
-                try:
-                    extra_price = float(extra.group(1))
-                    extra_qty_match = re.search(r'qty="(\d+)"', extra.group(0))
-                    extra_qty = int(extra_qty_match.group(1)) if extra_qty_match else 1
-                    line_total += extra_price * extra_qty
-                except ValueError:
-                    pass
-
-            group_order_totals[gid] += line_total
+        group_order_totals = order_group_totals(order_data, [g["id"] for g in groups])
 
         # Now match: outstanding balance = order total - payments
         target = round(target_balance, 2)
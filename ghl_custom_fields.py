@@ -0,0 +1,136 @@
+"""
+GHL Custom Fields Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Disk-cached custom-field definitions (id -> name, dataType, fieldKey) for a
+GHL location, plus the date parser used on custom-field values.
+
+Field definitions change rarely, but several tools need them: Cardly's
+address2/address3 lookup and the preview GUI's date picker labels. The
+GET /locations/{id}/customFields result is kept in
+%APPDATA%\\SideKick_PS\\ghl_custom_fields.json with the time it was fetched.
+It is served from there for FIELD_TTL seconds. If the API cannot be
+reached, the stale copy is returned rather than nothing.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from datetime import date
+
+import sidekick_config
+
+CACHE_FILENAME = 'ghl_custom_fields.json'
+BASE_URL = "https://services.leadconnectorhq.com"
+FIELD_TTL = 12 * 3600
+REQUEST_TIMEOUT = 10
+
+_cache_lock = threading.Lock()
+# YYYY-MM-DD, optionally followed by a time and offset (2026-03-12T14:30:00.000Z)
+_ISO_DATE_RE = re.compile(r'^\s*(\d{4})-(\d{2})-(\d{2})(?:[T ][0-9:.]+(?:Z|[+-]\d{2}:?\d{2})?)?\s*$')
+
+
+def _cache_path() -> str:
+    return os.path.join(sidekick_config.get_output_dir(), CACHE_FILENAME)
+
+
+def _read_cache() -> dict:
+    try:
+        with open(_cache_path(), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(data: dict) -> None:
+    path = _cache_path()
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def fetch_field_definitions(headers: dict, location_id: str) -> dict | None:
+    """Fetch a location's custom-field definitions from GHL.
+
+    Returns:
+        dict: {field_id: {name, type, field_key, model}}, or None on an API error.
+    """
+    import requests
+
+    try:
+        response = requests.get(f"{BASE_URL}/locations/{location_id}/customFields",
+                                headers=headers, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+    fields = {}
+    for cf in response.json().get('customFields', []):
+        if cf.get('id'):
+            fields[cf['id']] = {
+                'name': cf.get('name', ''),
+                'type': cf.get('dataType', ''),
+                'field_key': cf.get('fieldKey', ''),
+                'model': cf.get('model', ''),
+            }
+    return fields
+
+
+def get_field_definitions(headers: dict, location_id: str, max_age: float = FIELD_TTL) -> dict:
+    """Custom-field definitions for a location, refetched once older than max_age.
+
+    Args:
+        headers: Authorization/Version headers of the calling script.
+        location_id: GHL location ID.
+        max_age: Cache lifetime in seconds (0 forces a refetch).
+
+    Returns:
+        dict: {field_id: {name, type, field_key, model}}; empty if never fetched
+        and the API is unreachable.
+    """
+    if not location_id:
+        return {}
+    with _cache_lock:
+        entry = _read_cache().get(location_id, {})
+    if entry and time.time() - entry.get('fetched_at', 0) < max_age:
+        return entry.get('fields', {})
+
+    fields = fetch_field_definitions(headers, location_id)
+    if fields is None:
+        return entry.get('fields', {})
+    with _cache_lock:
+        data = _read_cache()
+        data[location_id] = {'fetched_at': time.time(), 'fields': fields}
+        _write_cache(data)
+    return fields
+
+
+def field_ids_by_key(fields: dict, *field_keys: str) -> dict:
+    """Map fieldKeys (e.g. 'contact.address2') to their field IDs."""
+    wanted = set(field_keys)
+    return {f['field_key']: fid for fid, f in fields.items() if f.get('field_key') in wanted}
+
+
+def parse_field_date(value) -> date | None:
+    """Date of an ISO-8601 custom-field value ('2026-03-12', '2026-03-12T14:30:00.000Z').
+
+    Only the calendar date is used, as GHL stores dates at midnight UTC.
+    Returns None for anything else.
+    """
+    if not isinstance(value, str):
+        return None
+    match = _ISO_DATE_RE.match(value)
+    if not match:
+        return None
+    try:
+        return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return None
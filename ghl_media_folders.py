@@ -0,0 +1,176 @@
+"""
+GHL Media Folders Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Cached directory of GHL Media Storage folders (name -> id, parent tree).
+
+GET /medias/files?type=folder returns one page at a time, so the listing is
+fetched with limit/offset until a short page comes back. The result is kept
+in the media ledger (ghl_media_ledger.db) together with the time it was
+fetched. Lookups within FOLDER_TTL are answered locally with no API call; a
+name that is missing triggers at most one refetch per MISS_REFRESH seconds,
+so a folder created from another machine is still found.
+
+Callers that create a folder pass the new ID to remember_folder, which adds
+it to the cached listing in place: the next upload resolves it locally. A
+cached ID can still go stale inside FOLDER_TTL (the folder was deleted or
+moved in GHL); when an upload is rejected for its parentId (is_folder_error),
+callers hand the ID to replace_folder, which drops it, refetches the listing
+and resolves the folder's name again before they retry.
+"""
+
+import ghl_media_ledger
+
+BASE_URL = "https://services.leadconnectorhq.com"
+MEDIA_FILES_URL = f"{BASE_URL}/medias/files"
+FOLDER_TTL = 12 * 3600
+MISS_REFRESH = 60
+PAGE_LIMIT = 100
+MAX_PAGES = 200
+FOLDER_ERROR_STATUSES = (400, 404, 422)
+
+
+def _folder_record(item: dict) -> dict:
+    """Normalise a /medias/files item (GHL returns _id, some responses id)."""
+    return {
+        'id': item.get('_id') or item.get('id') or '',
+        'name': item.get('name', ''),
+        'parent_id': item.get('parentId') or '',
+    }
+
+
+def fetch_folders(headers: dict, location_id: str, timeout: int = 30) -> list[dict] | None:
+    """Fetch every media folder of a location, page by page.
+
+    Args:
+        headers: Authorization/Version headers of the calling script.
+        location_id: GHL location ID.
+        timeout: Per-request timeout in seconds.
+
+    Returns:
+        list: Folder dicts with id, name and parent_id, or None on an API error.
+    """
+    import requests
+
+    folders: list[dict] = []
+    seen: set[str] = set()
+    for page in range(MAX_PAGES):
+        params = {
+            'altId': location_id,
+            'altType': 'location',
+            'type': 'folder',
+            'sortBy': 'createdAt',
+            'sortOrder': 'asc',
+            'limit': PAGE_LIMIT,
+            'offset': page * PAGE_LIMIT,
+        }
+        try:
+            response = requests.get(MEDIA_FILES_URL, headers=headers, params=params, timeout=timeout)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        items = response.json().get('files', [])
+        fresh = 0
+        for item in items:
+            record = _folder_record(item)
+            if not record['id'] or record['id'] in seen:
+                continue
+            seen.add(record['id'])
+            fresh += 1
+            # Older API versions ignore type=folder and return files too
+            if item.get('type', 'folder') == 'folder':
+                folders.append(record)
+        # A short page is the last one; a page of repeats means offset is ignored
+        if len(items) < PAGE_LIMIT or not fresh:
+            break
+    return folders
+
+
+def refresh_folders(headers: dict, location_id: str) -> list[dict] | None:
+    """Fetch the full listing and replace the cached copy; None on an API error."""
+    folders = fetch_folders(headers, location_id)
+    if folders is None:
+        return None
+    ghl_media_ledger.replace_folders(location_id, folders)
+    return sorted(folders, key=lambda f: f['name'].lower())
+
+
+def get_folders(headers: dict, location_id: str, max_age: float = FOLDER_TTL) -> list[dict]:
+    """Return the location's folders, refetching if the cached listing is older than max_age.
+
+    If the API cannot be reached the cached (possibly stale) listing is returned.
+    """
+    age = ghl_media_ledger.folder_listing_age(location_id)
+    if age is None or age >= max_age:
+        folders = refresh_folders(headers, location_id)
+        if folders is not None:
+            return folders
+    return ghl_media_ledger.cached_folders(location_id)
+
+
+def find_folder(headers: dict, location_id: str, name: str, parent_id: str | None = None,
+                max_age: float = FOLDER_TTL) -> str | None:
+    """Resolve a folder name to its ID, from the cache when possible.
+
+    Args:
+        headers: Authorization/Version headers of the calling script.
+        location_id: GHL location ID.
+        name: Folder name (case-insensitive).
+        parent_id: Restrict to children of this folder ('' = media root).
+        max_age: Cached listing lifetime in seconds.
+
+    Returns:
+        str | None: Folder ID, or None if no such folder exists.
+    """
+    age = ghl_media_ledger.folder_listing_age(location_id)
+    if age is not None and age < max_age:
+        folder_id = ghl_media_ledger.lookup_folder(location_id, name, parent_id)
+        if folder_id or age < MISS_REFRESH:
+            return folder_id
+    get_folders(headers, location_id, max_age=0)
+    return ghl_media_ledger.lookup_folder(location_id, name, parent_id)
+
+
+def remember_folder(location_id: str, folder_id: str, name: str, parent_id: str = '') -> bool:
+    """Add a folder created by the caller to the cached listing."""
+    return ghl_media_ledger.record_folder(location_id, folder_id, name, parent_id)
+
+
+def is_folder_error(status_code: int, text: str) -> bool:
+    """True if an upload response rejects the target folder (bad parentId / folder not found)."""
+    text = (text or '').lower()
+    return status_code in FOLDER_ERROR_STATUSES and ('parent' in text or 'folder' in text)
+
+
+def replace_folder(headers: dict, location_id: str, folder_id: str, name: str = '') -> str | None:
+    """Drop a folder ID that GHL rejected and resolve the folder again.
+
+    Args:
+        headers: Authorization/Version headers of the calling script.
+        location_id: GHL location ID.
+        folder_id: The cached ID the upload was rejected for.
+        name: Folder name; looked up in the cached listing if omitted.
+
+    Returns:
+        str | None: The folder's current ID, or None if it no longer exists.
+    """
+    if not name:
+        name = next((f['name'] for f in ghl_media_ledger.cached_folders(location_id)
+                     if f['id'] == folder_id), '')
+    ghl_media_ledger.forget_folder(location_id, folder_id)
+    refresh_folders(headers, location_id)
+    folder = ghl_media_ledger.lookup_folder(location_id, name) if name else None
+    return folder if folder != folder_id else None
+
+
+def folder_path(folders: list[dict], folder_id: str) -> str:
+    """Full 'Parent/Child' path of a folder within a listing."""
+    by_id = {f['id']: f for f in folders}
+    parts: list[str] = []
+    while folder_id in by_id and len(parts) < len(by_id):
+        parts.append(by_id[folder_id]['name'])
+        folder_id = by_id[folder_id]['parent_id']
+    return '/'.join(reversed(parts))
+
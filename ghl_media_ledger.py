@@ -0,0 +1,378 @@
+"""
+GHL Media Ledger Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Content-addressed record of files already uploaded to GHL Media Storage.
+
+Every upload is keyed by the SHA-256 of the file bytes (plus location and
+target folder), so re-syncing an unchanged album or re-sending the same room
+capture reuses the existing media URL instead of uploading again. A second
+table remembers the input digest that produced each rendered file (e.g. a
+contact sheet), letting callers skip rendering when inputs are unchanged.
+The media folder directory (see ghl_media_folders) is kept here as well,
+with the time each location's folder listing was fetched.
+
+A ledger hit is only as good as the media behind it: lookup_live_media checks
+the stored URL still resolves and forgets entries GHL has since deleted, so
+the caller uploads again instead of handing out a dead link.
+
+The ledger lives in %APPDATA%\\SideKick_PS\\ghl_media_ledger.db. All functions
+are best-effort: any SQLite error is swallowed and treated as a cache miss.
+"""
+
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+import requests
+
+import sidekick_config
+
+LEDGER_FILENAME = 'ghl_media_ledger.db'
+GONE_STATUSES = (403, 404, 410)  # Media URL answers that mean the file was deleted
+LIVENESS_TIMEOUT = 10
+
+
+def get_ledger_path() -> str:
+    """Return the path of the media ledger database."""
+    return os.path.join(sidekick_config.get_output_dir(), LEDGER_FILENAME)
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the ledger database, creating tables on first use."""
+    conn = sqlite3.connect(get_ledger_path(), timeout=10)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS media (
+            sha256 TEXT NOT NULL,
+            location_id TEXT NOT NULL DEFAULT '',
+            folder_id TEXT NOT NULL DEFAULT '',
+            url TEXT NOT NULL,
+            media_id TEXT,
+            file_name TEXT,
+            size_bytes INTEGER,
+            uploaded_at TEXT NOT NULL,
+            PRIMARY KEY (sha256, location_id, folder_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS renders (
+            render_key TEXT PRIMARY KEY,
+            input_digest TEXT NOT NULL,
+            output_sha256 TEXT NOT NULL,
+            output_path TEXT,
+            item_count INTEGER,
+            updated_at TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS folders (
+            location_id TEXT NOT NULL,
+            folder_id TEXT NOT NULL,
+            name TEXT NOT NULL,
+            parent_id TEXT NOT NULL DEFAULT '',
+            PRIMARY KEY (location_id, folder_id)
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS folder_listings (
+            location_id TEXT PRIMARY KEY,
+            fetched_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_folders_name ON folders (location_id, name COLLATE NOCASE)')
+    return conn
+
+
+def lookup_media(sha256: str, location_id: str = '', folder_id: str = '') -> dict | None:
+    """Find a previous upload of identical content.
+
+    Args:
+        sha256: Content hash of the file.
+        location_id: GHL location the file was uploaded to.
+        folder_id: GHL media folder ('' for the media root).
+
+    Returns:
+        dict with url, media_id, file_name and uploaded_at, or None.
+    """
+    if not sha256:
+        return None
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                'SELECT url, media_id, file_name, uploaded_at FROM media '
+                'WHERE sha256 = ? AND location_id = ? AND folder_id = ?',
+                (sha256, location_id or '', folder_id or '')
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    if not row:
+        return None
+    return {'url': row[0], 'media_id': row[1] or '', 'file_name': row[2] or '', 'uploaded_at': row[3]}
+
+
+def record_media(sha256: str, url: str, location_id: str = '', folder_id: str = '',
+                 media_id: str = '', file_name: str = '', size_bytes: int = 0) -> bool:
+    """Remember that content with this hash now lives at url."""
+    if not sha256 or not url:
+        return False
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                '''
+                INSERT INTO media (sha256, location_id, folder_id, url, media_id, file_name, size_bytes, uploaded_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(sha256, location_id, folder_id) DO UPDATE SET
+                    url=excluded.url,
+                    media_id=excluded.media_id,
+                    file_name=excluded.file_name,
+                    size_bytes=excluded.size_bytes,
+                    uploaded_at=excluded.uploaded_at
+                ''',
+                (sha256, location_id or '', folder_id or '', url, media_id or '', file_name or '',
+                 int(size_bytes or 0), datetime.now().isoformat(timespec='seconds'))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def forget_media(sha256: str, location_id: str = '', folder_id: str = '') -> bool:
+    """Drop a ledger entry, e.g. after the media was deleted in GHL."""
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                'DELETE FROM media WHERE sha256 = ? AND location_id = ? AND folder_id = ?',
+                (sha256, location_id or '', folder_id or '')
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def media_url_gone(url: str) -> bool:
+    """Return True if GHL no longer serves the media at url.
+
+    Network errors and other statuses count as alive, so a flaky connection
+    never throws away a good entry.
+    """
+    if not url:
+        return True
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=LIVENESS_TIMEOUT)
+    except requests.RequestException:
+        return False
+    return response.status_code in GONE_STATUSES
+
+
+def lookup_live_media(sha256: str, location_id: str = '', folder_id: str = '') -> dict | None:
+    """Like lookup_media, but forget the entry if its media was deleted in GHL.
+
+    Returns:
+        dict as from lookup_media, or None when there is nothing reusable.
+    """
+    known = lookup_media(sha256, location_id, folder_id)
+    if known and media_url_gone(known['url']):
+        forget_media(sha256, location_id, folder_id)
+        return None
+    return known
+
+
+def lookup_render(render_key: str, input_digest: str) -> dict | None:
+    """Return the previous render for render_key if it used the same inputs.
+
+    The render is only returned if its output file still exists with the
+    recorded content hash, so a deleted or hand-edited output is re-rendered.
+
+    Returns:
+        dict with output_sha256, output_path and item_count, or None.
+    """
+    if not render_key or not input_digest:
+        return None
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                'SELECT input_digest, output_sha256, output_path, item_count FROM renders WHERE render_key = ?',
+                (render_key,)
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    if not row or row[0] != input_digest:
+        return None
+    output_path = row[2] or ''
+    if not output_path or sidekick_config.sha256_file(output_path) != row[1]:
+        return None
+    return {'output_sha256': row[1], 'output_path': output_path, 'item_count': row[3] or 0}
+
+
+def record_render(render_key: str, input_digest: str, output_path: str,
+                  item_count: int = 0, output_sha256: str = '') -> str | None:
+    """Remember the inputs and output hash of a completed render.
+
+    Returns:
+        str: The output file's SHA-256 (computed if not supplied), or None.
+    """
+    output_sha256 = output_sha256 or sidekick_config.sha256_file(output_path)
+    if not render_key or not input_digest or not output_sha256:
+        return None
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                '''
+                INSERT INTO renders (render_key, input_digest, output_sha256, output_path, item_count, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(render_key) DO UPDATE SET
+                    input_digest=excluded.input_digest,
+                    output_sha256=excluded.output_sha256,
+                    output_path=excluded.output_path,
+                    item_count=excluded.item_count,
+                    updated_at=excluded.updated_at
+                ''',
+                (render_key, input_digest, output_sha256, output_path, int(item_count or 0),
+                 datetime.now().isoformat(timespec='seconds'))
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return output_sha256
+
+
+def folder_listing_age(location_id: str = '') -> float | None:
+    """Seconds since the location's folder listing was fetched, or None if never."""
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                'SELECT fetched_at FROM folder_listings WHERE location_id = ?', (location_id or '',)
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return max(0.0, time.time() - row[0]) if row else None
+
+
+def replace_folders(location_id: str, folders: list[dict]) -> bool:
+    """Store a complete folder listing for a location, replacing the previous one.
+
+    Args:
+        location_id: GHL location the listing belongs to.
+        folders: Dicts with id, name and parent_id.
+    """
+    rows = [(location_id or '', f['id'], f.get('name', ''), f.get('parent_id', '') or '')
+            for f in folders if f.get('id')]
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM folders WHERE location_id = ?', (location_id or '',))
+                conn.executemany(
+                    'INSERT OR REPLACE INTO folders (location_id, folder_id, name, parent_id) VALUES (?, ?, ?, ?)',
+                    rows
+                )
+                conn.execute(
+                    'INSERT OR REPLACE INTO folder_listings (location_id, fetched_at) VALUES (?, ?)',
+                    (location_id or '', time.time())
+                )
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def record_folder(location_id: str, folder_id: str, name: str, parent_id: str = '') -> bool:
+    """Add or rename one folder without touching the rest of the listing."""
+    if not folder_id:
+        return False
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO folders (location_id, folder_id, name, parent_id) VALUES (?, ?, ?, ?)',
+                    (location_id or '', folder_id, name or '', parent_id or '')
+                )
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def forget_folder(location_id: str, folder_id: str) -> bool:
+    """Drop a folder GHL no longer has and mark the location's listing stale."""
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM folders WHERE location_id = ? AND folder_id = ?',
+                             (location_id or '', folder_id or ''))
+                conn.execute('DELETE FROM folder_listings WHERE location_id = ?', (location_id or '',))
+        finally:
+            conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def lookup_folder(location_id: str, name: str, parent_id: str | None = None) -> str | None:
+    """Find a cached folder ID by name (case-insensitive).
+
+    Args:
+        location_id: GHL location.
+        name: Folder name.
+        parent_id: Only match folders under this parent ('' = media root);
+            None matches any parent, preferring a top-level folder.
+    """
+    if not name:
+        return None
+    sql = 'SELECT folder_id FROM folders WHERE location_id = ? AND name = ? COLLATE NOCASE'
+    params: tuple = (location_id or '', name)
+    if parent_id is not None:
+        sql += ' AND parent_id = ?'
+        params += (parent_id,)
+    sql += " ORDER BY (parent_id = '') DESC LIMIT 1"
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(sql, params).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    return row[0] if row else None
+
+
+def cached_folders(location_id: str = '') -> list[dict]:
+    """Return the cached folders of a location as dicts with id, name and parent_id."""
+    try:
+        conn = _connect()
+        try:
+            rows = conn.execute(
+                'SELECT folder_id, name, parent_id FROM folders WHERE location_id = ? ORDER BY name COLLATE NOCASE',
+                (location_id or '',)
+            ).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return []
+    return [{'id': r[0], 'name': r[1], 'parent_id': r[2]} for r in rows]
@@ -0,0 +1,489 @@
+"""
+GHL Sync Ledger Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Central record of which albums have been synced to GHL.
+
+Every PSA metadata write made by sync_ps_invoice (contact ID, last invoice
+and opportunity IDs, invoice step fingerprints, last_sync_at) is mirrored
+here, keyed by PSA path with shoot number and album name columns. The batch
+month sync can then answer "is this album already synced?" for every album
+with one indexed query, instead of opening each PSA file in turn.
+
+GHL contact IDs resolved by API search are remembered per export (XML path
+plus SHA-256 of its bytes) in the same database, so later runs skip the
+search without rewriting the export file.
+
+Keys written while a PSA is locked (open in ProSelect) or with deferred
+writes enabled stay pending. PsaReconciler pushes them into the PSA
+sk_ps_meta table in the background, so the PSA remains the portable copy.
+
+The ledger lives in %APPDATA%\\SideKick_PS\\ghl_sync_ledger.db and uses WAL
+journaling so the reconciler can write while the sync reads. All functions
+are best-effort: any SQLite error is swallowed and treated as a miss.
+
+Usage:
+    python ghl_sync_ledger.py --status
+    python ghl_sync_ledger.py --reconcile
+    python ghl_sync_ledger.py --month 2026-04
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+import sidekick_config
+
+LEDGER_FILENAME = 'ghl_sync_ledger.db'
+PSA_WRITE_TIMEOUT = 5
+RECONCILE_INTERVAL = 30
+
+# sk_ps_meta key set to '1' while an album's opportunity update is queued
+# but not yet confirmed by GHL; such albums are not reported as synced.
+OPP_MOVE_PENDING_KEY = 'ghl_opportunity_move_pending'
+
+# sk_ps_meta keys that are also kept as indexed album columns
+_ALBUM_COLUMNS = {
+    'shoot_no': 'shoot_no',
+    'album_name': 'album_name',
+    'order_date': 'order_date',
+    'ghl_contact_id': 'contact_id',
+    'ghl_last_invoice_id': 'invoice_id',
+    'ghl_last_opportunity_id': 'opportunity_id',
+    'last_sync_at': 'last_sync_at',
+}
+
+
+def get_ledger_path() -> str:
+    """Return the path of the sync ledger database."""
+    return os.path.join(sidekick_config.get_output_dir(), LEDGER_FILENAME)
+
+
+def _norm_path(psa_path: str) -> str:
+    """Normalise a PSA path so the same album always maps to one row."""
+    return os.path.normcase(os.path.abspath(psa_path))
+
+
+def album_key(psa_path: str) -> str:
+    """Key of a PSA in the synced_albums() result ('' for no path)."""
+    return _norm_path(psa_path) if psa_path else ''
+
+
+def _now() -> str:
+    """Return the current local time as an ISO timestamp."""
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the ledger database in WAL mode, creating tables on first use."""
+    conn = sqlite3.connect(get_ledger_path(), timeout=10)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS albums (
+            psa_path TEXT PRIMARY KEY,
+            shoot_no TEXT NOT NULL DEFAULT '',
+            album_name TEXT NOT NULL DEFAULT '',
+            order_date TEXT NOT NULL DEFAULT '',
+            contact_id TEXT NOT NULL DEFAULT '',
+            invoice_id TEXT NOT NULL DEFAULT '',
+            opportunity_id TEXT NOT NULL DEFAULT '',
+            last_sync_at TEXT NOT NULL DEFAULT '',
+            updated_at TEXT NOT NULL
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS meta (
+            psa_path TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL DEFAULT '',
+            updated_at TEXT NOT NULL,
+            pending INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (psa_path, key)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS contacts (
+            xml_path TEXT NOT NULL,
+            sha256 TEXT NOT NULL,
+            location_id TEXT NOT NULL DEFAULT '',
+            contact_id TEXT NOT NULL,
+            source TEXT NOT NULL DEFAULT '',
+            resolved_at TEXT NOT NULL,
+            PRIMARY KEY (xml_path, sha256, location_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_contacts_sha256 ON contacts (sha256, location_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_albums_shoot_no ON albums (shoot_no)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_albums_album_name ON albums (album_name COLLATE NOCASE)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_albums_order_date ON albums (order_date)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_meta_pending ON meta (psa_path) WHERE pending = 1')
+    return conn
+
+
+def record_meta(psa_path: str, values: dict, pending: bool = True) -> bool:
+    """Mirror sk_ps_meta key/values for one PSA in a single transaction.
+
+    Args:
+        psa_path: PSA file the values belong to.
+        values: Metadata key -> value (None is stored as '').
+        pending: True if the values still have to be written into the PSA.
+
+    Returns:
+        bool: True if the ledger was updated.
+    """
+    if not psa_path or not values:
+        return False
+    path = _norm_path(psa_path)
+    now = _now()
+    rows = [(path, str(k), '' if v is None else str(v), now, 1 if pending else 0)
+            for k, v in values.items() if k]
+    if not rows:
+        return False
+
+    columns = {_ALBUM_COLUMNS[k]: v for _, k, v, _, _ in rows if k in _ALBUM_COLUMNS}
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.executemany('''
+                    INSERT INTO meta (psa_path, key, value, updated_at, pending)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(psa_path, key) DO UPDATE SET
+                        value=excluded.value,
+                        updated_at=excluded.updated_at,
+                        pending=excluded.pending
+                ''', rows)
+                conn.execute(
+                    'INSERT OR IGNORE INTO albums (psa_path, album_name, updated_at) VALUES (?, ?, ?)',
+                    (path, os.path.splitext(os.path.basename(psa_path))[0], now)
+                )
+                assignments = ', '.join(f'{col} = ?' for col in columns)
+                conn.execute(
+                    f'UPDATE albums SET {assignments + ", " if assignments else ""}updated_at = ? WHERE psa_path = ?',
+                    (*columns.values(), now, path)
+                )
+            return True
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+
+def get_meta(psa_path: str, pending_only: bool = False) -> dict[str, str]:
+    """Return the mirrored metadata for one PSA ({} on miss)."""
+    if not psa_path:
+        return {}
+    sql = 'SELECT key, value FROM meta WHERE psa_path = ?'
+    if pending_only:
+        sql += ' AND pending = 1'
+    try:
+        conn = _connect()
+        try:
+            return {k: v for k, v in conn.execute(sql, (_norm_path(psa_path),))}
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return {}
+
+
+def mark_pushed(psa_path: str, values: dict) -> int:
+    """Clear the pending flag for keys whose ledger value still equals values.
+
+    A key re-written since the PSA write keeps its pending flag, so the newer
+    value is pushed on the next reconcile.
+
+    Returns:
+        int: Number of keys cleared.
+    """
+    if not psa_path or not values:
+        return 0
+    path = _norm_path(psa_path)
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                cur = conn.executemany(
+                    'UPDATE meta SET pending = 0 WHERE psa_path = ? AND key = ? AND value = ? AND pending = 1',
+                    [(path, str(k), '' if v is None else str(v)) for k, v in values.items() if k]
+                )
+            return max(cur.rowcount, 0)
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0
+
+
+def pending_count() -> int:
+    """Return how many keys are still waiting to be written into PSA files."""
+    try:
+        conn = _connect()
+        try:
+            return conn.execute('SELECT COUNT(*) FROM meta WHERE pending = 1').fetchone()[0]
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0
+
+
+def synced_albums(batch_month: str = '') -> dict[str, dict]:
+    """Return every album the ledger knows as synced, in one query.
+
+    Albums are keyed by PSA path (see album_key), not by name: exports in
+    different folders often share an album name. Albums whose opportunity
+    update is still pending (OPP_MOVE_PENDING_KEY) are left out so the next
+    run retries them.
+
+    Args:
+        batch_month: Optional 'YYYY-MM' filter on order_date. Albums with no
+            recorded order date are left out, so the caller checks them the
+            slow way (full parse + PSA metadata).
+
+    Returns:
+        dict: album_key(psa_path) -> {psa_path, shoot_no, album_name,
+            contact_id, invoice_id, opportunity_id, last_sync_at}.
+    """
+    sql = '''
+        SELECT psa_path, shoot_no, album_name, contact_id, invoice_id, opportunity_id, last_sync_at
+        FROM albums
+        WHERE (last_sync_at != '' OR invoice_id != '' OR opportunity_id != '')
+          AND NOT EXISTS (
+              SELECT 1 FROM meta
+              WHERE meta.psa_path = albums.psa_path AND meta.key = ? AND meta.value = '1'
+          )
+    '''
+    params: tuple = (OPP_MOVE_PENDING_KEY,)
+    if batch_month:
+        sql += " AND order_date LIKE ?"
+        params += (f'{batch_month}%',)
+    fields = ('psa_path', 'shoot_no', 'album_name', 'contact_id', 'invoice_id', 'opportunity_id', 'last_sync_at')
+    try:
+        conn = _connect()
+        try:
+            return {row[0]: dict(zip(fields, row)) for row in conn.execute(sql, params)}
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return {}
+
+
+def lookup_contact(xml_path: str, location_id: str = '', sha256: str | None = None) -> dict | None:
+    """Return the contact resolved earlier for this export, or None.
+
+    An exact (path, content) match wins; otherwise a copy of the same bytes
+    elsewhere (e.g. the export moved to another folder) is accepted.
+
+    Returns:
+        dict: {'contact_id', 'source', 'resolved_at'} or None.
+    """
+    if not xml_path:
+        return None
+    sha256 = sha256 or sidekick_config.sha256_file(xml_path)
+    if not sha256:
+        return None
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                'SELECT contact_id, source, resolved_at FROM contacts WHERE sha256 = ? AND location_id = ? '
+                'ORDER BY (xml_path = ?) DESC, resolved_at DESC LIMIT 1',
+                (sha256, location_id or '', _norm_path(xml_path))
+            ).fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+    if not row:
+        return None
+    return {'contact_id': row[0], 'source': row[1], 'resolved_at': row[2]}
+
+
+def record_contact(xml_path: str, contact_id: str, source: str = '', location_id: str = '',
+                   sha256: str | None = None) -> bool:
+    """Remember the contact resolved for this export (keyed by path + content hash)."""
+    if not xml_path or not contact_id:
+        return False
+    sha256 = sha256 or sidekick_config.sha256_file(xml_path)
+    if not sha256:
+        return False
+    try:
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute('''
+                    INSERT INTO contacts (xml_path, sha256, location_id, contact_id, source, resolved_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(xml_path, sha256, location_id) DO UPDATE SET
+                        contact_id=excluded.contact_id,
+                        source=excluded.source,
+                        resolved_at=excluded.resolved_at
+                ''', (_norm_path(xml_path), sha256, location_id or '', str(contact_id), source or '', _now()))
+            return True
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+
+
+def write_psa_meta(psa_path: str, values: dict, timeout: float = PSA_WRITE_TIMEOUT) -> int:
+    """Upsert key/values into the PSA's sk_ps_meta table.
+
+    Returns:
+        int: Number of keys written (0 if the PSA is missing or locked).
+    """
+    if not psa_path or not os.path.exists(psa_path) or not values:
+        return 0
+    rows = [(str(k), '' if v is None else str(v)) for k, v in values.items() if k]
+    if not rows:
+        return 0
+    try:
+        conn = sqlite3.connect(psa_path, timeout=timeout)
+        try:
+            with conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS sk_ps_meta (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        key TEXT NOT NULL UNIQUE,
+                        value TEXT,
+                        updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+                    )
+                ''')
+                conn.executemany('''
+                    INSERT INTO sk_ps_meta (key, value, updated_at)
+                    VALUES (?, ?, datetime('now'))
+                    ON CONFLICT(key) DO UPDATE SET
+                        value=excluded.value,
+                        updated_at=datetime('now')
+                ''', rows)
+            return len(rows)
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return 0
+
+
+def push_pending(limit: int = 0) -> dict:
+    """Write pending ledger keys into their PSA files.
+
+    Args:
+        limit: Maximum albums to push (0 = all).
+
+    Returns:
+        dict: {'albums': n, 'keys': n, 'failed': n, 'missing': n}
+    """
+    stats = {'albums': 0, 'keys': 0, 'failed': 0, 'missing': 0}
+    try:
+        conn = _connect()
+        try:
+            rows = conn.execute(
+                'SELECT psa_path, key, value FROM meta WHERE pending = 1 ORDER BY psa_path'
+            ).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return stats
+
+    by_album: dict[str, dict] = {}
+    for path, key, value in rows:
+        by_album.setdefault(path, {})[key] = value
+
+    for path, values in by_album.items():
+        if limit and stats['albums'] >= limit:
+            break
+        stats['albums'] += 1
+        if not os.path.exists(path):
+            stats['missing'] += 1  # drive offline or album moved; keep pending
+            continue
+        written = write_psa_meta(path, values)
+        if written:
+            stats['keys'] += mark_pushed(path, values)
+        else:
+            stats['failed'] += 1
+    return stats
+
+
+def import_psa_meta(psa_path: str) -> bool:
+    """Backfill the ledger from a PSA's existing sk_ps_meta table.
+
+    Keys still pending in the ledger are newer than the PSA and are kept.
+    """
+    if not psa_path or not os.path.exists(psa_path):
+        return False
+    try:
+        conn = sqlite3.connect(psa_path, timeout=PSA_WRITE_TIMEOUT)
+        try:
+            if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='sk_ps_meta'").fetchone():
+                return False
+            values = {str(k): str(v or '') for k, v in conn.execute('SELECT key, value FROM sk_ps_meta') if k}
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    for key in get_meta(psa_path, pending_only=True):
+        values.pop(key, None)
+    return record_meta(psa_path, values, pending=False)
+
+
+class PsaReconciler(threading.Thread):
+    """Background thread that periodically pushes pending keys into PSA files.
+
+    stop() wakes the thread, runs a final push and waits for it to finish,
+    so keys written during a sync reach the PSA before the process exits.
+    """
+
+    def __init__(self, interval: float = RECONCILE_INTERVAL):
+        super().__init__(name='PsaReconciler', daemon=True)
+        self.interval = interval
+        self.totals = {'albums': 0, 'keys': 0, 'failed': 0, 'missing': 0}
+        self._stop_event = threading.Event()
+
+    def _push(self) -> None:
+        for key, value in push_pending().items():
+            self.totals[key] += value
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            self._push()
+        self._push()
+
+    def stop(self, timeout: float = 60) -> dict:
+        """Flush pending keys and stop the thread; returns the push totals."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+        return self.totals
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='SideKick_PS GHL sync ledger')
+    parser.add_argument('--status', action='store_true', help='Show album and pending key counts')
+    parser.add_argument('--reconcile', action='store_true', help='Write pending keys into PSA files')
+    parser.add_argument('--month', default='', help='List albums synced for a YYYY-MM order month')
+    parser.add_argument('--import-psa', default='', help='Backfill the ledger from a PSA file')
+    args = parser.parse_args()
+
+    print(f"Ledger: {get_ledger_path()}")
+    if args.import_psa:
+        ok = import_psa_meta(args.import_psa)
+        print(f"[{'OK' if ok else 'WARN'}] Import {args.import_psa}")
+    if args.reconcile:
+        stats = push_pending()
+        print(f"[OK] Pushed {stats['keys']} key(s) to {stats['albums']} album(s)"
+              f" ({stats['failed']} locked, {stats['missing']} missing)")
+    if args.month:
+        albums = synced_albums(args.month)
+        for entry in sorted(albums.values(), key=lambda e: e['album_name'].lower()):
+            print(f"  {entry['album_name']:<40} {entry['last_sync_at']:<20} {entry['contact_id']}")
+        print(f"[INFO] {len(albums)} synced album(s) for {args.month}")
+    if args.status or not (args.reconcile or args.month or args.import_psa):
+        print(f"[INFO] Synced albums: {len(synced_albums())}")
+        print(f"[INFO] Pending PSA keys: {pending_count()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
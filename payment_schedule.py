@@ -0,0 +1,392 @@
+"""
+Payment Schedule Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Precomputed payment-plan schedules for ProSelect orders.
+
+A PaymentPlan is built once per order: payment dates become day ordinals
+and amounts become integer pence, held in sorted arrays with a running
+total. Paid / outstanding / next-due / release-threshold questions are then
+a bisect into those arrays rather than a loop that re-parses date strings
+and re-sorts the payment dicts on every call. Integer pence also removes
+the float drift of summing many instalments.
+
+A ScheduleBook holds the plans for every shoot in a batch and merges their
+payments into one date-sorted index, so a month's cashflow forecast across
+all shoots is two bisects and a slice.
+
+ProSelect payment lines are the plan schedule, not a ledger of receipts:
+"paid as of" a date means the instalments dated on or before it, the same
+past/future split the invoice sync uses when recording payments.
+
+Usage:
+    python payment_schedule.py --folder "C:\\...\\ProSelect Exports" --month 2026-05
+"""
+
+import argparse
+import json
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import accumulate
+
+UNDATED = 0  # ordinal for payments with no usable date (sorts first, counts as past)
+
+
+def to_pence(amount) -> int:
+    """Pounds (float/str) to integer pence; unparseable values count as 0."""
+    try:
+        return int(round(float(amount or 0) * 100))
+    except (TypeError, ValueError):
+        return 0
+
+
+def to_pounds(pence: int) -> float:
+    """Integer pence back to pounds for display and API payloads."""
+    return round(pence / 100.0, 2)
+
+
+def date_ordinal(value) -> int:
+    """Ordinal of a YYYY-MM-DD (or ISO datetime) string or date; UNDATED if unparseable."""
+    if isinstance(value, date):
+        return value.toordinal()
+    raw = str(value or '').strip()[:10]
+    try:
+        return date.fromisoformat(raw).toordinal()
+    except ValueError:
+        return UNDATED
+
+
+def ordinal_date(ordinal: int) -> str:
+    """YYYY-MM-DD for an ordinal ('' for UNDATED)."""
+    return date.fromordinal(ordinal).isoformat() if ordinal > UNDATED else ''
+
+
+def _month_bounds(year: int, month: int) -> tuple[int, int]:
+    """(first day ordinal, first day of next month ordinal)."""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start.toordinal(), end.toordinal()
+
+
+def _field(obj, name: str, default=None):
+    """Read name from a dict or an attribute record (proselect_export models)."""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+@dataclass(slots=True)
+class Instalments:
+    """Recurring-schedule split of the payments still to come.
+
+    base_pence is the equal per-instalment amount; rounding_pence is what is
+    left over (total - base * count) and goes on the first payment or the
+    deposit, depending on the RoundingInDeposit setting.
+    """
+    count: int = 0
+    total_pence: int = 0
+    base_pence: int = 0
+    rounding_pence: int = 0
+    first_date: str = ''
+    second_date: str = ''
+
+    @property
+    def base(self) -> float:
+        return to_pounds(self.base_pence)
+
+    @property
+    def rounding(self) -> float:
+        return to_pounds(self.rounding_pence)
+
+    @property
+    def first_amount(self) -> float:
+        """First instalment with the rounding difference applied."""
+        return to_pounds(self.base_pence + self.rounding_pence)
+
+
+@dataclass(slots=True)
+class PaymentPlan:
+    """One order's payment schedule as date-sorted compact arrays."""
+    total_pence: int = 0
+    ordinals: array = field(default_factory=lambda: array('l'))
+    pence: array = field(default_factory=lambda: array('q'))
+    cumulative: array = field(default_factory=lambda: array('q'))
+    dates: tuple = ()            # normalised date strings, aligned with ordinals
+    methods: tuple = ()
+    has_credits: bool = False    # a negative line means the running total can dip
+    listed_count: int = 0        # payment lines as exported (incl. malformed ones)
+    first_listed_pence: int = 0  # amount of the first line in export order
+    last_listed_date: str = ''   # date of the last line in export order
+
+    @classmethod
+    def from_order(cls, order) -> 'PaymentPlan':
+        """Build from an order dict (parse_proselect_xml) or a proselect_export.Order."""
+        if order is None:
+            return cls()
+        payments = _field(order, 'payments', []) or []
+        return cls.from_payments(payments, _field(order, 'total_amount', 0))
+
+    @classmethod
+    def from_payments(cls, payments, total_amount=0) -> 'PaymentPlan':
+        """Build from payment dicts or proselect_export.Payment records."""
+        rows = []
+        listed = list(payments) if isinstance(payments, (list, tuple)) else []
+        for seq, p in enumerate(listed):
+            if not isinstance(p, dict) and not hasattr(p, 'amount'):
+                continue
+            raw_date = str(_field(p, 'date', '') or '').strip()
+            if 'T' in raw_date:
+                raw_date = raw_date.split('T')[0]
+            rows.append((date_ordinal(raw_date), seq, to_pence(_field(p, 'amount', 0)),
+                         raw_date, str(_field(p, 'method', '') or '')))
+        rows.sort()  # by date, then export order for same-day lines
+
+        pence = array('q', (r[2] for r in rows))
+        first = listed[0] if listed else None
+        return cls(
+            total_pence=to_pence(total_amount),
+            ordinals=array('l', (r[0] for r in rows)),
+            pence=pence,
+            cumulative=array('q', accumulate(pence)),
+            dates=tuple(r[3] for r in rows),
+            methods=tuple(r[4] for r in rows),
+            has_credits=any(p < 0 for p in pence),
+            listed_count=len(listed),
+            first_listed_pence=to_pence(_field(first, 'amount', 0)) if first is not None else 0,
+            last_listed_date=str(_field(listed[-1], 'date', '') or '') if listed else '',
+        )
+
+    def __len__(self) -> int:
+        return len(self.pence)
+
+    def _sum_to(self, index: int) -> int:
+        """Sum of the first index payments."""
+        return self.cumulative[index - 1] if index > 0 else 0
+
+    @property
+    def scheduled_pence(self) -> int:
+        """Every scheduled instalment, regardless of date."""
+        return self._sum_to(len(self.cumulative))
+
+    def past_count(self, as_of) -> int:
+        """Number of instalments dated on or before as_of (undated count as past)."""
+        return bisect_right(self.ordinals, date_ordinal(as_of))
+
+    def paid_pence(self, as_of) -> int:
+        """Instalments dated on or before as_of."""
+        return self._sum_to(self.past_count(as_of))
+
+    def outstanding_pence(self, as_of=None) -> int:
+        """Order total less instalments due by as_of (less all instalments if as_of is None)."""
+        paid = self.scheduled_pence if as_of is None else self.paid_pence(as_of)
+        return max(0, self.total_pence - paid)
+
+    def next_due(self, as_of) -> tuple[str, int]:
+        """(date, pence) of the first instalment after as_of, or ('', 0)."""
+        i = self.past_count(as_of)
+        if i >= len(self.ordinals):
+            return '', 0
+        return self.dates[i], self.pence[i]
+
+    def due_between(self, start_ordinal: int, end_ordinal: int) -> int:
+        """Pence due on dates in [start_ordinal, end_ordinal)."""
+        lo = bisect_left(self.ordinals, start_ordinal)
+        hi = bisect_left(self.ordinals, end_ordinal)
+        return self._sum_to(hi) - self._sum_to(lo)
+
+    def release_date(self, threshold_pct: float = 0.25) -> str:
+        """Date the running total first reaches threshold_pct of the order total ('' if never)."""
+        if self.total_pence <= 0 or not self.cumulative:
+            return ''
+        threshold = self.total_pence * threshold_pct
+        if not self.has_credits:
+            i = bisect_left(self.cumulative, threshold)
+        else:
+            # Credit lines can make the running total dip, so it is not sorted.
+            i = next((k for k, c in enumerate(self.cumulative) if c >= threshold), len(self.cumulative))
+        return self.dates[i] if i < len(self.dates) else ''
+
+    def future(self, as_of) -> tuple[int, int]:
+        """(start index, pence) of instalments dated after as_of."""
+        i = self.past_count(as_of)
+        return i, self.scheduled_pence - self._sum_to(i)
+
+    def instalments(self, as_of=None) -> Instalments:
+        """Split the instalments after as_of (all of them if None) into an equal recurring schedule."""
+        start, total = self.future(as_of) if as_of is not None else (0, self.scheduled_pence)
+        count = len(self.pence) - start
+        if count <= 0:
+            return Instalments()
+        base = int(round(total / count))
+        return Instalments(
+            count=count,
+            total_pence=total,
+            base_pence=base,
+            rounding_pence=total - base * count,
+            first_date=self.dates[start],
+            second_date=self.dates[start + 1] if count > 1 else self.dates[start],
+        )
+
+    def status(self, as_of) -> dict:
+        """Paid / outstanding / next-due / release summary in pounds."""
+        next_date, next_pence = self.next_due(as_of)
+        return {
+            'total': to_pounds(self.total_pence),
+            'scheduled': to_pounds(self.scheduled_pence),
+            'paid': to_pounds(self.paid_pence(as_of)),
+            'outstanding': to_pounds(self.outstanding_pence(as_of)),
+            'next_due_date': next_date,
+            'next_due_amount': to_pounds(next_pence),
+            'release_date': self.release_date(),
+            'payments': len(self.pence),
+        }
+
+
+class ScheduleBook:
+    """Payment plans for many shoots with a merged, date-sorted payment index."""
+
+    def __init__(self):
+        self._plans: dict[str, PaymentPlan] = {}
+        self._index = None  # (ordinals, keys, cumulative) built on first query
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._plans
+
+    def add(self, key: str, order) -> PaymentPlan:
+        """Add (or replace) a shoot's plan from an order dict/model or a ready PaymentPlan."""
+        plan = order if isinstance(order, PaymentPlan) else PaymentPlan.from_order(order)
+        self._plans[key] = plan
+        self._index = None
+        return plan
+
+    def get(self, key: str) -> PaymentPlan | None:
+        return self._plans.get(key)
+
+    def _merged(self) -> tuple:
+        """All payments of all plans sorted by date: (ordinals, pence, keys, cumulative)."""
+        if self._index is None:
+            rows = sorted(
+                (o, key, p)
+                for key, plan in self._plans.items()
+                for o, p in zip(plan.ordinals, plan.pence)
+            )
+            pence = array('q', (r[2] for r in rows))
+            self._index = (
+                array('l', (r[0] for r in rows)),
+                pence,
+                tuple(r[1] for r in rows),
+                array('q', accumulate(pence)),
+            )
+        return self._index
+
+    def due_between(self, start_ordinal: int, end_ordinal: int) -> int:
+        """Pence due across every shoot on dates in [start_ordinal, end_ordinal)."""
+        ordinals, _pence, _keys, cumulative = self._merged()
+        lo = bisect_left(ordinals, start_ordinal)
+        hi = bisect_left(ordinals, end_ordinal)
+        return (cumulative[hi - 1] if hi else 0) - (cumulative[lo - 1] if lo else 0)
+
+    def status(self, as_of) -> dict:
+        """Per-shoot paid/outstanding/next-due/release summary."""
+        return {key: plan.status(as_of) for key, plan in self._plans.items()}
+
+    def cashflow(self, year: int, month: int, as_of=None) -> dict:
+        """Instalments due in a calendar month across every shoot.
+
+        Args:
+            year: Forecast year.
+            month: Forecast month (1-12).
+            as_of: Optional date; if given, outstanding balances are reported
+                as of that date as well.
+
+        Returns:
+            dict: month, due total, payment/shoot counts, and per-shoot and
+                per-day breakdowns (pounds).
+        """
+        ordinals, pence, keys, _cumulative = self._merged()
+        start, end = _month_bounds(year, month)
+        lo = bisect_left(ordinals, start)
+        hi = bisect_left(ordinals, end)
+        due = self.due_between(start, end)
+
+        by_shoot: dict[str, int] = {}
+        by_day: dict[str, int] = {}
+        for i in range(lo, hi):
+            by_shoot[keys[i]] = by_shoot.get(keys[i], 0) + pence[i]
+            day = ordinal_date(ordinals[i])
+            by_day[day] = by_day.get(day, 0) + pence[i]
+
+        forecast = {
+            'month': f'{year:04d}-{month:02d}',
+            'due': to_pounds(due),
+            'payments': hi - lo,
+            'shoots': len(by_shoot),
+            'by_shoot': {k: to_pounds(v) for k, v in sorted(by_shoot.items())},
+            'by_day': {k: to_pounds(v) for k, v in sorted(by_day.items())},
+        }
+        if as_of is not None:
+            forecast['outstanding'] = to_pounds(sum(p.outstanding_pence(as_of) for p in self._plans.values()))
+        return forecast
+
+
+def book_from_exports(xml_paths: list[str]) -> ScheduleBook:
+    """Build a ScheduleBook from ProSelect exports, keyed by album name (latest export wins)."""
+    from proselect_export import load_export
+
+    book = ScheduleBook()
+    for xml_path in sorted(xml_paths, key=os.path.getmtime):
+        try:
+            export = load_export(xml_path)
+        except Exception:
+            continue
+        if export.order is None:
+            continue
+        key = export.client.album_name.strip() or os.path.splitext(os.path.basename(xml_path))[0]
+        book.add(key, export.order)
+    return book
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Payment plan cashflow forecast from ProSelect exports')
+    parser.add_argument('--folder', required=True, help='Folder of ProSelect XML exports (searched recursively)')
+    parser.add_argument('--month', default=date.today().strftime('%Y-%m'), help='Forecast month YYYY-MM (default: this month)')
+    parser.add_argument('--json', action='store_true', help='Print the forecast as JSON')
+    args = parser.parse_args()
+
+    try:
+        year, month = (int(part) for part in args.month.split('-')[:2])
+        _month_bounds(year, month)
+    except ValueError:
+        print(f"[FAIL] Invalid --month: {args.month} (expected YYYY-MM)")
+        return 1
+
+    xml_paths = [
+        os.path.join(root, name)
+        for root, _dirs, files in os.walk(args.folder)
+        for name in files if name.lower().endswith('.xml')
+    ]
+    book = book_from_exports(xml_paths)
+    forecast = book.cashflow(year, month, as_of=date.today())
+
+    if args.json:
+        print(json.dumps(forecast, indent=2))
+        return 0
+
+    print(f"[INFO] {len(book)} payment plan(s) from {len(xml_paths)} export(s)")
+    print(f"[OK] {forecast['month']}: £{forecast['due']:.2f} due from {forecast['payments']} payment(s) across {forecast['shoots']} shoot(s)")
+    for day, amount in forecast['by_day'].items():
+        print(f"  {day}  £{amount:>10.2f}")
+    print(f"  Outstanding today: £{forecast['outstanding']:.2f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+ProSelect Export Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Shared, typed model of a ProSelect order XML export.
+
+The export is read in one iterparse pass that clears each Ordered_Item and
+Payment element once it has been read, so large multi-hundred-item exports
+never sit in memory as a full tree. Records are slotted dataclasses.
+
+Results are memoised per (path, mtime, size) for the life of the process.
+The invoice sync, the batch month scan and the contact sheet all call
+load_export() and share one parse per file. Rewriting the XML (e.g.
+injecting a GHL contact ID) changes its mtime, so the next call re-reads it.
+
+Records returned from the cache are shared: treat them as read-only and use
+as_dict() when a mutable copy is needed.
+"""
+
+import os
+import threading
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+
+CACHE_MAX_ENTRIES = 256
+
+# Root-level element -> Client attribute
+_CLIENT_TAGS = {
+    'Client_ID': 'client_id',
+    'Email_Address': 'email',
+    'First_Name': 'first_name',
+    'Last_Name': 'last_name',
+    'Cell_Phone': 'cell_phone',
+    'Home_Phone': 'home_phone',
+    'Work_Phone': 'work_phone',
+    'Album_Name': 'album_name',
+    'Album_Path': 'album_path',
+    'Street': 'street',
+    'Street2': 'street2',
+    'City': 'city',
+    'State': 'state',
+    'Zip_Code': 'zip_code',
+    'Country': 'country',
+}
+
+# Direct child of <Order> -> Order attribute
+_ORDER_TAGS = {
+    'DateSQL': 'date',
+    'Album_ID': 'album_id',
+    'Total_Amount': 'total_amount',
+}
+
+
+@dataclass(slots=True)
+class Client:
+    """Client and album fields from the export root."""
+    client_id: str = ''
+    email: str = ''
+    first_name: str = ''
+    last_name: str = ''
+    cell_phone: str = ''
+    home_phone: str = ''
+    work_phone: str = ''
+    album_name: str = ''
+    album_path: str = ''
+    street: str = ''
+    street2: str = ''
+    city: str = ''
+    state: str = ''
+    zip_code: str = ''
+    country: str = ''
+
+    @property
+    def phone(self) -> str:
+        """Best contact number: cell, then home, then work."""
+        return self.cell_phone or self.home_phone or self.work_phone
+
+
+@dataclass(slots=True)
+class OrderedItem:
+    """One <Ordered_Item>, with tax details as ProSelect reports them."""
+    type: str = ''
+    description: str = ''
+    product: str = ''
+    sku: str = ''
+    ps_item_id: str = ''
+    size: str = ''
+    template: str = ''
+    price: float = 0.0
+    quantity: int = 1
+    taxable: bool = False
+    vat_amount: float = 0.0
+    tax_label: str = ''
+    tax_rate: float = 0.0
+    price_includes_tax: bool = False
+    product_line: str = ''
+    product_line_code: str = ''
+    ordered_layout: str = ''
+    layout_images: tuple = ()   # (ordered thumbnail, source image name) pairs
+    images: tuple = ()          # same, from the <Images> element
+
+    def as_dict(self) -> dict:
+        """Item dict in the shape the invoice code uses."""
+        return {
+            'type': self.type,
+            'description': self.description,
+            'product': self.product,
+            'sku': self.sku,
+            'ps_item_id': self.ps_item_id,
+            'size': self.size,
+            'template': self.template,
+            'price': self.price,
+            'quantity': self.quantity,
+            'taxable': self.taxable,
+            'vat_amount': self.vat_amount,
+            'tax_label': self.tax_label,
+            'tax_rate': self.tax_rate,
+            'price_includes_tax': self.price_includes_tax,
+            'product_line': self.product_line,
+            'product_line_code': self.product_line_code,
+        }
+
+
+@dataclass(slots=True)
+class Payment:
+    """One scheduled or received <Payment>."""
+    id: str | None = None
+    date: str = ''
+    amount: float = 0.0
+    method: str = ''
+    type: str = ''  # OD=Ordered, FP=Final Payment
+
+    def as_dict(self) -> dict:
+        """Payment dict in the shape the invoice code uses."""
+        return {'id': self.id, 'date': self.date, 'amount': self.amount, 'method': self.method, 'type': self.type}
+
+
+@dataclass(slots=True)
+class Order:
+    """The <Order> element: header fields, items and payments."""
+    date: str = ''
+    info_date: str = ''
+    album_id: str = ''
+    total_amount: float = 0.0
+    items: list = field(default_factory=list)
+    payments: list = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class ProSelectExport:
+    """A parsed export plus the file stamp it was read from."""
+    path: str
+    mtime_ns: int
+    size: int
+    client: Client
+    order: Order | None = None
+
+
+def _text(elem, tag: str, default: str = '') -> str:
+    """Text of elem.find(tag), or default if missing/empty (same rule as get_text)."""
+    child = elem.find(tag)
+    return child.text if child is not None and child.text else default
+
+
+def _stripped(elem) -> str:
+    """Stripped text of an element ('' if missing or empty)."""
+    return elem.text.strip() if elem is not None and elem.text else ''
+
+
+def _read_item(item) -> OrderedItem:
+    """Build an OrderedItem from a complete <Ordered_Item> element."""
+    tax_elem = item.find('Tax')
+    tax1_elem = item.find('Tax1')
+    product_line_elem = item.find('ProductLineName')
+
+    layout_images = []
+    for layout_img in item.iterfind('.//Layout_Image'):
+        ordered_img = _stripped(layout_img.find('Ordered_Image'))
+        image_name = _stripped(layout_img.find('Image_Name'))
+        if ordered_img and image_name:
+            layout_images.append((ordered_img, image_name))
+
+    images = []
+    images_elem = item.find('Images')
+    if images_elem is not None:
+        for oi, iname in zip(images_elem.findall('Ordered_Image'), images_elem.findall('Image_Name')):
+            ordered_img, image_name = _stripped(oi), _stripped(iname)
+            if ordered_img and image_name:
+                images.append((ordered_img, image_name))
+
+    return OrderedItem(
+        type=_text(item, 'ItemType'),
+        description=_text(item, 'Description'),
+        product=_text(item, 'Product_Name'),
+        sku=_text(item, 'Product_Code'),
+        ps_item_id=_text(item, 'ID'),
+        size=_text(item, 'Size'),
+        template=_text(item, 'Template_Name'),
+        price=float(_text(item, 'Extended_Price', '0')),
+        quantity=int(_text(item, 'Quantity', '1')),
+        taxable=tax_elem.get('taxable', 'false').lower() == 'true' if tax_elem is not None else False,
+        vat_amount=float(_text(item, 'Tax', '0')),
+        tax_label=tax1_elem.get('label', '') if tax1_elem is not None else '',
+        tax_rate=float(tax1_elem.get('rate', '0')) if tax1_elem is not None else 0.0,
+        price_includes_tax=tax1_elem.get('priceIncludesTax', 'false').lower() == 'true' if tax1_elem is not None else False,
+        product_line=_text(item, 'ProductLineName'),
+        product_line_code=product_line_elem.get('code', '') if product_line_elem is not None else '',
+        ordered_layout=_stripped(item.find('.//Ordered_Layout')),
+        layout_images=tuple(layout_images),
+        images=tuple(images),
+    )
+
+
+def _read_payment(payment) -> Payment:
+    """Build a Payment from a complete <Payment> element."""
+    return Payment(
+        id=payment.get('id'),
+        date=_text(payment, 'DateSQL'),
+        amount=float(_text(payment, 'Amount', '0')),
+        method=_text(payment, 'MethodName'),
+        type=_text(payment, 'Type'),
+    )
+
+
+def parse_export(xml_path: str) -> ProSelectExport:
+    """Parse an export in one iterparse pass (no caching).
+
+    Raises:
+        OSError, ET.ParseError, ValueError: unreadable file, malformed XML or
+            non-numeric amounts (the same failures ET.parse + float() gave).
+    """
+    st = os.stat(xml_path)
+    client = Client()
+    order = None
+    seen_client: set[str] = set()
+    seen_order: set[str] = set()
+    stack: list[str] = []
+    in_order = False
+
+    for event, elem in ET.iterparse(xml_path, events=('start', 'end')):
+        if event == 'start':
+            if len(stack) == 1 and elem.tag == 'Order' and order is None:
+                order = Order()
+                in_order = True
+            stack.append(elem.tag)
+            continue
+
+        tag = stack.pop()
+        depth = len(stack)  # 0 = root, 1 = child of root, ...
+        if depth == 1:
+            if tag == 'Order':
+                in_order = False
+            elif tag in _CLIENT_TAGS and tag not in seen_client:
+                seen_client.add(tag)
+                setattr(client, _CLIENT_TAGS[tag], elem.text or '')
+            elem.clear()
+        elif in_order:
+            if tag == 'Ordered_Item':
+                order.items.append(_read_item(elem))
+                elem.clear()
+            elif tag == 'Payment':
+                order.payments.append(_read_payment(elem))
+                elem.clear()
+            elif depth == 2 and tag in _ORDER_TAGS and tag not in seen_order:
+                seen_order.add(tag)
+                setattr(order, _ORDER_TAGS[tag], elem.text or '')
+            elif depth == 3 and tag == 'Date' and stack[2] == 'Info' and 'Info/Date' not in seen_order:
+                seen_order.add('Info/Date')
+                order.info_date = _stripped(elem)
+
+    if order is not None:
+        order.total_amount = float(order.total_amount or '0')
+    return ProSelectExport(path=xml_path, mtime_ns=st.st_mtime_ns, size=st.st_size, client=client, order=order)
+
+
+_cache: dict[str, ProSelectExport] = {}
+_cache_lock = threading.Lock()
+
+
+def load_export(xml_path: str) -> ProSelectExport:
+    """Return the parsed export, reusing this process's copy while the file is unchanged."""
+    key = os.path.normcase(os.path.abspath(xml_path))
+    st = os.stat(xml_path)
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached is not None and cached.mtime_ns == st.st_mtime_ns and cached.size == st.st_size:
+        return cached
+
+    export = parse_export(xml_path)
+    with _cache_lock:
+        _cache.pop(key, None)
+        _cache[key] = export
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.pop(next(iter(_cache)))
+    return export
+
+
+def clear_cache() -> None:
+    """Forget all memoised exports."""
+    with _cache_lock:
+        _cache.clear()
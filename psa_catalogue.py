@@ -0,0 +1,347 @@
+"""
+PSA Catalogue Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Incrementally refreshed index of every .psa album under the shoot archive
+roots, so a job ref (e.g. P25097P_Field) resolves without walking the archive.
+
+The catalogue remembers each directory's mtime, sub-directories and .psa
+files. A refresh only lists directories whose mtime changed (a file was
+added, removed or renamed inside them); unchanged directories are reused
+from the cache after a single stat. Directories are scanned in parallel,
+which matters on NAS shares where every listing is a network round trip.
+
+Album names follow ShootNo_LastName[_GHLContactID][_test].psa; the parsed
+fields are kept per file. Email and clientCode from the PSA OrderList are
+read on first use and cached against the file's mtime and size.
+
+The catalogue lives in %APPDATA%\\SideKick_PS\\psa_catalogue.json.
+
+Usage:
+    python psa_catalogue.py --refresh
+    python psa_catalogue.py --find P25097P_Field
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import sidekick_config
+
+CATALOGUE_FILENAME = "psa_catalogue.json"
+CATALOGUE_VERSION = 1
+SCAN_WORKERS = 8
+# Lookups within this many seconds of the last refresh reuse it as-is
+REFRESH_MAX_AGE = 60
+
+DEFAULT_ARCHIVE_ROOTS = [
+    os.path.expanduser("~/Pictures/Shoots/Archive"),
+    os.path.expanduser("~/Pictures/Shoots/Processed"),
+    os.path.expanduser("~/Pictures/Shoots"),
+    r"C:\Users\guy\Pictures\Shoots\Archive",
+]
+
+_GHL_ID_RE = re.compile(r"^[A-Za-z0-9]{20,}$")
+_EMAIL_RE = re.compile(r"<email>([^<]+)</email>", re.IGNORECASE)
+_CLIENT_CODE_RE = re.compile(r"<clientCode>([^<]+)</clientCode>", re.IGNORECASE)
+
+
+def parse_album_stem(stem: str) -> dict:
+    """Split an album file stem into shoot_no, last_name, ghl_contact_id, is_test."""
+    parts = stem.split("_")
+    return {
+        "shoot_no": parts[0].upper(),
+        "last_name": parts[1] if len(parts) > 1 else "",
+        # GHL contact IDs are 20+ alphanumeric chars
+        "ghl_contact_id": next((p for p in parts[2:] if _GHL_ID_RE.match(p) and p != "test"), ""),
+        "is_test": any(p.lower() == "test" for p in parts[2:]),
+    }
+
+
+def read_order_contact(psa_path: str) -> tuple[str, str]:
+    """Read (email, clientCode) from the PSA OrderList, or ('', '')."""
+    try:
+        conn = sqlite3.connect(psa_path, timeout=5)
+        try:
+            row = conn.execute("SELECT buffer FROM BigStrings WHERE buffCode='OrderList' LIMIT 1").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return "", ""
+    if not row or row[0] is None:
+        return "", ""
+    xml_str = row[0].decode("utf-8", errors="ignore") if isinstance(row[0], bytes) else str(row[0])
+    m = _EMAIL_RE.search(xml_str)
+    email = m.group(1).strip() if m else ""
+    m = _CLIENT_CODE_RE.search(xml_str)
+    client_code = m.group(1).strip() if m else ""
+    return email, client_code
+
+
+def _scan_dir(path: str, cached: dict | None) -> tuple[dict | None, bool]:
+    """List one directory unless its mtime matches the cached listing.
+
+    Returns:
+        (listing, changed): listing is {'mtime_ns', 'dirs', 'psa'} where psa
+        maps file name -> [mtime_ns, size]; None if the directory is gone.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None, True
+    if cached and cached.get("mtime_ns") == mtime_ns:
+        return cached, False
+
+    dirs: list[str] = []
+    psa: dict[str, list[int]] = {}
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append(entry.name)
+                    elif entry.name.lower().endswith(".psa"):
+                        st = entry.stat(follow_symlinks=False)
+                        psa[entry.name] = [st.st_mtime_ns, st.st_size]
+                except OSError:
+                    continue
+    except OSError:
+        return None, True
+    return {"mtime_ns": mtime_ns, "dirs": sorted(dirs), "psa": psa}, True
+
+
+class PsaCatalogue:
+    """Cached index of .psa albums under one or more archive roots."""
+
+    def __init__(self, roots: list[str] | None = None, cache_path: str = ""):
+        self.roots = self._distinct_roots(roots or DEFAULT_ARCHIVE_ROOTS)
+        self.cache_path = cache_path or os.path.join(sidekick_config.get_output_dir(), CATALOGUE_FILENAME)
+        self.dirs: dict[str, dict] = {}      # directory -> listing (see _scan_dir)
+        self.contacts: dict[str, list] = {}  # psa path -> [mtime_ns, size, email, client_code]
+        self.refreshed_at = 0.0
+        self._by_shoot: dict[str, list[str]] = {}
+        self._albums: list[str] = []
+        self._album_set: set[str] = set()
+        self._dirty = False
+        self._load()
+
+    @staticmethod
+    def _distinct_roots(roots: list[str]) -> list[str]:
+        """Drop missing roots and roots nested inside another root."""
+        result: list[str] = []
+        for root in roots:
+            root = os.path.abspath(root)
+            if not os.path.isdir(root) or any(os.path.normcase(root) == os.path.normcase(r) for r in result):
+                continue
+            result.append(root)
+        nested = {
+            r for r in result for other in result
+            if r != other and os.path.normcase(r).startswith(os.path.normcase(other).rstrip("\\/") + os.sep)
+        }
+        return [r for r in result if r not in nested]
+
+    def _load(self) -> None:
+        """Load the cached catalogue; the in-memory index is rebuilt from it."""
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != CATALOGUE_VERSION:
+            return
+        self.dirs = data.get("dirs", {})
+        self.contacts = data.get("contacts", {})
+        self.refreshed_at = float(data.get("refreshed_at", 0) or 0)
+        if sorted(data.get("roots", [])) == sorted(self.roots):
+            self._rebuild_index()
+        else:
+            self.refreshed_at = 0.0  # different roots: force a (still incremental) walk
+
+    def save(self) -> bool:
+        """Write the catalogue back to disk if anything changed."""
+        if not self._dirty:
+            return False
+        tmp_path = self.cache_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "version": CATALOGUE_VERSION,
+                    "roots": self.roots,
+                    "refreshed_at": self.refreshed_at,
+                    "dirs": self.dirs,
+                    "contacts": self.contacts,
+                }, f, separators=(",", ":"))
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            return False
+        self._dirty = False
+        return True
+
+    def refresh(self, max_age: float = REFRESH_MAX_AGE, workers: int = SCAN_WORKERS) -> dict:
+        """Bring the catalogue up to date, listing only changed directories.
+
+        Args:
+            max_age: Skip the refresh if the last one is younger than this (seconds).
+            workers: Parallel directory scans.
+
+        Returns:
+            dict: {'dirs', 'listed', 'albums', 'seconds'} for this refresh.
+        """
+        if max_age and self.refreshed_at and time.time() - self.refreshed_at < max_age:
+            return {"dirs": len(self.dirs), "listed": 0, "albums": len(self._albums), "seconds": 0.0}
+
+        start = time.perf_counter()
+        seen: dict[str, dict] = {}
+        listed = 0
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pending = {pool.submit(_scan_dir, root, self.dirs.get(root)): root for root in self.roots}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = pending.pop(future)
+                    listing, changed = future.result()
+                    if listing is None:
+                        continue
+                    listed += changed
+                    seen[path] = listing
+                    for name in listing["dirs"]:
+                        child = os.path.join(path, name)
+                        pending[pool.submit(_scan_dir, child, self.dirs.get(child))] = child
+
+        self.dirs = seen
+        self.refreshed_at = time.time()
+        self._dirty = True
+        self._rebuild_index()
+        self.contacts = {p: c for p, c in self.contacts.items() if p in self._album_set}
+        return {"dirs": len(seen), "listed": listed, "albums": len(self._albums),
+                "seconds": round(time.perf_counter() - start, 3)}
+
+    def _rebuild_index(self) -> None:
+        """Rebuild the in-memory shoot_no -> albums index from the directory cache."""
+        root_rank = {os.path.normcase(r): i for i, r in enumerate(self.roots)}
+
+        def _rank(path: str) -> int:
+            norm = os.path.normcase(path)
+            return min((i for r, i in root_rank.items() if norm == r or norm.startswith(r.rstrip("\\/") + os.sep)),
+                       default=len(root_rank))
+
+        albums = sorted(
+            (os.path.join(d, name) for d, listing in self.dirs.items() for name in listing.get("psa", {})),
+            key=lambda p: (_rank(p), p.lower()),
+        )
+        by_shoot: dict[str, list[str]] = {}
+        for path in albums:
+            shoot_no = parse_album_stem(os.path.splitext(os.path.basename(path))[0])["shoot_no"]
+            by_shoot.setdefault(shoot_no, []).append(path)
+        self._albums = albums
+        self._album_set = set(albums)
+        self._by_shoot = by_shoot
+
+    def _file_stamp(self, psa_path: str) -> list[int]:
+        """Return the cached [mtime_ns, size] for an album."""
+        listing = self.dirs.get(os.path.dirname(psa_path), {})
+        return listing.get("psa", {}).get(os.path.basename(psa_path), [0, 0])
+
+    def describe(self, psa_path: str, with_contact: bool = True) -> dict:
+        """Return the catalogue record for one album.
+
+        Email and clientCode are read from the PSA only when the cached copy
+        is missing or the file changed since it was cached.
+        """
+        record = {"psa_path": psa_path, **parse_album_stem(os.path.splitext(os.path.basename(psa_path))[0]),
+                  "email": "", "client_code": ""}
+        if not with_contact:
+            return record
+        try:
+            st = os.stat(psa_path)
+            stamp = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            stamp = self._file_stamp(psa_path)
+        cached = self.contacts.get(psa_path)
+        if cached and cached[:2] == stamp:
+            record["email"], record["client_code"] = cached[2], cached[3]
+        else:
+            record["email"], record["client_code"] = read_order_contact(psa_path)
+            self.contacts[psa_path] = [*stamp, record["email"], record["client_code"]]
+            self._dirty = True
+        return record
+
+    def find(self, job_ref: str) -> str:
+        """Return the first album whose file name contains job_ref, or ''."""
+        needle = job_ref.strip().lower()
+        if not needle:
+            return ""
+        candidates = self._by_shoot.get(needle.split("_")[0].upper())
+        if candidates is None:
+            candidates = self._albums  # job ref without a shoot number prefix
+        for path in candidates:
+            if needle in os.path.basename(path).lower():
+                return path
+        return ""
+
+    def lookup(self, job_ref: str, with_contact: bool = True) -> dict:
+        """Resolve a job ref to its album record (empty fields if not found)."""
+        self.refresh()
+        psa_path = self.find(job_ref)
+        if psa_path and not os.path.exists(psa_path):
+            self.refresh(max_age=0)  # moved since the last refresh
+            psa_path = self.find(job_ref)
+        if not psa_path:
+            return {"psa_path": "", "shoot_no": "", "last_name": "", "ghl_contact_id": "",
+                    "is_test": False, "email": "", "client_code": ""}
+        return self.describe(psa_path, with_contact)
+
+    def albums(self, include_test: bool = False) -> list[tuple[str, int, int]]:
+        """Return (psa_path, mtime_ns, size) for every catalogued album.
+
+        The stamps come from the last refresh, so no file is opened or stat'ed.
+        """
+        result = []
+        for path in self._albums:
+            if not include_test and parse_album_stem(os.path.splitext(os.path.basename(path))[0])["is_test"]:
+                continue
+            mtime_ns, size = self._file_stamp(path)
+            result.append((path, mtime_ns, size))
+        return result
+
+    def shoots(self, include_test: bool = False) -> list[dict]:
+        """Return one record per shoot number (most recently modified album wins)."""
+        latest: dict[str, str] = {}
+        for shoot_no, paths in self._by_shoot.items():
+            for path in paths:
+                if not include_test and parse_album_stem(os.path.splitext(os.path.basename(path))[0])["is_test"]:
+                    continue
+                current = latest.get(shoot_no)
+                if current is None or self._file_stamp(path)[0] > self._file_stamp(current)[0]:
+                    latest[shoot_no] = path
+        return [self.describe(latest[s], with_contact=False) for s in sorted(latest)]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Index .psa albums in the shoot archive")
+    parser.add_argument("--root", action="append", default=[], help="Archive root (repeatable; default: standard roots)")
+    parser.add_argument("--refresh", action="store_true", help="Refresh the catalogue now")
+    parser.add_argument("--find", default="", help="Resolve a job ref, e.g. P25097P_Field")
+    args = parser.parse_args()
+
+    catalogue = PsaCatalogue(args.root or None)
+    stats = catalogue.refresh(max_age=0 if args.refresh else REFRESH_MAX_AGE)
+    print(f"[INFO] {stats['albums']} album(s) in {stats['dirs']} folder(s); "
+          f"{stats['listed']} folder(s) re-listed in {stats['seconds']:.2f}s")
+    if args.find:
+        record = catalogue.lookup(args.find)
+        print(json.dumps(record, indent=2))
+    catalogue.save()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,368 @@
+"""
+PSA Receivables Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Week-by-week cashflow and receivables report across every album in the
+shoot archive.
+
+Each .psa OrderList is parsed once per order group: the order date
+(lastOrderChanged), the order total (items x qty plus extras, totalled the
+same way as detect_psa_group) and the payment lines. Albums are listed by
+the incremental PsaCatalogue, parsed in a process pool, and the results are
+cached in %APPDATA%\\SideKick_PS\\psa_receivables.json against each file's
+mtime and size, so a rerun only opens albums that changed. The catalogue's
+own stamps only refresh when a directory changes, and ProSelect saves an
+album in place, so every album is stat'ed before its cached parse is used.
+
+Every order group becomes a payment_schedule.PaymentPlan. For each week
+(Monday to Sunday) overlapping the requested months the report gives:
+
+    orders       order groups placed that week, and their value (ordered)
+    due          instalments dated in the week
+    collected    the part of due dated on or before the as-of date
+    outstanding  at week end: totals of orders placed by then less their
+                 instalments dated by then
+    overdue      the part of outstanding on orders with no instalment
+                 scheduled after the week end
+
+As in payment_schedule, ProSelect payment lines are the plan schedule, so
+"collected" means the instalment date has passed.
+
+Usage:
+    python psa_receivables.py --from 2026-01 --to 2026-06
+    python psa_receivables.py --from 2026-04 --format json --output receivables.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+
+from detect_psa_group import order_group_totals
+from payment_schedule import UNDATED, PaymentPlan, ScheduleBook, date_ordinal, ordinal_date, to_pence, to_pounds
+from psa_catalogue import PsaCatalogue
+import sidekick_config
+
+CACHE_FILENAME = "psa_receivables.json"
+CACHE_VERSION = 1
+# Below this many albums to parse, a process pool costs more than it saves
+POOL_MIN_ALBUMS = 64
+PARSE_CHUNK = 16
+
+REPORT_FIELDS = ("week_start", "week_end", "orders", "ordered", "due", "collected", "outstanding", "overdue")
+
+_GROUP_RE = re.compile(r'<Group\s+id="(\d+)"([^>]*)>(.*?)</Group>', re.DOTALL)
+_PAYMENT_RE = re.compile(r"<payment\s+([^>]+)/>", re.IGNORECASE)
+_VALUE_RE = re.compile(r'value="(-?[\d.]+)"')
+_JDATE_RE = re.compile(r'jdate="(\d{4}-\d{2}-\d{2})')
+_ORDER_DATE_RE = re.compile(r'lastOrderChanged="(\d{4}-\d{2}-\d{2})')
+_FIRST_NAME_RE = re.compile(r"<firstName>(.*?)</firstName>")
+_LAST_NAME_RE = re.compile(r"<lastName>(.*?)</lastName>")
+
+
+def parse_psa_orders(psa_path: str) -> list | None:
+    """Read every order group from a .psa OrderList.
+
+    Returns:
+        list: [group_id, client, order_date, total_pence, [[date, pence], ...]]
+            per group ([] if the album has no order), or None if the file
+            could not be read (locked or missing) so it is retried next run.
+    """
+    try:
+        conn = sqlite3.connect(Path(psa_path).as_uri() + "?mode=ro", uri=True, timeout=5)
+        try:
+            row = conn.execute("SELECT buffer FROM BigStrings WHERE buffCode='OrderList' LIMIT 1").fetchone()
+        finally:
+            conn.close()
+    except (sqlite3.Error, ValueError):
+        return None
+    if not row or row[0] is None:
+        return []
+    order_data = row[0].decode("utf-8", errors="replace") if isinstance(row[0], bytes) else str(row[0])
+
+    groups = [(int(m.group(1)), m.group(2), m.group(3)) for m in _GROUP_RE.finditer(order_data)]
+    totals = order_group_totals(order_data, [gid for gid, _, _ in groups])
+    orders = []
+    for gid, attrs, content in groups:
+        payments = []
+        for pm in _PAYMENT_RE.finditer(content):
+            value = _VALUE_RE.search(pm.group(1))
+            jdate = _JDATE_RE.search(pm.group(1))
+            if value and jdate:
+                payments.append([jdate.group(1), to_pence(value.group(1))])
+        order_date = _ORDER_DATE_RE.search(attrs)
+        first = _FIRST_NAME_RE.search(content)
+        last = _LAST_NAME_RE.search(content)
+        client = " ".join(n.group(1).strip() for n in (first, last) if n and n.group(1).strip())
+        orders.append([
+            gid,
+            client,
+            order_date.group(1) if order_date else min((p[0] for p in payments), default=""),
+            to_pence(totals.get(gid, 0.0)),
+            payments,
+        ])
+    return orders
+
+
+def _parse_album(psa_path: str) -> tuple[str, list | None]:
+    """Process pool worker: parse one album."""
+    return psa_path, parse_psa_orders(psa_path)
+
+
+def _current_stamps(albums: list[tuple[str, int, int]]) -> list[tuple[str, int, int]]:
+    """Re-stat catalogued albums: (psa_path, mtime_ns, size), dropping files that are gone."""
+    current = []
+    for path, _mtime_ns, _size in albums:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        current.append((path, st.st_mtime_ns, st.st_size))
+    return current
+
+
+def _load_cache(cache_path: str) -> dict:
+    """Load cached parses: psa path -> [mtime_ns, size, orders]."""
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("albums", {})
+
+
+def _save_cache(cache_path: str, albums: dict) -> bool:
+    """Write the parse cache atomically."""
+    tmp_path = cache_path + ".tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "albums": albums}, f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        return False
+    return True
+
+
+@dataclass(slots=True)
+class OrderRecord:
+    """One order group of one album, with its payment plan."""
+    album: str
+    group_id: int
+    client: str
+    order_ordinal: int
+    plan: PaymentPlan
+
+    @property
+    def key(self) -> str:
+        return f"{self.album}#{self.group_id}"
+
+
+def collect_orders(roots: list[str] | None = None, include_test: bool = False, workers: int = 0,
+                   use_cache: bool = True, cache_path: str = "") -> tuple[list[OrderRecord], dict]:
+    """Parse (or reuse cached parses of) every album under the archive roots.
+
+    Args:
+        roots: Archive roots (default: the PsaCatalogue standard roots).
+        include_test: Include *_test albums.
+        workers: Process pool size (0 = one per CPU).
+        use_cache: Reuse parses whose album mtime and size are unchanged.
+        cache_path: Override the parse cache location.
+
+    Returns:
+        (orders, stats): stats has 'albums', 'parsed', 'cached', 'failed', 'seconds'.
+    """
+    start = time.perf_counter()
+    catalogue = PsaCatalogue(roots)
+    catalogue.refresh(max_age=0)
+    catalogue.save()
+    albums = _current_stamps(catalogue.albums(include_test=include_test))
+
+    cache_path = cache_path or os.path.join(sidekick_config.get_output_dir(), CACHE_FILENAME)
+    cached = _load_cache(cache_path) if use_cache else {}
+    parsed: dict[str, list] = {}
+    stale: list[str] = []
+    for path, mtime_ns, size in albums:
+        entry = cached.get(path)
+        if entry and entry[0] == mtime_ns and entry[1] == size:
+            parsed[path] = entry[2]
+        else:
+            stale.append(path)
+
+    failed = 0
+    if stale:
+        if len(stale) >= POOL_MIN_ALBUMS and workers != 1:
+            with ProcessPoolExecutor(max_workers=workers or None) as pool:
+                results = list(pool.map(_parse_album, stale, chunksize=PARSE_CHUNK))
+        else:
+            results = [_parse_album(path) for path in stale]
+        for path, orders in results:
+            if orders is None:
+                failed += 1
+            else:
+                parsed[path] = orders
+
+    stamps = {path: (mtime_ns, size) for path, mtime_ns, size in albums}
+    if use_cache and (stale or len(cached) != len(parsed)):
+        _save_cache(cache_path, {path: [*stamps[path], orders] for path, orders in parsed.items()})
+
+    records = []
+    for path, orders in parsed.items():
+        album = os.path.splitext(os.path.basename(path))[0]
+        for gid, client, order_date, total_pence, payments in orders:
+            plan = PaymentPlan.from_payments([{"date": d, "amount": p / 100} for d, p in payments],
+                                             total_pence / 100)
+            records.append(OrderRecord(album, gid, client, date_ordinal(order_date), plan))
+    records.sort(key=lambda r: r.order_ordinal)
+
+    stats = {"albums": len(albums), "parsed": len(stale) - failed, "cached": len(albums) - len(stale),
+             "failed": failed, "seconds": round(time.perf_counter() - start, 3)}
+    return records, stats
+
+
+def weekly_report(orders: list[OrderRecord], first_day: date, last_day: date, as_of: date) -> list[dict]:
+    """Aggregate orders into Monday-to-Sunday weeks covering first_day..last_day.
+
+    Args:
+        orders: Order records sorted by order date (as collect_orders returns them).
+        first_day: First day of the reporting period.
+        last_day: Last day of the reporting period.
+        as_of: Instalments dated on or before this count as collected.
+
+    Returns:
+        list: One dict per week with the REPORT_FIELDS keys (amounts in pounds).
+    """
+    book = ScheduleBook()
+    for record in orders:
+        book.add(record.key, record.plan)
+    as_of_ordinal = as_of.toordinal()
+
+    weeks = []
+    week_start = first_day.toordinal() - first_day.weekday()
+    placed = 0  # orders are sorted, so those placed by the week end are a prefix
+    while week_start <= last_day.toordinal():
+        week_end = week_start + 6
+        placed_before = placed
+        while placed < len(orders) and orders[placed].order_ordinal <= week_end:
+            placed += 1
+
+        week_end_date = date.fromordinal(week_end)
+        outstanding = overdue = 0
+        for record in orders[:placed]:
+            owed = record.plan.outstanding_pence(week_end_date)
+            if not owed:
+                continue
+            outstanding += owed
+            if not record.plan.next_due(week_end_date)[0]:
+                overdue += owed
+
+        new_orders = [r for r in orders[placed_before:placed] if r.order_ordinal >= week_start]
+        weeks.append({
+            "week_start": ordinal_date(week_start),
+            "week_end": ordinal_date(week_end),
+            "orders": len(new_orders),
+            "ordered": to_pounds(sum(r.plan.total_pence for r in new_orders)),
+            "due": to_pounds(book.due_between(week_start, week_end + 1)),
+            "collected": to_pounds(book.due_between(week_start, min(week_end, as_of_ordinal) + 1)
+                                   if week_start <= as_of_ordinal else 0),
+            "outstanding": to_pounds(outstanding),
+            "overdue": to_pounds(overdue),
+        })
+        week_start += 7
+    return weeks
+
+
+def _parse_month(value: str) -> tuple[int, int]:
+    """YYYY-MM -> (year, month); raises ValueError."""
+    year, month = (int(part) for part in value.split("-")[:2])
+    date(year, month, 1)
+    return year, month
+
+
+def format_csv(weeks: list[dict]) -> str:
+    """Render the weekly rows as CSV with a header line."""
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(weeks)
+    return out.getvalue()
+
+
+def main() -> int:
+    this_month = date.today().strftime("%Y-%m")
+    parser = argparse.ArgumentParser(description="Weekly cashflow and receivables report from archive PSA files")
+    parser.add_argument("--from", dest="from_month", default=this_month, help="First month YYYY-MM (default: this month)")
+    parser.add_argument("--to", dest="to_month", default="", help="Last month YYYY-MM (default: same as --from)")
+    parser.add_argument("--format", choices=("csv", "json"), default="csv", help="Output format (default: csv)")
+    parser.add_argument("--output", default="", help="Write the report to this file instead of stdout")
+    parser.add_argument("--as-of", default="", help="Collected cut-off date YYYY-MM-DD (default: today)")
+    parser.add_argument("--root", action="append", default=[], help="Archive root (repeatable; default: standard roots)")
+    parser.add_argument("--workers", type=int, default=0, help="Parse processes (default: one per CPU)")
+    parser.add_argument("--include-test", action="store_true", help="Include *_test albums")
+    parser.add_argument("--no-cache", action="store_true", help="Re-parse every album")
+    args = parser.parse_args()
+
+    try:
+        from_year, from_month = _parse_month(args.from_month)
+        to_year, to_month = _parse_month(args.to_month or args.from_month)
+    except ValueError:
+        print(f"[FAIL] Invalid month range: {args.from_month} .. {args.to_month} (expected YYYY-MM)", file=sys.stderr)
+        return 1
+    first_day = date(from_year, from_month, 1)
+    last_day = (date(to_year + 1, 1, 1) if to_month == 12 else date(to_year, to_month + 1, 1)) - timedelta(days=1)
+    if last_day < first_day:
+        print("[FAIL] --to is before --from", file=sys.stderr)
+        return 1
+    as_of = date.today()
+    if args.as_of:
+        if date_ordinal(args.as_of) == UNDATED:
+            print(f"[FAIL] Invalid --as-of: {args.as_of} (expected YYYY-MM-DD)", file=sys.stderr)
+            return 1
+        as_of = date.fromordinal(date_ordinal(args.as_of))
+
+    orders, stats = collect_orders(args.root or None, include_test=args.include_test,
+                                   workers=args.workers, use_cache=not args.no_cache)
+    weeks = weekly_report(orders, first_day, last_day, as_of)
+    print(f"[INFO] {len(orders)} order(s) from {stats['albums']} album(s): {stats['parsed']} parsed, "
+          f"{stats['cached']} cached, {stats['failed']} unreadable in {stats['seconds']:.2f}s", file=sys.stderr)
+
+    if args.format == "json":
+        report = json.dumps({
+            "from": first_day.isoformat(),
+            "to": last_day.isoformat(),
+            "as_of": as_of.isoformat(),
+            "albums": stats["albums"],
+            "orders": len(orders),
+            "weeks": weeks,
+        }, indent=2) + "\n"
+    else:
+        report = format_csv(weeks)
+
+    if not args.output:
+        sys.stdout.write(report)
+        return 0
+    try:
+        with open(args.output, "w", encoding="utf-8", newline="") as f:
+            f.write(report)
+    except OSError as e:
+        print(f"[FAIL] Could not write {args.output}: {e}", file=sys.stderr)
+        return 1
+    print(f"[OK] {len(weeks)} week(s) written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -120,9 +120,84 @@ def get_album_info(psa_path: str) -> dict:
         return {"error": f"Error: {e}"}
 
 
+def _thumbnail_filename(image_id: int, image_ids: dict) -> str:
+    """Return the .jpg filename used for a thumbnail's albumimage ID."""
+    if image_id in image_ids:
+        # Use original name but change extension to .jpg
+        return f"{os.path.splitext(image_ids[image_id])[0]}.jpg"
+    return f"thumb_{image_id:04d}.jpg"
+
+
+def iter_thumbnails(psa_path: str, image_ids: dict | None = None, only_ids=None):
+    """Yield (filename, memoryview) for each main JPEG thumbnail in a .psa file.
+
+    Reads straight from the Thumbnails table one row at a time, so nothing
+    is written to disk and only one blob is held in memory per step. On
+    Python 3.11+ the blob is read through sqlite3 incremental blob I/O,
+    which rejects non-JPEG rows from their first two bytes without reading
+    the rest.
+
+    Copy (bytes(buf)) any buffer that must outlive the loop iteration.
+
+    Args:
+        psa_path: Path to the .psa file
+        image_ids: Optional albumimage ID -> image name map (from get_album_info);
+                   loaded from the album when not supplied
+        only_ids: Optional iterable of albumimage IDs to restrict the scan to
+
+    Yields:
+        tuple[str, memoryview]: Thumbnail filename (as extract_thumbnails
+        would name it) and the JPEG bytes
+    """
+    if image_ids is None:
+        info = get_album_info(psa_path)
+        if "error" in info:
+            return
+        image_ids = info.get("image_ids", {})
+
+    params = []
+    id_filter = ''
+    if only_ids is not None:
+        params = list(only_ids)
+        if not params:
+            return
+        id_filter = f"AND imageID IN ({','.join('?' for _ in params)})"
+
+    conn = sqlite3.connect(psa_path)
+    try:
+        use_blob_io = hasattr(conn, 'blobopen')
+        data_col = '' if use_blob_io else ', imageData'
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT rowid, imageID{data_col}
+            FROM Thumbnails
+            WHERE thumbnailType = 1 AND imageData IS NOT NULL {id_filter}
+            ORDER BY rowid
+        ''', params)
+
+        for row in cursor.fetchall() if use_blob_io else cursor:
+            rowid, image_id = row[0], row[1]
+            if use_blob_io:
+                with conn.blobopen('Thumbnails', 'imageData', rowid, readonly=True) as blob:
+                    # Verify it's a JPEG (starts with FFD8) before reading the whole blob
+                    if len(blob) < 2 or blob[0:2] != b'\xff\xd8':
+                        continue
+                    data = blob.read()
+            else:
+                data = row[2]
+                if not data or data[:2] != b'\xff\xd8':
+                    continue
+            yield _thumbnail_filename(image_id, image_ids), memoryview(data)
+    finally:
+        conn.close()
+
+
 def extract_thumbnails(psa_path: str, output_folder: str) -> dict:
     """Extract all thumbnails from .psa file to a folder.
 
+    Disk materialisation of iter_thumbnails() for tools that need real
+    files; in-process renderers should consume iter_thumbnails() directly.
+
     Args:
         psa_path: Path to the .psa file
         output_folder: Folder to save extracted thumbnails
@@ -143,37 +218,8 @@ def extract_thumbnails(psa_path: str, output_folder: str) -> dict:
     os.makedirs(output_folder, exist_ok=True)
 
     try:
-        conn = sqlite3.connect(psa_path)
-        cursor = conn.cursor()
-
-        # Get all thumbnails with type 1 (main thumbnails)
-        cursor.execute('''
-            SELECT id, imageID, imageData
-            FROM Thumbnails
-            WHERE thumbnailType = 1 AND imageData IS NOT NULL
-        ''')
-
         extracted = []
-        image_ids = info.get("image_ids", {})
-
-        for row in cursor.fetchall():
-            thumb_id, image_id, data = row
-
-            if not data:
-                continue
-
-            # Verify it's a JPEG (starts with FFD8FF)
-            if data[:2] != b'\xff\xd8':
-                continue
-
-            # Get image name from mapping, or use ID
-            if image_id in image_ids:
-                # Use original name but change extension to .jpg
-                base_name = os.path.splitext(image_ids[image_id])[0]
-                filename = f"{base_name}.jpg"
-            else:
-                filename = f"thumb_{image_id:04d}.jpg"
-
+        for filename, data in iter_thumbnails(psa_path, info.get("image_ids", {})):
             output_path = os.path.join(output_folder, filename)
 
             with open(output_path, 'wb') as f:
@@ -181,8 +227,6 @@ def extract_thumbnails(psa_path: str, output_folder: str) -> dict:
 
             extracted.append(filename)
 
-        conn.close()
-
         return {
             "success": True,
             "count": len(extracted),
@@ -197,6 +241,71 @@ def extract_thumbnails(psa_path: str, output_folder: str) -> dict:
         return {"error": f"Error: {e}"}
 
 
+def load_thumbnails(psa_path: str, only_ids=None) -> dict:
+    """Load main thumbnails into memory as an ordered {filename: memoryview} map.
+
+    Args:
+        psa_path: Path to the .psa file
+        only_ids: Optional iterable of albumimage IDs to restrict to
+
+    Returns:
+        dict with "success", "thumbnails" and "album_info", or "error"
+    """
+    if not os.path.exists(psa_path):
+        return {"error": f"File not found: {psa_path}"}
+
+    info = get_album_info(psa_path)
+    if "error" in info:
+        return info
+
+    try:
+        thumbnails = dict(iter_thumbnails(psa_path, info.get("image_ids", {}), only_ids))
+        return {"success": True, "thumbnails": thumbnails, "album_info": info}
+    except sqlite3.Error as e:
+        return {"error": f"Database error: {e}"}
+    except Exception as e:
+        return {"error": f"Error: {e}"}
+
+
+def thumbnail_set_digest(psa_path: str) -> dict:
+    """Compute a SHA-256 digest of the thumbnails extract_thumbnails() would write.
+
+    Covers the output filename and JPEG bytes of every main thumbnail, so the
+    digest changes whenever the extracted folder would differ. Nothing is
+    written to disk.
+
+    Args:
+        psa_path: Path to the .psa file
+
+    Returns:
+        dict with "success", "digest" (hex) and "count", or "error"
+    """
+    import hashlib
+
+    if not os.path.exists(psa_path):
+        return {"error": f"File not found: {psa_path}"}
+
+    info = get_album_info(psa_path)
+    if "error" in info:
+        return info
+
+    try:
+        digest = hashlib.sha256()
+        count = 0
+        for filename, data in iter_thumbnails(psa_path, info.get("image_ids", {})):
+            digest.update(filename.encode('utf-8') + b'\0')
+            digest.update(len(data).to_bytes(8, 'little'))
+            digest.update(data)
+            count += 1
+
+        return {"success": True, "digest": digest.hexdigest(), "count": count}
+
+    except sqlite3.Error as e:
+        return {"error": f"Database error: {e}"}
+    except Exception as e:
+        return {"error": f"Error: {e}"}
+
+
 def main() -> None:
     """CLI entry point — read image data and optionally extract thumbnails from a .psa file."""
     if len(sys.argv) < 2:
@@ -79,7 +79,7 @@ def _ssh_quote(s: str) -> str:
     return "'" + s.replace("'", "'\\''") + "'"
 
 
-def _query_remote(ssh_host: str, remote_db_path: str, job_ref: str | None, limit: int, shoot_no: str = "", last_name: str = "") -> list[dict[str, Any]]:
+def _query_remote(ssh_host: str, remote_db_path: str, job_ref: str | None, limit: int, shoot_no: str = "", last_name: str = "", timeout: float = 60) -> list[dict[str, Any]]:
     remote_script = r'''
 import json
 import sqlite3
@@ -141,7 +141,7 @@ finally:
     )
     cmd = ["ssh", ssh_host, remote_cmd]
 
-    proc = subprocess.run(cmd, input=remote_script, capture_output=True, text=True, timeout=60)
+    proc = subprocess.run(cmd, input=remote_script, capture_output=True, text=True, timeout=timeout)
     if proc.returncode != 0:
         err = (proc.stderr or proc.stdout).strip()
         raise RuntimeError(f"Remote query failed ({ssh_host}): {err}")
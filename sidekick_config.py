@@ -0,0 +1,338 @@
+"""
+SideKick Config Module
+Copyright (c) 2026 GuyMayer. All rights reserved.
+Unauthorized use, modification, or distribution is prohibited.
+
+Shared, cached reader for SideKick_PS.ini and the credentials JSON files.
+
+Each file is parsed once per (path, mtime, size) and handed out as a
+read-only mapping. Parsed INIs are also kept in
+%APPDATA%\\SideKick_PS\\config_snapshot.json, so the next process only
+stat()s the INI and reads the snapshot. It skips the corruption fix-up
+and the multi-encoding decode (AHK often writes UTF-16). Secrets (API keys,
+license key/token) are never stored in plain text: they are encrypted for
+the current Windows user with DPAPI. Where DPAPI is unavailable, INIs that
+hold secrets are not snapshotted and are parsed once per process.
+Credentials files are small and only cached in memory.
+
+Callers that need to change a value copy the mapping first (dict(...)).
+
+Also home to small helpers every SideKick module shares: get_output_dir()
+and sha256_file().
+"""
+
+import base64
+import hashlib
+import json
+import os
+import re
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping
+
+INI_FILENAME = 'SideKick_PS.ini'
+SNAPSHOT_FILENAME = 'config_snapshot.json'
+SNAPSHOT_VERSION = 3  # older snapshots are discarded on load
+INI_ENCODINGS = ('utf-8', 'utf-16', 'utf-16-le', 'cp1252', 'latin-1')
+_HASH_CHUNK = 1024 * 1024
+
+_lock = threading.Lock()
+_memo: dict[str, tuple[tuple[int, int], Any]] = {}  # path -> (stamp, frozen data)
+_snapshot: dict | None = None
+
+# Key names whose values must not be persisted ([GHL] API_Key_B64, [License] Key/Token, ...)
+_SECRET_KEY_RE = re.compile(r'(?i)^key$|api_?key|token|secret|password|_b64$')
+# PaymentTypes= followed by lines that aren't key=value or [section]
+_ORPHAN_LINES_RE = re.compile(r'(PaymentTypes=[^\r\n]*)\r?\n((?:(?![\[\w]+=)[^\r\n]+\r?\n)+)')
+
+
+def get_output_dir() -> str:
+    """Get a writable directory for output files (%APPDATA%\\SideKick_PS, else TEMP)."""
+    appdata = os.environ.get('APPDATA')
+    if appdata:
+        sidekick_dir = os.path.join(appdata, 'SideKick_PS')
+        try:
+            os.makedirs(sidekick_dir, exist_ok=True)
+            return sidekick_dir
+        except OSError:
+            pass
+    return os.environ.get('TEMP', os.path.dirname(os.path.abspath(__file__)))
+
+
+def sha256_file(file_path: str) -> str | None:
+    """Return the hex SHA-256 of a file's bytes, or None if unreadable."""
+    try:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+
+def ini_paths(script_dir: str) -> list[str]:
+    """Candidate INI locations, in priority order: script dir, its parent, AppData."""
+    return [
+        os.path.join(script_dir, INI_FILENAME),
+        os.path.join(os.path.dirname(script_dir), INI_FILENAME),
+        os.path.join(os.environ.get('APPDATA', ''), 'SideKick_PS', INI_FILENAME),
+    ]
+
+
+def sanitize_ini_file(ini_path: str) -> bool:
+    """Fix corrupted INI files with multi-line values that break configparser.
+
+    Args:
+        ini_path: Path to the INI file.
+
+    Returns:
+        bool: True if file was fixed, False if no fix needed or failed.
+    """
+    try:
+        with open(ini_path, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+
+        fixed = _ORPHAN_LINES_RE.sub(
+            lambda m: m.group(1) + '|' + '|'.join(line.strip() for line in m.group(2).strip().split('\n') if line.strip()) + '\n',
+            content
+        )
+
+        if fixed != content:
+            with open(ini_path, 'w', encoding='utf-8') as f:
+                f.write(fixed)
+            return True
+    except Exception:
+        pass
+    return False
+
+
+def parse_ini_text(content: str) -> dict:
+    """Parse INI text into {section: {key: value}} (';' comments, last section wins)."""
+    config: dict = {}
+    current_section = None
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line.startswith(';'):
+            continue
+        if line.startswith('[') and line.endswith(']'):
+            current_section = line[1:-1]
+            config[current_section] = {}
+        elif '=' in line and current_section:
+            key, value = line.split('=', 1)
+            config[current_section][key.strip()] = value.strip()
+    return config
+
+
+def _parse_ini(ini_path: str) -> tuple[dict, str]:
+    """Sanitise and parse an INI; returns (config, encoding that decoded it)."""
+    # Auto-fix corrupted INI files (e.g., multi-line PaymentTypes)
+    sanitize_ini_file(ini_path)
+    for encoding in INI_ENCODINGS:
+        try:
+            with open(ini_path, 'r', encoding=encoding) as f:
+                return parse_ini_text(f.read()), encoding
+        except (UnicodeDecodeError, UnicodeError):
+            continue
+    raise ValueError(f"Could not decode INI file with any known encoding: {ini_path}")
+
+
+def _split_secrets(config: dict) -> tuple[dict, dict]:
+    """Split config into (public sections, {section: {secret key: value}})."""
+    public: dict = {}
+    secrets: dict = {}
+    for section, values in config.items():
+        public[section] = {k: v for k, v in values.items() if not _SECRET_KEY_RE.search(k)}
+        hidden = {k: v for k, v in values.items() if _SECRET_KEY_RE.search(k)}
+        if hidden:
+            secrets[section] = hidden
+    return public, secrets
+
+
+def _dpapi(data: bytes, protect: bool) -> bytes | None:
+    """Encrypt/decrypt data for the current Windows user; None off Windows or on failure."""
+    if os.name != 'nt':
+        return None
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class DATA_BLOB(ctypes.Structure):
+            _fields_ = [('cbData', wintypes.DWORD), ('pbData', ctypes.POINTER(ctypes.c_char))]
+
+        buffer = ctypes.create_string_buffer(data, len(data))
+        blob_in = DATA_BLOB(len(data), ctypes.cast(buffer, ctypes.POINTER(ctypes.c_char)))
+        blob_out = DATA_BLOB()
+        crypt32 = ctypes.windll.crypt32
+        call = crypt32.CryptProtectData if protect else crypt32.CryptUnprotectData
+        # 0x1 = CRYPTPROTECT_UI_FORBIDDEN
+        if not call(ctypes.byref(blob_in), None, None, None, None, 0x1, ctypes.byref(blob_out)):
+            return None
+        try:
+            return ctypes.string_at(blob_out.pbData, blob_out.cbData)
+        finally:
+            ctypes.windll.kernel32.LocalFree(blob_out.pbData)
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _seal_secrets(secrets: dict) -> str | None:
+    sealed = _dpapi(json.dumps(secrets).encode('utf-8'), protect=True)
+    return base64.b64encode(sealed).decode('ascii') if sealed else None
+
+
+def _open_secrets(sealed: str) -> dict | None:
+    try:
+        data = _dpapi(base64.b64decode(sealed), protect=False)
+        secrets = json.loads(data.decode('utf-8')) if data else None
+    except (ValueError, UnicodeError):
+        return None
+    return secrets if isinstance(secrets, dict) else None
+
+
+def _stamp(path: str) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _snapshot_path() -> str:
+    return os.path.join(get_output_dir(), SNAPSHOT_FILENAME)
+
+
+def _load_snapshot() -> dict:
+    global _snapshot
+    if _snapshot is None:
+        try:
+            with open(_snapshot_path(), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get('version') != SNAPSHOT_VERSION:
+                data = {}
+        except (OSError, ValueError):
+            data = {}
+        _snapshot = {'version': SNAPSHOT_VERSION, 'files': data.get('files', {})}
+    return _snapshot
+
+
+def _save_snapshot(data: dict) -> None:
+    # Forget INIs that have since been deleted or moved
+    for ini_path in [p for p in data['files'] if not os.path.exists(p)]:
+        del data['files'][ini_path]
+    path = _snapshot_path()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _freeze(config: dict) -> Mapping[str, Mapping[str, str]]:
+    return MappingProxyType({section: MappingProxyType(dict(values)) for section, values in config.items()})
+
+
+def load_ini(ini_path: str) -> Mapping[str, Mapping[str, str]]:
+    """Read-only {section: {key: value}} view of an INI file, parsed at most once per change.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+        ValueError: If it cannot be decoded.
+    """
+    key = os.path.normcase(os.path.abspath(ini_path))
+    stamp = _stamp(key)
+    if stamp is None:
+        raise FileNotFoundError(ini_path)
+    with _lock:
+        hit = _memo.get(key)
+        if hit and hit[0] == stamp:
+            return hit[1]
+        snapshot = _load_snapshot()
+        entry = snapshot['files'].get(key)
+        config = None
+        if entry and tuple(entry.get('stamp', ())) == stamp:
+            config = {section: dict(values) for section, values in entry['sections'].items()}
+            if entry.get('secrets'):
+                secrets = _open_secrets(entry['secrets'])
+                if secrets is None:
+                    config = None  # sealed by another user or machine
+                else:
+                    for section, values in secrets.items():
+                        config.setdefault(section, {}).update(values)
+        if config is None:
+            config, _encoding = _parse_ini(key)
+            stamp = _stamp(key) or stamp  # sanitising may have rewritten the file
+            public, secrets = _split_secrets(config)
+            sealed = _seal_secrets(secrets) if secrets else None
+            if secrets and not sealed:
+                # Without DPAPI the snapshot could not replace the INI read
+                if snapshot['files'].pop(key, None) is not None:
+                    _save_snapshot(snapshot)
+            else:
+                snapshot['files'][key] = {'stamp': list(stamp), 'sections': public}
+                if sealed:
+                    snapshot['files'][key]['secrets'] = sealed
+                _save_snapshot(snapshot)
+        frozen = _freeze(config)
+        _memo[key] = (stamp, frozen)
+        return frozen
+
+
+def _has_api_key(config: Mapping) -> bool:
+    ghl = config.get('GHL', {})
+    return bool(ghl.get('API_Key_B64') or ghl.get('API_Key_V2_B64'))
+
+
+def find_ini(script_dir: str, require_api_key: bool = False) -> str | None:
+    """First existing INI among ini_paths(script_dir).
+
+    With require_api_key, prefer the first one whose [GHL] section holds an
+    API key, falling back to the first existing one.
+    """
+    existing = [path for path in ini_paths(script_dir) if os.path.exists(path)]
+    if require_api_key:
+        for path in existing:
+            try:
+                if _has_api_key(load_ini(path)):
+                    return path
+            except (OSError, ValueError):
+                continue
+    return existing[0] if existing else None
+
+
+def ini_setting(script_dir: str, section: str, key: str, default: str = '') -> str:
+    """A value from the first readable INI among ini_paths(script_dir)."""
+    for path in ini_paths(script_dir):
+        if not os.path.exists(path):
+            continue
+        try:
+            config = load_ini(path)
+        except (OSError, ValueError):
+            continue
+        return config.get(section, {}).get(key, default)
+    return default
+
+
+def read_json(path: str) -> Mapping[str, Any] | None:
+    """Read-only view of a JSON object file (credentials.json etc.), or None if unreadable."""
+    key = os.path.normcase(os.path.abspath(path))
+    stamp = _stamp(key)
+    if stamp is None:
+        return None
+    with _lock:
+        hit = _memo.get(key)
+        if hit and hit[0] == stamp:
+            return hit[1]
+    try:
+        with open(key, 'r', encoding='utf-8-sig') as f:  # utf-8-sig handles BOM
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    frozen = MappingProxyType(data)
+    with _lock:
+        _memo[key] = (stamp, frozen)
+    return frozen
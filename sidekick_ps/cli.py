@@ -38,6 +38,7 @@ COMMANDS: dict[str, str] = {
     "write-psa":           "write_psa_payments",
     "read-psa":            "read_psa_payments",
     "read-psa-images":     "read_psa_images",
+    "receivables":         "psa_receivables",
 }
 
 # Commands that launch a GUI – the console window is hidden on startup so
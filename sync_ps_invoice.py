@@ -25,14 +25,17 @@ import json
 import os
 import time
 import re
-import configparser
 import base64
+import hashlib
 import ctypes
 import traceback
 import sqlite3
-import xml.etree.ElementTree as ET
 from datetime import datetime
 
+import sidekick_config
+from proselect_export import load_export
+from payment_schedule import PaymentPlan, ScheduleBook, to_pounds
+
 # =============================================================================
 # GHL PRODUCTS CACHE - For SKU-to-name lookups
 # =============================================================================
@@ -42,36 +45,6 @@ _ghl_products_cache_time: float = 0  # Last fetch timestamp
 # =============================================================================
 # DEBUG MODE - Read from INI file (Settings > DebugLogging)
 # =============================================================================
-def _sanitize_ini_file(ini_path: str) -> bool:
-    """Fix corrupted INI files with multi-line values that break configparser.
-
-    Args:
-        ini_path: Path to the INI file.
-
-    Returns:
-        bool: True if file was fixed, False if no fix needed or failed.
-    """
-    try:
-        import re
-        with open(ini_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-
-        # Pattern: PaymentTypes= followed by lines that aren't key=value or [section]
-        # These are orphan lines that break configparser
-        fixed = re.sub(
-            r'(PaymentTypes=[^\r\n]*)\r?\n((?:(?![\[\w]+=)[^\r\n]+\r?\n)+)',
-            lambda m: m.group(1) + '|' + '|'.join(line.strip() for line in m.group(2).strip().split('\n') if line.strip()) + '\n',
-            content
-        )
-
-        if fixed != content:
-            with open(ini_path, 'w', encoding='utf-8') as f:
-                f.write(fixed)
-            return True
-    except Exception:
-        pass
-    return False
-
 def get_debug_mode_setting() -> bool:
     """Read DebugLogging setting from INI file.
 
@@ -81,39 +54,21 @@ def get_debug_mode_setting() -> bool:
         bool: True if DebugLogging is enabled and within 24hrs, False otherwise.
     """
     try:
-        import configparser
         from datetime import datetime, timedelta
         script_dir = os.path.dirname(os.path.abspath(__file__))
-        possible_paths = [
-            os.path.join(script_dir, "SideKick_PS.ini"),
-            os.path.join(os.path.dirname(script_dir), "SideKick_PS.ini"),
-            os.path.join(os.environ.get('APPDATA', ''), "SideKick_PS", "SideKick_PS.ini"),
-        ]
-        for ini_path in possible_paths:
-            if os.path.exists(ini_path):
-                config = configparser.ConfigParser()
-                try:
-                    config.read(ini_path)
-                except configparser.ParsingError:
-                    # Try to fix corrupted INI and retry
-                    if _sanitize_ini_file(ini_path):
-                        config.read(ini_path)
-                    else:
-                        continue
-                enabled = config.get('Settings', 'DebugLogging', fallback='0') == '1'
-                if not enabled:
-                    return False
-                # Check timestamp - auto-disable after 24 hours
-                timestamp_str = config.get('Settings', 'DebugLoggingTimestamp', fallback='')
-                if timestamp_str:
-                    try:
-                        enabled_time = datetime.strptime(timestamp_str, '%Y%m%d%H%M%S')
-                        if datetime.now() - enabled_time > timedelta(hours=24):
-                            return False  # Expired
-                    except ValueError:
-                        pass
-                return True
-        return False  # Default to disabled
+        enabled = sidekick_config.ini_setting(script_dir, 'Settings', 'DebugLogging', '0') == '1'
+        if not enabled:
+            return False
+        # Check timestamp - auto-disable after 24 hours
+        timestamp_str = sidekick_config.ini_setting(script_dir, 'Settings', 'DebugLoggingTimestamp')
+        if timestamp_str:
+            try:
+                enabled_time = datetime.strptime(timestamp_str, '%Y%m%d%H%M%S')
+                if datetime.now() - enabled_time > timedelta(hours=24):
+                    return False  # Expired
+            except ValueError:
+                pass
+        return True
     except Exception:
         return False  # Default to disabled on error
 
@@ -194,28 +149,9 @@ def get_auto_send_logs_setting() -> bool:
         bool: True if AutoSendLogs is enabled, False otherwise.
     """
     try:
-        # Try to find INI file - check script dir first, then common locations
+        # For compiled EXE, the parent directory is checked too (Inno installer structure)
         script_dir = os.path.dirname(os.path.abspath(__file__))
-
-        # For compiled EXE, check parent directory (Inno installer structure)
-        possible_paths = [
-            os.path.join(script_dir, "SideKick_PS.ini"),
-            os.path.join(os.path.dirname(script_dir), "SideKick_PS.ini"),
-            os.path.join(os.environ.get('APPDATA', ''), "SideKick_PS", "SideKick_PS.ini"),
-        ]
-
-        for ini_path in possible_paths:
-            if os.path.exists(ini_path):
-                config = configparser.ConfigParser()
-                try:
-                    config.read(ini_path)
-                except configparser.ParsingError:
-                    if _sanitize_ini_file(ini_path):
-                        config.read(ini_path)
-                    else:
-                        continue
-                return config.get('Settings', 'AutoSendLogs', fallback='0') == '1'
-        return False
+        return sidekick_config.ini_setting(script_dir, 'Settings', 'AutoSendLogs', '0') == '1'
     except Exception:
         return False
 
@@ -557,64 +493,19 @@ OUTPUT_FILE = os.path.join(_get_output_dir(), 'ghl_invoice_sync_result.json')
 ENCRYPT_KEY = "ZoomPhotography2026"
 
 
-def _parse_ini_line(line: str, current_section: str | None, config: dict) -> str | None:
-    """Parse a single INI line and update config.
-
-    Args:
-        line: Stripped line from INI file.
-        current_section: Current section name.
-        config: Config dict to update.
-
-    Returns:
-        str: Updated current section name.
-    """
-    if line.startswith('[') and line.endswith(']'):
-        section = line[1:-1]
-        config[section] = {}
-        return section
-    if '=' in line and current_section:
-        key, value = line.split('=', 1)
-        config[current_section][key.strip()] = value.strip()
-    return current_section
-
-
 def _parse_ini_file(ini_path: str) -> dict:
     """Parse INI file into nested dictionary by section.
 
+    Served from the shared config snapshot, so the file is only re-read
+    (and auto-fixed) after it changes.
+
     Args:
         ini_path: Path to the INI file.
 
     Returns:
         dict: Nested dictionary with sections as keys.
     """
-    # Auto-fix corrupted INI files (e.g., multi-line PaymentTypes)
-    _sanitize_ini_file(ini_path)
-
-    config = {}
-    current_section = None
-
-    # Try multiple encodings (AHK often writes UTF-16)
-    encodings = ['utf-8', 'utf-16', 'utf-16-le', 'cp1252', 'latin-1']
-    content = None
-
-    for encoding in encodings:
-        try:
-            with open(ini_path, 'r', encoding=encoding) as f:
-                content = f.read()
-            break
-        except (UnicodeDecodeError, UnicodeError):
-            continue
-
-    if content is None:
-        raise ValueError(f"Could not decode INI file with any known encoding: {ini_path}")
-
-    for line in content.splitlines():
-        line = line.strip()
-        if not line or line.startswith(';'):
-            continue
-        current_section = _parse_ini_line(line, current_section, config)
-
-    return config
+    return {section: dict(values) for section, values in sidekick_config.load_ini(ini_path).items()}
 
 
 def _decode_api_key(ghl_config: dict, key_name: str | None = None) -> str:
@@ -656,33 +547,11 @@ def _find_ini_file() -> str:
     Raises:
         FileNotFoundError: If no valid INI file found.
     """
-    possible_paths = [
-        INI_FILE,  # Script directory
-        os.path.join(os.path.dirname(SCRIPT_DIR), "SideKick_PS.ini"),  # Parent dir
-        os.path.join(os.environ.get('APPDATA', ''), "SideKick_PS", "SideKick_PS.ini"),  # AppData
-    ]
-
-    for ini_path in possible_paths:
-        if os.path.exists(ini_path):
-            try:
-                config = _parse_ini_file(ini_path)
-                ghl = config.get('GHL', {})
-                # Check if API key exists in this INI
-                if ghl.get('API_Key_B64') or ghl.get('API_Key_V2_B64'):
-                    debug_log(f"Using INI file with API key: {ini_path}")
-                    return ini_path
-                else:
-                    debug_log(f"INI file found but no API key: {ini_path}")
-            except Exception as e:
-                debug_log(f"Error parsing INI {ini_path}: {e}")
-                continue
-
-    # If no INI with API key found, return first existing one for better error message
-    for ini_path in possible_paths:
-        if os.path.exists(ini_path):
-            return ini_path
-
-    raise FileNotFoundError(f"INI file not found. Checked: {possible_paths}")
+    ini_path = sidekick_config.find_ini(SCRIPT_DIR, require_api_key=True)
+    if not ini_path:
+        raise FileNotFoundError(f"INI file not found. Checked: {sidekick_config.ini_paths(SCRIPT_DIR)}")
+    debug_log(f"Using INI file: {ini_path}")
+    return ini_path
 
 
 def load_config() -> dict:
@@ -700,6 +569,7 @@ def load_config() -> dict:
     location_id = ""
     sync_tag = "PS Invoice"
     opportunity_tags = "ProSelect,Invoice Synced"
+    defer_psa_writes = '0'
 
     # Try to load from credentials.json (primary source)
     # Check both "credentials.json" and legacy "ghl_credentials.json" names
@@ -713,8 +583,9 @@ def load_config() -> dict:
     for cred_path in credentials_paths:
         if os.path.exists(cred_path):
             try:
-                with open(cred_path, 'r', encoding='utf-8-sig') as f:  # utf-8-sig handles BOM
-                    creds = json.load(f)
+                creds = sidekick_config.read_json(cred_path)
+                if creds is None:
+                    raise ValueError("not a readable JSON object")
                 api_key_b64 = creds.get('api_key_b64', '')
                 if api_key_b64:
                     api_key = base64.b64decode(api_key_b64).decode('utf-8')
@@ -746,6 +617,9 @@ def load_config() -> dict:
         # Auto-add toggle settings (AHK writes 0/1)
         auto_contact_tags = ghl.get('AutoAddContactTags', '1')
         auto_opp_tags = ghl.get('AutoAddOppTags', '1')
+
+        # 1 = write PSA metadata via the sync ledger's background reconciler
+        defer_psa_writes = ghl.get('DeferPsaWrites', '0')
     except Exception as e:
         debug_log(f"Error loading INI: {e}")
 
@@ -764,6 +638,7 @@ def load_config() -> dict:
         'OPPORTUNITY_TAGS': [t.strip() for t in opportunity_tags.split(',') if t.strip()],
         'AUTO_ADD_CONTACT_TAGS': auto_contact_tags != '0',
         'AUTO_ADD_OPP_TAGS': auto_opp_tags != '0',
+        'DEFER_PSA_WRITES': defer_psa_writes == '1',
     }
 
 # Load config
@@ -914,6 +789,13 @@ PRODUCTION_ORDER_CONFIRMED_STAGE = 'New Order'
 PRODUCTION_COMPLETE_STAGE = 'Complete'
 PRODUCTION_NO_SALE_STAGE = 'No Sale'
 
+# Batch month mode: concurrent requests when flushing queued opportunity
+# updates, retries for 429/5xx responses, and how many queued opportunity
+# moves may wait before the queue is flushed mid-run.
+OPP_FLUSH_WORKERS = 4
+OPP_FLUSH_RETRIES = 2
+OPP_FLUSH_EVERY = 10
+
 # Stage-name aliases to handle historical naming differences across locations.
 _PRODUCTION_STAGE_ALIASES: dict[str, list[str]] = {
     'awaiting approval': ['proofing'],
@@ -1075,22 +957,18 @@ def _resolve_optional_opp_financial_field_ids() -> dict[str, str]:
     return resolved
 
 
-def _summarize_payment_status(order_data: dict) -> tuple[float, float, float, int, float, str]:
-    """Return (order_total, total_paid, amount_remaining, payments_count, paid_ratio, label)."""
+def _summarize_payment_status(order_data: dict, plan: PaymentPlan | None = None) -> tuple[float, float, float, int, float, str]:
+    """Return (order_total, total_paid, amount_remaining, payments_count, paid_ratio, label).
+
+    Pass a PaymentPlan already built for this order to avoid rebuilding it.
+    """
+    if not isinstance(order_data, dict):
+        order_data = {}
+    plan = plan or PaymentPlan.from_order(order_data)
     total = float(order_data.get('total_amount', 0) or 0)
-    payments = order_data.get('payments', []) if isinstance(order_data, dict) else []
-    total_paid = 0.0
-    if isinstance(payments, list):
-        for p in payments:
-            if not isinstance(p, dict):
-                continue
-            try:
-                total_paid += float(p.get('amount', 0) or 0)
-            except Exception:
-                continue
-    total_paid = round(total_paid, 2)
+    total_paid = to_pounds(plan.scheduled_pence)
     amount_remaining = round(max(0.0, total - total_paid), 2)
-    payments_count = len(payments) if isinstance(payments, list) else 0
+    payments_count = plan.listed_count
     paid_ratio = round((total_paid / total) * 100.0, 2) if total > 0 else 0.0
 
     # ProSelect XML payment lines are typically payment-plan schedule entries,
@@ -1098,11 +976,7 @@ def _summarize_payment_status(order_data: dict) -> tuple[float, float, float, in
     if payments_count > 1:
         label = 'Pay Plan Active'
     elif payments_count == 1:
-        one_payment = 0.0
-        try:
-            one_payment = float((payments[0] or {}).get('amount', 0) or 0) if isinstance(payments, list) else 0.0
-        except Exception:
-            one_payment = 0.0
+        one_payment = to_pounds(plan.first_listed_pence)
         if total > 0 and abs(one_payment - total) <= 0.01:
             label = 'Paid in Full'
         elif one_payment > 0:
@@ -1126,43 +1000,15 @@ def _is_non_product_financial_line(name: str) -> bool:
     return ('credit' in text) or ('deposit' in text)
 
 
-def _calculate_release_goods_date(order_data: dict, threshold_pct: float = 0.25) -> str:
+def _calculate_release_goods_date(order_data: dict, threshold_pct: float = 0.25, plan: PaymentPlan | None = None) -> str:
     """Return the date (YYYY-MM-DD) when cumulative payments first reach threshold_pct of order total.
 
-    Payments are sorted by date ascending; the date of the payment that pushes
+    Payments are taken in date order; the date of the payment that pushes
     the running total to or above the threshold is returned.  Returns '' if
     there are no payments or no order total.
     """
-    total = float((order_data or {}).get('total_amount', 0) or 0)
-    payments = (order_data or {}).get('payments', [])
-    if total <= 0 or not isinstance(payments, list) or not payments:
-        return ''
-
-    threshold = total * threshold_pct
-
-    # Sort by date string (ISO YYYY-MM-DD sorts lexicographically).
-    def _payment_sort_key(p: dict) -> str:
-        return str(p.get('date') or '').strip()
-
-    sorted_payments = sorted(
-        [p for p in payments if isinstance(p, dict)],
-        key=_payment_sort_key
-    )
-
-    running = 0.0
-    for p in sorted_payments:
-        try:
-            running += float(p.get('amount', 0) or 0)
-        except Exception:
-            continue
-        if running >= threshold:
-            raw_date = str(p.get('date') or '').strip()
-            # Normalise to YYYY-MM-DD (handle datetime strings).
-            if raw_date and 'T' in raw_date:
-                raw_date = raw_date.split('T')[0]
-            return raw_date
-
-    return ''
+    plan = plan or PaymentPlan.from_order(order_data if isinstance(order_data, dict) else {})
+    return plan.release_date(threshold_pct)
 
 
 def _extract_ghl_contact_id_from_album_name(album_name: str) -> str | None:
@@ -1207,18 +1053,21 @@ def parse_proselect_xml(xml_path: str) -> dict | None:
     })
 
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
+        export = load_export(xml_path)
+        client = export.client
 
-        debug_log(f"XML parsed successfully, root tag: {root.tag}")
+        debug_log("XML parsed successfully", {
+            "items": len(export.order.items) if export.order else 0,
+            "payments": len(export.order.payments) if export.order else 0,
+        })
 
         # Extract client info - Client_ID is the GHL contact ID
-        client_id_raw = get_text(root, 'Client_ID')
-        album_name = get_text(root, 'Album_Name')
-        email = get_text(root, 'Email_Address')
+        client_id_raw = client.client_id
+        album_name = client.album_name
+        email = client.email
 
         # Determine GHL contact ID with multiple fallback strategies.
-        # Priority: Album_Name -> Client_ID -> API lookup by job/email.
+        # Priority: Album_Name -> Client_ID -> earlier resolution (sidecar) -> API lookup by job/email.
         ghl_contact_id = None
         ghl_contact_source = ''
 
@@ -1239,10 +1088,19 @@ def parse_proselect_xml(xml_path: str) -> dict | None:
             ghl_contact_source = 'client_id'
             debug_log("Using Client_ID as GHL contact ID", {"id": ghl_contact_id})
 
-        # Strategy 3: API lookup (client id / email, then name as last resort).
+        # Strategy 3: ID resolved by an earlier run for this exact export (path + content hash).
+        if not ghl_contact_id:
+            import ghl_sync_ledger
+            resolved = ghl_sync_ledger.lookup_contact(xml_path, LOCATION_ID)
+            if resolved:
+                ghl_contact_id = resolved['contact_id']
+                ghl_contact_source = 'sidecar'
+                debug_log("Using previously resolved GHL contact ID", {"id": ghl_contact_id, **resolved})
+
+        # Strategy 4: API lookup (client id / email, then name as last resort).
         if not ghl_contact_id:
-            _first = get_text(root, 'First_Name').strip()
-            _last = get_text(root, 'Last_Name').strip()
+            _first = client.first_name.strip()
+            _last = client.last_name.strip()
             if email or client_id_raw:
                 debug_log("No direct GHL ID found in Album_Name/Client_ID, searching by job/email", {
                     "email": email,
@@ -1260,9 +1118,9 @@ def parse_proselect_xml(xml_path: str) -> dict | None:
                     ghl_contact_id = found_id
                     ghl_contact_source = 'name_search'
                     debug_log("Found GHL contact ID by name search", {"id": ghl_contact_id})
-            # Persist resolved ID back into XML so future runs skip the API search
+            # Remember the resolved ID so future runs skip the API search
             if ghl_contact_id and ghl_contact_source in ('api_lookup', 'name_search'):
-                _inject_ghl_id_into_xml(xml_path, ghl_contact_id)
+                _remember_resolved_contact(xml_path, ghl_contact_id, ghl_contact_source)
 
         # Log final result
         if ghl_contact_id:
@@ -1282,84 +1140,34 @@ def parse_proselect_xml(xml_path: str) -> dict | None:
         data: dict = {
             'ghl_contact_id': ghl_contact_id,  # GHL contact ID from ProSelect
             'client_id_raw': client_id_raw,
-            'email': get_text(root, 'Email_Address'),
-            'first_name': get_text(root, 'First_Name'),
-            'last_name': get_text(root, 'Last_Name'),
-            'phone': get_text(root, 'Cell_Phone') or get_text(root, 'Home_Phone') or get_text(root, 'Work_Phone'),
+            'email': client.email,
+            'first_name': client.first_name,
+            'last_name': client.last_name,
+            'phone': client.phone,
             'album_name': album_name,
-            'album_path': get_text(root, 'Album_Path'),
+            'album_path': client.album_path,
             # Address fields
-            'street': get_text(root, 'Street'),
-            'street2': get_text(root, 'Street2'),
-            'city': get_text(root, 'City'),
-            'state': get_text(root, 'State'),
-            'zip_code': get_text(root, 'Zip_Code'),
-            'country': get_text(root, 'Country'),
+            'street': client.street,
+            'street2': client.street2,
+            'city': client.city,
+            'state': client.state,
+            'zip_code': client.zip_code,
+            'country': client.country,
         }
 
         debug_log("CLIENT INFO EXTRACTED", data)
 
-        # Extract order info
-        order = root.find('Order')
+        # Extract order info - items/payments come from the shared single-pass export model
+        # (VAT is handled by ProSelect per user settings; OD=Ordered, FP=Final Payment)
+        order = export.order
         if order is not None:
-            items_list: list = []
-            payments_list: list = []
-
-            # Parse ordered items - VAT is handled by ProSelect per user settings
-            for item in order.findall('.//Ordered_Item'):
-                price = float(get_text(item, 'Extended_Price', '0'))
-
-                # Get tax info as ProSelect provides it (respects user's VAT settings)
-                tax_elem = item.find('Tax')
-                is_taxable = tax_elem.get('taxable', 'false').lower() == 'true' if tax_elem is not None else False
-                vat_amount = float(get_text(item, 'Tax', '0'))
-
-                # Get detailed tax info from Tax1 element (for Xero/QuickBooks sync)
-                tax1_elem = item.find('Tax1')
-                tax_label = tax1_elem.get('label', '') if tax1_elem is not None else ''
-                tax_rate = float(tax1_elem.get('rate', '0')) if tax1_elem is not None else 0.0
-                price_includes_tax = tax1_elem.get('priceIncludesTax', 'false').lower() == 'true' if tax1_elem is not None else False
-
-                # Get ProductLineName for product categorization
-                product_line_elem = item.find('ProductLineName')
-                product_line = get_text(item, 'ProductLineName')
-                product_line_code = product_line_elem.get('code', '') if product_line_elem is not None else ''
-
-                item_data = {
-                    'type': get_text(item, 'ItemType'),
-                    'description': get_text(item, 'Description'),
-                    'product': get_text(item, 'Product_Name'),
-                    'sku': get_text(item, 'Product_Code'),  # SKU for GHL/Xero/QuickBooks product matching
-                    'ps_item_id': get_text(item, 'ID'),  # ProSelect internal item ID
-                    'size': get_text(item, 'Size'),  # Product size (e.g., "10.0x8.0")
-                    'template': get_text(item, 'Template_Name'),  # ProSelect template name
-                    'price': price,
-                    'quantity': int(get_text(item, 'Quantity', '1')),
-                    'taxable': is_taxable,
-                    'vat_amount': vat_amount,
-                    'tax_label': tax_label,  # e.g., "VAT (20%)"
-                    'tax_rate': tax_rate,  # e.g., 20.0
-                    'price_includes_tax': price_includes_tax,  # True if price is tax-inclusive
-                    'product_line': product_line,  # e.g., "Studio Pricing"
-                    'product_line_code': product_line_code,  # e.g., "A"
-                }
-                items_list.append(item_data)
-
-            # Parse payments
-            for payment in order.findall('.//Payment'):
-                payment_data = {
-                    'id': payment.get('id'),
-                    'date': get_text(payment, 'DateSQL'),
-                    'amount': float(get_text(payment, 'Amount', '0')),
-                    'method': get_text(payment, 'MethodName'),
-                    'type': get_text(payment, 'Type')  # OD=Ordered, FP=Final Payment
-                }
-                payments_list.append(payment_data)
+            items_list: list = [item.as_dict() for item in order.items]
+            payments_list: list = [payment.as_dict() for payment in order.payments]
 
             data['order'] = {
-                'date': get_text(order, 'DateSQL'),
-                'album_id': get_text(order, 'Album_ID'),
-                'total_amount': float(get_text(order, 'Total_Amount', '0')),
+                'date': order.date,
+                'album_id': order.album_id,
+                'total_amount': order.total_amount,
                 'items': items_list,
                 'payments': payments_list
             }
@@ -1396,21 +1204,6 @@ def parse_proselect_xml(xml_path: str) -> dict | None:
         print(f"Error parsing XML: {e}")
         return None
 
-def get_text(element, tag: str, default: str = '') -> str:
-    """Safely get text from XML element.
-
-    Args:
-        element: XML element to search in.
-        tag: Tag name to find.
-        default: Default value if not found.
-
-    Returns:
-        str: The text content or default value.
-    """
-    child = element.find(tag)
-    return child.text if child is not None and child.text else default
-
-
 def _get_ghl_headers() -> dict:
     """Get standard GHL API headers.
 
@@ -2098,8 +1891,9 @@ def _create_production_opportunity(
         return ''
 
     order = (ps_data or {}).get('order', {}) if isinstance(ps_data, dict) else {}
-    order_total, total_paid, amount_remaining, payments_count, paid_ratio, payment_status_label = _summarize_payment_status(order)
-    release_goods_date = _calculate_release_goods_date(order)
+    plan = PaymentPlan.from_order(order if isinstance(order, dict) else {})
+    order_total, total_paid, amount_remaining, payments_count, paid_ratio, payment_status_label = _summarize_payment_status(order, plan)
+    release_goods_date = _calculate_release_goods_date(order, plan=plan)
     payment_summary_note = (
         f"Order Total: £{order_total:.2f} | Paid: £{total_paid:.2f} | "
         f"Remaining: £{amount_remaining:.2f} | Payments: {payments_count} | Paid %: {paid_ratio:.2f}"
@@ -2176,6 +1970,147 @@ def _create_production_opportunity(
         return ''
 
 
+class OpportunityMutationQueue:
+    """Batch-run buffer for opportunity updates and contact tags.
+
+    Batch month mode used to send, for every shoot, a pipeline lookup, an
+    opportunity search, a PUT per selected opportunity, a contact tag POST
+    and a GET + POST per opportunity for the opportunity tags. With a queue:
+
+    - update() merges stage moves, monetary values and custom fields per
+      opportunity (custom fields by id, last value wins) into one PUT;
+    - add_contact_tags() unions tags per contact into one POST (GHL v2 keeps
+      opportunity tags on the contact);
+    - pipeline, financial-field and per-contact opportunity lookups are made
+      once per run;
+    - flush() sends the merged requests concurrently and reports how many
+      calls were saved.
+
+    New opportunities are still created immediately, as their IDs are needed
+    for the PSA metadata.
+    """
+
+    def __init__(self, workers: int = OPP_FLUSH_WORKERS):
+        self.workers = max(1, int(workers))
+        self._updates: dict[str, dict] = {}           # opp_id -> merged PUT payload
+        self._update_counts: dict[str, int] = {}
+        self._tags: dict[str, list[str]] = {}         # contact_id -> ordered tag union
+        self._tag_counts: dict[str, int] = {}
+        self._lookups: dict[tuple, object] = {}
+        self.lookups_reused = 0
+
+    def __len__(self) -> int:
+        return len(self._updates) + len(self._tags)
+
+    def lookup(self, key: tuple, fetch):
+        """Return fetch() the first time key is seen in this run, the same value after."""
+        if key in self._lookups:
+            self.lookups_reused += 1
+            return self._lookups[key]
+        value = fetch()
+        self._lookups[key] = value
+        return value
+
+    def forget(self, key: tuple) -> None:
+        """Drop a memoised lookup (e.g. a contact's opportunities after a create)."""
+        self._lookups.pop(key, None)
+
+    def update(self, opp_id: str, payload: dict) -> None:
+        """Merge an opportunity PUT payload into the pending update for opp_id."""
+        merged = self._updates.setdefault(opp_id, {})
+        fields = {str(row.get('id')): row for row in merged.get('customFields', [])}
+        for row in payload.get('customFields', []) or []:
+            fid = str(row.get('id') or '').strip()
+            if fid:
+                fields[fid] = row
+        merged.update({k: v for k, v in payload.items() if k != 'customFields'})
+        if fields:
+            merged['customFields'] = list(fields.values())
+        self._update_counts[opp_id] = self._update_counts.get(opp_id, 0) + 1
+
+    def add_contact_tags(self, contact_id: str, tags: list[str], calls: int = 1) -> None:
+        """Queue tags for a contact; repeated tags are only sent once.
+
+        calls is how many requests the unbatched path would have made for
+        this addition (used only for the calls-saved report).
+        """
+        if not contact_id or not tags:
+            return
+        pending = self._tags.setdefault(contact_id, [])
+        pending.extend(tag for tag in tags if tag and tag not in pending)
+        self._tag_counts[contact_id] = self._tag_counts.get(contact_id, 0) + max(1, calls)
+
+    def _send(self, method: str, url: str, payload: dict) -> tuple[bool, str]:
+        for attempt in range(OPP_FLUSH_RETRIES + 1):
+            try:
+                response = requests.request(method, url, headers=_get_ghl_headers(), json=payload, timeout=30)
+            except Exception as e:
+                if attempt < OPP_FLUSH_RETRIES:
+                    time.sleep(2 ** attempt)
+                    continue
+                return False, str(e)
+            if response.status_code in (200, 201):
+                return True, ''
+            if (response.status_code == 429 or response.status_code >= 500) and attempt < OPP_FLUSH_RETRIES:
+                try:
+                    delay = float(response.headers.get('Retry-After') or 2 ** attempt)
+                except ValueError:
+                    delay = 2 ** attempt
+                time.sleep(min(delay, 30))
+                continue
+            return False, f"{response.status_code}: {response.text[:200] if response.text else 'EMPTY'}"
+        return False, 'retries exhausted'
+
+    def flush(self) -> dict:
+        """Send every queued mutation and empty the queue.
+
+        Returns:
+            dict: mutations (requests the unbatched path would have sent),
+            requests (sent now), lookups_reused, calls_saved, failed,
+            failed_opportunities and failed_contacts ({id: error}).
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        base = "https://services.leadconnectorhq.com"
+        jobs = [('opportunity', opp_id, 'PUT', f"{base}/opportunities/{opp_id}", payload)
+                for opp_id, payload in self._updates.items()]
+        jobs += [('contact', contact_id, 'POST', f"{base}/contacts/{contact_id}/tags", {'tags': tags})
+                 for contact_id, tags in self._tags.items()]
+        mutations = sum(self._update_counts.values()) + sum(self._tag_counts.values())
+
+        failed_opps: dict[str, str] = {}
+        failed_contacts: dict[str, str] = {}
+        if jobs:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs))) as pool:
+                outcomes = list(pool.map(lambda job: self._send(job[2], job[3], job[4]), jobs))
+            for (kind, target_id, _method, _url, _payload), (ok, error) in zip(jobs, outcomes):
+                if ok:
+                    continue
+                (failed_opps if kind == 'opportunity' else failed_contacts)[target_id] = error
+                debug_log(f"OPPORTUNITY QUEUE {kind.upper()} FAILED", {'id': target_id, 'error': error})
+
+        stats = {
+            'mutations': mutations,
+            'requests': len(jobs),
+            'lookups_reused': self.lookups_reused,
+            'calls_saved': mutations - len(jobs) + self.lookups_reused,
+            'failed': len(failed_opps) + len(failed_contacts),
+            'failed_opportunities': failed_opps,
+            'failed_contacts': failed_contacts,
+        }
+        self._updates.clear()
+        self._update_counts.clear()
+        self._tags.clear()
+        self._tag_counts.clear()
+        self.lookups_reused = 0
+        return stats
+
+
+def _queued_lookup(queue: OpportunityMutationQueue | None, key: tuple, fetch):
+    """fetch(), memoised for the batch run when a queue is given."""
+    return fetch() if queue is None else queue.lookup(key, fetch)
+
+
 def move_contact_opportunity_to_production(
     contact_id: str,
     shoot_no: str = '',
@@ -2183,8 +2118,14 @@ def move_contact_opportunity_to_production(
     service_type: str = '',
     shoot_date: str = '',
     ps_data: dict | None = None,
+    queue: OpportunityMutationQueue | None = None,
 ) -> dict:
-    """Move the matching existing opportunity into Production; create one if none exists."""
+    """Move the matching existing opportunity into Production; create one if none exists.
+
+    With a queue the opportunity PUTs are merged into it rather than sent,
+    and lookups are shared across the batch; the IDs left waiting for
+    queue.flush() are returned under 'queued'.
+    """
     if not contact_id:
         return {'success': False, 'error': 'Missing contact_id', 'moved': 0, 'scanned': 0}
 
@@ -2198,7 +2139,9 @@ def move_contact_opportunity_to_production(
     if _order_total <= 0:
         inferred_stage = PRODUCTION_NO_SALE_STAGE
 
-    pipeline_id, stage_id = _get_pipeline_and_stage_ids(PRODUCTION_PIPELINE_NAME, inferred_stage)
+    pipeline_id, stage_id = _queued_lookup(
+        queue, ('stage', inferred_stage),
+        lambda: _get_pipeline_and_stage_ids(PRODUCTION_PIPELINE_NAME, inferred_stage))
     stage_warning = ''
     if not pipeline_id:
         stage_warning = f"Production pipeline not found: {PRODUCTION_PIPELINE_NAME}"
@@ -2207,18 +2150,23 @@ def move_contact_opportunity_to_production(
         # Fall back to Order Confirmed if the inferred stage name isn't found.
         debug_log(f"move_contact_opportunity_to_production: stage {inferred_stage!r} not found, falling back to Order Confirmed")
         inferred_stage = PRODUCTION_ORDER_CONFIRMED_STAGE
-        pipeline_id, stage_id = _get_pipeline_and_stage_ids(PRODUCTION_PIPELINE_NAME, PRODUCTION_ORDER_CONFIRMED_STAGE)
+        pipeline_id, stage_id = _queued_lookup(
+            queue, ('stage', PRODUCTION_ORDER_CONFIRMED_STAGE),
+            lambda: _get_pipeline_and_stage_ids(PRODUCTION_PIPELINE_NAME, PRODUCTION_ORDER_CONFIRMED_STAGE))
         if not stage_id:
             stage_warning = f"Production stage not found: {PRODUCTION_ORDER_CONFIRMED_STAGE}"
             debug_log(f"move_contact_opportunity_to_production: {stage_warning}; proceeding with value/field updates only")
 
-    opportunities = get_contact_opportunities(contact_id)
+    opportunities = _queued_lookup(queue, ('opportunities', contact_id),
+                                   lambda: get_contact_opportunities(contact_id))
     if not opportunities:
         # No existing opportunity — create one in the Production pipeline.
         created_opp_id = _create_production_opportunity(
             contact_id, shoot_no, album_name, service_type, shoot_date, ps_data,
             pipeline_id, stage_id, inferred_stage,
         )
+        if queue is not None:
+            queue.forget(('opportunities', contact_id))
         if created_opp_id:
             return {
                 'success': True,
@@ -2277,7 +2225,8 @@ def move_contact_opportunity_to_production(
     moved_opportunity_id = ''
     scanned = 0
     failed = 0
-    optional_financial_ids = _resolve_optional_opp_financial_field_ids()
+    queued_ids: list[str] = []
+    optional_financial_ids = _queued_lookup(queue, ('financial_fields',), _resolve_optional_opp_financial_field_ids)
 
     order = (ps_data or {}).get('order', {}) if isinstance(ps_data, dict) else {}
     items = order.get('items', []) if isinstance(order, dict) else []
@@ -2291,8 +2240,9 @@ def move_contact_opportunity_to_production(
                 ordered_products.append(name)
     ordered_products_text = ', '.join(sorted(set(ordered_products))) if ordered_products else ''
 
-    order_total, total_paid, amount_remaining, payments_count, paid_ratio, payment_status_label = _summarize_payment_status(order)
-    release_goods_date = _calculate_release_goods_date(order)
+    plan = PaymentPlan.from_order(order if isinstance(order, dict) else {})
+    order_total, total_paid, amount_remaining, payments_count, paid_ratio, payment_status_label = _summarize_payment_status(order, plan)
+    release_goods_date = _calculate_release_goods_date(order, plan=plan)
     payment_summary_note = (
         f"Order Total: £{order_total:.2f} | Paid: £{total_paid:.2f} | "
         f"Remaining: £{amount_remaining:.2f} | Payments: {payments_count} | Paid %: {paid_ratio:.2f}"
@@ -2360,6 +2310,15 @@ def move_contact_opportunity_to_production(
             # Already in correct stage and no fields to update — skip.
             continue
 
+        if queue is not None:
+            queue.update(opp_id, payload)
+            queued_ids.append(opp_id)
+            if not already_there:
+                moved += 1
+                if not moved_opportunity_id:
+                    moved_opportunity_id = opp_id
+            continue
+
         try:
             response = requests.put(
                 f"https://services.leadconnectorhq.com/opportunities/{opp_id}",
@@ -2402,55 +2361,21 @@ def move_contact_opportunity_to_production(
         'financial_fields_resolved': list(optional_financial_ids.keys()),
         'opportunity_id': moved_opportunity_id,
         'stage_warning': stage_warning,
+        'queued': queued_ids,
     }
 
 
-def add_tags_to_opportunity(opportunity_id: str, tags: list[str]) -> bool:
-    """Add tags to the contact that owns a GHL opportunity.
-
-    GHL v2 PUT /opportunities does not accept a 'tags' field — tags in GHL
-    live on the contact, not the opportunity.  We GET the opportunity to
-    resolve the contactId, then POST to /contacts/{id}/tags.
-
-    Args:
-        opportunity_id: The GHL opportunity ID.
-        tags: List of tag names to add.
-
-    Returns:
-        bool: True if tags were added successfully, False otherwise.
-    """
-    if not tags:
-        return True
-
-    url = f"https://services.leadconnectorhq.com/opportunities/{opportunity_id}"
-
-    try:
-        response = requests.get(url, headers=_get_ghl_headers(), timeout=30)
-        if response.status_code != 200:
-            debug_log(f"GET OPPORTUNITY FAILED: {response.status_code}")
-            return False
-
-        opportunity = response.json().get('opportunity', {})
-        contact_id = opportunity.get('contactId') or opportunity.get('contact', {}).get('id', '')
-        if not contact_id:
-            debug_log(f"ADD OPPORTUNITY TAGS: no contactId on opportunity {opportunity_id}")
-            return False
-
-        # Tags belong to the contact in GHL v2 — delegate to the contact tags endpoint.
-        return add_tags_to_contact(contact_id, tags)
-
-    except Exception as e:
-        debug_log(f"ADD OPPORTUNITY TAGS FAILED: {e}")
-        print(f"   [WARN] Failed to add opportunity tags: {e}")
-        return False
-
-
-def tag_contact_opportunities(contact_id: str, tags: list[str]) -> int:
+def tag_contact_opportunities(contact_id: str, tags: list[str], queue: OpportunityMutationQueue | None = None) -> int:
     """Add tags to all opportunities for a contact.
 
+    Opportunity tags live on the contact in GHL v2, so this is one contact
+    tag request (queued when a queue is given) rather than a GET + POST per
+    opportunity.
+
     Args:
         contact_id: The GHL contact ID.
         tags: List of tag names to add.
+        queue: Optional batch queue to defer the tag request to.
 
     Returns:
         int: Number of opportunities tagged.
@@ -2458,21 +2383,20 @@ def tag_contact_opportunities(contact_id: str, tags: list[str]) -> int:
     if not tags:
         return 0
 
-    opportunities = get_contact_opportunities(contact_id)
-    if not opportunities:
+    opportunities = _queued_lookup(queue, ('opportunities', contact_id),
+                                   lambda: get_contact_opportunities(contact_id))
+    opp_count = sum(1 for opp in opportunities if opp.get('id'))
+    if not opp_count:
         debug_log(f"No opportunities found for contact {contact_id}")
         return 0
 
-    tagged_count = 0
-    for opp in opportunities:
-        opp_id = opp.get('id')
-        if opp_id and add_tags_to_opportunity(opp_id, tags):
-            tagged_count += 1
-
-    if tagged_count > 0:
-        debug_log(f"Tagged {tagged_count} opportunities for contact {contact_id}")
+    if queue is not None:
+        queue.add_contact_tags(contact_id, tags, calls=2 * opp_count)
+    elif not add_tags_to_contact(contact_id, tags):
+        return 0
 
-    return tagged_count
+    debug_log(f"Tagged {opp_count} opportunities for contact {contact_id}")
+    return opp_count
 
 
 def _search_ghl_contacts(filters: list, search_type: str) -> str | None:
@@ -2593,25 +2517,47 @@ def find_ghl_contact_by_name(first_name: str, last_name: str) -> str | None:
     return None
 
 
-def _inject_ghl_id_into_xml(xml_path: str, ghl_id: str) -> bool:
-    """Write the resolved GHL contact ID back into the XML Client_ID element."""
+def _remember_resolved_contact(xml_path: str, ghl_id: str, source: str = '') -> bool:
+    """Record a resolved GHL contact ID for this export in the sync ledger.
+
+    The export itself is never rewritten, so its mtime (used for batch
+    ordering and dedup) stays as ProSelect wrote it.
+    """
     if not xml_path or not ghl_id or not os.path.exists(xml_path):
         return False
+    import ghl_sync_ledger
+    ok = ghl_sync_ledger.record_contact(xml_path, ghl_id, source, LOCATION_ID)
+    debug_log("Remembered resolved GHL contact ID" if ok else "Could not remember resolved GHL contact ID",
+              {"xml_path": xml_path, "ghl_id": ghl_id, "source": source})
+    return ok
+
+
+def lookup_export_contact_id(xml_path: str) -> dict:
+    """GHL contact ID for an export without any API call.
+
+    Same order as parse_proselect_xml: Album_Name, a GHL-style Client_ID,
+    then the ID an earlier sync resolved and kept in the sync ledger.
+
+    Returns:
+        dict: {'contact_id', 'source'}; contact_id is '' if none is known.
+    """
     try:
-        import xml.etree.ElementTree as _ET
-        _ET.register_namespace('', '')
-        tree = _ET.parse(xml_path)
-        root = tree.getroot()
-        elem = root.find('Client_ID')
-        if elem is None:
-            elem = _ET.SubElement(root, 'Client_ID')
-        elem.text = ghl_id
-        tree.write(xml_path, encoding='unicode', xml_declaration=False)
-        debug_log(f"Injected GHL ID into XML", {"xml_path": xml_path, "ghl_id": ghl_id})
-        return True
+        client = load_export(xml_path).client
     except Exception as e:
-        debug_log(f"_inject_ghl_id_into_xml failed: {e}", {"xml_path": xml_path})
-        return False
+        debug_log(f"LOOKUP EXPORT CONTACT: could not read {xml_path}: {e}")
+        return {'contact_id': '', 'source': ''}
+
+    album_contact_id = _extract_ghl_contact_id_from_album_name(client.album_name) if client.album_name else None
+    if album_contact_id:
+        return {'contact_id': album_contact_id, 'source': 'album_name'}
+    client_id = (client.client_id or '').strip()
+    if len(client_id) >= 15 and client_id.isalnum():
+        return {'contact_id': client_id, 'source': 'client_id'}
+    import ghl_sync_ledger
+    resolved = ghl_sync_ledger.lookup_contact(xml_path, LOCATION_ID)
+    if resolved:
+        return {'contact_id': resolved['contact_id'], 'source': 'sidecar'}
+    return {'contact_id': '', 'source': ''}
 
 
 def calculate_payment_summary(order_data: dict) -> dict:
@@ -2628,13 +2574,13 @@ def calculate_payment_summary(order_data: dict) -> dict:
         return {}
 
     total = order_data.get('total_amount', 0)
-    payments = order_data['payments']
+    plan = PaymentPlan.from_order(order_data)
 
-    scheduled_total = sum(p['amount'] for p in payments)
-    deposit_paid = total - scheduled_total if scheduled_total < total else 0
+    scheduled_total = to_pounds(plan.scheduled_pence)
+    deposit_paid = to_pounds(plan.total_pence - plan.scheduled_pence) if plan.scheduled_pence < plan.total_pence else 0
 
     # Determine status
-    if not payments:
+    if not plan.listed_count:
         status = "Paid in Full"
     elif deposit_paid > 0:
         status = "Deposit Paid - Payment Plan Active"
@@ -2642,14 +2588,14 @@ def calculate_payment_summary(order_data: dict) -> dict:
         status = "Payment Plan Active"
 
     # Last payment date (expected delivery)
-    delivery_date = payments[-1]['date'] if payments else order_data.get('date')
+    delivery_date = plan.last_listed_date if plan.listed_count else order_data.get('date')
 
     return {
         'total': total,
         'scheduled': scheduled_total,
         'deposit': deposit_paid,
         'status': status,
-        'payment_count': len(payments),
+        'payment_count': plan.listed_count,
         'delivery_date': delivery_date
     }
 
@@ -3701,8 +3647,17 @@ def get_thumbnails(thumb_folder: str) -> list:
 
     return sorted(thumbnails)
 
-def upload_to_ghl_media(file_path: str) -> str | None:
-    """Upload a single file to GHL Media Storage, returns URL."""
+def upload_to_ghl_media(file_path: str, dedupe: bool = True) -> str | None:
+    """Upload a single file to GHL Media Storage, returns URL.
+
+    Identical content uploaded before (same SHA-256, same location) is not
+    sent again; the URL recorded in the media ledger is returned instead,
+    provided GHL still serves it.
+
+    Args:
+        file_path: Local file to upload.
+        dedupe: If False, always upload even when the content is known.
+    """
 
     debug_log("UPLOAD TO GHL MEDIA", {"file_path": file_path})
 
@@ -3711,6 +3666,16 @@ def upload_to_ghl_media(file_path: str) -> str | None:
         print(f"    [FAIL] File not found: {file_path}")
         return None
 
+    import ghl_media_ledger
+    location_id = CONFIG.get('LOCATION_ID', '')
+    content_sha = sidekick_config.sha256_file(file_path)
+    if dedupe:
+        known = ghl_media_ledger.lookup_live_media(content_sha, location_id)
+        if known:
+            debug_log("MEDIA UPLOAD SKIPPED - CONTENT ALREADY UPLOADED", {"sha256": content_sha, "url": known['url']})
+            print(f"    [SKIP] Identical file already in GHL Media")
+            return known['url']
+
     file_size = os.path.getsize(file_path)
     debug_log("FILE INFO", {
         "file_path": file_path,
@@ -3759,6 +3724,11 @@ def upload_to_ghl_media(file_path: str) -> str | None:
                 result = response.json()
                 uploaded_url = result.get('url')
                 debug_log("MEDIA UPLOAD SUCCESS", {"url": uploaded_url})
+                ghl_media_ledger.record_media(
+                    content_sha, uploaded_url, location_id,
+                    media_id=result.get('fileId', result.get('_id', '')),
+                    file_name=file_name, size_bytes=file_size
+                )
                 return uploaded_url
             else:
                 debug_log("MEDIA UPLOAD FAILED", {
@@ -3824,6 +3794,9 @@ def _fetch_snippet_html(snippet_id: str) -> str | None:
     return None
 
 
+ATTACHMENT_REJECTED_STATUSES = (400, 404, 422)  # Send errors that can mean a dead attachment URL
+
+
 def send_room_capture_email(contact_id: str, image_path: str, subject: str = '', message_html: str = '', template_id: str = '') -> dict:
     """Upload a room capture image to GHL media and send it as an email to the contact.
 
@@ -3856,11 +3829,16 @@ def send_room_capture_email(contact_id: str, image_path: str, subject: str = '',
     debug_log("CONTACT FOR EMAIL", {"email": contact_email, "name": contact_name})
 
     # Step 2: Upload image to GHL media
+    import ghl_media_ledger
     print(f"  Uploading image to GHL media...")
+    location_id = CONFIG.get('LOCATION_ID', '')
+    image_sha = sidekick_config.sha256_file(image_path)
+    cached = ghl_media_ledger.lookup_media(image_sha, location_id)
     image_url = upload_to_ghl_media(image_path)
     if not image_url:
         return {'success': False, 'error': 'Failed to upload image to GHL media'}
-    debug_log("IMAGE UPLOADED", {"url": image_url})
+    reused = bool(cached) and cached['url'] == image_url
+    debug_log("IMAGE UPLOADED", {"url": image_url, "reused": reused})
 
     # Step 3: Get business details for the from line
     business = get_business_details()
@@ -3925,6 +3903,23 @@ def send_room_capture_email(contact_id: str, image_path: str, subject: str = '',
             "body": response.text[:500] if response.text else "EMPTY"
         })
 
+        # A rejected attachment may be a ledger URL GHL has since deleted:
+        # forget it, upload the image again and retry the send once
+        if reused and response.status_code in ATTACHMENT_REJECTED_STATUSES:
+            print(f"  [WARN] Email rejected with reused image ({response.status_code}) - uploading again")
+            ghl_media_ledger.forget_media(image_sha, location_id)
+            fresh_url = upload_to_ghl_media(image_path, dedupe=False)
+            if not fresh_url:
+                return {'success': False, 'error': 'Failed to re-upload image to GHL media'}
+            payload['message'] = payload['html'] = message_html.replace(image_url, fresh_url)
+            payload['attachments'] = [fresh_url]
+            image_url = fresh_url
+            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            debug_log("SEND EMAIL RETRY RESPONSE", {
+                "status_code": response.status_code,
+                "body": response.text[:500] if response.text else "EMPTY"
+            })
+
         if response.status_code in [200, 201]:
             result_data = response.json()
             msg_id = result_data.get('messageId') or result_data.get('id', '')
@@ -4480,18 +4475,12 @@ def _handle_invoice_success(
         future_payments = [p for p in payments if p.get('date', '') > today]
 
         if future_payments:
-            # Calculate schedule details
-            num_payments = len(future_payments)
-            total_future = sum(p.get('amount', 0) for p in future_payments)
-
-            # Calculate base amount (rounded down to avoid over-billing)
-            base_amount = round(total_future / num_payments, 2)
-
-            # Check for rounding difference
-            calculated_total = round(base_amount * num_payments, 2)
-            rounding_diff = round(total_future - calculated_total, 2)
-
-            first_date = future_payments[0].get('date', today)
+            # Equal instalments in integer pence; any remainder is the rounding difference
+            instalments = PaymentPlan.from_payments(future_payments).instalments()
+            num_payments = instalments.count
+            base_amount = instalments.base
+            rounding_diff = instalments.rounding
+            first_date = instalments.first_date or today
 
             client_name = f"{ps_data.get('first_name', '')} {ps_data.get('last_name', '')}".strip()
             email = ps_data.get('email', '')
@@ -4507,7 +4496,7 @@ def _handle_invoice_success(
                 print(f"  [WARN] Rounding adjustment: £{rounding_diff:.2f} applied to first payment")
 
             # First payment amount includes rounding adjustment
-            first_payment_amount = round(base_amount + rounding_diff, 2)
+            first_payment_amount = instalments.first_amount
 
             # Handle rounding difference based on setting
             if rounding_diff != 0 and num_payments > 1:
@@ -4549,7 +4538,7 @@ def _handle_invoice_success(
                     # Create remaining payments with base amount
                     if num_payments > 1:
                         # Get second payment date
-                        second_date = future_payments[1].get('date', first_date) if len(future_payments) > 1 else first_date
+                        second_date = instalments.second_date or first_date
                         print(f"  Creating remaining {num_payments - 1} payments: £{base_amount:.2f} each")
                         schedule = create_recurring_invoice_schedule(
                             contact_id=contact_id,
@@ -4673,9 +4662,53 @@ def check_existing_invoice(contact_id: str, shoot_no: str, order_total: float) -
     return None
 
 
+# PSA meta keys holding the fingerprint of the last invoice state pushed to GHL.
+# The fingerprints are only trusted when ghl_invoice_fp_invoice_id matches the
+# invoice being updated, so a re-created invoice always gets a full update.
+INVOICE_FP_META_KEYS = {
+    'invoice_id': 'ghl_invoice_fp_invoice_id',
+    'invoice_number': 'ghl_invoice_fp_invoice_number',
+    'items': 'ghl_invoice_items_fp',
+    'past_payments': 'ghl_invoice_past_payments_fp',
+    'future_payments': 'ghl_invoice_future_payments_fp',
+}
+
+# Minimum GHL requests avoided by each skippable update step (for reporting).
+INVOICE_SKIP_API_COST = {
+    'fetch_invoice': 1,      # GET /invoices/{id}
+    'update_items': 1,       # PUT /invoices/{id}
+    'record_payments': 0,    # nothing would have been recorded anyway
+    'update_schedules': 2,   # GET schedules list + POST new schedule
+}
+
+
+def _fingerprint_invoice_state(value) -> str:
+    """Return a stable SHA-256 fingerprint for a JSON-serialisable invoice fragment.
+
+    Args:
+        value: Payload fragment (items, payments, schedule options...).
+
+    Returns:
+        str: Hex digest of the canonical JSON encoding.
+    """
+    canonical = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _payment_fingerprint_rows(payments: list) -> list:
+    """Reduce payments to the fields that matter for GHL, in date order."""
+    rows = [
+        [str(p.get('date', '')), round(float(p.get('amount', 0) or 0), 2),
+         str(p.get('method', '')), str(p.get('id', ''))]
+        for p in payments
+    ]
+    return sorted(rows)
+
+
 def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: bool = False,
                             rounding_in_deposit: bool = True, open_browser: bool = True,
-                            skip_zero_extras: bool = False) -> dict:
+                            skip_zero_extras: bool = False, psa_path: str = '',
+                            force_full_update: bool = False) -> dict:
     """Update an existing GHL invoice's line items, amounts, and payments.
 
     This preserves provider payments (GoCardless/Stripe) and updates:
@@ -4683,12 +4716,22 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
     - Records any new past payments not yet recorded
     - Cancels old recurring schedules and creates new ones for future payments
 
+    When a PSA file is available, fingerprints of the last synced line items,
+    past payments and future payment plan are kept in its sk_ps_meta table.
+    Each step whose fingerprint is unchanged is skipped, so a ProSelect edit
+    that only adds a payment results in a single record-payment call instead
+    of a full invoice rewrite. Skipped steps are listed in the result under
+    'skipped_operations'.
+
     Args:
         invoice_id: GHL invoice ID to update.
         ps_data: Parsed ProSelect data.
         financials_only: Whether financials-only mode is enabled.
         rounding_in_deposit: If True, add rounding to deposit; else create separate first invoice.
         open_browser: If True, open the invoice URL in browser after update.
+        skip_zero_extras: If True, drop zero-priced extras from the invoice.
+        psa_path: PSA file holding the synced-state fingerprints (resolved from ps_data if empty).
+        force_full_update: If True, ignore stored fingerprints and rewrite everything.
 
     Returns:
         dict: Result with success status.
@@ -4704,21 +4747,15 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
         print("[FAIL] No items in XML to update invoice")
         return {'success': False, 'error': 'No items in XML to update invoice'}
 
-    # Step 1: Fetch existing invoice to know current payment state
-    print(f"  Fetching existing invoice details...")
-    existing_data = get_ghl_invoice(invoice_id)
-    existing_amount_paid = 0
-    existing_payments_count = 0
-    if existing_data:
-        existing_inv = existing_data.get('invoice', existing_data)
-        existing_amount_paid = existing_inv.get('amountPaid', 0)
-        existing_payments_count = len(existing_inv.get('recordPayment', existing_inv.get('payments', [])))
-        debug_log("EXISTING INVOICE STATE", {
-            "amount_paid": existing_amount_paid,
-            "payments_count": existing_payments_count
-        })
+    # Load the fingerprints of the last state we pushed for this invoice
+    if not psa_path:
+        psa_path = _resolve_psa_path_for_sync('', ps_data)
+    synced_meta = psa_meta_get_all(psa_path) if psa_path and not force_full_update else {}
+    if synced_meta.get(INVOICE_FP_META_KEYS['invoice_id']) != invoice_id:
+        synced_meta = {}
+    skipped_operations = []
 
-    # Step 2: Build new line items from the XML
+    # Step 1: Build new line items from the XML
     print(f"  Building updated invoice items from {len(items)} product items...")
     invoice_items, total_discounts_credits = _build_product_invoice_items(items, financials_only, skip_zero_extras)
 
@@ -4742,18 +4779,6 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
     today = datetime.now().strftime('%Y-%m-%d')
     due_date = today if issue_date < today else issue_date
 
-    # Step 3: Pre-check - if new total < existing paid, warn early
-    if ps_order_total < existing_amount_paid - 0.01:
-        print(f"  [WARN] New order total (£{ps_order_total:.2f}) is less than amount already paid (£{existing_amount_paid:.2f})")
-        print(f"  Attempting to set invoice to draft first...")
-        # Try moving to draft to bypass payment restrictions
-        draft_result = update_invoice_to_draft(invoice_id)
-        if draft_result.get('success'):
-            debug_log("Invoice set to draft before update")
-        else:
-            debug_log("Could not set to draft - update may fail", draft_result)
-
-    # Step 4: Update invoice items via PUT
     payload = {
         "altId": CONFIG.get('LOCATION_ID', ''),
         "altType": "location",
@@ -4773,66 +4798,127 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
                 "value": float(capped_discount)
             }
 
-    url = f"https://services.leadconnectorhq.com/invoices/{invoice_id}"
-    debug_log(f"UPDATE INVOICE REQUEST: {url}", payload)
-
-    try:
-        response = requests.put(url, headers=_get_ghl_headers(), json=payload, timeout=60)
-        response_body = response.text[:3000] if response.text else "EMPTY"
-        debug_log(f"UPDATE INVOICE RESPONSE: Status={response.status_code}", {"body": response_body})
+    # Fingerprint the state we are about to push. dueDate is excluded because it
+    # tracks today's date and would otherwise force a rewrite on every sync.
+    items_fp = _fingerprint_invoice_state({k: v for k, v in payload.items() if k != 'dueDate'})
+    past_payments = [p for p in payments if p.get('date', '') <= today]
+    future_payments = [p for p in payments if p.get('date', '') > today]
+    past_payments_fp = _fingerprint_invoice_state(_payment_fingerprint_rows(past_payments))
+    future_payments_fp = _fingerprint_invoice_state({
+        'payments': _payment_fingerprint_rows(future_payments),
+        'contact_id': ps_data.get('ghl_contact_id', ''),
+        'email': ps_data.get('email', ''),
+        'client_name': client_name,
+        'shoot_no': shoot_no,
+        'rounding_in_deposit': bool(rounding_in_deposit),
+    })
+    items_unchanged = synced_meta.get(INVOICE_FP_META_KEYS['items']) == items_fp
+    past_payments_unchanged = synced_meta.get(INVOICE_FP_META_KEYS['past_payments']) == past_payments_fp
+    future_payments_unchanged = synced_meta.get(INVOICE_FP_META_KEYS['future_payments']) == future_payments_fp
+    debug_log("INVOICE DELTA CHECK", {
+        "psa_path": psa_path,
+        "items_unchanged": items_unchanged,
+        "past_payments_unchanged": past_payments_unchanged,
+        "future_payments_unchanged": future_payments_unchanged,
+    })
 
-        if response.status_code not in [200, 201]:
-            error_msg = f"Invoice update failed (HTTP {response.status_code})"
-            if response.status_code == 400:
-                error_msg = "Invalid invoice data - check order details"
-            elif response.status_code == 422:
-                error_msg = f"Invoice validation failed - total may be less than amount paid"
-                if existing_amount_paid > 0:
-                    error_msg += f" (new total: £{ps_order_total:.2f}, already paid: £{existing_amount_paid:.2f})"
-
-                # Production-only follow-up syncs can legitimately hit this when
-                # invoice financials are already settled; skip invoice mutation
-                # but continue with downstream automation (supplier/pipeline sync).
-                print(f"[WARN] {error_msg}")
-                print("  [INFO] Invoice update skipped (already paid amount exceeds/equals new total)")
-                return {
-                    'success': True,
-                    'updated': False,
-                    'invoice_id': invoice_id,
-                    'invoice_skipped': True,
-                    'warning': error_msg,
-                    'client_name': client_name,
-                    'shoot_no': shoot_no,
-                }
-            print(f"[FAIL] {error_msg}")
-            print(f"  Response: {response.text}")
-            error_log(f"GHL Invoice Update Failed: {error_msg}", {
-                "status_code": response.status_code,
-                "response": response.text[:2000],
-                "invoice_id": invoice_id,
-                "ps_order_total": ps_order_total,
-                "existing_amount_paid": existing_amount_paid,
+    # Step 2: Fetch existing invoice to know current payment state. Only needed
+    # when items are rewritten (draft pre-check) or payments may need recording.
+    existing_amount_paid = 0
+    existing_payments_count = 0
+    inv_number = synced_meta.get(INVOICE_FP_META_KEYS['invoice_number']) or 'N/A'
+    if items_unchanged and past_payments_unchanged:
+        skipped_operations.append('fetch_invoice')
+    else:
+        print(f"  Fetching existing invoice details...")
+        existing_data = get_ghl_invoice(invoice_id)
+        if existing_data:
+            existing_inv = existing_data.get('invoice', existing_data)
+            existing_amount_paid = existing_inv.get('amountPaid', 0)
+            existing_payments_count = len(existing_inv.get('recordPayment', existing_inv.get('payments', [])))
+            inv_number = existing_inv.get('invoiceNumber', existing_inv.get('number', inv_number))
+            debug_log("EXISTING INVOICE STATE", {
+                "amount_paid": existing_amount_paid,
+                "payments_count": existing_payments_count
             })
-            return {'success': False, 'error': error_msg, 'status_code': response.status_code}
 
-        updated_data = response.json()
-        inv = updated_data.get('invoice', updated_data)
-        inv_number = inv.get('invoiceNumber', inv.get('number', 'N/A'))
-        print(f"\n[OK] Invoice #{inv_number} items updated!")
-        print(f"  New total: £{ps_order_total:.2f}")
+    # Step 3: Pre-check - if new total < existing paid, warn early
+    if not items_unchanged and ps_order_total < existing_amount_paid - 0.01:
+        print(f"  [WARN] New order total (£{ps_order_total:.2f}) is less than amount already paid (£{existing_amount_paid:.2f})")
+        print(f"  Attempting to set invoice to draft first...")
+        # Try moving to draft to bypass payment restrictions
+        draft_result = update_invoice_to_draft(invoice_id)
+        if draft_result.get('success'):
+            debug_log("Invoice set to draft before update")
+        else:
+            debug_log("Could not set to draft - update may fail", draft_result)
 
-    except requests.exceptions.RequestException as e:
-        error_msg = f"Network error: {str(e)}"
-        print(f"[FAIL] Error updating invoice: {error_msg}")
-        error_log(f"GHL Invoice Update Network Error: {error_msg}", {"invoice_id": invoice_id}, exception=e)
-        return {'success': False, 'error': error_msg}
+    # Step 4: Update invoice items via PUT (skipped when unchanged since last sync)
+    if items_unchanged:
+        skipped_operations.append('update_items')
+        print(f"  [SKIP] Invoice line items unchanged since last sync")
+    else:
+        url = f"https://services.leadconnectorhq.com/invoices/{invoice_id}"
+        debug_log(f"UPDATE INVOICE REQUEST: {url}", payload)
+
+        try:
+            response = requests.put(url, headers=_get_ghl_headers(), json=payload, timeout=60)
+            response_body = response.text[:3000] if response.text else "EMPTY"
+            debug_log(f"UPDATE INVOICE RESPONSE: Status={response.status_code}", {"body": response_body})
+
+            if response.status_code not in [200, 201]:
+                error_msg = f"Invoice update failed (HTTP {response.status_code})"
+                if response.status_code == 400:
+                    error_msg = "Invalid invoice data - check order details"
+                elif response.status_code == 422:
+                    error_msg = f"Invoice validation failed - total may be less than amount paid"
+                    if existing_amount_paid > 0:
+                        error_msg += f" (new total: £{ps_order_total:.2f}, already paid: £{existing_amount_paid:.2f})"
+
+                    # Production-only follow-up syncs can legitimately hit this when
+                    # invoice financials are already settled; skip invoice mutation
+                    # but continue with downstream automation (supplier/pipeline sync).
+                    print(f"[WARN] {error_msg}")
+                    print("  [INFO] Invoice update skipped (already paid amount exceeds/equals new total)")
+                    return {
+                        'success': True,
+                        'updated': False,
+                        'invoice_id': invoice_id,
+                        'invoice_skipped': True,
+                        'warning': error_msg,
+                        'client_name': client_name,
+                        'shoot_no': shoot_no,
+                    }
+                print(f"[FAIL] {error_msg}")
+                print(f"  Response: {response.text}")
+                error_log(f"GHL Invoice Update Failed: {error_msg}", {
+                    "status_code": response.status_code,
+                    "response": response.text[:2000],
+                    "invoice_id": invoice_id,
+                    "ps_order_total": ps_order_total,
+                    "existing_amount_paid": existing_amount_paid,
+                })
+                return {'success': False, 'error': error_msg, 'status_code': response.status_code}
+
+            updated_data = response.json()
+            inv = updated_data.get('invoice', updated_data)
+            inv_number = inv.get('invoiceNumber', inv.get('number', 'N/A'))
+            print(f"\n[OK] Invoice #{inv_number} items updated!")
+            print(f"  New total: £{ps_order_total:.2f}")
+
+        except requests.exceptions.RequestException as e:
+            error_msg = f"Network error: {str(e)}"
+            print(f"[FAIL] Error updating invoice: {error_msg}")
+            error_log(f"GHL Invoice Update Network Error: {error_msg}", {"invoice_id": invoice_id}, exception=e)
+            return {'success': False, 'error': error_msg}
 
     # Step 5: Handle payments - record new past payments
     payments_recorded = 0
-    if payments:
-        past_payments = [p for p in payments if p.get('date', '') <= today]
-        future_payments = [p for p in payments if p.get('date', '') > today]
-
+    past_payments_synced = True
+    if payments and past_payments_unchanged:
+        skipped_operations.append('record_payments')
+        print(f"  [SKIP] No payment changes since last sync")
+    elif payments:
         # Calculate how much has been paid in the XML vs what GHL already has
         xml_past_total = sum(p.get('amount', 0) for p in past_payments)
         new_payment_amount = round(xml_past_total - existing_amount_paid, 2)
@@ -4867,6 +4953,7 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
                     success, _ = record_ghl_payment(invoice_id, payment)
                     if success:
                         payments_recorded += 1
+                past_payments_synced = payments_recorded == len(new_to_record)
                 print(f"  [OK] Recorded {payments_recorded}/{len(new_to_record)} new payment(s)")
             else:
                 print(f"  [INFO] No new past payments to record (existing: £{existing_amount_paid:.2f})")
@@ -4875,11 +4962,13 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
     contact_id = ps_data.get('ghl_contact_id', '')
     schedule_ids = []
     schedule_created = False
+    future_payments_synced = True
 
     if payments and contact_id:
-        future_payments = [p for p in payments if p.get('date', '') > today]
-
-        if future_payments:
+        if future_payments and future_payments_unchanged:
+            skipped_operations.append('update_schedules')
+            print(f"  [SKIP] Payment schedule unchanged since last sync")
+        elif future_payments:
             # Cancel any existing schedules for this shoot first
             print(f"\n Updating payment schedules...")
             existing_schedules = list_contact_schedules(contact_id)
@@ -4892,19 +4981,18 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
                         cancel_ghl_schedule(sched_id)
 
             # Create new schedule for remaining future payments
-            num_payments = len(future_payments)
-            total_future = sum(p.get('amount', 0) for p in future_payments)
-            base_amount = round(total_future / num_payments, 2)
-            calculated_total = round(base_amount * num_payments, 2)
-            rounding_diff = round(total_future - calculated_total, 2)
-            first_date = future_payments[0].get('date', today)
+            instalments = PaymentPlan.from_payments(future_payments).instalments()
+            num_payments = instalments.count
+            base_amount = instalments.base
+            rounding_diff = instalments.rounding
+            first_date = instalments.first_date or today
 
             email = ps_data.get('email', '')
             payment_plan_name = f"{client_name} - {shoot_no} Payment Plan" if shoot_no else f"{client_name} Payment Plan"
 
             if rounding_diff != 0 and num_payments > 1 and not rounding_in_deposit:
                 # First payment with rounding adjustment
-                first_amount = round(base_amount + rounding_diff, 2)
+                first_amount = instalments.first_amount
                 payment_1_name = f"{client_name} - {shoot_no} Payment 1" if shoot_no else f"{client_name} Payment 1"
                 first_schedule = create_recurring_invoice_schedule(
                     contact_id=contact_id, contact_name=client_name, email=email,
@@ -4917,7 +5005,7 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
                         schedule_ids.append(sid)
                 # Remaining payments
                 if num_payments > 1:
-                    second_date = future_payments[1].get('date', first_date) if len(future_payments) > 1 else first_date
+                    second_date = instalments.second_date or first_date
                     schedule = create_recurring_invoice_schedule(
                         contact_id=contact_id, contact_name=client_name, email=email,
                         amount=base_amount, num_payments=num_payments - 1,
@@ -4940,6 +5028,7 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
                     sid = schedule.get('_id', schedule.get('id', ''))
                     if sid:
                         schedule_ids.append(sid)
+            future_payments_synced = schedule_created
 
     if open_browser:
         _open_invoice_in_browser(invoice_id)
@@ -4953,6 +5042,29 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
 
     print(f"  Amount due: £{final_due:.2f}")
 
+    # Remember what GHL now holds so the next sync only pushes the delta.
+    # A step that failed keeps its old fingerprint and is retried next time.
+    if psa_path:
+        fp_values = {
+            INVOICE_FP_META_KEYS['invoice_id']: invoice_id,
+            INVOICE_FP_META_KEYS['invoice_number']: str(inv_number),
+            INVOICE_FP_META_KEYS['items']: items_fp,
+        }
+        if past_payments_synced:
+            fp_values[INVOICE_FP_META_KEYS['past_payments']] = past_payments_fp
+        if future_payments_synced:
+            fp_values[INVOICE_FP_META_KEYS['future_payments']] = future_payments_fp
+        if not synced_meta:
+            # First delta-tracked sync for this invoice: drop stale entries
+            fp_values.setdefault(INVOICE_FP_META_KEYS['past_payments'], '')
+            fp_values.setdefault(INVOICE_FP_META_KEYS['future_payments'], '')
+        psa_meta_set_many(psa_path, fp_values)
+
+    api_calls_saved = sum(INVOICE_SKIP_API_COST.get(op, 0) for op in skipped_operations)
+    if skipped_operations:
+        print(f"  [INFO] Skipped unchanged steps: {', '.join(skipped_operations)} (~{api_calls_saved} API call(s) saved)")
+    debug_log("INVOICE DELTA RESULT", {"skipped_operations": skipped_operations, "api_calls_saved": api_calls_saved})
+
     result = {
         'success': True,
         'updated': True,
@@ -4962,6 +5074,8 @@ def update_existing_invoice(invoice_id: str, ps_data: dict, financials_only: boo
         'amount_due': final_due,
         'payments_recorded': payments_recorded,
         'schedule_created': schedule_created,
+        'skipped_operations': skipped_operations,
+        'api_calls_saved': api_calls_saved,
         'client_name': client_name,
         'shoot_no': shoot_no,
     }
@@ -5330,6 +5444,8 @@ def update_ghl_contact(contact_id: str, ps_data: dict) -> dict | None:
 
 def list_ghl_folders() -> None:
     """List all folders in GHL Media - outputs ID|Name format for AHK parsing"""
+    import ghl_media_folders
+
     headers = {
         "Authorization": f"Bearer {API_KEY}",
         "Version": "2021-07-28",
@@ -5340,36 +5456,16 @@ def list_ghl_folders() -> None:
         config = load_config()
         location_id = config.get('LOCATION_ID', '')
 
-        params = {
-            'altId': location_id,
-            'altType': 'location',
-            'sortBy': 'name',
-            'sortOrder': 'asc',
-            'type': 'folder',
-            'limit': 100
-        }
-
-        response = requests.get(
-            "https://services.leadconnectorhq.com/medias/files",
-            headers=headers,
-            params=params,
-            timeout=30
-        )
-
-        if response.status_code == 200:
-            data = response.json()
-            folders = data.get('files', [])
-
-            if not folders:
-                print("NO_FOLDERS")
-            else:
-                # Output format: ID|Name (one per line)
-                for folder in folders:
-                    folder_id = folder.get('_id', '')
-                    folder_name = folder.get('name', 'Unnamed')
-                    print(f"{folder_id}|{folder_name}")
+        # The settings picker always shows a fresh listing (every page); it also refreshes the cache
+        folders = ghl_media_folders.refresh_folders(headers, location_id)
+        if folders is None:
+            print("API_ERROR|medias/files")
+        elif not folders:
+            print("NO_FOLDERS")
         else:
-            print(f"API_ERROR|{response.status_code}")
+            # Output format: ID|Name (one per line)
+            for folder in folders:
+                print(f"{folder['id']}|{folder['name'] or 'Unnamed'}")
     except Exception as e:
         print(f"ERROR|{str(e)}")
 
@@ -5532,7 +5628,8 @@ def _generate_contact_sheet_path(cs_data: dict, xml_path: str = '') -> str:
     return os.path.join(output_dir, jpg_filename)
 
 
-def _add_contact_sheet_note(contact_id: str, cs_data: dict, thumb_folder: str, jpg_url: str) -> None:
+def _add_contact_sheet_note(contact_id: str, cs_data: dict, thumb_folder: str, jpg_url: str,
+                            image_count: int | None = None) -> None:
     """Add contact sheet note to GHL contact.
 
     Args:
@@ -5540,11 +5637,13 @@ def _add_contact_sheet_note(contact_id: str, cs_data: dict, thumb_folder: str, j
         cs_data: Contact sheet data.
         thumb_folder: Path to thumbnail folder.
         jpg_url: URL of uploaded JPG.
+        image_count: Product count, if already known (thumb_folder is then not scanned).
     """
     from create_ghl_contactsheet import add_contact_note
     import glob
 
-    image_count = len(glob.glob(os.path.join(thumb_folder, "Product_*.jpg")))
+    if image_count is None:
+        image_count = len(glob.glob(os.path.join(thumb_folder, "Product_*.jpg")))
     note_body = f"""📸 Product Contact Sheet - {cs_data['shoot_no']}
 
 Client: {cs_data['first_name']} {cs_data['last_name']}
@@ -5560,20 +5659,46 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}"""
     print(f"   [OK] Note added to contact")
 
 
+def _contact_sheet_input_digest(psa_path: str, title: str, subtitle: str, image_labels: dict) -> str:
+    """Digest everything that feeds the contact sheet render.
+
+    Returns '' when the PSA thumbnails cannot be hashed, which disables
+    render skipping for this sync.
+    """
+    from read_psa_images import thumbnail_set_digest
+
+    thumbs = thumbnail_set_digest(psa_path)
+    if not thumbs.get('success') or not thumbs.get('count'):
+        return ''
+    return _fingerprint_invoice_state({
+        'thumbnails': thumbs['digest'],
+        'title': title,
+        'subtitle': subtitle,
+        'image_labels': image_labels or {},
+    })
+
+
 def _create_and_upload_contact_sheet(xml_path: str, contact_id: str, collect_folder: str = '', psa_path: str = '') -> None:
     """Create and upload contact sheet JPG to GHL.
 
+    Uses the media ledger to avoid repeat work on re-syncs: if the PSA
+    thumbnails and sheet text are unchanged since the last render, the
+    existing JPG is reused without reading or rendering thumbnails, and if the JPG
+    bytes were already uploaded to the target folder the upload (and the
+    duplicate contact note) is skipped.
+
     Args:
         xml_path: Path to the ProSelect XML file.
         contact_id: GHL contact ID for adding notes.
         collect_folder: Optional folder to save a local copy of the contact sheet.
-        psa_path: Path to .psa album file for extracting thumbnails.
+        psa_path: Path to .psa album file; thumbnails are decoded from it in memory.
     """
+    import shutil
+    import ghl_media_ledger
+
     print(f"\n Creating contact sheet...")
     debug_log("CONTACT SHEET - Starting creation", {"xml_path": xml_path, "psa_path": psa_path})
 
-    temp_thumb_folder = None  # Track temp folder for cleanup
-
     try:
         debug_log("CONTACT SHEET - Importing module")
         from create_ghl_contactsheet import (
@@ -5585,64 +5710,90 @@ def _create_and_upload_contact_sheet(xml_path: str, contact_id: str, collect_fol
         cs_data = cs_parse_xml(xml_path)
         debug_log("CONTACT SHEET - XML parsed", {"shoot_no": cs_data.get('shoot_no', 'unknown')})
 
-        # Extract thumbnails directly from .psa file
-        thumb_folder = None
-
-        if psa_path and os.path.exists(psa_path):
-            print(f"   [INFO] Extracting thumbnails from album...")
-            debug_log("CONTACT SHEET - Extracting from PSA", {"psa_path": psa_path})
-
-            try:
-                from read_psa_images import extract_thumbnails
-                import tempfile
-
-                temp_thumb_folder = tempfile.mkdtemp(prefix="psa_thumbs_")
-                result = extract_thumbnails(psa_path, temp_thumb_folder)
-
-                if result.get("success") and result.get("count", 0) > 0:
-                    thumb_folder = temp_thumb_folder
-                    print(f"   [OK] Extracted {result['count']} thumbnails")
-                    debug_log("CONTACT SHEET - PSA extraction success", {"count": result['count']})
-                else:
-                    debug_log("CONTACT SHEET - PSA extraction failed", result)
-            except Exception as psa_err:
-                debug_log("CONTACT SHEET - PSA extraction error", {"error": str(psa_err)})
-
-        if not thumb_folder:
-            print(f"   [INFO] No thumbnail folder found")
-            debug_log("CONTACT SHEET - No thumbnail folder", {"xml_path": xml_path})
-            return
-
-        debug_log("CONTACT SHEET - Thumbnail folder found", {"thumb_folder": thumb_folder})
-
         jpg_path = _generate_contact_sheet_path(cs_data, xml_path)
         title = f"Product Gallery - {cs_data['shoot_no']}"
         subtitle = f"{cs_data['first_name']} {cs_data['last_name']} - {cs_data.get('order_date', '')}"
 
-        debug_log("CONTACT SHEET - Creating JPG", {"jpg_path": jpg_path, "title": title})
-        result_path = create_contact_sheet_jpg(thumb_folder, jpg_path, title, subtitle, cs_data.get('image_labels', {}))
+        # Skip extraction + render when the inputs match the last render of this JPG
+        render_key = os.path.normcase(os.path.abspath(jpg_path))
+        input_digest = ''
+        previous_render = None
+        if psa_path and os.path.exists(psa_path):
+            input_digest = _contact_sheet_input_digest(psa_path, title, subtitle, cs_data.get('image_labels', {}))
+            previous_render = ghl_media_ledger.lookup_render(render_key, input_digest)
+
+        image_count = None
+        if previous_render:
+            jpg_sha = previous_render['output_sha256']
+            image_count = previous_render['item_count']
+            print(f"   [SKIP] Thumbnails unchanged - reusing {os.path.basename(jpg_path)}")
+            debug_log("CONTACT SHEET - Render skipped (inputs unchanged)", {"jpg_path": jpg_path, "input_digest": input_digest})
+        else:
+            # Load thumbnails straight from the .psa file into memory (no temp folder)
+            thumbnails = {}
+            if psa_path and os.path.exists(psa_path):
+                print(f"   [INFO] Reading thumbnails from album...")
+                debug_log("CONTACT SHEET - Reading from PSA", {"psa_path": psa_path})
 
-        if not result_path:
-            print(f"   [WARN] Failed to create JPG")
-            debug_log("CONTACT SHEET - JPG creation failed")
-            return
-        print(f"   [OK] JPG created: {os.path.basename(jpg_path)}")
-        debug_log("CONTACT SHEET - JPG created", {"result_path": result_path})
+                try:
+                    from read_psa_images import load_thumbnails
+
+                    result = load_thumbnails(psa_path)
+                    if result.get("success") and result.get("thumbnails"):
+                        thumbnails = result["thumbnails"]
+                        print(f"   [OK] Loaded {len(thumbnails)} thumbnails")
+                        debug_log("CONTACT SHEET - PSA read success", {"count": len(thumbnails)})
+                    else:
+                        debug_log("CONTACT SHEET - PSA read failed", {"error": result.get("error", "no thumbnails")})
+                except Exception as psa_err:
+                    debug_log("CONTACT SHEET - PSA read error", {"error": str(psa_err)})
+
+            if not thumbnails:
+                print(f"   [INFO] No thumbnails found")
+                debug_log("CONTACT SHEET - No thumbnails", {"xml_path": xml_path})
+                return
+
+            debug_log("CONTACT SHEET - Creating JPG", {"jpg_path": jpg_path, "title": title})
+            result_path = create_contact_sheet_jpg('', jpg_path, title, subtitle, cs_data.get('image_labels', {}),
+                                                   thumbnails=thumbnails)
+
+            if not result_path:
+                print(f"   [WARN] Failed to create JPG")
+                debug_log("CONTACT SHEET - JPG creation failed")
+                return
+            print(f"   [OK] JPG created: {os.path.basename(jpg_path)}")
+            debug_log("CONTACT SHEET - JPG created", {"result_path": result_path})
+
+            import fnmatch
+            image_count = sum(1 for name in thumbnails if fnmatch.fnmatch(name, "Product_*.jpg"))
+            jpg_sha = sidekick_config.sha256_file(jpg_path)
+            if input_digest:
+                ghl_media_ledger.record_render(render_key, input_digest, jpg_path, image_count, jpg_sha)
 
         folder_id = get_media_folder_id() or find_folder_by_name("Order Sheets")
-        debug_log("CONTACT SHEET - Uploading to folder", {"folder_id": folder_id})
+        location_id = CONFIG.get('LOCATION_ID', '')
 
-        jpg_url = upload_to_folder(jpg_path, folder_id)
-        if not jpg_url:
-            print(f"   [WARN] Failed to upload JPG")
-            debug_log("CONTACT SHEET - Upload failed")
-            return
-        print(f"   [OK] Uploaded to GHL Media")
-        debug_log("CONTACT SHEET - Upload success", {"jpg_url": jpg_url})
+        known_media = ghl_media_ledger.lookup_live_media(jpg_sha, location_id, folder_id or '')
+        if known_media:
+            jpg_url = known_media['url']
+            print(f"   [SKIP] Identical contact sheet already in GHL Media")
+            debug_log("CONTACT SHEET - Upload skipped (content already uploaded)", {"sha256": jpg_sha, "jpg_url": jpg_url})
+        else:
+            debug_log("CONTACT SHEET - Uploading to folder", {"folder_id": folder_id})
+
+            jpg_url = upload_to_folder(jpg_path, folder_id)
+            if not jpg_url:
+                print(f"   [WARN] Failed to upload JPG")
+                debug_log("CONTACT SHEET - Upload failed")
+                return
+            print(f"   [OK] Uploaded to GHL Media")
+            debug_log("CONTACT SHEET - Upload success", {"jpg_url": jpg_url})
+            ghl_media_ledger.record_media(jpg_sha, jpg_url, location_id, folder_id or '',
+                                          file_name=os.path.basename(jpg_path),
+                                          size_bytes=os.path.getsize(jpg_path))
 
         # Save local copy if collect folder is specified
         if collect_folder and os.path.isdir(collect_folder):
-            import shutil
             album_name = cs_data.get('shoot_no', 'Unknown')
             # Sanitize album name for filename
             safe_name = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in album_name)
@@ -5655,7 +5806,9 @@ def _create_and_upload_contact_sheet(xml_path: str, contact_id: str, collect_fol
                 print(f"   [WARN] Failed to save local copy: {copy_err}")
                 debug_log("CONTACT SHEET - Local copy failed", {"error": str(copy_err)})
 
-        _add_contact_sheet_note(contact_id, cs_data, thumb_folder, jpg_url)
+        # The note for an already-uploaded sheet was added when it was first uploaded
+        if not known_media:
+            _add_contact_sheet_note(contact_id, cs_data, '', jpg_url, image_count)
 
     except ImportError as e:
         print(f"   [WARN] Contact sheet module not found: {e}")
@@ -5663,14 +5816,6 @@ def _create_and_upload_contact_sheet(xml_path: str, contact_id: str, collect_fol
     except Exception as e:
         print(f"   [WARN] Contact sheet error: {e}")
         debug_log("CONTACT SHEET - Exception", {"error": str(e), "type": type(e).__name__})
-    finally:
-        # Clean up temp thumbnail folder if we created one
-        if temp_thumb_folder and os.path.isdir(temp_thumb_folder):
-            try:
-                shutil.rmtree(temp_thumb_folder)
-                debug_log("CONTACT SHEET - Cleaned up temp folder", {"temp_thumb_folder": temp_thumb_folder})
-            except Exception as cleanup_err:
-                debug_log("CONTACT SHEET - Cleanup error", {"error": str(cleanup_err)})
 
 
 def _print_sync_header(xml_path: str, financials_only: bool, create_invoice: bool, create_contact_sheet: bool) -> None:
@@ -5760,10 +5905,12 @@ def _parse_cli_args():
         parser.add_argument('--check-duplicate', action='store_true')
         parser.add_argument('--resync', action='store_true')
         parser.add_argument('--update-invoice', type=str, default='')
+        parser.add_argument('--full-invoice-update', action='store_true')
         parser.add_argument('--no-supplier-sync', action='store_true')
         parser.add_argument('--supplier-ssh-host', type=str, default='toypi.tail009b36.ts.net')
         parser.add_argument('--supplier-remote-db-path', type=str, default='/home/guy/.openclaw/data/supplier_status.db')
         parser.add_argument('--read-psa-meta', type=str, default='', metavar='PSA_PATH')
+        parser.add_argument('--lookup-contact', type=str, default='', metavar='XML_PATH')
         parser.add_argument('--batch-sync-month', type=str, default='')
         parser.add_argument('--batch-xml-folder', type=str, default='')
         parser.add_argument('--batch-skip-existing-invoices', action='store_true')
@@ -5815,6 +5962,8 @@ def _parse_cli_args():
                             help='Delete existing invoice for this shoot then sync new one')
         parser.add_argument('--update-invoice', type=str, default='',
                             help='Update an existing GHL invoice ID with new data from XML')
+        parser.add_argument('--full-invoice-update', action='store_true',
+                            help='Ignore last-synced fingerprints and rewrite the whole invoice (used with --update-invoice)')
         parser.add_argument('--no-supplier-sync', action='store_true',
                             help='Skip automatic supplier status sync after invoice sync')
         parser.add_argument('--supplier-ssh-host', type=str, default='toypi.tail009b36.ts.net',
@@ -5823,6 +5972,8 @@ def _parse_cli_args():
                             help='Remote supplier SQLite DB path on ToyPi/OpenClaw host')
         parser.add_argument('--read-psa-meta', type=str, default='', metavar='PSA_PATH',
                             help='Read sk_ps_meta table from PSA file and print as JSON, then exit')
+        parser.add_argument('--lookup-contact', type=str, default='', metavar='XML_PATH',
+                            help='Print the known GHL contact ID for an XML export as JSON (no API calls), then exit')
         parser.add_argument('--batch-sync-month', type=str, default='',
                     help='Run batch sync for a month (YYYY-MM or YYYY-MM-DD)')
         parser.add_argument('--batch-xml-folder', type=str, default='',
@@ -5905,100 +6056,99 @@ def _resolve_psa_path_for_sync(xml_path: str, ps_data: dict) -> str:
     return ''
 
 
-def _ensure_psa_meta_table(conn: sqlite3.Connection) -> None:
-    """Ensure SideKick metadata table exists in PSA SQLite DB."""
-    conn.execute(
-        '''
-        CREATE TABLE IF NOT EXISTS sk_ps_meta (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            key TEXT NOT NULL UNIQUE,
-            value TEXT,
-            updated_at TEXT NOT NULL DEFAULT (datetime('now'))
-        )
-        '''
-    )
+_psa_reconciler = None
+
+
+def _start_psa_reconciler() -> None:
+    """Start the background PSA reconciler once per process (flushed at exit)."""
+    global _psa_reconciler
+    if _psa_reconciler is not None:
+        return
+    import atexit
+    import ghl_sync_ledger
+    _psa_reconciler = ghl_sync_ledger.PsaReconciler()
+    _psa_reconciler.start()
+    atexit.register(_stop_psa_reconciler)
+
+
+def _stop_psa_reconciler() -> None:
+    """Flush pending ledger keys into their PSA files and stop the reconciler."""
+    global _psa_reconciler
+    if _psa_reconciler is None:
+        return
+    totals = _psa_reconciler.stop()
+    _psa_reconciler = None
+    debug_log("PSA RECONCILER STOPPED", totals)
+    if totals.get('failed') or totals.get('missing'):
+        print(f"[WARN] {totals['failed'] + totals['missing']} album(s) still have PSA metadata pending "
+              f"(locked or offline) - kept in sync ledger", flush=True)
 
 
 def psa_meta_set(psa_path: str, key: str, value: str) -> bool:
     """Set one metadata key/value in PSA custom metadata table."""
-    if not psa_path or not os.path.exists(psa_path) or not key:
-        return False
-
-    try:
-        conn = sqlite3.connect(psa_path)
-        try:
-            _ensure_psa_meta_table(conn)
-            conn.execute(
-                '''
-                INSERT INTO sk_ps_meta (key, value, updated_at)
-                VALUES (?, ?, datetime('now'))
-                ON CONFLICT(key) DO UPDATE SET
-                    value=excluded.value,
-                    updated_at=datetime('now')
-                ''',
-                (str(key), str(value) if value is not None else '')
-            )
-            conn.commit()
-            return True
-        finally:
-            conn.close()
-    except Exception as e:
-        debug_log(f"psa_meta_set failed: {e}", {'psa_path': psa_path, 'key': key})
+    if not key:
         return False
+    ok, _written = psa_meta_set_many(psa_path, {key: value})
+    return ok
 
 
 def psa_meta_set_many(psa_path: str, values: dict[str, str]) -> tuple[bool, int]:
-    """Set multiple metadata keys in PSA custom metadata table."""
+    """Set multiple metadata keys in PSA custom metadata table.
+
+    Values are mirrored into the central sync ledger first. With
+    [GHL] DeferPsaWrites=1 the PSA write is left to the background reconciler;
+    otherwise the PSA is written now and anything that fails (e.g. the album
+    is open in ProSelect) stays pending in the ledger for a later push.
+    """
     if not psa_path or not os.path.exists(psa_path) or not isinstance(values, dict) or not values:
         return False, 0
 
-    written = 0
-    try:
-        conn = sqlite3.connect(psa_path)
-        try:
-            _ensure_psa_meta_table(conn)
-            for key, value in values.items():
-                if not key:
-                    continue
-                conn.execute(
-                    '''
-                    INSERT INTO sk_ps_meta (key, value, updated_at)
-                    VALUES (?, ?, datetime('now'))
-                    ON CONFLICT(key) DO UPDATE SET
-                        value=excluded.value,
-                        updated_at=datetime('now')
-                    ''',
-                    (str(key), str(value) if value is not None else '')
-                )
-                written += 1
-            conn.commit()
-            return True, written
-        finally:
-            conn.close()
-    except Exception as e:
-        debug_log(f"psa_meta_set_many failed: {e}", {'psa_path': psa_path})
-        return False, written
+    values = {str(k): str(v) if v is not None else '' for k, v in values.items() if k}
+    import ghl_sync_ledger
+    in_ledger = ghl_sync_ledger.record_meta(psa_path, values, pending=True)
+    if in_ledger and CONFIG.get('DEFER_PSA_WRITES'):
+        _start_psa_reconciler()
+        return True, len(values)
+
+    written = ghl_sync_ledger.write_psa_meta(psa_path, values)
+    if written:
+        if in_ledger:
+            ghl_sync_ledger.mark_pushed(psa_path, values)
+        return True, written
+
+    debug_log("psa_meta_set_many failed", {'psa_path': psa_path, 'queued_in_ledger': in_ledger})
+    if in_ledger:
+        _start_psa_reconciler()
+        return True, len(values)
+    return False, 0
 
 
 def psa_meta_get_all(psa_path: str) -> dict[str, str]:
-    """Read all key/value pairs from PSA custom metadata table."""
+    """Read all key/value pairs from PSA custom metadata table.
+
+    Keys still pending in the sync ledger (not yet written into the PSA)
+    override the PSA's own values.
+    """
     if not psa_path or not os.path.exists(psa_path):
         return {}
 
+    meta = {}
     try:
         conn = sqlite3.connect(psa_path)
         try:
             cur = conn.cursor()
             cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='sk_ps_meta'")
-            if not cur.fetchone():
-                return {}
-            cur.execute('SELECT key, value FROM sk_ps_meta ORDER BY key')
-            return {str(k): str(v or '') for k, v in cur.fetchall() if k is not None}
+            if cur.fetchone():
+                cur.execute('SELECT key, value FROM sk_ps_meta ORDER BY key')
+                meta = {str(k): str(v or '') for k, v in cur.fetchall() if k is not None}
         finally:
             conn.close()
     except Exception as e:
         debug_log(f"psa_meta_get_all failed: {e}", {'psa_path': psa_path})
-        return {}
+
+    import ghl_sync_ledger
+    meta.update(ghl_sync_ledger.get_meta(psa_path, pending_only=True))
+    return meta
 
 
 def _persist_psa_sync_metadata(
@@ -6009,8 +6159,14 @@ def _persist_psa_sync_metadata(
     album_name: str,
     invoice_id: str = '',
     opportunity_id: str = '',
+    opportunity_pending: bool = False,
 ) -> dict:
-    """Persist the canonical sync metadata into the resolved PSA file."""
+    """Persist the canonical sync metadata into the resolved PSA file.
+
+    opportunity_pending marks an opportunity update that is queued but not
+    yet sent; the batch sync clears the flag once GHL confirms it.
+    """
+    import ghl_sync_ledger
     psa_path = _resolve_psa_path_for_sync(xml_path, ps_data)
     if not psa_path:
         return {
@@ -6029,10 +6185,15 @@ def _persist_psa_sync_metadata(
         'album_name': str(album_name or ''),
         'last_sync_at': datetime.now().isoformat(timespec='seconds'),
     }
+    order_data = (ps_data or {}).get('order', {}) if isinstance(ps_data, dict) else {}
+    order_date = _try_parse_date(str(order_data.get('date', '') if isinstance(order_data, dict) else ''))
+    if order_date is not None:
+        meta_values['order_date'] = order_date.strftime('%Y-%m-%d')
     if invoice_id:
         meta_values['ghl_last_invoice_id'] = str(invoice_id)
     if opportunity_id:
         meta_values['ghl_last_opportunity_id'] = str(opportunity_id)
+    meta_values[ghl_sync_ledger.OPP_MOVE_PENDING_KEY] = '1' if opportunity_pending else ''
 
     meta_ok, meta_written = psa_meta_set_many(psa_path, meta_values)
     return {
@@ -6109,16 +6270,20 @@ def _find_existing_production_opportunity(
     album_name: str = '',
     service_type: str = '',
     shoot_date: str = '',
+    queue: OpportunityMutationQueue | None = None,
 ) -> dict | None:
     """Return the matching opportunity when it is already in the Production pipeline."""
     if not contact_id:
         return None
 
-    pipeline_id, _stage_id = _get_pipeline_and_stage_ids(PRODUCTION_PIPELINE_NAME, PRODUCTION_ORDER_CONFIRMED_STAGE)
+    pipeline_id, _stage_id = _queued_lookup(
+        queue, ('stage', PRODUCTION_ORDER_CONFIRMED_STAGE),
+        lambda: _get_pipeline_and_stage_ids(PRODUCTION_PIPELINE_NAME, PRODUCTION_ORDER_CONFIRMED_STAGE))
     if not pipeline_id:
         return None
 
-    opportunities = get_contact_opportunities(contact_id)
+    opportunities = _queued_lookup(queue, ('opportunities', contact_id),
+                                   lambda: get_contact_opportunities(contact_id))
     if not opportunities:
         return None
 
@@ -6141,6 +6306,58 @@ def _find_existing_production_opportunity(
     return None
 
 
+def _flush_opportunity_queue(opp_queue: OpportunityMutationQueue, queued_moves: list, summary: dict) -> None:
+    """Flush a batch run's opportunity queue and settle the moves waiting on it.
+
+    A move whose PUTs all succeeded clears its album's OPP_MOVE_PENDING_KEY;
+    a failed one keeps the flag (so the next run retries it) and its item is
+    counted as failed in summary.
+
+    Args:
+        opp_queue: The run's mutation queue.
+        queued_moves: (item, move_result, PSA path whose flag to clear) tuples; emptied.
+        summary: Batch summary; 'opportunity_queue' totals and counts are updated.
+    """
+    import ghl_sync_ledger
+
+    if not (len(opp_queue) or opp_queue.lookups_reused or queued_moves):
+        return
+    if len(opp_queue):
+        print(f"\nSending {len(opp_queue)} queued opportunity/tag update(s)...", flush=True)
+    queue_stats = opp_queue.flush()
+    totals = summary.setdefault('opportunity_queue', {
+        'mutations': 0, 'requests': 0, 'lookups_reused': 0, 'calls_saved': 0, 'failed': 0,
+        'failed_opportunities': {}, 'failed_contacts': {},
+    })
+    for key, value in queue_stats.items():
+        if isinstance(value, dict):
+            totals[key].update(value)
+        else:
+            totals[key] += value
+    failed_opps = queue_stats['failed_opportunities']
+    for item, move_result, pending_psa_path in queued_moves:
+        failed_ids = [opp_id for opp_id in move_result.get('queued') or [] if opp_id in failed_opps]
+        if move_result.get('success') and not failed_ids:
+            if pending_psa_path:
+                psa_meta_set(pending_psa_path, ghl_sync_ledger.OPP_MOVE_PENDING_KEY, '')
+            continue
+        move_result['success'] = False
+        if failed_ids:
+            move_result['failed'] = len(failed_ids)
+            move_result['moved'] = max(0, int(move_result.get('moved', 0) or 0) - len(failed_ids))
+            move_result['error'] = failed_opps[failed_ids[0]]
+        item['opportunity'] = 'failed'
+        item['error'] = f"Opportunity update failed: {move_result.get('error') or 'unknown error'}"
+        if item.get('success'):
+            item['success'] = False
+            summary['success'] = False
+            summary['failed'] += 1
+            summary['skipped_synced' if item.get('skipped') else 'processed'] -= 1
+        print(f"  [WARN] {item.get('shoot_no') or item.get('album_name')}: opportunity update failed "
+              f"({move_result.get('error') or 'unknown error'}) — will retry next run", flush=True)
+    queued_moves.clear()
+
+
 def run_batch_sync_month(
     batch_month: str,
     xml_folder: str,
@@ -6206,13 +6423,10 @@ def run_batch_sync_month(
     _shoot_no_normalise_re = re.compile(r'^([A-Z]\d+)[A-Z]?$', re.IGNORECASE)
 
     def _quick_client_name(xml_path: str) -> str:
-        """Read First_Name + Last_Name from XML without full parse (no API calls)."""
+        """Read First_Name + Last_Name from the export model (no API calls)."""
         try:
-            import xml.etree.ElementTree as _ET
-            _tree = _ET.parse(xml_path)
-            fn = (_tree.findtext('First_Name') or '').strip()
-            ln = (_tree.findtext('Last_Name') or '').strip()
-            return f"{fn} {ln}".strip().lower()
+            client = load_export(xml_path).client
+            return f"{client.first_name.strip()} {client.last_name.strip()}".strip().lower()
         except Exception:
             return ''
 
@@ -6274,250 +6488,352 @@ def run_batch_sync_month(
     # to reuse the ID found by the first without an extra API call.
     _shoot_id_cache: dict[str, str] = {}
 
-    for xml_path in xml_paths:
-        # Fast date pre-check: read only <DateSQL> from the XML before doing a full
-        # parse (which would trigger GHL API calls for contact lookups).
-        try:
-            import xml.etree.ElementTree as _ET
-            _tree = _ET.parse(xml_path)
-            _date_sql = (_tree.findtext('.//Order/DateSQL') or '').strip()
-            if _date_sql and not _date_sql.startswith(target_month_str):
-                continue
-        except Exception:
-            pass  # Malformed XML or missing field — let full parse decide
-
-        item = {
-            'xml_path': xml_path,
-            'success': False,
-        }
-        try:
-            ps_data = parse_proselect_xml(xml_path)
-            if not ps_data:
-                item['error'] = 'Failed to parse XML'
-                summary['failed'] += 1
-                summary['items'].append(item)
-                continue
+    # One indexed query for every album already synced this month, so synced
+    # albums are skipped without a full parse (API lookups) or opening the PSA.
+    # Keyed by resolved PSA path: different exports can share an album name.
+    import ghl_sync_ledger
+    ledger_synced = ghl_sync_ledger.synced_albums(target_month_str)
+    if ghl_sync_ledger.pending_count():
+        _start_psa_reconciler()  # retry PSA writes left pending by earlier runs
 
-            if not _ps_data_matches_batch_month(ps_data, xml_path, year, month):
-                continue
+    # Opportunity PUTs and contact tags are merged per opportunity/contact
+    # and sent every OPP_FLUSH_EVERY queued moves and when the loop ends.
+    # Until GHL confirms a move the album keeps OPP_MOVE_PENDING_KEY set, so
+    # a killed run or a failed flush is retried on the next run.
+    opp_queue = OpportunityMutationQueue()
+    queued_moves: list[tuple[dict, dict, str]] = []  # (item, move_result, PSA path whose flag to clear)
 
-            album_name = ps_data.get('album_name', '')
-            shoot_no = album_name.split('_')[0] if album_name and '_' in album_name else ''
-            contact_id = str(ps_data.get('ghl_contact_id', '') or '').strip()
-            client_name = f"{ps_data.get('first_name', '')} {ps_data.get('last_name', '')}".strip()
+    def _flush_opp_queue() -> None:
+        _flush_opportunity_queue(opp_queue, queued_moves, summary)
 
-            # Hard skip any test shoot — client name contains "test" (case-insensitive)
-            if 'test' in client_name.lower():
-                print(f"\n  - Skip: test shoot ({client_name})", flush=True)
-                summary['failed'] += 1
-                item['success'] = False
-                item['error'] = f'test shoot skipped ({client_name})'
-                summary['items'].append(item)
-                continue
+    try:
+        for xml_path in xml_paths:
+            if len(queued_moves) >= OPP_FLUSH_EVERY:
+                _flush_opp_queue()
+
+            # Fast date pre-check: read <DateSQL> from the export model before
+            # parse_proselect_xml (which would trigger GHL API calls for contact lookups).
+            _date_sql = ''
+            _album_quick = ''
+            _album_path_quick = ''
+            _client_quick = ''
+            # The export model is memoised, so the full parse below reuses this read.
+            try:
+                _export = load_export(xml_path)
+                _date_sql = (_export.order.date if _export.order else '').strip()
+                if _date_sql and not _date_sql.startswith(target_month_str):
+                    continue
+                _album_quick = _export.client.album_name.strip()
+                _album_path_quick = _export.client.album_path.strip()
+                _client_quick = f"{_export.client.first_name.strip()} {_export.client.last_name.strip()}".strip()
+            except Exception:
+                pass  # Malformed XML or missing field — let full parse decide
 
-            summary['matched_month'] += 1
-            print(f"\n[{summary['matched_month']}] Processing {shoot_no or '(no shoot)'} - {client_name or album_name or os.path.basename(xml_path)}", flush=True)
-            service_type = _extract_service_type_from_ps_data(ps_data)
-            order_data = ps_data.get('order', {}) if isinstance(ps_data, dict) else {}
-            shoot_date = str(order_data.get('date') or '').strip() if isinstance(order_data, dict) else ''
-            psa_path = _resolve_psa_path_for_sync(xml_path, ps_data)
-            psa_meta = psa_meta_get_all(psa_path) if psa_path else {}
-
-            # Seed cache with any ID already known for this shoot
-            if contact_id and shoot_no:
-                _shoot_id_cache[shoot_no.upper()] = contact_id
-
-            item.update({
-                'client_name': client_name,
-                'album_name': album_name,
-                'shoot_no': shoot_no,
-                'contact_id': contact_id,
-                'psa_path': psa_path,
-            })
+            item = {
+                'xml_path': xml_path,
+                'success': False,
+            }
 
-            if psa_meta.get('last_sync_at') or psa_meta.get('ghl_last_opportunity_id') or psa_meta.get('ghl_last_invoice_id'):
-                item['success'] = True
-                item['skipped'] = 'already_synced'
+            ledger_row = None
+            _psa_quick = ''
+            if ledger_synced and _album_quick:
+                # Filesystem-only resolve (same as the full path below), no PSA open.
+                _psa_quick = _resolve_psa_path_for_sync(xml_path, {'album_name': _album_quick, 'album_path': _album_path_quick})
+                ledger_row = ledger_synced.get(ghl_sync_ledger.album_key(_psa_quick))
+            if ledger_row and _date_sql and not force_opp_stage_eval and 'test' not in _client_quick.lower():
+                summary['matched_month'] += 1
+                shoot_no = ledger_row.get('shoot_no') or (_album_quick.split('_')[0] if '_' in _album_quick else '')
+                print(f"\n[{summary['matched_month']}] Processing {shoot_no or '(no shoot)'} - {_client_quick or _album_quick}", flush=True)
+                print('  - Skip: already synced (sync ledger)', flush=True)
+                item.update({
+                    'success': True,
+                    'skipped': 'already_synced',
+                    'client_name': _client_quick,
+                    'album_name': _album_quick,
+                    'shoot_no': shoot_no,
+                    'contact_id': ledger_row.get('contact_id', ''),
+                    'psa_path': _psa_quick,
+                })
                 summary['skipped_synced'] += 1
-                if force_opp_stage_eval and contact_id:
-                    print('  - Skip: already synced — re-evaluating opportunity stage only', flush=True)
-                    move_result = move_contact_opportunity_to_production(
-                        contact_id, shoot_no, album_name, service_type, shoot_date, ps_data
-                    )
-                    item['production_move'] = move_result
-                    if move_result.get('success') and int(move_result.get('moved', 0) or 0) > 0:
-                        print(f"  [OPP] Stage updated: {move_result.get('stage')}", flush=True)
-                else:
-                    print('  - Skip: already synced in PSA metadata', flush=True)
                 summary['items'].append(item)
                 continue
 
-            if not contact_id:
-                # Use sibling shoot ID if already resolved in this batch run (same shoot, typo name)
-                norm_shoot = shoot_no.upper() if shoot_no else ''
-                if norm_shoot and norm_shoot in _shoot_id_cache:
-                    contact_id = _shoot_id_cache[norm_shoot]
-                    print(f"[OK] Found contact via shoot cache ({norm_shoot})", flush=True)
-                    _inject_ghl_id_into_xml(xml_path, contact_id)
+            try:
+                ps_data = parse_proselect_xml(xml_path)
+                if not ps_data:
+                    item['error'] = 'Failed to parse XML'
+                    summary['failed'] += 1
+                    summary['items'].append(item)
+                    continue
+
+                if not _ps_data_matches_batch_month(ps_data, xml_path, year, month):
+                    continue
+
+                album_name = ps_data.get('album_name', '')
+                shoot_no = album_name.split('_')[0] if album_name and '_' in album_name else ''
+                contact_id = str(ps_data.get('ghl_contact_id', '') or '').strip()
+                client_name = f"{ps_data.get('first_name', '')} {ps_data.get('last_name', '')}".strip()
+
+                # Hard skip any test shoot — client name contains "test" (case-insensitive)
+                if 'test' in client_name.lower():
+                    print(f"\n  - Skip: test shoot ({client_name})", flush=True)
+                    summary['failed'] += 1
+                    item['success'] = False
+                    item['error'] = f'test shoot skipped ({client_name})'
+                    summary['items'].append(item)
+                    continue
+
+                summary['matched_month'] += 1
+                print(f"\n[{summary['matched_month']}] Processing {shoot_no or '(no shoot)'} - {client_name or album_name or os.path.basename(xml_path)}", flush=True)
+                service_type = _extract_service_type_from_ps_data(ps_data)
+                order_data = ps_data.get('order', {}) if isinstance(ps_data, dict) else {}
+                shoot_date = str(order_data.get('date') or '').strip() if isinstance(order_data, dict) else ''
+                psa_path = _resolve_psa_path_for_sync(xml_path, ps_data)
+                psa_meta = psa_meta_get_all(psa_path) if psa_path else {}
+
+                # Seed cache with any ID already known for this shoot
+                if contact_id and shoot_no:
+                    _shoot_id_cache[shoot_no.upper()] = contact_id
+
+                item.update({
+                    'client_name': client_name,
+                    'album_name': album_name,
+                    'shoot_no': shoot_no,
+                    'contact_id': contact_id,
+                    'psa_path': psa_path,
+                })
+
+                if psa_meta.get('last_sync_at') or psa_meta.get('ghl_last_opportunity_id') or psa_meta.get('ghl_last_invoice_id'):
+                    if psa_path:
+                        ghl_sync_ledger.import_psa_meta(psa_path)  # backfill so the next run skips via the ledger
+                    item['success'] = True
+                    item['skipped'] = 'already_synced'
+                    summary['skipped_synced'] += 1
+                    # A move queued by an earlier run that never confirmed it is sent again.
+                    opp_pending = psa_meta.get(ghl_sync_ledger.OPP_MOVE_PENDING_KEY) == '1'
+                    if (force_opp_stage_eval or opp_pending) and contact_id:
+                        if opp_pending:
+                            print('  - Skip: already synced — retrying unconfirmed opportunity update', flush=True)
+                        else:
+                            print('  - Skip: already synced — re-evaluating opportunity stage only', flush=True)
+                        move_result = move_contact_opportunity_to_production(
+                            contact_id, shoot_no, album_name, service_type, shoot_date, ps_data, queue=opp_queue
+                        )
+                        item['production_move'] = move_result
+                        if opp_pending or move_result.get('queued'):
+                            queued_moves.append((item, move_result, psa_path if opp_pending else ''))
+                        if move_result.get('success') and int(move_result.get('moved', 0) or 0) > 0:
+                            print(f"  [OPP] Stage update queued: {move_result.get('stage')}", flush=True)
+                    else:
+                        print('  - Skip: already synced in PSA metadata', flush=True)
+                    summary['items'].append(item)
+                    continue
+
+                if not contact_id:
+                    # Use sibling shoot ID if already resolved in this batch run (same shoot, typo name)
+                    norm_shoot = shoot_no.upper() if shoot_no else ''
+                    if norm_shoot and norm_shoot in _shoot_id_cache:
+                        contact_id = _shoot_id_cache[norm_shoot]
+                        print(f"[OK] Found contact via shoot cache ({norm_shoot})", flush=True)
+                        _remember_resolved_contact(xml_path, contact_id, 'shoot_cache')
+                        if psa_path:
+                            psa_meta_set(psa_path, 'ghl_contact_id', contact_id)
+                        item['contact_id'] = contact_id
+                        ps_data['ghl_contact_id'] = contact_id
+
+                if not contact_id:
+                    # Final fallback: search GHL by first + last name
+                    first_name = ps_data.get('first_name', '').strip()
+                    last_name = ps_data.get('last_name', '').strip()
+                    contact_id = find_ghl_contact_by_name(first_name, last_name) or ''
+                    if contact_id:
+                        _remember_resolved_contact(xml_path, contact_id, 'name_search')
+
+                if contact_id:
+                    # Persist into PSA so future runs don't need to search
                     if psa_path:
                         psa_meta_set(psa_path, 'ghl_contact_id', contact_id)
                     item['contact_id'] = contact_id
                     ps_data['ghl_contact_id'] = contact_id
+                    if norm_shoot := shoot_no.upper():
+                        _shoot_id_cache[norm_shoot] = contact_id
+
+                if not contact_id:
+                    item['error'] = 'No GHL Contact ID in XML'
+                    summary['failed'] += 1
+                    summary['items'].append(item)
+                    print('  - Failed: no GHL Contact ID in XML', flush=True)
+                    continue
 
-            if not contact_id:
-                # Final fallback: search GHL by first + last name
-                first_name = ps_data.get('first_name', '').strip()
-                last_name = ps_data.get('last_name', '').strip()
-                contact_id = find_ghl_contact_by_name(first_name, last_name) or ''
-
-            if contact_id:
-                # Found via fallback — persist into XML and PSA so future runs don't need to search
-                _inject_ghl_id_into_xml(xml_path, contact_id)
-                if psa_path:
-                    psa_meta_set(psa_path, 'ghl_contact_id', contact_id)
-                item['contact_id'] = contact_id
-                ps_data['ghl_contact_id'] = contact_id
-                if norm_shoot := shoot_no.upper():
-                    _shoot_id_cache[norm_shoot] = contact_id
-
-            if not contact_id:
-                item['error'] = 'No GHL Contact ID in XML'
-                summary['failed'] += 1
-                summary['items'].append(item)
-                print('  - Failed: no GHL Contact ID in XML', flush=True)
-                continue
-
-            result = update_ghl_contact(contact_id, ps_data) or {'success': False, 'error': 'Contact update returned no result'}
-            if result is None:
-                result = {'success': False, 'error': 'Contact update returned no result'}
+                result = update_ghl_contact(contact_id, ps_data) or {'success': False, 'error': 'Contact update returned no result'}
+                if result is None:
+                    result = {'success': False, 'error': 'Contact update returned no result'}
+
+                invoice_id = ''
+                opp_id = ''
+                existing_invoice = None
+                create_invoice_for_item = True
+                if skip_existing_invoices:
+                    order_total = order_data.get('total_amount', 0) if isinstance(order_data, dict) else 0
+                    existing_invoice = check_existing_invoice(contact_id, shoot_no, order_total)
+                    if existing_invoice:
+                        create_invoice_for_item = False
+                        summary['skipped_existing_invoices'] += 1
+                        invoice_id = str(existing_invoice.get('invoice_id') or '').strip()
+                        result['invoice'] = {
+                            'success': True,
+                            'skipped_existing': True,
+                            **existing_invoice,
+                        }
+                        print('  - Skip invoice: existing invoice found', flush=True)
 
-            invoice_id = ''
-            opp_id = ''
-            existing_invoice = None
-            create_invoice_for_item = True
-            if skip_existing_invoices:
-                order_total = order_data.get('total_amount', 0) if isinstance(order_data, dict) else 0
-                existing_invoice = check_existing_invoice(contact_id, shoot_no, order_total)
-                if existing_invoice:
-                    create_invoice_for_item = False
-                    summary['skipped_existing_invoices'] += 1
-                    invoice_id = str(existing_invoice.get('invoice_id') or '').strip()
-                    result['invoice'] = {
-                        'success': True,
-                        'skipped_existing': True,
-                        **existing_invoice,
-                    }
-                    print('  - Skip invoice: existing invoice found', flush=True)
-
-            if create_invoice_for_item and result.get('success'):
-                invoice_result = create_ghl_invoice(
-                    contact_id,
-                    ps_data,
-                    financials_only,
-                    rounding_in_deposit,
-                    open_browser,
-                    skip_zero_extras,
-                )
-                if invoice_result:
-                    result['invoice'] = invoice_result
-                    invoice_id = str(invoice_result.get('invoice_id') or '').strip()
-
-            if result.get('success'):
-                existing_production = None
-                if skip_existing_opportunities:
-                    existing_production = _find_existing_production_opportunity(
+                if create_invoice_for_item and result.get('success'):
+                    invoice_result = create_ghl_invoice(
                         contact_id,
-                        shoot_no,
-                        album_name,
-                        service_type,
-                        shoot_date,
+                        ps_data,
+                        financials_only,
+                        rounding_in_deposit,
+                        open_browser,
+                        skip_zero_extras,
                     )
+                    if invoice_result:
+                        result['invoice'] = invoice_result
+                        invoice_id = str(invoice_result.get('invoice_id') or '').strip()
+
+                if result.get('success'):
+                    existing_production = None
+                    if skip_existing_opportunities:
+                        existing_production = _find_existing_production_opportunity(
+                            contact_id,
+                            shoot_no,
+                            album_name,
+                            service_type,
+                            shoot_date,
+                            queue=opp_queue,
+                        )
 
-                if existing_production is not None:
-                    opp_id = _get_opportunity_id(existing_production)
-                    result['production_move'] = {
-                        'success': True,
-                        'moved': 0,
-                        'existing': True,
-                        'opportunity_id': opp_id,
-                        'message': 'Opportunity already in Production pipeline',
-                    }
-                    summary['skipped_existing_opportunities'] += 1
-                    print('  - Skip opportunity: already in Production pipeline', flush=True)
-                else:
-                    move_result = move_contact_opportunity_to_production(
+                    if existing_production is not None:
+                        opp_id = _get_opportunity_id(existing_production)
+                        result['production_move'] = {
+                            'success': True,
+                            'moved': 0,
+                            'existing': True,
+                            'opportunity_id': opp_id,
+                            'message': 'Opportunity already in Production pipeline',
+                        }
+                        summary['skipped_existing_opportunities'] += 1
+                        print('  - Skip opportunity: already in Production pipeline', flush=True)
+                    else:
+                        move_result = move_contact_opportunity_to_production(
+                            contact_id,
+                            shoot_no,
+                            album_name,
+                            service_type,
+                            shoot_date,
+                            ps_data,
+                            queue=opp_queue,
+                        )
+                        result['production_move'] = move_result
+                        opp_id = str(move_result.get('opportunity_id') or '').strip()
+                        if move_result.get('queued'):
+                            queued_moves.append((item, move_result, psa_path))
+
+                    if CONFIG.get('AUTO_ADD_CONTACT_TAGS', True):
+                        sync_tag = CONFIG.get('SYNC_TAG', 'PS Invoice')
+                        if sync_tag:
+                            opp_queue.add_contact_tags(contact_id, [sync_tag])
+
+                    if CONFIG.get('AUTO_ADD_OPP_TAGS', True):
+                        opp_tags = CONFIG.get('OPPORTUNITY_TAGS', [])
+                        if opp_tags:
+                            tagged = tag_contact_opportunities(contact_id, opp_tags, queue=opp_queue)
+                            if tagged > 0:
+                                result['opportunities_tagged'] = tagged
+
+                    result['psa_meta'] = _persist_psa_sync_metadata(
+                        xml_path,
+                        ps_data,
                         contact_id,
                         shoot_no,
                         album_name,
-                        service_type,
-                        shoot_date,
-                        ps_data,
+                        invoice_id,
+                        opp_id,
+                        opportunity_pending=bool(result['production_move'].get('queued')),
                     )
-                    result['production_move'] = move_result
-                    opp_id = str(move_result.get('opportunity_id') or '').strip()
-
-                if CONFIG.get('AUTO_ADD_CONTACT_TAGS', True):
-                    sync_tag = CONFIG.get('SYNC_TAG', 'PS Invoice')
-                    if sync_tag:
-                        add_tags_to_contact(contact_id, [sync_tag])
-
-                if CONFIG.get('AUTO_ADD_OPP_TAGS', True):
-                    opp_tags = CONFIG.get('OPPORTUNITY_TAGS', [])
-                    if opp_tags:
-                        tagged = tag_contact_opportunities(contact_id, opp_tags)
-                        if tagged > 0:
-                            result['opportunities_tagged'] = tagged
-
-                result['psa_meta'] = _persist_psa_sync_metadata(
-                    xml_path,
-                    ps_data,
-                    contact_id,
-                    shoot_no,
-                    album_name,
-                    invoice_id,
-                    opp_id,
-                )
-                if not result['psa_meta'].get('success'):
-                    result.setdefault('warnings', []).append('PSA metadata write failed')
-
-            if supplier_sync_enabled and create_invoice_for_item and result.get('success'):
-                supplier_job_ref = _build_supplier_job_ref(shoot_no, ps_data.get('last_name', ''))
-                if supplier_job_ref:
-                    result['supplier_sync'] = _run_supplier_sync(supplier_job_ref, supplier_ssh_host, supplier_remote_db_path)
-
-            item['success'] = bool(result.get('success'))
-            if result.get('error'):
-                item['error'] = result.get('error')
-            if existing_invoice:
-                item['invoice'] = 'existing'
-            elif result.get('invoice'):
-                item['invoice'] = 'created'
-            if result.get('production_move', {}).get('existing'):
-                item['opportunity'] = 'existing'
-            elif result.get('production_move'):
-                item['opportunity'] = 'processed'
-
-            if item['success']:
-                summary['processed'] += 1
-                print('  - Done', flush=True)
-            else:
+                    if not result['psa_meta'].get('success'):
+                        result.setdefault('warnings', []).append('PSA metadata write failed')
+
+                if supplier_sync_enabled and create_invoice_for_item and result.get('success'):
+                    supplier_job_ref = _build_supplier_job_ref(shoot_no, ps_data.get('last_name', ''))
+                    if supplier_job_ref:
+                        result['supplier_sync'] = _run_supplier_sync(supplier_job_ref, supplier_ssh_host, supplier_remote_db_path)
+
+                item['success'] = bool(result.get('success'))
+                if result.get('error'):
+                    item['error'] = result.get('error')
+                if existing_invoice:
+                    item['invoice'] = 'existing'
+                elif result.get('invoice'):
+                    item['invoice'] = 'created'
+                if result.get('production_move', {}).get('existing'):
+                    item['opportunity'] = 'existing'
+                elif result.get('production_move'):
+                    item['opportunity'] = 'processed'
+
+                if item['success']:
+                    summary['processed'] += 1
+                    print('  - Done', flush=True)
+                else:
+                    summary['success'] = False
+                    summary['failed'] += 1
+                    print(f"  - Failed: {item.get('error', 'Unknown error')}", flush=True)
+
+                summary['items'].append(item)
+            except Exception as exc:
                 summary['success'] = False
                 summary['failed'] += 1
-                print(f"  - Failed: {item.get('error', 'Unknown error')}", flush=True)
+                item['error'] = str(exc)
+                summary['items'].append(item)
+                print(f"  - Failed with exception: {exc}", flush=True)
+                debug_log('BATCH SYNC ITEM FAILED', {'xml_path': xml_path, 'exception': str(exc)})
+    finally:
+        _flush_opp_queue()
 
-            summary['items'].append(item)
-        except Exception as exc:
-            summary['success'] = False
-            summary['failed'] += 1
-            item['error'] = str(exc)
-            summary['items'].append(item)
-            print(f"  - Failed with exception: {exc}", flush=True)
-            debug_log('BATCH SYNC ITEM FAILED', {'xml_path': xml_path, 'exception': str(exc)})
+    queue_stats = summary.get('opportunity_queue')
+    if queue_stats:
+        status = '[OK]' if not queue_stats['failed'] else '[WARN]'
+        print(
+            f"{status} Opportunity queue: {queue_stats['mutations']} update(s) sent as "
+            f"{queue_stats['requests']} request(s), {queue_stats['lookups_reused']} lookup(s) reused — "
+            f"{queue_stats['calls_saved']} API call(s) saved"
+            + (f", {queue_stats['failed']} failed" if queue_stats['failed'] else ''),
+            flush=True,
+        )
 
     if summary['matched_month'] == 0:
         summary['success'] = False
         summary['error'] = f'No XML exports matched {year:04d}-{month:02d}'
 
+    # Cashflow forecast: instalments due this month from every shoot in the
+    # folder, not just this month's shoots (exports are already memoised).
+    schedule_book = ScheduleBook()
+    for xml_path in xml_paths:
+        try:
+            export = load_export(xml_path)
+        except Exception:
+            continue
+        client_name = f"{export.client.first_name} {export.client.last_name}".lower()
+        if export.order is None or 'test' in client_name:
+            continue
+        schedule_book.add(export.client.album_name.strip() or os.path.basename(xml_path), export.order)
+    summary['cashflow'] = schedule_book.cashflow(year, month, as_of=datetime.now().date())
+    print(
+        f"\nCashflow {target_month_str}: £{summary['cashflow']['due']:.2f} due from "
+        f"{summary['cashflow']['payments']} payment(s) across {summary['cashflow']['shoots']} shoot(s)",
+        flush=True,
+    )
+
+    _stop_psa_reconciler()  # push deferred/locked PSA metadata before reporting
     return summary
 
 
@@ -6829,6 +7145,11 @@ def main() -> None:
         print(_json.dumps(meta))
         sys.exit(0 if meta else 1)
 
+    if args.lookup_contact:
+        found = lookup_export_contact_id(args.lookup_contact)
+        print(json.dumps(found))
+        sys.exit(0 if found['contact_id'] else 1)
+
     if args.list_folders:
         list_ghl_folders()
         sys.exit(0)
@@ -7061,7 +7382,9 @@ def main() -> None:
             _album = ps_data.get('album_name', '')
             _sn = _album.split('_')[0] if _album and '_' in _album else ''
             ps_data['_shoot_no_override'] = f"{_sn}-{order_suffix}" if _sn else ''
-        result = update_existing_invoice(args.update_invoice, ps_data, financials_only, rounding_in_deposit, open_browser, skip_zero_extras)
+        psa_path = _resolve_psa_path_for_sync(args.xml_path, ps_data)
+        result = update_existing_invoice(args.update_invoice, ps_data, financials_only, rounding_in_deposit, open_browser, skip_zero_extras,
+                                         psa_path=psa_path, force_full_update=args.full_invoice_update)
 
         # Enrich result with client info for error display
         client_name = f"{ps_data.get('first_name', '')} {ps_data.get('last_name', '')}".strip()
@@ -0,0 +1,75 @@
+"""Tests for build_ghl_production_pipeline's request retries."""
+import pytest
+import requests
+
+import build_ghl_production_pipeline as builder
+
+
+class _Response:
+    def __init__(self, status_code: int, body: str = '{}'):
+        self.status_code = status_code
+        self.headers: dict = {}
+        self.text = body
+
+
+class _Session:
+    def __init__(self, statuses: list):
+        self.statuses = statuses
+        self.calls: list[tuple[str, str]] = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        status = self.statuses.pop(0)
+        if isinstance(status, Exception):
+            raise status
+        return _Response(status)
+
+
+@pytest.fixture
+def session(monkeypatch):
+    holder = _Session([])
+    monkeypatch.setattr(builder, 'RETRY_BACKOFF', 0.0)
+    monkeypatch.setattr(builder, '_limiter', builder._RateLimiter())
+    monkeypatch.setattr(builder, '_session', lambda: holder)
+    monkeypatch.setattr(builder, '_working_candidate', {})
+    return holder
+
+
+CANDIDATES = [('/a', None, {'name': 'x'}), ('/b', None, {'name': 'x'})]
+
+
+@pytest.mark.parametrize('failure', [502, 504, requests.ReadTimeout('read timed out')])
+def test_create_is_sent_once_after_server_error(session, failure):
+    session.statuses = [failure, 201, 201]
+
+    response, _error = builder._try_request('POST', 'key', CANDIDATES, 'create_field')
+
+    assert len(session.calls) == 1
+    assert response is None or response.status_code >= 500
+
+
+def test_create_retries_rate_limit(session):
+    session.statuses = [429, 201]
+
+    response, _error = builder._try_request('POST', 'key', CANDIDATES, 'create_field')
+
+    assert response.status_code == 201
+    assert session.calls == [('POST', f'{builder.BASE_URL}/a')] * 2
+
+
+def test_reads_retry_server_errors(session):
+    session.statuses = [502, 503, 200]
+
+    response, _error = builder._try_request('GET', 'key', CANDIDATES, 'read_fields')
+
+    assert response.status_code == 200
+    assert len(session.calls) == 3
+
+
+def test_create_field_5xx_raises_without_duplicate(session):
+    session.statuses = [500]
+    spec = builder.FIELD_SPECS[0]
+
+    with pytest.raises(RuntimeError, match='HTTP 500'):
+        builder.create_custom_field('key', 'loc', spec)
+    assert len(session.calls) == 1
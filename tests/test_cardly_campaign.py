@@ -0,0 +1,109 @@
+"""Tests for cardly_campaign's order stage (retries and resend protection)."""
+import os
+import time
+
+import pytest
+
+import cardly_campaign
+
+RECIPIENT = {'name': 'Ann Smith', 'address1': '1 High St', 'postcode': 'AB1 2CD'}
+
+
+@pytest.fixture(autouse=True)
+def offline(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path / 'appdata'))
+    monkeypatch.setattr(cardly_campaign, 'RETRY_BACKOFF', 0.0)
+    monkeypatch.setattr(cardly_campaign, 'get_ghl_contact',
+                        lambda contact_id: {'success': True, 'data': {'contact': {'firstName': 'Ann'}}})
+    monkeypatch.setattr(cardly_campaign, 'recipient_from_contact', lambda contact: dict(RECIPIENT))
+    monkeypatch.setattr(cardly_campaign.cardly_order_mirror, 'sync_orders', lambda api_key: {'success': True})
+    monkeypatch.setattr(cardly_campaign.cardly_order_mirror, 'find_orders', lambda api_key, **recipient: [])
+
+
+def _campaign(tmp_path, contact_ids=('c1',)):
+    image = tmp_path / 'photo.jpg'
+    image.write_bytes(b'jpeg')
+    manifest = tmp_path / 'spring.csv'
+    manifest.write_text('contact_id,image\n' + ''.join(f'{c},{image}\n' for c in contact_ids), encoding='utf-8')
+    cards = cardly_campaign.load_campaign(str(manifest), template_id='tmpl')
+    ledger = cardly_campaign.CampaignLedger(str(tmp_path / 'ledger.json'))
+    for card in cards:
+        ledger.artwork[card.render_key] = {'artwork_id': 'art1'}
+    return cards, ledger
+
+
+def _orders(monkeypatch, responses):
+    calls = []
+
+    def place(*args, **kwargs):
+        calls.append(args)
+        return responses.pop(0)
+
+    monkeypatch.setattr(cardly_campaign, 'place_cardly_order', place)
+    return calls
+
+
+def _run(cards, ledger, retries=2):
+    return cardly_campaign.run_campaign(cards, ledger, render_workers=1, order_workers=1, retries=retries)
+
+
+@pytest.mark.parametrize('status', [502, 504, 503])
+def test_gateway_errors_on_order_are_uncertain_not_resent(tmp_path, monkeypatch, status):
+    cards, ledger = _campaign(tmp_path)
+    calls = _orders(monkeypatch, [{'success': False, 'status': status, 'error': 'gateway', 'retry_after': ''}])
+
+    result = _run(cards, ledger)
+
+    assert len(calls) == 1
+    assert result['cards'][0]['status'] == 'uncertain'
+
+
+@pytest.mark.parametrize('refusal', [
+    {'success': False, 'status': 429, 'error': 'slow down', 'retry_after': ''},
+    {'success': False, 'status': 503, 'error': 'maintenance', 'retry_after': '0'},
+])
+def test_refused_orders_are_retried(tmp_path, monkeypatch, refusal):
+    cards, ledger = _campaign(tmp_path)
+    calls = _orders(monkeypatch, [refusal, {'success': True, 'data': {'data': {'id': 'ord1'}}}])
+
+    result = _run(cards, ledger)
+
+    assert len(calls) == 2
+    assert result['cards'][0]['status'] == 'ordered'
+    assert result['cards'][0]['order_id'] == 'ord1'
+
+
+def test_rerun_after_image_reexport_does_not_resend(tmp_path, monkeypatch):
+    cards, ledger = _campaign(tmp_path)
+    calls = _orders(monkeypatch, [{'success': True, 'data': {'data': {'id': 'ord1'}}}])
+    assert _run(cards, ledger)['stats']['ordered'] == 1
+
+    later = time.time() + 60
+    os.utime(cards[0].image, (later, later))
+    cards, _ = _campaign(tmp_path)
+    result = _run(cards, cardly_campaign.CampaignLedger(ledger.path))
+
+    assert len(calls) == 1
+    assert result['cards'][0]['status'] == 'skipped'
+    assert result['cards'][0]['order_id'] == 'ord1'
+
+
+def test_recipient_with_recent_mirrored_order_is_skipped(tmp_path, monkeypatch):
+    recent = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(time.time() - 86400))
+    old = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(time.time() - 90 * 86400))
+    mirrored = {'c1': [{'order_id': 'prev', 'created': recent}], 'c2': [{'order_id': 'older', 'created': old}]}
+    recipients = {'c1': dict(RECIPIENT, name='Ann Smith'), 'c2': dict(RECIPIENT, name='Bob Jones')}
+    monkeypatch.setattr(cardly_campaign, 'get_ghl_contact',
+                        lambda contact_id: {'success': True, 'data': {'contact': {'id': contact_id}}})
+    monkeypatch.setattr(cardly_campaign, 'recipient_from_contact', lambda contact: recipients[contact['id']])
+    monkeypatch.setattr(cardly_campaign.cardly_order_mirror, 'find_orders', lambda api_key, name, **kw: next(
+        orders for cid, orders in mirrored.items() if recipients[cid]['name'] == name))
+    cards, ledger = _campaign(tmp_path, ('c1', 'c2'))
+    calls = _orders(monkeypatch, [{'success': True, 'data': {'data': {'id': 'ord2'}}}])
+
+    result = _run(cards, ledger)
+
+    assert [card['status'] for card in result['cards']] == ['skipped', 'ordered']
+    assert result['cards'][0]['order_id'] == 'prev'
+    assert len(calls) == 1
+    assert list(ledger.orders) == ['spring|c2']
@@ -0,0 +1,28 @@
+"""Tests for check_shoot_status's concurrent probes."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from check_shoot_status import _Probe
+
+
+def test_queued_probes_do_not_time_out_while_waiting_for_a_worker():
+    pool = ThreadPoolExecutor(max_workers=2)
+    try:
+        probes = [_Probe(pool, f"probe{i}", time.sleep, 0.2) for i in range(8)]
+        outcomes = [probe.result(timeout=0.5) for probe in probes]
+    finally:
+        pool.shutdown(wait=True)
+
+    assert [result for result, _seconds in outcomes] == [None] * 8
+    assert all(seconds < 0.5 for _result, seconds in outcomes)
+
+
+def test_probe_still_times_out_once_running():
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        result, seconds = _Probe(pool, "slow", time.sleep, 0.5).result(timeout=0.1)
+    finally:
+        pool.shutdown(wait=True)
+
+    assert result == {"error": "slow timed out after 0.1s"}
+    assert seconds == 0.1
@@ -0,0 +1,53 @@
+"""Tests for ghl_media_folders' cached folder directory."""
+import pytest
+
+import ghl_media_folders
+import ghl_media_ledger
+
+
+@pytest.fixture
+def listing(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path / 'appdata'))
+    ghl_media_ledger.replace_folders('loc1', [{'id': 'old', 'name': 'Order Sheets'}])
+    remote = [{'id': 'new', 'name': 'Order Sheets'}]
+    fetches = []
+
+    def fetch(headers, location_id, timeout=30):
+        fetches.append(location_id)
+        return list(remote)
+
+    monkeypatch.setattr(ghl_media_folders, 'fetch_folders', fetch)
+    return remote, fetches
+
+
+def test_cached_folder_is_trusted_within_ttl(listing):
+    _remote, fetches = listing
+
+    assert ghl_media_folders.find_folder({}, 'loc1', 'order sheets') == 'old'
+    assert fetches == []
+
+
+def test_rejected_folder_is_dropped_and_resolved_again(listing):
+    _remote, fetches = listing
+
+    assert ghl_media_folders.replace_folder({}, 'loc1', 'old') == 'new'
+    assert fetches == ['loc1']
+    assert ghl_media_folders.find_folder({}, 'loc1', 'Order Sheets') == 'new'
+
+
+def test_deleted_folder_resolves_to_none(listing):
+    remote, _fetches = listing
+    remote.clear()
+
+    assert ghl_media_folders.replace_folder({}, 'loc1', 'old') is None
+    assert ghl_media_ledger.lookup_folder('loc1', 'Order Sheets') is None
+
+
+@pytest.mark.parametrize('status, text, expected', [
+    (422, '{"message": "Invalid parentId"}', True),
+    (404, '{"message": "Folder not found"}', True),
+    (413, '{"message": "File too large"}', False),
+    (500, '{"message": "folder service down"}', False),
+])
+def test_is_folder_error(status, text, expected):
+    assert ghl_media_folders.is_folder_error(status, text) is expected
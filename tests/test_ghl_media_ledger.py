@@ -0,0 +1,46 @@
+"""Tests for ghl_media_ledger's reuse of previously uploaded media."""
+import pytest
+import requests
+
+import ghl_media_ledger
+
+
+class _Response:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+
+
+@pytest.fixture(autouse=True)
+def ledger(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path / 'appdata'))
+    ghl_media_ledger.record_media('abc', 'https://cdn.example/a.jpg', 'loc1')
+
+
+def _head(monkeypatch, outcome):
+    calls = []
+
+    def head(url, **kwargs):
+        calls.append(url)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return _Response(outcome)
+
+    monkeypatch.setattr(ghl_media_ledger.requests, 'head', head)
+    return calls
+
+
+@pytest.mark.parametrize('status', [404, 410, 403])
+def test_deleted_media_is_forgotten(monkeypatch, status):
+    calls = _head(monkeypatch, status)
+
+    assert ghl_media_ledger.lookup_live_media('abc', 'loc1') is None
+    assert calls == ['https://cdn.example/a.jpg']
+    assert ghl_media_ledger.lookup_media('abc', 'loc1') is None
+
+
+@pytest.mark.parametrize('outcome', [200, 503, requests.ConnectionError('offline')])
+def test_live_or_unreachable_media_is_kept(monkeypatch, outcome):
+    _head(monkeypatch, outcome)
+
+    assert ghl_media_ledger.lookup_live_media('abc', 'loc1')['url'] == 'https://cdn.example/a.jpg'
+    assert ghl_media_ledger.lookup_media('abc', 'loc1') is not None
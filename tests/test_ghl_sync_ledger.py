@@ -0,0 +1,61 @@
+"""Tests for ghl_sync_ledger's batch skip lookup."""
+import pytest
+
+import ghl_sync_ledger
+
+
+@pytest.fixture(autouse=True)
+def private_appdata(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path / 'appdata'))
+
+
+def _album(root, folder: str, album_name: str) -> str:
+    unprocessed = root / folder / 'Unprocessed'
+    unprocessed.mkdir(parents=True)
+    psa = unprocessed / f'{album_name}.psa'
+    psa.write_bytes(b'')
+    return str(psa)
+
+
+def test_same_album_name_in_other_folder_is_not_synced(tmp_path):
+    import sync_ps_invoice
+
+    synced = _album(tmp_path, 'Client A', 'P26001P_Smith')
+    other = _album(tmp_path, 'Client B', 'P26001P_Smith')
+    ghl_sync_ledger.record_meta(synced, {'album_name': 'P26001P_Smith', 'order_date': '2026-04-12',
+                                         'last_sync_at': '2026-04-13T09:00:00'}, pending=False)
+
+    albums = ghl_sync_ledger.synced_albums('2026-04')
+
+    def lookup(folder):
+        psa = sync_ps_invoice._resolve_psa_path_for_sync(
+            str(tmp_path / folder / 'export.xml'),
+            {'album_name': 'P26001P_Smith', 'album_path': str(tmp_path / folder)},
+        )
+        return albums.get(ghl_sync_ledger.album_key(psa))
+
+    assert lookup('Client A')['psa_path'] == ghl_sync_ledger.album_key(synced)
+    assert lookup('Client B') is None
+    assert ghl_sync_ledger.album_key(other) not in albums
+
+
+def test_month_filter_skips_rows_without_order_date(tmp_path):
+    dated = _album(tmp_path, 'A', 'P26002P_Jones')
+    undated = _album(tmp_path, 'B', 'P26003P_Brown')
+    ghl_sync_ledger.record_meta(dated, {'order_date': '2026-04-02', 'last_sync_at': 'x'}, pending=False)
+    ghl_sync_ledger.record_meta(undated, {'last_sync_at': 'x'}, pending=False)
+
+    assert set(ghl_sync_ledger.synced_albums('2026-04')) == {ghl_sync_ledger.album_key(dated)}
+    assert set(ghl_sync_ledger.synced_albums('2026-05')) == set()
+    assert len(ghl_sync_ledger.synced_albums()) == 2
+
+
+def test_album_with_pending_opportunity_move_is_not_synced(tmp_path):
+    psa = _album(tmp_path, 'A', 'P26004P_Green')
+    ghl_sync_ledger.record_meta(psa, {'order_date': '2026-04-05', 'last_sync_at': 'x',
+                                      'ghl_last_opportunity_id': 'opp1',
+                                      ghl_sync_ledger.OPP_MOVE_PENDING_KEY: '1'}, pending=False)
+    assert ghl_sync_ledger.synced_albums('2026-04') == {}
+
+    ghl_sync_ledger.record_meta(psa, {ghl_sync_ledger.OPP_MOVE_PENDING_KEY: ''}, pending=False)
+    assert set(ghl_sync_ledger.synced_albums('2026-04')) == {ghl_sync_ledger.album_key(psa)}
@@ -0,0 +1,101 @@
+"""Tests for sync_ps_invoice's batched opportunity updates."""
+import pytest
+
+import ghl_sync_ledger
+import sync_ps_invoice
+
+BASE = 'https://services.leadconnectorhq.com'
+
+
+class _Response:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers: dict = {}
+        self.text = '{}'
+
+
+@pytest.fixture
+def ghl(tmp_path, monkeypatch):
+    """Record queue requests; PUTs to opportunities in ghl['fail'] get a 400."""
+    monkeypatch.setenv('APPDATA', str(tmp_path / 'appdata'))
+    monkeypatch.setattr(sync_ps_invoice, 'CONFIG', {'LOCATION_ID': 'loc1'}, raising=False)
+    monkeypatch.setattr(sync_ps_invoice, '_get_ghl_headers', lambda: {})
+    state = {'requests': [], 'fail': set()}
+
+    def request(method, url, json=None, **kwargs):
+        state['requests'].append((method, url, json))
+        opp_id = url.rsplit('/', 1)[-1]
+        return _Response(400 if method == 'PUT' and opp_id in state['fail'] else 200)
+
+    monkeypatch.setattr(sync_ps_invoice.requests, 'request', request)
+    return state
+
+
+def _pending_album(tmp_path, name: str) -> str:
+    psa_path = str(tmp_path / f'{name}.psa')
+    open(psa_path, 'wb').close()
+    sync_ps_invoice.psa_meta_set(psa_path, ghl_sync_ledger.OPP_MOVE_PENDING_KEY, '1')
+    return psa_path
+
+
+def _pending_flag(psa_path: str) -> str:
+    return ghl_sync_ledger.get_meta(psa_path).get(ghl_sync_ledger.OPP_MOVE_PENDING_KEY, '')
+
+
+def _summary() -> dict:
+    return {'success': True, 'processed': 2, 'failed': 0, 'skipped_synced': 0}
+
+
+def test_updates_to_one_opportunity_are_sent_as_one_put(ghl):
+    queue = sync_ps_invoice.OpportunityMutationQueue(workers=1)
+    queue.update('opp1', {'pipelineStageId': 'stage-new', 'customFields': [{'id': 'f1', 'field_value': 'a'}]})
+    queue.update('opp1', {'monetaryValue': 250, 'customFields': [{'id': 'f1', 'field_value': 'b'},
+                                                                  {'id': 'f2', 'field_value': 'c'}]})
+    queue.add_contact_tags('c1', ['Sold'])
+    queue.add_contact_tags('c1', ['Sold', 'Production'])
+
+    stats = queue.flush()
+
+    puts = [r for r in ghl['requests'] if r[0] == 'PUT']
+    assert len(puts) == 1 and puts[0][1] == f'{BASE}/opportunities/opp1'
+    assert puts[0][2] == {'pipelineStageId': 'stage-new', 'monetaryValue': 250,
+                          'customFields': [{'id': 'f1', 'field_value': 'b'}, {'id': 'f2', 'field_value': 'c'}]}
+    assert [r[2] for r in ghl['requests'] if r[0] == 'POST'] == [{'tags': ['Sold', 'Production']}]
+    assert (stats['mutations'], stats['requests'], stats['failed']) == (4, 2, 0)
+    assert len(queue) == 0
+
+
+def test_successful_flush_clears_pending_flag(tmp_path, ghl):
+    psa_path = _pending_album(tmp_path, 'P26020P_Smith')
+    queue = sync_ps_invoice.OpportunityMutationQueue(workers=1)
+    queue.update('opp1', {'pipelineStageId': 'stage-new'})
+    item = {'shoot_no': 'P26020P', 'success': True}
+    queued_moves = [(item, {'success': True, 'moved': 1, 'queued': ['opp1']}, psa_path)]
+    summary = _summary()
+
+    sync_ps_invoice._flush_opportunity_queue(queue, queued_moves, summary)
+
+    assert _pending_flag(psa_path) == ''
+    assert item['success'] and summary['failed'] == 0
+    assert queued_moves == []
+
+
+def test_failed_flush_keeps_pending_flag(tmp_path, ghl):
+    ghl['fail'].add('opp2')
+    ok_path = _pending_album(tmp_path, 'P26021P_Jones')
+    failed_path = _pending_album(tmp_path, 'P26022P_Brown')
+    queue = sync_ps_invoice.OpportunityMutationQueue(workers=1)
+    queue.update('opp1', {'pipelineStageId': 'stage-new'})
+    queue.update('opp2', {'pipelineStageId': 'stage-new'})
+    ok_item = {'shoot_no': 'P26021P', 'success': True}
+    failed_item = {'shoot_no': 'P26022P', 'success': True}
+    queued_moves = [(ok_item, {'success': True, 'moved': 1, 'queued': ['opp1']}, ok_path),
+                    (failed_item, {'success': True, 'moved': 1, 'queued': ['opp2']}, failed_path)]
+    summary = _summary()
+
+    sync_ps_invoice._flush_opportunity_queue(queue, queued_moves, summary)
+
+    assert (_pending_flag(ok_path), _pending_flag(failed_path)) == ('', '1')
+    assert failed_item['success'] is False and failed_item['opportunity'] == 'failed'
+    assert (summary['success'], summary['processed'], summary['failed']) == (False, 1, 1)
+    assert list(summary['opportunity_queue']['failed_opportunities']) == ['opp2']
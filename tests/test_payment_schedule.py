@@ -0,0 +1,57 @@
+"""Tests for payment_schedule's instalment split and cashflow forecast."""
+from datetime import date
+
+import pytest
+
+from payment_schedule import PaymentPlan, ScheduleBook
+
+
+def _plan(total, *payments):
+    return PaymentPlan.from_payments([{'date': d, 'amount': a, 'method': 'DD'} for d, a in payments], total)
+
+
+@pytest.mark.parametrize('amounts, base, rounding, first', [
+    ((33.33, 33.33, 33.34), 3333, 1, 33.34),
+    ((16.67, 16.67, 16.67, 16.67, 16.67, 16.65), 1667, -2, 16.65),
+    ((30.00, 30.00, 30.00), 3000, 0, 30.00),
+])
+def test_instalment_split_keeps_every_penny(amounts, base, rounding, first):
+    plan = _plan(sum(amounts), *((f'2026-0{m + 1}-01', a) for m, a in enumerate(amounts)))
+
+    split = plan.instalments()
+
+    assert (split.count, split.base_pence, split.rounding_pence) == (len(amounts), base, rounding)
+    assert split.base_pence * split.count + split.rounding_pence == split.total_pence == plan.total_pence
+    assert split.first_amount == first
+
+
+def test_instalments_after_as_of_exclude_the_deposit():
+    plan = _plan(500, ('2026-03-01', 200), ('2026-04-01', 100), ('2026-05-01', 100), ('2026-06-01', 100))
+
+    split = plan.instalments(as_of='2026-03-01')
+
+    assert (split.count, split.total_pence, split.base_pence, split.rounding_pence) == (3, 30000, 10000, 0)
+    assert (split.first_date, split.second_date) == ('2026-04-01', '2026-05-01')
+    assert plan.instalments(as_of='2026-06-01').count == 0
+
+
+def test_many_small_payments_sum_without_float_drift():
+    plan = _plan(10.00, *(('2026-05-01', 0.10) for _ in range(100)))
+
+    assert plan.scheduled_pence == 1000
+    assert plan.outstanding_pence() == 0
+
+
+def test_month_cashflow_totals_across_shoots():
+    book = ScheduleBook()
+    book.add('A', _plan(300, ('2026-04-30', 100), ('2026-05-01', 50), ('2026-05-31', 50.10), ('2026-06-01', 25)))
+    book.add('B', _plan(500, ('2026-05-15', 200.05), ('2026-07-01', 299.95)))
+
+    forecast = book.cashflow(2026, 5, as_of=date(2026, 5, 15))
+
+    assert (forecast['month'], forecast['due'], forecast['payments'], forecast['shoots']) == ('2026-05', 300.15, 3, 2)
+    assert forecast['by_shoot'] == {'A': 100.10, 'B': 200.05}
+    assert forecast['by_day'] == {'2026-05-01': 50.00, '2026-05-15': 200.05, '2026-05-31': 50.10}
+    assert forecast['outstanding'] == 449.95
+    assert book.cashflow(2026, 12)['due'] == 0.0
+    assert book.cashflow(2026, 7)['by_shoot'] == {'B': 299.95}
@@ -0,0 +1,64 @@
+"""Tests for psa_receivables' album parse cache."""
+import os
+import sqlite3
+
+import pytest
+
+import psa_receivables
+
+ORDER_LIST = ('<OrderList><Group id="1" lastOrderChanged="2026-03-02">'
+              '<firstName>Ann</firstName><lastName>Smith</lastName>{payments}</Group></OrderList>')
+
+
+@pytest.fixture(autouse=True)
+def private_appdata(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path / 'appdata'))
+
+
+def _write_album(path, payments: list[tuple[str, str]]) -> None:
+    order_list = ORDER_LIST.format(payments=''.join(
+        f'<payment value="{value}" jdate="{day}T00:00:00"/>' for day, value in payments))
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute('CREATE TABLE IF NOT EXISTS BigStrings (buffCode TEXT, buffer BLOB)')
+        conn.execute('DELETE FROM BigStrings')
+        conn.execute("INSERT INTO BigStrings VALUES ('OrderList', ?)", (order_list.encode('utf-8'),))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_album_saved_in_place_is_parsed_again(tmp_path):
+    archive = tmp_path / 'archive' / 'Smith'
+    archive.mkdir(parents=True)
+    album = archive / 'P26010P_Smith.psa'
+    _write_album(album, [('2026-03-02', '100.00')])
+    cache_path = str(tmp_path / 'receivables.json')
+    roots = [str(tmp_path / 'archive')]
+
+    orders, stats = psa_receivables.collect_orders(roots, workers=1, cache_path=cache_path)
+    assert (stats['parsed'], orders[0].client) == (1, 'Ann Smith')
+
+    # ProSelect rewrites the album in place: the directory mtime does not move
+    dir_stat = os.stat(archive)
+    _write_album(album, [('2026-03-02', '100.00'), ('2026-04-02', '50.00')])
+    later = os.stat(album).st_mtime_ns + 10 ** 9
+    os.utime(album, ns=(later, later))
+    os.utime(archive, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+
+    orders, stats = psa_receivables.collect_orders(roots, workers=1, cache_path=cache_path)
+
+    assert (stats['parsed'], stats['cached']) == (1, 0)
+    assert orders[0].plan.scheduled_pence == 15000
+
+
+def test_unchanged_album_comes_from_cache(tmp_path):
+    archive = tmp_path / 'archive'
+    archive.mkdir()
+    _write_album(archive / 'P26011P_Jones.psa', [('2026-03-09', '80.00')])
+    cache_path = str(tmp_path / 'receivables.json')
+
+    psa_receivables.collect_orders([str(archive)], workers=1, cache_path=cache_path)
+    _orders, stats = psa_receivables.collect_orders([str(archive)], workers=1, cache_path=cache_path)
+
+    assert (stats['parsed'], stats['cached']) == (0, 1)
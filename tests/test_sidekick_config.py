@@ -0,0 +1,61 @@
+"""Tests for sidekick_config's on-disk INI snapshot."""
+import builtins
+
+import pytest
+
+import sidekick_config
+
+INI = '[GHL]\nAPI_Key_B64=c2VjcmV0\nLocation_ID=loc1\n[License]\nKey=ABC-123\nEmail=a@b.c\n'
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv('APPDATA', str(tmp_path / 'appdata'))
+    monkeypatch.setattr(sidekick_config, '_memo', {})
+    monkeypatch.setattr(sidekick_config, '_snapshot', None)
+
+
+def _new_process(monkeypatch):
+    monkeypatch.setattr(sidekick_config, '_memo', {})
+    monkeypatch.setattr(sidekick_config, '_snapshot', None)
+
+
+def _fake_dpapi(data: bytes, protect: bool) -> bytes:
+    return bytes(b ^ 0x5A for b in data)
+
+
+def test_warm_load_reads_no_ini_and_keeps_secrets_sealed(tmp_path, monkeypatch):
+    monkeypatch.setattr(sidekick_config, '_dpapi', _fake_dpapi)
+    ini = tmp_path / 'SideKick_PS.ini'
+    ini.write_text(INI, encoding='utf-8')
+    assert sidekick_config.load_ini(str(ini))['GHL']['API_Key_B64'] == 'c2VjcmV0'
+
+    snapshot_text = (tmp_path / 'appdata' / 'SideKick_PS' / sidekick_config.SNAPSHOT_FILENAME).read_text()
+    assert 'c2VjcmV0' not in snapshot_text and 'ABC-123' not in snapshot_text
+    assert 'loc1' in snapshot_text
+
+    _new_process(monkeypatch)
+    real_open = builtins.open
+
+    def guarded_open(path, *args, **kwargs):
+        assert str(path) != str(ini), 'warm load re-read the INI'
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', guarded_open)
+    config = sidekick_config.load_ini(str(ini))
+    assert config['GHL'] == {'Location_ID': 'loc1', 'API_Key_B64': 'c2VjcmV0'}
+    assert config['License'] == {'Email': 'a@b.c', 'Key': 'ABC-123'}
+
+
+def test_ini_with_secrets_is_not_snapshotted_without_dpapi(tmp_path, monkeypatch):
+    monkeypatch.setattr(sidekick_config, '_dpapi', lambda data, protect: None)
+    ini = tmp_path / 'SideKick_PS.ini'
+    ini.write_text(INI, encoding='utf-8')
+    public_ini = tmp_path / 'public.ini'
+    public_ini.write_text('[Settings]\nDebug=1\n', encoding='utf-8')
+
+    assert sidekick_config.load_ini(str(ini))['License']['Key'] == 'ABC-123'
+    sidekick_config.load_ini(str(public_ini))
+
+    files = sidekick_config._load_snapshot()['files']
+    assert list(files) == [sidekick_config.os.path.normcase(str(public_ini))]
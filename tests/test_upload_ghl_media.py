@@ -0,0 +1,115 @@
+"""Tests for upload_ghl_media's batch retry and resume manifest."""
+import json
+
+import pytest
+import requests
+
+import upload_ghl_media
+
+
+class _Response:
+    status_code = 200
+    headers: dict = {}
+    text = ''
+
+    def json(self):
+        return {'url': 'https://cdn.example/a.jpg', 'fileId': 'f1'}
+
+
+class _FlakySession:
+    def __init__(self, failures: list[Exception]):
+        self.failures = failures
+        self.calls = 0
+
+    def post(self, *args, **kwargs):
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return _Response()
+
+
+@pytest.fixture
+def photo(tmp_path):
+    path = tmp_path / 'a.jpg'
+    path.write_bytes(b'jpeg bytes')
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(upload_ghl_media, 'RETRY_BACKOFF', 0.0)
+    monkeypatch.setattr(upload_ghl_media, 'get_headers', lambda: {})
+
+
+@pytest.mark.parametrize('error', [requests.ConnectionError('reset'), requests.Timeout('timed out')])
+def test_connection_errors_are_retried(photo, monkeypatch, error):
+    session = _FlakySession([error])
+    monkeypatch.setattr(upload_ghl_media, '_session', lambda: session)
+
+    data, attempts, message = upload_ghl_media._post_with_retry(photo, '', retries=2)
+
+    assert data == {'url': 'https://cdn.example/a.jpg', 'fileId': 'f1'}
+    assert (attempts, message, session.calls) == (2, '', 2)
+
+
+def test_unreadable_file_is_not_retried(tmp_path, monkeypatch):
+    session = _FlakySession([])
+    monkeypatch.setattr(upload_ghl_media, '_session', lambda: session)
+
+    data, attempts, _message = upload_ghl_media._post_with_retry(str(tmp_path / 'missing.jpg'), '', retries=2)
+
+    assert (data, attempts, session.calls) == (None, 1, 0)
+
+
+def test_manifest_appends_one_line_per_file_and_resumes(tmp_path, photo):
+    manifest_path = str(tmp_path / 'manifest.jsonl')
+    manifest = upload_ghl_media.UploadManifest(manifest_path)
+    manifest.record(photo, 'folder1', 'https://cdn.example/a.jpg', 'abc')
+    manifest.record(photo, 'folder1', 'https://cdn.example/a2.jpg', 'abc')
+
+    with open(manifest_path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f]
+    assert [line['url'] for line in lines] == ['https://cdn.example/a.jpg', 'https://cdn.example/a2.jpg']
+
+    resumed = upload_ghl_media.UploadManifest(manifest_path)
+    assert resumed.done(photo, 'folder1')['url'] == 'https://cdn.example/a2.jpg'
+    assert resumed.done(photo, 'other-folder') is None
+
+
+def test_manifest_with_torn_line_is_compacted(tmp_path, photo):
+    manifest_path = tmp_path / 'manifest.jsonl'
+    upload_ghl_media.UploadManifest(str(manifest_path)).record(photo, '', 'https://cdn.example/a.jpg', 'abc')
+    with open(manifest_path, 'a', encoding='utf-8') as f:
+        f.write('{"file": "b.jpg", "sta')
+
+    resumed = upload_ghl_media.UploadManifest(str(manifest_path))
+
+    assert list(resumed.entries) == [photo]
+    assert len(manifest_path.read_text(encoding='utf-8').splitlines()) == 1
+
+
+def test_batch_resolves_rejected_folder_again(tmp_path, photo, monkeypatch):
+    class _Rejected(_Response):
+        status_code = 422
+        text = '{"message": "Invalid parentId"}'
+
+    posted = []
+
+    class _Session:
+        def post(self, *args, data, **kwargs):
+            posted.append(data.get('parentId', ''))
+            return _Rejected() if data.get('parentId') == 'stale' else _Response()
+
+    monkeypatch.setenv('APPDATA', str(tmp_path / 'appdata'))
+    monkeypatch.setattr(upload_ghl_media, '_session', lambda: _Session())
+    monkeypatch.setattr(upload_ghl_media, 'find_folder_id', lambda name: 'stale')
+    replaced = []
+    monkeypatch.setattr(upload_ghl_media.ghl_media_folders, 'replace_folder',
+                        lambda headers, location_id, folder_id, name: replaced.append((folder_id, name)) or 'fresh')
+
+    result = upload_ghl_media.upload_batch([photo], 'Order Sheets', workers=1,
+                                           manifest_path=str(tmp_path / 'manifest.jsonl'))
+
+    assert result['files'][0]['status'] == 'uploaded'
+    assert posted == ['stale', 'fresh']
+    assert replaced == [('stale', 'Order Sheets')]
@@ -0,0 +1,120 @@
+"""Tests for write_psa_payments' OrderList splice and batch writer."""
+import sqlite3
+
+import pytest
+
+import write_psa_payments as writer
+
+ORDER_LIST = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<OrderList version="3">\n'
+    '\t<Groups>\n'
+    '\t\t<Group id="1" name="Main" NextPaymentID="4" lastPaymentsChanged="2026-01-10 09:00:00">\n'
+    '\t\t\t<items><item groupID="1" qty="1"><Price price="500" /></item></items>\n'
+    '\t\t\t<payments>\n'
+    '\t\t\t\t<payment value="100"  exported="No"  methodID="2"  SCEntryID=""  methodName="Credit Card"  '
+    'status="0"  jdate="2026-01-10 09:00:00" id="4" />\n'
+    '\t\t\t</payments>\n'
+    '\t\t</Group>\n'
+    '\t\t<Group id="2" name="Extras" NextPaymentID="0" lastPaymentsChanged="">\n'
+    '\t\t\t<items />\n'
+    '\t\t</Group>\n'
+    '\t</Groups>\n'
+    '</OrderList>'
+)
+
+
+def _album(tmp_path, xml: str = ORDER_LIST) -> str:
+    psa_path = str(tmp_path / 'P26030P_Smith.psa')
+    conn = sqlite3.connect(psa_path)
+    try:
+        conn.execute('CREATE TABLE BigStrings (buffCode TEXT, buffer BLOB)')
+        conn.execute("INSERT INTO BigStrings VALUES ('OrderList', ?)", (xml.encode('utf-8'),))
+        conn.commit()
+    finally:
+        conn.close()
+    return psa_path
+
+
+def _order_list(psa_path: str) -> str:
+    conn = sqlite3.connect(psa_path)
+    try:
+        buffer = conn.execute("SELECT buffer FROM BigStrings WHERE buffCode='OrderList'").fetchone()[0]
+    finally:
+        conn.close()
+    return buffer if isinstance(buffer, str) else buffer.decode('utf-8')
+
+
+def _payment(day, month, method, amount) -> dict:
+    return {'day': day, 'month': month, 'year': 2026, 'method_name': method, 'amount': amount}
+
+
+def test_payments_are_spliced_into_the_group(tmp_path):
+    psa_path = _album(tmp_path)
+    edit = writer.AlbumEdit(psa_path, group=1, payments=[_payment(1, 3, 'GoCardless DD', 200.05),
+                                                         _payment(1, 4, 'Smith & "Co" voucher', 199.95)])
+
+    result = writer.apply_album_edits(psa_path, [edit])
+
+    assert (result['status'], result['added']) == ('written', 2)
+    xml = _order_list(psa_path)
+    group_tag = xml[xml.index('<Group id="1"'):xml.index('>', xml.index('<Group id="1"'))]
+    assert 'NextPaymentID="6"' in group_tag and 'lastPaymentsChanged="2026-01-10' not in group_tag
+    assert 'methodName="Smith &amp; &quot;Co&quot; voucher"' in xml
+    lines = [line for line in xml.splitlines() if '<payment ' in line]
+    assert [writer.payment_attrs(line)['id'] for line in lines] == ['4', '5', '6']
+    assert [writer.payment_attrs(line)['methodName'] for line in lines][1:] == ['GoCardless DD',
+                                                                               'Smith & "Co" voucher']
+    assert writer.payment_attrs(lines[1])['methodID'] == '12' and 'value="200.05"' in lines[1]
+    assert all(line.startswith('\t\t\t\t<payment ') for line in lines)
+    # Everything outside group 1's tag and payments section is byte for byte the same
+    assert xml.split('</payments>')[1] == ORDER_LIST.split('</payments>')[1]
+    assert xml.split('<Group id="1"')[0] == ORDER_LIST.split('<Group id="1"')[0]
+
+
+def test_group_without_payments_gets_a_section_and_album_wide_ids(tmp_path):
+    psa_path = _album(tmp_path)
+
+    writer.apply_album_edits(psa_path, [writer.AlbumEdit(psa_path, group=2, payments=[_payment(5, 3, 'Cash', 50)])])
+
+    xml = _order_list(psa_path)
+    extras = xml[xml.index('<Group id="2"'):xml.index('</Group>', xml.index('<Group id="2"'))]
+    assert 'NextPaymentID="5"' in extras
+    assert '\t\t\t<payments>\n\t\t\t\t<payment value="50"' in extras and 'id="5" />\n\t\t\t</payments>\n' in extras
+    assert '<items />' in extras
+
+
+def test_dry_run_reports_the_diff_without_writing(tmp_path):
+    psa_path = _album(tmp_path)
+    edit = writer.AlbumEdit(psa_path, group=1, payments=[_payment(1, 3, 'Bank Transfer', 250)], clear=True)
+
+    result = writer.apply_album_edits(psa_path, [edit], dry_run=True)
+
+    assert (result['status'], result['added'], result['removed']) == ('dry-run', 1, 1)
+    assert any(line.startswith('-') and 'Credit Card' in line for line in result['diff'])
+    assert any(line.startswith('+') and 'Bank Transfer' in line for line in result['diff'])
+    assert _order_list(psa_path) == ORDER_LIST
+
+
+def test_rerun_of_the_same_manifest_changes_nothing(tmp_path):
+    psa_path = _album(tmp_path)
+    edit = writer.AlbumEdit(psa_path, group=1, payments=[_payment(1, 3, 'GoCardless DD', 200)])
+    writer.apply_album_edits(psa_path, [edit], skip_existing=True)
+    written = _order_list(psa_path)
+
+    result = writer.apply_album_edits(psa_path, [edit], skip_existing=True)
+
+    assert (result['status'], result['added'], result['skipped']) == ('unchanged', 0, 1)
+    assert _order_list(psa_path) == written
+
+
+@pytest.mark.parametrize('dry_run, summary', [(True, 'would add 1 payment(s)'), (False, '1 payment(s) added')])
+def test_batch_summary_wording(tmp_path, capsys, dry_run, summary):
+    psa_path = _album(tmp_path)
+    manifest = tmp_path / 'payments.csv'
+    manifest.write_text(f'psa,group,date,method,amount\n{psa_path},1,2026-03-01,Cash,75\n', encoding='utf-8')
+
+    code = writer._batch_main(['--manifest', str(manifest)] + (['--dry-run'] if dry_run else []))
+
+    assert code == 0
+    assert capsys.readouterr().out.splitlines()[-1].endswith(summary)
@@ -4,13 +4,19 @@ Copyright (c) 2026 GuyMayer. All rights reserved.
 Unauthorized use, modification, or distribution is prohibited.
 """
 
+import argparse
 import subprocess
 import sys
 import json
+import glob
 import os
 import mimetypes
 import base64
-import re
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 # Auto-install dependencies
 def install_dependencies() -> None:
@@ -25,6 +31,10 @@ def install_dependencies() -> None:
 install_dependencies()
 import requests
 
+import ghl_media_folders
+import ghl_media_ledger
+import sidekick_config
+
 def _get_script_dir():
     """Get script directory (handles both .py and compiled .exe)."""
     if getattr(sys, 'frozen', False):
@@ -49,39 +59,22 @@ def _load_credentials():
     ]
 
     for cred_path in possible_paths:
-        if os.path.exists(cred_path):
-            try:
-                with open(cred_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                # Parse api_key_b64
-                api_match = re.search(r'"api_key_b64"\s*:\s*"([^"]+)"', content)
-                api_key = _decode_api_key(api_match.group(1)) if api_match else ''
-                # Parse location_id
-                loc_match = re.search(r'"location_id"\s*:\s*"([^"]+)"', content)
-                location_id = loc_match.group(1) if loc_match else ''
-                if api_key:
-                    return api_key, location_id
-            except Exception:
-                continue
+        creds = sidekick_config.read_json(cred_path)
+        if not creds:
+            continue
+        api_key = _decode_api_key(str(creds.get('api_key_b64') or ''))
+        location_id = str(creds.get('location_id') or '')
+        if api_key:
+            return api_key, location_id
     return '', ''
 
 # Configuration - Load from credentials file, or use command line argument as fallback
+# (positional key/location only apply to the single-file form, not --batch)
 _api_key, _location_id = _load_credentials()
-API_KEY = sys.argv[3] if len(sys.argv) > 3 else _api_key
-LOCATION_ID = sys.argv[4] if len(sys.argv) > 4 else _location_id
-
+_cli_args = [] if "--batch" in sys.argv else sys.argv
+API_KEY = _cli_args[3] if len(_cli_args) > 3 else _api_key
+LOCATION_ID = _cli_args[4] if len(_cli_args) > 4 else _location_id
 
-def _get_output_dir():
-    """Get a writable directory for output files."""
-    appdata = os.environ.get('APPDATA')
-    if appdata:
-        sidekick_dir = os.path.join(appdata, 'SideKick_PS')
-        try:
-            os.makedirs(sidekick_dir, exist_ok=True)
-            return sidekick_dir
-        except OSError:
-            pass
-    return os.environ.get('TEMP', os.getcwd())
 DEBUG = "--debug" in sys.argv
 
 # API endpoints
@@ -102,46 +95,21 @@ def get_headers() -> dict:
         "Version": "2021-07-28"
     }
 
-def list_folders() -> dict | None:
-    """List all folders in media storage."""
-    headers = get_headers()
-    headers["Content-Type"] = "application/json"
-
-    params = {
-        "altId": LOCATION_ID,
-        "altType": "location",
-        "sortBy": "createdAt",
-        "sortOrder": "desc"
-    }
-
-    try:
-        response = requests.get(MEDIA_FILES_URL, headers=headers, params=params, timeout=30)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            print(f"Error listing folders: {response.status_code}")
-            print(response.text)
-            return None
-    except Exception as e:
-        print(f"Error: {e}")
-        return None
+def list_folders(refresh: bool = False) -> list[dict]:
+    """List media folders (id, name, parent_id) from the cached folder directory."""
+    return ghl_media_folders.get_folders(get_headers(), LOCATION_ID,
+                                         max_age=0 if refresh else ghl_media_folders.FOLDER_TTL)
 
 def find_folder_id(folder_name: str) -> str | None:
     """Find folder ID by name."""
-    data = list_folders()
-    if not data:
-        return None
+    return ghl_media_folders.find_folder(get_headers(), LOCATION_ID, folder_name)
 
-    # Search in folders
-    folders = data.get('files', [])
-    for folder in folders:
-        if folder.get('name', '').lower() == folder_name.lower():
-            return folder.get('id')
+def upload_file(file_path: str, folder_name: str | None = None, retry_folder: bool = True) -> dict:
+    """Upload a file to GHL Media Storage.
 
-    return None
-
-def upload_file(file_path: str, folder_name: str | None = None) -> dict:
-    """Upload a file to GHL Media Storage."""
+    If GHL rejects the cached folder ID, the folder is resolved again from a
+    fresh listing and the upload retried once.
+    """
 
     if not os.path.exists(file_path):
         return {
@@ -170,6 +138,13 @@ def upload_file(file_path: str, folder_name: str | None = None) -> dict:
             data = {
                 'name': file_name
             }
+            folder_id = None
+            if folder_name:
+                folder_id = find_folder_id(folder_name)
+                if folder_id:
+                    data['parentId'] = folder_id
+                else:
+                    print(f"Folder not found, uploading to media root: {folder_name}")
 
             # Add location info
             params = {
@@ -202,6 +177,10 @@ def upload_file(file_path: str, folder_name: str | None = None) -> dict:
                     'data': result,
                     'url': result.get('url')
                 }
+            elif folder_id and retry_folder and ghl_media_folders.is_folder_error(response.status_code, response.text):
+                print(f"Folder {folder_id} rejected ({response.status_code}) - refreshing folder list")
+                ghl_media_folders.replace_folder(headers, LOCATION_ID, folder_id, folder_name)
+                return upload_file(file_path, folder_name, retry_folder=False)
             else:
                 print(f"\n✗ Upload failed: {response.status_code}")
                 print(response.text)
@@ -217,6 +196,289 @@ def upload_file(file_path: str, folder_name: str | None = None) -> dict:
             'error': str(e)
         }
 
+
+# =============================================================================
+# Batch upload
+# =============================================================================
+BATCH_WORKERS = 4
+BATCH_RETRIES = 3
+RETRY_BACKOFF = 1.0
+BATCH_TIMEOUT = 120
+MANIFEST_FILENAME = "ghl_upload_manifest.jsonl"
+MANIFEST_COMPACT_SLACK = 100  # superseded journal lines tolerated before a rewrite on load
+FOLDER_REJECTED = "Folder rejected"  # error prefix when GHL refuses the upload's parentId
+_MEDIA_TYPES = ("image/", "video/", "audio/", "application/pdf")
+
+_thread_state = threading.local()
+
+
+def _session() -> requests.Session:
+    """One keep-alive session per worker thread."""
+    session = getattr(_thread_state, "session", None)
+    if session is None:
+        session = _thread_state.session = requests.Session()
+    return session
+
+
+def expand_batch_source(source: str) -> list[str]:
+    """Files to upload from a folder (media files in it) or a glob pattern."""
+    if os.path.isdir(source):
+        paths = [entry.path for entry in os.scandir(source) if entry.is_file()
+                 and (mimetypes.guess_type(entry.name)[0] or "").startswith(_MEDIA_TYPES)]
+    else:
+        paths = [p for p in glob.glob(source, recursive=True) if os.path.isfile(p)]
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+class UploadManifest:
+    """Resumable record of a batch: file path -> size, mtime and upload result.
+
+    An append-only journal of one JSON line per completed file, so an
+    interrupted batch picks up where it stopped and recording a file costs
+    one short append however large the batch is. Later lines win; the
+    journal is rewritten on load once it holds many superseded (or torn)
+    lines. A file is only treated as done if its size and mtime are
+    unchanged and it went to the same location and folder.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries: dict[str, dict] = {}
+        lines = 0
+        torn = False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        torn = True  # cut short by an interrupted run
+                        continue
+                    if isinstance(entry, dict) and entry.get("file"):
+                        self.entries[entry.pop("file")] = entry
+        except OSError:
+            return
+        if torn or lines > len(self.entries) + MANIFEST_COMPACT_SLACK:
+            self._compact()
+
+    def _compact(self) -> None:
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for file_path, entry in self.entries.items():
+                    f.write(json.dumps({"file": file_path, **entry}) + "\n")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            debug_print(f"Manifest not compacted: {e}")
+
+    @staticmethod
+    def _stamp(file_path: str) -> list[int]:
+        st = os.stat(file_path)
+        return [st.st_size, st.st_mtime_ns]
+
+    def done(self, file_path: str, folder_id: str) -> dict | None:
+        """The earlier result for this file if it is unchanged, else None."""
+        entry = self.entries.get(file_path)
+        if not entry or entry.get("location_id") != LOCATION_ID or entry.get("folder_id") != folder_id:
+            return None
+        try:
+            return entry if entry.get("stamp") == self._stamp(file_path) else None
+        except OSError:
+            return None
+
+    def record(self, file_path: str, folder_id: str, url: str, sha256: str) -> None:
+        """Mark a file as uploaded and append it to the journal."""
+        entry = {
+            "stamp": self._stamp(file_path), "location_id": LOCATION_ID, "folder_id": folder_id,
+            "url": url, "sha256": sha256, "uploaded_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        with self.lock:
+            self.entries[file_path] = entry
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"file": file_path, **entry}) + "\n")
+            except OSError as e:
+                debug_print(f"Manifest not saved: {e}")
+
+
+def _post_with_retry(file_path: str, folder_id: str, retries: int) -> tuple[dict | None, int, str]:
+    """POST one file, retrying connection errors, 429 and 5xx with backoff.
+
+    Returns:
+        (response JSON or None, attempts made, error message); the message
+        starts with FOLDER_REJECTED if GHL refused folder_id.
+    """
+    mime_type = mimetypes.guess_type(file_path)[0] or "application/octet-stream"
+    file_name = os.path.basename(file_path)
+    data = {"name": file_name}
+    if folder_id:
+        data["parentId"] = folder_id
+    params = {"altId": LOCATION_ID, "altType": "location"}
+
+    error = ""
+    for attempt in range(1, retries + 2):
+        delay = RETRY_BACKOFF * (2 ** (attempt - 1)) * (1 + random.random() / 2)
+        try:
+            with open(file_path, "rb") as f:
+                response = _session().post(MEDIA_UPLOAD_URL, headers=get_headers(), params=params,
+                                           files={"file": (file_name, f, mime_type)}, data=data,
+                                           timeout=BATCH_TIMEOUT)
+        except requests.RequestException as e:  # before OSError: ConnectionError/Timeout subclass it
+            error = str(e)
+        except OSError as e:
+            return None, attempt, str(e)  # the local file could not be read
+        else:
+            if response.status_code in (200, 201):
+                return response.json(), attempt, ""
+            error = f"API returned status {response.status_code}: {response.text[:200]}"
+            if folder_id and ghl_media_folders.is_folder_error(response.status_code, response.text):
+                return None, attempt, f"{FOLDER_REJECTED}: {error}"
+            if response.status_code != 429 and response.status_code < 500:
+                return None, attempt, error  # client error: retrying won't help
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = max(delay, float(retry_after))
+        if attempt <= retries:
+            time.sleep(delay)
+    return None, retries + 1, error
+
+
+def upload_batch(paths: list[str], folder_name: str | None = None, workers: int = BATCH_WORKERS,
+                 retries: int = BATCH_RETRIES, manifest_path: str = "") -> dict:
+    """Upload many files concurrently, skipping ones a previous run completed.
+
+    Files already uploaded (same path, size and mtime in the manifest, or the
+    same content in the media ledger) are skipped. Each file is retried with
+    exponential backoff on network errors, 429 and 5xx responses. If GHL
+    rejects the cached folder ID, the folder is resolved again from a fresh
+    listing (once for the whole batch) and the file retried.
+
+    Returns:
+        dict: success, files (per-file results) and stats (counts, MB, seconds, MB/s, files/s).
+    """
+    folder_id = ""
+    if folder_name:
+        folder_id = find_folder_id(folder_name) or ""
+        if not folder_id:
+            print(f"Folder not found, uploading to media root: {folder_name}")
+    manifest = UploadManifest(manifest_path or os.path.join(sidekick_config.get_output_dir(), MANIFEST_FILENAME))
+    print_lock = threading.Lock()
+    folder_lock = threading.Lock()
+    target = {"folder_id": folder_id}
+    total = len(paths)
+    progress = {"done": 0}
+
+    def _report(result: dict) -> dict:
+        with print_lock:
+            progress["done"] += 1
+            label = {"uploaded": "OK", "skipped": "SKIP", "failed": "FAIL"}[result["status"]]
+            detail = result["error"] or f"{result['bytes'] / 1048576:.1f} MB"
+            if result["status"] == "skipped":
+                detail = "already uploaded"
+            elif result["status"] == "uploaded":
+                detail += f" in {result['seconds']:.1f}s" + (f" ({result['attempts']} attempts)" if result["attempts"] > 1 else "")
+            print(f"[{progress['done']}/{total}] [{label}] {os.path.basename(result['file'])}: {detail}", flush=True)
+        return result
+
+    def _replace_folder(rejected_id: str) -> str:
+        with folder_lock:
+            if target["folder_id"] == rejected_id:
+                target["folder_id"] = ghl_media_folders.replace_folder(
+                    get_headers(), LOCATION_ID, rejected_id, folder_name or "") or ""
+                with print_lock:
+                    print(f"Folder {rejected_id} rejected - now uploading to "
+                          f"{target['folder_id'] or 'media root'}", flush=True)
+            return target["folder_id"]
+
+    def _upload(file_path: str) -> dict:
+        result = {"file": file_path, "status": "failed", "url": "", "bytes": 0, "seconds": 0.0,
+                  "attempts": 0, "error": ""}
+        folder_id = target["folder_id"]
+        try:
+            result["bytes"] = os.path.getsize(file_path)
+        except OSError as e:
+            result["error"] = str(e)
+            return _report(result)
+
+        earlier = manifest.done(file_path, folder_id)
+        if earlier:
+            result.update(status="skipped", url=earlier["url"])
+            return _report(result)
+        sha256 = sidekick_config.sha256_file(file_path) or ""
+        known = ghl_media_ledger.lookup_live_media(sha256, LOCATION_ID, folder_id)
+        if known:
+            manifest.record(file_path, folder_id, known["url"], sha256)
+            result.update(status="skipped", url=known["url"])
+            return _report(result)
+
+        start = time.perf_counter()
+        data, attempts, error = _post_with_retry(file_path, folder_id, retries)
+        if data is None and error.startswith(FOLDER_REJECTED):
+            folder_id = _replace_folder(folder_id)
+            data, more, error = _post_with_retry(file_path, folder_id, retries)
+            attempts += more
+        result.update(seconds=round(time.perf_counter() - start, 3), attempts=attempts, error=error)
+        if data is None:
+            return _report(result)
+        url = data.get("url", "")
+        result.update(status="uploaded", url=url)
+        manifest.record(file_path, folder_id, url, sha256)
+        ghl_media_ledger.record_media(sha256, url, LOCATION_ID, folder_id, media_id=data.get("fileId", ""),
+                                      file_name=os.path.basename(file_path), size_bytes=result["bytes"])
+        return _report(result)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(_upload, paths))
+    elapsed = time.perf_counter() - start
+
+    uploaded = [r for r in results if r["status"] == "uploaded"]
+    megabytes = sum(r["bytes"] for r in uploaded) / 1048576
+    stats = {
+        "files": total,
+        "uploaded": len(uploaded),
+        "skipped": sum(1 for r in results if r["status"] == "skipped"),
+        "failed": sum(1 for r in results if r["status"] == "failed"),
+        "megabytes": round(megabytes, 2),
+        "seconds": round(elapsed, 2),
+        "mb_per_second": round(megabytes / elapsed, 2) if elapsed else 0.0,
+        "files_per_second": round(len(uploaded) / elapsed, 2) if elapsed else 0.0,
+    }
+    return {"success": stats["failed"] == 0, "files": results, "stats": stats}
+
+
+def _batch_main(argv: list[str]) -> int:
+    """CLI entry point for --batch mode."""
+    parser = argparse.ArgumentParser(prog="upload_ghl_media.py --batch",
+                                     description="Upload a folder or glob of files to GHL Media Storage")
+    parser.add_argument("--batch", required=True, metavar="FOLDER|GLOB", help="Folder (its media files) or glob pattern")
+    parser.add_argument("folder_name", nargs="?", default=None, help="GHL Media folder to upload into")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help=f"Concurrent uploads (default: {BATCH_WORKERS})")
+    parser.add_argument("--retries", type=int, default=BATCH_RETRIES, help=f"Retries per file (default: {BATCH_RETRIES})")
+    parser.add_argument("--manifest", default="", help="Resume manifest path (default: in the SideKick_PS app data folder)")
+    parser.add_argument("--debug", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    paths = expand_batch_source(args.batch)
+    if not paths:
+        print(f"No files found: {args.batch}")
+        return 1
+
+    print("GHL Media Uploader - batch")
+    print("=" * 40)
+    print(f"{len(paths)} file(s), {args.workers} at a time")
+    result = upload_batch(paths, args.folder_name, args.workers, args.retries, args.manifest)
+    stats = result["stats"]
+    print(f"\n{stats['uploaded']} uploaded, {stats['skipped']} skipped, {stats['failed']} failed "
+          f"in {stats['seconds']:.1f}s - {stats['mb_per_second']:.2f} MB/s, {stats['files_per_second']:.2f} files/s")
+
+    with open(os.path.join(sidekick_config.get_output_dir(), "ghl_upload_result.json"), 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    return 0 if result["success"] else 1
+
+
 def main() -> None:
     """Main entry point for GHL Media Uploader."""
     if len(sys.argv) < 2:
@@ -227,19 +489,23 @@ def main() -> None:
         print("\nExamples:")
         print('  python upload_ghl_media.py "C:\\Photos\\image.jpg"')
         print('  python upload_ghl_media.py "C:\\Photos\\image.jpg" "Client Photos"')
+        print('  python upload_ghl_media.py --batch "C:\\Photos\\Proofs" "Client Photos" --workers 6')
+        print('  python upload_ghl_media.py --batch "C:\\Photos\\**\\*.jpg"')
         print("\nCommands:")
         print('  python upload_ghl_media.py --list-folders')
         sys.exit(1)
 
+    if "--batch" in sys.argv:
+        sys.exit(_batch_main(sys.argv[1:]))
+
     # List folders command
     if sys.argv[1] == "--list-folders":
         print("Fetching folders from GHL Media Storage...")
-        data = list_folders()
-        if data:
+        folders = list_folders(refresh=True)
+        if folders:
             print("\nFolders found:")
-            for item in data.get('files', []):
-                if item.get('isDir'):
-                    print(f"  📁 {item.get('name')} (ID: {item.get('id')})")
+            for item in folders:
+                print(f"  📁 {ghl_media_folders.folder_path(folders, item['id'])} (ID: {item['id']})")
         sys.exit(0)
 
     file_path = sys.argv[1]
@@ -251,7 +517,7 @@ def main() -> None:
     result = upload_file(file_path, folder_name)
 
     # Save result
-    with open(os.path.join(_get_output_dir(), "ghl_upload_result.json"), 'w', encoding='utf-8') as f:
+    with open(os.path.join(sidekick_config.get_output_dir(), "ghl_upload_result.json"), 'w', encoding='utf-8') as f:
         json.dump(result, f, indent=2)
 
     print(json.dumps(result, indent=2))
@@ -2,22 +2,40 @@
 SideKick License Validation Module
 Copyright (c) 2026 GuyMayer. All rights reserved.
 Unauthorized use, modification, or distribution is prohibited.
+
+Every successful online validation is kept in
+%APPDATA%\\SideKick_PS\\license_cache.json. Each entry is signed with an
+HMAC and carries an expiry VALIDATION_WINDOW_DAYS after it was made. The
+'check' action reads it with no network call and no `requests` import.
+Once the entry is REVALIDATE_AFTER_DAYS old, 'check' still answers from
+the cache but starts a detached 'revalidate' process to refresh it. Normal
+startups therefore never wait on LemonSqueezy. A definite rejection
+(unknown or expired key) is cached too, so the next check asks for a
+blocking validation.
 """
 
 import base64
+import functools
 import hashlib
+import hmac
 import json
 import os
+import subprocess
 import sys
+import time
 from datetime import datetime
 
-import requests
-
 # LemonSqueezy API Configuration
 LEMON_API_URL = "https://api.lemonsqueezy.com/v1"
 STORE_ID = "zoomphoto"
 PRODUCT_ID = "077d6b76-ca2a-42df-a653-86f7aa186895"
 
+VALIDATION_WINDOW_DAYS = 30
+REVALIDATE_AFTER_DAYS = 7
+REVALIDATE_COOLDOWN = 15 * 60  # seconds between background revalidation attempts
+LICENSE_CACHE_FILENAME = 'license_cache.json'
+REVALIDATE_MARKER_FILENAME = 'license_revalidate.marker'
+
 
 def _get_data_dir() -> str:
     """Get a writable directory for data files (trial data, etc.)."""
@@ -54,8 +72,17 @@ def _get_encryption_key() -> bytes:
 
 def _xor_encrypt(data: bytes, key: bytes) -> bytes:
     """Simple XOR encryption with repeating key."""
-    key_len = len(key)
-    return bytes([data[i] ^ key[i % key_len] for i in range(len(data))])
+    if not data:
+        return b''
+    keystream = (key * (len(data) // len(key) + 1))[:len(data)]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(keystream, 'big')).to_bytes(len(data), 'big')
+
+@functools.lru_cache(maxsize=8)
+def _trial_key(location_hash: str) -> bytes:
+    """App key combined with the location hash (unique encryption per location)."""
+    app_key = _get_encryption_key()
+    location_key = hashlib.sha256(location_hash.encode()).digest()
+    return bytes(a ^ b for a, b in zip(app_key, location_key))
 
 def _encrypt_trial_data(trial_data: dict, location_hash: str) -> str:
     """
@@ -63,9 +90,7 @@ def _encrypt_trial_data(trial_data: dict, location_hash: str) -> str:
     Returns base64 encoded encrypted string.
     """
     # Combine app key with location hash for unique encryption per location
-    app_key = _get_encryption_key()
-    location_key = hashlib.sha256(location_hash.encode()).digest()
-    combined_key = bytes([app_key[i] ^ location_key[i] for i in range(32)])
+    combined_key = _trial_key(location_hash)
 
     # Add integrity check
     json_str = json.dumps(trial_data, sort_keys=True)
@@ -82,9 +107,7 @@ def _decrypt_trial_data(encrypted_str: str, location_hash: str) -> dict | None:
     """
     try:
         # Combine app key with location hash
-        app_key = _get_encryption_key()
-        location_key = hashlib.sha256(location_hash.encode()).digest()
-        combined_key = bytes([app_key[i] ^ location_key[i] for i in range(32)])
+        combined_key = _trial_key(location_hash)
 
         # Decrypt
         encrypted = base64.b64decode(encrypted_str.encode('ascii'))
@@ -105,6 +128,117 @@ def _decrypt_trial_data(encrypted_str: str, location_hash: str) -> dict | None:
         return None  # Decryption failed
 
 
+def _license_cache_path() -> str:
+    return os.path.join(_get_data_dir(), LICENSE_CACHE_FILENAME)
+
+
+def _sign_entry(entry: dict) -> str:
+    """HMAC-SHA256 of a cache entry (without its signature), keyed from the app secret."""
+    key = hashlib.sha256(_get_encryption_key() + b'license_cache').digest()
+    body = json.dumps({k: v for k, v in entry.items() if k != 'sig'}, sort_keys=True)
+    return hmac.new(key, body.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def _read_license_cache() -> dict:
+    try:
+        with open(_license_cache_path(), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_license_cache(data: dict) -> None:
+    path = _license_cache_path()
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def store_validation(license_key: str, location_id: str, result: dict) -> None:
+    """Cache a definite validation outcome (a valid result, or a rejection).
+
+    Network failures (timeout, connection_error, error) are not cached, so
+    the previous entry stays in force until it expires.
+    """
+    if result.get("status") in ("timeout", "connection_error", "error"):
+        return
+    now = time.time()
+    entry = {
+        "key_hash": hashlib.sha256(license_key.encode('utf-8')).hexdigest(),
+        "valid": bool(result.get("valid")),
+        "result": {k: v for k, v in result.items() if k not in ("license_key", "cached")},
+        "validated_at": now,
+        "expires": now + VALIDATION_WINDOW_DAYS * 86400,
+    }
+    entry["sig"] = _sign_entry(entry)
+    data = _read_license_cache()
+    data[get_instance_id(location_id)] = entry
+    _write_license_cache(data)
+
+
+def cached_validation(license_key: str, location_id: str) -> dict | None:
+    """The cached outcome for this key and location, if signed, unexpired and matching.
+
+    Returns:
+        dict | None: The entry (valid, result, validated_at, expires), or None.
+    """
+    if not license_key or not location_id:
+        return None
+    entry = _read_license_cache().get(get_instance_id(location_id))
+    if not isinstance(entry, dict) or not hmac.compare_digest(str(entry.get("sig", "")), _sign_entry(entry)):
+        return None
+    if entry.get("key_hash") != hashlib.sha256(license_key.encode('utf-8')).hexdigest():
+        return None
+    if entry.get("expires", 0) <= time.time():
+        return None
+    return entry
+
+
+def _revalidate_command(license_key: str, location_id: str) -> list[str]:
+    """Command line that re-runs this module's 'revalidate' action."""
+    args = ["revalidate", license_key, location_id]
+    if not getattr(sys, 'frozen', False):
+        return [sys.executable, os.path.abspath(__file__)] + args
+    if os.path.basename(sys.executable).lower().startswith('sidekick_ps_cli'):
+        return [sys.executable, "validate-license"] + args
+    return [sys.executable] + args
+
+
+def revalidate_in_background(license_key: str, location_id: str) -> bool:
+    """Start a detached process that validates online and refreshes the cache.
+
+    At most one attempt is started per REVALIDATE_COOLDOWN, so repeated
+    launches while offline don't pile up processes.
+
+    Returns:
+        bool: True if a process was started.
+    """
+    marker = os.path.join(_get_data_dir(), REVALIDATE_MARKER_FILENAME)
+    try:
+        if time.time() - os.path.getmtime(marker) < REVALIDATE_COOLDOWN:
+            return False
+    except OSError:
+        pass
+    try:
+        with open(marker, 'w', encoding='utf-8') as f:
+            f.write(datetime.now().isoformat())
+        kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL,
+                  "stderr": subprocess.DEVNULL, "close_fds": True}
+        if os.name == 'nt':
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW | subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        subprocess.Popen(_revalidate_command(license_key, location_id), **kwargs)
+        return True
+    except OSError:
+        return False
+
+
 def _init_validation_result(license_key: str, location_id: str) -> dict:
     """Initialize a validation result dictionary.
 
@@ -173,6 +307,8 @@ def _handle_request_exception(exception: Exception, result: dict) -> None:
         exception: The exception that occurred.
         result: Result dict to update.
     """
+    import requests
+
     if isinstance(exception, requests.exceptions.Timeout):
         result["message"] = "Connection timeout - check internet"
         result["status"] = "timeout"
@@ -188,10 +324,13 @@ def validate_license(license_key: str, location_id: str) -> dict:
     """
     Validate a license key with LemonSqueezy.
     The license is bound to the GHL Location ID.
+    The outcome refreshes the local validation cache (see store_validation).
 
     Returns:
         dict with keys: valid, status, message, customer_name, customer_email, expires_at
     """
+    import requests
+
     result = _init_validation_result(license_key, location_id)
 
     if not license_key or not location_id:
@@ -221,6 +360,7 @@ def validate_license(license_key: str, location_id: str) -> dict:
     except Exception as e:
         _handle_request_exception(e, result)
 
+    store_validation(license_key, location_id, result)
     return result
 
 def _handle_activation_400(error_msg: str, instance_id: str, result: dict) -> None:
@@ -265,6 +405,8 @@ def activate_license(license_key: str, location_id: str) -> dict:
     Returns:
         dict with keys: success, message, instance_id
     """
+    import requests
+
     result = {"success": False, "message": "", "instance_id": "", "activated_at": ""}
 
     if not license_key or not location_id:
@@ -300,6 +442,8 @@ def deactivate_license(license_key: str, location_id: str, instance_id: str = ""
     Returns:
         dict with keys: success, message
     """
+    import requests
+
     result = {
         "success": False,
         "message": ""
@@ -332,6 +476,10 @@ def deactivate_license(license_key: str, location_id: str, instance_id: str = ""
             if data.get("deactivated", False):
                 result["success"] = True
                 result["message"] = "License deactivated successfully"
+                if location_id:
+                    cache = _read_license_cache()
+                    if cache.pop(get_instance_id(location_id), None) is not None:
+                        _write_license_cache(cache)
             else:
                 result["message"] = data.get("error", "Deactivation failed")
         else:
@@ -342,12 +490,19 @@ def deactivate_license(license_key: str, location_id: str, instance_id: str = ""
 
     return result
 
-def check_needs_validation(last_validated: str) -> dict:
+def check_needs_validation(last_validated: str, license_key: str = "", location_id: str = "") -> dict:
     """
     Check if license needs re-validation (monthly requirement).
 
+    When the license key and Location ID are given, the signed validation
+    cache is consulted first (no network call). A cached validation that is
+    REVALIDATE_AFTER_DAYS old still counts, but a background revalidation
+    is started so the VALIDATION_WINDOW_DAYS limit is never reached.
+
     Args:
         last_validated: ISO format datetime string of last validation
+        license_key: Optional license key (enables the validation cache)
+        location_id: Optional GHL Location ID (enables the validation cache)
 
     Returns:
         dict with needs_validation (bool), days_since (int), message
@@ -358,6 +513,21 @@ def check_needs_validation(last_validated: str) -> dict:
         "message": ""
     }
 
+    cached = cached_validation(license_key, location_id)
+    if cached is not None:
+        days_since = int((time.time() - cached["validated_at"]) // 86400)
+        result["days_since"] = days_since
+        result["cached"] = True
+        if not cached.get("valid"):
+            result["message"] = "License was rejected at last validation - validation required"
+            return result
+        result["needs_validation"] = False
+        result["validated_at"] = datetime.fromtimestamp(cached["validated_at"]).strftime("%Y-%m-%dT%H:%M:%S")
+        result["message"] = f"License valid. Next validation in {VALIDATION_WINDOW_DAYS - days_since} days"
+        if days_since >= REVALIDATE_AFTER_DAYS:
+            result["revalidating"] = revalidate_in_background(license_key, location_id)
+        return result
+
     if not last_validated or last_validated.strip() == "":
         result["message"] = "No previous validation - validation required"
         return result
@@ -373,13 +543,15 @@ def check_needs_validation(last_validated: str) -> dict:
 
         result["days_since"] = days_since
 
-        if days_since >= 30:
+        if days_since >= VALIDATION_WINDOW_DAYS:
             result["needs_validation"] = True
             result["message"] = f"Last validated {days_since} days ago - monthly validation required"
         else:
             result["needs_validation"] = False
-            days_until = 30 - days_since
+            days_until = VALIDATION_WINDOW_DAYS - days_since
             result["message"] = f"License valid. Next validation in {days_until} days"
+            if license_key and location_id and days_since >= REVALIDATE_AFTER_DAYS:
+                result["revalidating"] = revalidate_in_background(license_key, location_id)
 
     except Exception as e:
         result["message"] = f"Error parsing date: {str(e)} - validation required"
@@ -491,15 +663,17 @@ def _print_usage_error(message: str) -> None:
     Args:
         message: Error message to print.
     """
-    print(json.dumps({"error": message, "actions": ["validate", "activate", "deactivate", "check", "trial"]}))
+    print(json.dumps({"error": message, "actions": ["validate", "activate", "deactivate", "check", "trial", "revalidate"]}))
     sys.exit(1)
 
 
 def _handle_check_action() -> dict:
     """Handle 'check' CLI action."""
     if len(sys.argv) < 3:
-        _print_usage_error("Usage: validate_license.py check <last_validated_date>")
-    return check_needs_validation(sys.argv[2])
+        _print_usage_error("Usage: validate_license.py check <last_validated_date> [license_key location_id]")
+    license_key = sys.argv[3] if len(sys.argv) > 4 else ""
+    location_id = sys.argv[4] if len(sys.argv) > 4 else ""
+    return check_needs_validation(sys.argv[2], license_key, location_id)
 
 
 def _handle_trial_action() -> dict:
@@ -513,7 +687,7 @@ def _handle_license_action(action: str) -> dict:
     """Handle license-based CLI actions.
 
     Args:
-        action: Action name (validate, activate, deactivate).
+        action: Action name (validate, revalidate, activate, deactivate).
 
     Returns:
         dict: Result of the action.
@@ -527,6 +701,7 @@ def _handle_license_action(action: str) -> dict:
 
     actions = {
         "validate": lambda: validate_license(license_key, location_id),
+        "revalidate": lambda: validate_license(license_key, location_id),
         "activate": lambda: activate_license(license_key, location_id),
         "deactivate": lambda: deactivate_license(license_key, location_id, instance_id),
     }
@@ -12,6 +12,17 @@ Each payment format: day,month,year,methodName,amount
     - methodName: e.g., "GoCardless DD", "Credit Card", "Bank Transfer"
     - amount: decimal (e.g., 250.00 or 250)
 
+Batch usage:
+    python write_psa_payments.py --manifest payments.csv [--dry-run] [--workers N]
+                                 [--open-album PATH] [--report results.json]
+
+    The manifest maps albums to payments (CSV columns psa, group, date, method,
+    amount, clear, clear_method - or the JSON form documented in
+    load_manifest). Albums are written in parallel, each in one transaction
+    that is retried while the album is busy. Payments already in the album
+    with the same date, method and amount are skipped, so a manifest can be
+    re-run safely. --dry-run prints each album's payment diff instead.
+
 Options:
     --clear         Clear ALL existing payments before adding new ones
     --clear-method  METHODNAME
@@ -30,11 +41,30 @@ Example:
     python write_psa_payments.py album.psa "26,2,26,Credit Card,200" "26,3,26,GoCardless DD,250"
 """
 
+import argparse
+import csv
+import difflib
+import json
 import sys
 import sqlite3
 import re
 import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, date as _date
+from xml.sax.saxutils import escape, unescape
+
+# Batch writes: SQLite busy wait per attempt, extra attempts and their backoff
+BUSY_TIMEOUT = 2
+BUSY_RETRIES = 3
+BUSY_BACKOFF = 0.5
+BATCH_WORKERS = 4
+
+_PAYMENTS_SECTION_RE = re.compile(r'<payments>.*?</payments>|<payments\s*/>', re.DOTALL)
+_ATTR_ESCAPE = {'"': "&quot;"}
+_ATTR_UNESCAPE = {"&quot;": '"'}
 
 
 # Known ProSelect payment method name -> methodID mapping
@@ -158,6 +188,341 @@ def psa_meta_set(conn: sqlite3.Connection, key: str, value: str) -> None:
     )
 
 
+
+
+class OrderGroup:
+    """One <Group> of an OrderList with its payment lines.
+
+    Positions are offsets into the source XML so an edited group can be
+    spliced back without touching the rest of the document.
+    """
+
+    def __init__(self, gid, tag_start, tag_end, close_start, section, payments):
+        self.id = gid
+        self.tag_start = tag_start
+        self.tag_end = tag_end
+        self.close_start = close_start  # offset of </Group>
+        self.section = section          # (start, end) of <payments>...</payments>, or None
+        self.payments = payments        # raw <payment .../> element strings
+        self.original = list(payments)
+        self.added_ids = []
+
+    @property
+    def changed(self) -> bool:
+        return self.payments != self.original
+
+
+class OrderList:
+    """Parsed view of a ProSelect OrderList for payment edits.
+
+    Groups, their <payments> sections and payment lines are indexed in one
+    pass. Edits only replace the payment sections and two attributes on the
+    edited groups' tags; everything else is written back byte for byte, so
+    ProSelect's own formatting is preserved.
+    """
+
+    def __init__(self, xml: str):
+        self.xml = xml
+
+        # Existing method name -> ID map from current payments (all groups)
+        self.method_ids = {}
+        for m in re.finditer(r'methodID="(\d+)"[^/]*methodName="([^"]+)"', xml):
+            self.method_ids[unescape(m.group(2), _ATTR_UNESCAPE).strip().lower()] = int(m.group(1))
+
+        # Payment IDs are unique across the whole album, not per group
+        self.max_payment_id = max((int(m.group(1)) for m in re.finditer(r'<payment[^>]+\bid="(\d+)"', xml)), default=0)
+
+        # Match the indentation of existing payment lines
+        self.indent = "\t\t\t\t\t\t"  # Default: 6 tabs (matches observed format)
+        indent_match = re.search(r'^(\s+)<payment\s', xml, re.MULTILINE)
+        if indent_match:
+            self.indent = indent_match.group(1).split("\n")[-1] or self.indent
+        self.tag_indent = self.indent[:-1] if self.indent else "\t\t\t\t\t"  # <payments> tag
+
+        self.groups = {}
+        for gm in re.finditer(r'<Group\s+id="(\d+)"[^>]*>(.*?)</Group>', xml, re.DOTALL):
+            gid = int(gm.group(1))
+            if gid in self.groups:
+                continue
+            section = None
+            payments = []
+            sm = _PAYMENTS_SECTION_RE.search(xml, gm.start(2), gm.end(2))
+            if sm:
+                section = (sm.start(), sm.end())
+                payments = re.findall(r'<payment\s+[^>]*/>', sm.group(0))
+            self.groups[gid] = OrderGroup(gid, gm.start(), gm.start(2), gm.end(2), section, payments)
+
+    def remove_payments(self, gid: int, predicate=None) -> int:
+        """Remove the group's payment lines matching predicate(attrs) (all if None)."""
+        group = self.groups[gid]
+        if predicate is None:
+            kept = []
+        else:
+            kept = [p for p in group.payments if not predicate(payment_attrs(p))]
+        removed = len(group.payments) - len(kept)
+        group.payments = kept
+        return removed
+
+    def payment_keys(self, gid: int) -> Counter:
+        """(date, method, pence) of each of the group's payment lines."""
+        return Counter(_attrs_key(payment_attrs(p)) for p in self.groups[gid].payments)
+
+    def add_payments(self, gid: int, payments: list, now_str: str) -> list:
+        """Append payment lines to the group; returns their new payment IDs."""
+        group = self.groups[gid]
+        time_part = now_str.split(" ")[1]
+        ids = []
+        for p in payments:
+            self.max_payment_id += 1
+            method_id = get_method_id(p["method_name"], self.method_ids)
+            jdate = f"{p['year']:04d}-{p['month']:02d}-{p['day']:02d} {time_part}"
+            # Match ProSelect's exact formatting: double-space between attributes
+            group.payments.append(
+                f'<payment value="{format_amount(p["amount"])}"  exported="No"  '
+                f'methodID="{method_id}"  SCEntryID=""  '
+                f'methodName="{escape(p["method_name"], _ATTR_ESCAPE)}"  status="0"  '
+                f'jdate="{jdate}" id="{self.max_payment_id}" />'
+            )
+            ids.append(self.max_payment_id)
+        group.added_ids.extend(ids)
+        return ids
+
+    def _section_xml(self, group: OrderGroup) -> str:
+        lines = ["<payments>"] + [self.indent + p for p in group.payments]
+        return "\n".join(lines) + "\n" + self.tag_indent + "</payments>"
+
+    def to_xml(self, now_str: str) -> str:
+        """Serialise the OrderList with every edited group spliced in."""
+        xml = self.xml
+        # Splice from the end so earlier offsets stay valid
+        for group in sorted(self.groups.values(), key=lambda g: g.tag_start, reverse=True):
+            if not group.changed:
+                continue
+            if group.section:
+                start, end = group.section
+                xml = xml[:start] + self._section_xml(group) + xml[end:]
+            else:
+                # No <payments> section in this group yet: add one on its own line before </Group>
+                line_start = xml.rfind("\n", group.tag_end, group.close_start) + 1
+                if not line_start or xml[line_start:group.close_start].strip():
+                    line_start = group.close_start
+                xml = xml[:line_start] + self.tag_indent + self._section_xml(group) + "\n" + xml[line_start:]
+
+            tag = xml[group.tag_start:group.tag_end]
+            if group.added_ids:
+                tag = re.sub(r'NextPaymentID="\d+"', f'NextPaymentID="{group.added_ids[-1]}"', tag)
+            tag = re.sub(r'lastPaymentsChanged="[^"]*"', f'lastPaymentsChanged="{now_str}"', tag)
+            xml = xml[:group.tag_start] + tag + xml[group.tag_end:]
+        return xml
+
+    def diff(self, label: str = "") -> list:
+        """Unified diff of the payment lines of every edited group."""
+        lines = []
+        for group in self.groups.values():
+            if group.changed:
+                name = f"{label}#group{group.id}"
+                lines.extend(difflib.unified_diff(group.original, group.payments, name, name, lineterm=""))
+        return lines
+
+
+def payment_attrs(element: str) -> dict:
+    """Attributes of one <payment .../> element."""
+    return {k: unescape(v, _ATTR_UNESCAPE) for k, v in re.findall(r'(\w+)="([^"]*)"', element)}
+
+
+def _payment_key(jdate: str, method_name: str, amount) -> tuple:
+    """Identity of a payment line for duplicate checks: (date, method, pence)."""
+    try:
+        pence = int(round(float(amount) * 100))
+    except (TypeError, ValueError):
+        pence = 0
+    return jdate[:10], method_name.strip().lower(), pence
+
+
+def _attrs_key(attrs: dict) -> tuple:
+    return _payment_key(attrs.get("jdate", ""), attrs.get("methodName", ""), attrs.get("value", 0))
+
+
+def _new_key(payment: dict) -> tuple:
+    return _payment_key(f"{payment['year']:04d}-{payment['month']:02d}-{payment['day']:02d}",
+                        payment["method_name"], payment["amount"])
+
+
+def _future_method_filter(clear_method: str):
+    """Predicate for --clear-method: future-dated lines of a matching method.
+
+    Lines with a past or today jdate are already-collected payments (e.g. a
+    GoCardless upfront deposit) and are preserved. Lines with no date are
+    scheduled plan entries and are removed. An empty method name matches
+    nothing (an empty string would otherwise match every method).
+    """
+    search_lower = clear_method.strip().lower()
+    today = _date.today()
+
+    def _matches(attrs: dict) -> bool:
+        if not search_lower or search_lower not in attrs.get("methodName", "\x00").lower():
+            return False
+        date_match = re.match(r'(\d{4})-(\d{2})-(\d{2})', attrs.get("jdate", ""))
+        if date_match:
+            pdate = _date(int(date_match.group(1)), int(date_match.group(2)), int(date_match.group(3)))
+            if pdate <= today:
+                return False  # past/today = collected, preserve
+        return True
+
+    return _matches
+
+
+def _clear_predicate(edit):
+    """Removal predicate for an edit's clear options (None = keep everything)."""
+    if edit.clear_method:
+        return _future_method_filter(edit.clear_method)
+    if edit.clear:
+        return lambda attrs: True
+    return None
+
+
+def _sparing(matches, wanted: Counter):
+    """Wrap a removal predicate so lines identical to a wanted payment are kept."""
+    def _matches(attrs: dict) -> bool:
+        if not matches(attrs):
+            return False
+        key = _attrs_key(attrs)
+        if wanted[key] > 0:
+            wanted[key] -= 1
+            return False
+        return True
+    return _matches
+
+
+def _missing(payments: list, present: Counter) -> list:
+    """Payments not already present (each present line covers one payment)."""
+    remaining = []
+    for p in payments:
+        key = _new_key(p)
+        if present[key] > 0:
+            present[key] -= 1
+        else:
+            remaining.append(p)
+    return remaining
+
+
+@dataclass
+class AlbumEdit:
+    """Payment edits for one order group of one album."""
+    psa_path: str
+    group: int = 1
+    payments: list = field(default_factory=list)  # parse_payment_arg dicts
+    clear: bool = False
+    clear_method: str = ""
+    meta: dict = field(default_factory=dict)
+
+
+def _is_busy(error: sqlite3.Error) -> bool:
+    """True for SQLITE_BUSY / SQLITE_LOCKED errors."""
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def apply_album_edits(psa_path, edits, dry_run=False, skip_existing=False, retries=BUSY_RETRIES) -> dict:
+    """Apply payment edits to one album in a single transaction.
+
+    The write lock is taken (BEGIN IMMEDIATE) before the OrderList is read,
+    so nothing can change it between the read and the write. If another
+    connection holds the lock the whole attempt is retried with backoff.
+
+    Args:
+        psa_path: Path to the .psa file
+        edits: AlbumEdit list for this album (one per order group)
+        dry_run: Build the diff but roll back instead of writing
+        skip_existing: Skip payments already present with the same date, method and amount
+        retries: Extra attempts while the album is busy
+
+    Returns:
+        dict: psa_path, status ('written', 'dry-run', 'unchanged', 'busy' or
+            'error'), added, removed, skipped, diff (list of lines), message
+    """
+    result = {"psa_path": psa_path, "status": "error", "added": 0, "removed": 0,
+              "skipped": 0, "diff": [], "message": ""}
+    if not os.path.exists(psa_path):
+        result["message"] = f"File not found: {psa_path}"
+        return result
+
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(BUSY_BACKOFF * (2 ** (attempt - 1)))
+        try:
+            conn = sqlite3.connect(psa_path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    outcome = _edit_order_list(conn, psa_path, edits, dry_run, skip_existing)
+                    conn.execute("ROLLBACK" if dry_run or outcome["status"] != "written" else "COMMIT")
+                except BaseException:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+            finally:
+                conn.close()
+            result.update(outcome)
+            return result
+        except sqlite3.Error as e:
+            if _is_busy(e) and attempt < retries:
+                continue
+            result["status"] = "busy" if _is_busy(e) else "error"
+            result["message"] = f"SQLite error: {str(e)}"
+            return result
+        except Exception as e:
+            result["message"] = str(e)
+            return result
+    return result
+
+
+def _edit_order_list(conn, psa_path, edits, dry_run, skip_existing) -> dict:
+    """Read, edit and (unless dry_run) write the OrderList inside the open transaction."""
+    row = conn.execute('SELECT buffer FROM BigStrings WHERE buffCode=?', ('OrderList',)).fetchone()
+    if not row:
+        return {"status": "error", "message": "No OrderList found in album"}
+    order_data = row[0]
+    if isinstance(order_data, bytes):
+        order_data = order_data.decode('utf-8', errors='replace')
+
+    order_list = OrderList(order_data)
+    now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    added = removed = skipped = 0
+    meta = {}
+    for edit in edits:
+        if edit.group not in order_list.groups:
+            return {"status": "error", "message": f"Order group {edit.group} not found"}
+        # Clearing only ever touches the TARGET group
+        clear = _clear_predicate(edit)
+        if clear is not None:
+            if skip_existing:
+                # Lines about to be re-added unchanged stay, so a re-run changes nothing
+                clear = _sparing(clear, Counter(_new_key(p) for p in edit.payments))
+            removed += order_list.remove_payments(edit.group, clear)
+        payments = edit.payments
+        if skip_existing:
+            payments = _missing(payments, order_list.payment_keys(edit.group))
+            skipped += len(edit.payments) - len(payments)
+        added += len(order_list.add_payments(edit.group, payments, now_str))
+        meta.update({k: v for k, v in edit.meta.items() if k})
+
+    diff = order_list.diff(os.path.basename(psa_path))
+    outcome = {"added": added, "removed": removed, "skipped": skipped, "diff": diff}
+    if dry_run:
+        return {**outcome, "status": "dry-run"}
+    if not diff and not meta:
+        return {**outcome, "status": "unchanged"}
+
+    if diff:
+        conn.execute('UPDATE BigStrings SET buffer=? WHERE buffCode=?', (order_list.to_xml(now_str), 'OrderList'))
+    if meta:
+        _ensure_psa_meta_table(conn)
+        for key, value in meta.items():
+            psa_meta_set(conn, key, value)
+    return {**outcome, "status": "written"}
+
+
 def write_payments_to_psa(psa_path, payment_args, clear_existing=False, target_group=1, clear_method=None, meta=None) -> str:
     """
     Write payment lines into a .psa SQLite database file.
@@ -189,238 +554,191 @@ def write_payments_to_psa(psa_path, payment_args, clear_existing=False, target_g
     if not payments:
         return "ERROR|No payment lines provided"
 
-    try:
-        # Open database for read-write
-        conn = sqlite3.connect(psa_path)
-        cursor = conn.cursor()
-
-        # Read OrderList
-        cursor.execute('SELECT buffer FROM BigStrings WHERE buffCode=?', ('OrderList',))
-        row = cursor.fetchone()
-
-        if not row:
-            conn.close()
-            return "ERROR|No OrderList found in album"
-
-        order_data = row[0]
-        if isinstance(order_data, bytes):
-            order_data = order_data.decode('utf-8', errors='replace')
-
-        # Build existing method name -> ID map from current payments
-        existing_methods = {}
-        for m in re.finditer(r'methodID="(\d+)"[^/]*methodName="([^"]+)"', order_data):
-            mid = int(m.group(1))
-            mname = m.group(2).strip().lower()
-            existing_methods[mname] = mid
-
-        # Find current max payment ID
-        max_id = 0
-        for m in re.finditer(r'<payment[^>]+\bid="(\d+)"', order_data):
-            pid = int(m.group(1))
-            if pid > max_id:
-                max_id = pid
-
-        # Find the target Group element and its full content span
-        group_pattern = rf'<Group\s+id="{target_group}"[^>]*>'
-        group_match = re.search(group_pattern, order_data)
-        if not group_match:
-            conn.close()
-            return f"ERROR|Order group {target_group} not found"
-
-        # Find the closing </Group> for the target group
-        group_end_match = re.search(
-            rf'<Group\s+id="{target_group}"[^>]*>.*?</Group>',
-            order_data,
-            re.DOTALL,
-        )
-        if not group_end_match:
-            conn.close()
-            return f"ERROR|Could not find closing tag for group {target_group}"
-
-        group_start = group_match.start()
-        group_end = group_end_match.end()
-        group_content = order_data[group_start:group_end]
-
-        # Detect indentation from existing data
-        # Look for existing payment lines to match indentation
-        indent = "\t\t\t\t\t\t"  # Default: 6 tabs (matches observed format)
-        payment_indent_match = re.search(r'^(\s+)<payment\s', order_data, re.MULTILINE)
-        if payment_indent_match:
-            indent = payment_indent_match.group(1)
-
-        payments_tag_indent = indent[:-1] if len(indent) > 0 else "\t\t\t\t\t"  # 5 tabs for <payments> tag
-
-        # Handle clear mode — only clear payments within the TARGET group
-        if clear_method:
-            # Selective removal: only strip <payment .../> lines whose
-            # methodName attribute contains the given string (case-insensitive)
-            # AND whose scheduled date is STRICTLY in the future.
-            # Entries with a past or today jdate are already-collected payments
-            # (e.g. a GoCardless upfront deposit) and must be preserved.
-            # Safety guard: an empty string matches EVERYTHING in Python — skip clearing.
-            search_lower = clear_method.strip().lower()
-            if search_lower:
-                today = _date.today()
-                def _remove_method_payments(m):
-                    inner = m.group(0)
-                    lines = inner.split('\n')
-                    kept = []
-                    for line in lines:
-                        method_match = re.search(r'methodName="([^"]+)"', line)
-                        if method_match and search_lower in method_match.group(1).lower():
-                            # Only remove if the scheduled date is strictly in the future.
-                            # Past/today = already collected (deposit) → keep it.
-                            date_match = re.search(r'jdate="(\d{4})-(\d{2})-(\d{2})', line)
-                            if date_match:
-                                pdate = _date(
-                                    int(date_match.group(1)),
-                                    int(date_match.group(2)),
-                                    int(date_match.group(3)),
-                                )
-                                if pdate <= today:
-                                    kept.append(line)  # past/today = collected, preserve
-                                    continue
-                            # Future date (or no date) → scheduled plan entry, remove
-                            continue
-                        kept.append(line)
-                    return '\n'.join(kept)
-                new_group_content = re.sub(
-                    r'<payments>.*?</payments>',
-                    _remove_method_payments,
-                    group_content,
-                    flags=re.DOTALL,
-                )
-                order_data = order_data[:group_start] + new_group_content + order_data[group_end:]
-                group_end = group_start + len(new_group_content)
-                group_content = new_group_content
-        elif clear_existing:
-            new_group_content = re.sub(
-                r'<payments>\s*(?:<payment[^/]*/>\s*)*</payments>',
-                '<payments>\n' + payments_tag_indent + '</payments>',
-                group_content,
-                flags=re.DOTALL,
-            )
-            order_data = order_data[:group_start] + new_group_content + order_data[group_end:]
-            # Recalculate group_end after replacement
-            group_end = group_start + len(new_group_content)
-            group_content = new_group_content
-
-        # Find the </payments> closing tag WITHIN the target group
-        # Helper: wraps a relative regex match so .start() returns an absolute offset
-        class _AbsMatch:
-            def __init__(self, m, offset):
-                self._m = m
-                self._offset = offset
-            def start(self):
-                return self._m.start() + self._offset
-            def group(self, n=0):
-                return self._m.group(n)
-
-        payments_close = re.search(r'(\s*)</payments>', group_content)
-        payments_close_abs = None
-        if payments_close:
-            # Convert relative offset to absolute position in order_data
-            payments_close_abs_start = group_start + payments_close.start()
-            payments_close_abs = re.search(r'(\s*)</payments>', order_data[payments_close_abs_start:])
-            if payments_close_abs:
-                payments_close = _AbsMatch(payments_close_abs, payments_close_abs_start)
-
-        if not payments_close_abs:
-            # No <payments> section exists in target group — create one
-            group_end_tag = re.search(r'</Group>', order_data[group_start:group_end])
-            if group_end_tag:
-                insert_pos = group_start + group_end_tag.start()
-                new_section = (
-                    f"{payments_tag_indent}<payments>\n"
-                    f"{payments_tag_indent}</payments>\n"
-                )
-                order_data = order_data[:insert_pos] + new_section + order_data[insert_pos:]
-                # Re-find the closing tag within the updated data
-                new_group_end_match = re.search(
-                    rf'<Group\s+id="{target_group}"[^>]*>.*?</Group>',
-                    order_data,
-                    re.DOTALL,
-                )
-                group_content = order_data[group_start:new_group_end_match.end()]
-                rel_close = re.search(r'(\s*)</payments>', group_content)
-                if rel_close:
-                    payments_close = _AbsMatch(rel_close, group_start)
-
-        if not payments_close:
-            conn.close()
-            return "ERROR|Could not find or create <payments> section"
-
-        # Build new payment XML lines
-        now_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_lines = []
-        next_id = max_id + 1
+    edit = AlbumEdit(psa_path, target_group, payments, clear_existing, clear_method or "", meta or {})
+    result = apply_album_edits(psa_path, [edit])
+    if result["status"] != "written":
+        return f"ERROR|{result['message'] or result['status']}"
+    return f"SUCCESS|{result['added']}"
 
-        for p in payments:
-            method_id = get_method_id(p["method_name"], existing_methods)
-            jdate = f"{p['year']:04d}-{p['month']:02d}-{p['day']:02d} {now_str.split(' ')[1]}"
-            amount_str = format_amount(p["amount"])
 
-            # Match ProSelect's exact formatting: double-space between attributes
-            line = (
-                f'{indent}<payment value="{amount_str}"  exported="No"  '
-                f'methodID="{method_id}"  SCEntryID=""  '
-                f'methodName="{p["method_name"]}"  status="0"  '
-                f'jdate="{jdate}" id="{next_id}" />'
-            )
-            new_lines.append(line)
-            next_id += 1
-
-        # Insert new payment lines before </payments>
-        insert_text = "\n".join(new_lines) + "\n"
-        insert_pos = payments_close.start()
-        order_data = order_data[:insert_pos] + "\n" + insert_text + order_data[insert_pos:]
-
-        # Update NextPaymentID on the Group element
-        new_max_id = next_id - 1
-        order_data = re.sub(
-            rf'(<Group\s+id="{target_group}"[^>]*?)NextPaymentID="\d+"',
-            rf'\g<1>NextPaymentID="{new_max_id}"',
-            order_data
-        )
+# ---------------------------------------------------------------------------
+# Batch writes from a manifest
+# ---------------------------------------------------------------------------
 
-        # Update lastPaymentsChanged timestamp on the Group element
-        order_data = re.sub(
-            rf'(<Group\s+id="{target_group}"[^>]*?)lastPaymentsChanged="[^"]*"',
-            rf'\g<1>lastPaymentsChanged="{now_str}"',
-            order_data
-        )
+def _manifest_payment(value) -> dict:
+    """Payment from a manifest: "day,month,year,method,amount" or {date, method, amount}."""
+    if isinstance(value, str):
+        return parse_payment_arg(value)
+    if not isinstance(value, dict):
+        raise ValueError(f"Unrecognised payment: {value!r}")
+    return _row_payment(str(value.get("date", "")), str(value.get("method", "")), value.get("amount"))
 
-        # Write back to database
-        cursor.execute(
-            'UPDATE BigStrings SET buffer=? WHERE buffCode=?',
-            (order_data, 'OrderList')
-        )
 
-        # Write metadata keys if provided
-        if meta:
-            _ensure_psa_meta_table(conn)
-            for key, value in meta.items():
-                if key:
-                    psa_meta_set(conn, key, value)
+def _row_payment(date_str: str, method_name: str, amount) -> dict:
+    """Payment from a YYYY-MM-DD (or D/M/YYYY) date, method name and amount."""
+    date_str = date_str.strip()
+    if re.match(r'^\d{4}-\d{1,2}-\d{1,2}', date_str):
+        year, month, day = (int(x) for x in date_str[:10].split("-"))
+    else:
+        parts = re.split(r'[/.,]', date_str)
+        if len(parts) != 3:
+            raise ValueError(f"Bad payment date: {date_str!r}")
+        day, month, year = (int(x) for x in parts)
+    if year < 100:
+        year += 2000
+    _date(year, month, day)
+    if not method_name.strip():
+        raise ValueError(f"Missing payment method for {date_str}")
+    return {"day": day, "month": month, "year": year, "method_name": method_name.strip(), "amount": float(amount)}
+
+
+def _truthy(value) -> bool:
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
 
-        conn.commit()
-        conn.close()
+def load_manifest(manifest_path) -> list:
+    """Read a batch manifest into AlbumEdit entries.
 
-        return f"SUCCESS|{len(payments)}"
+    JSON: a list (or {"albums": [...]}) of
+        {"psa": path, "group": 1, "clear": false, "clear_method": "",
+         "payments": ["d,m,y,method,amount" | {"date", "method", "amount"}, ...],
+         "meta": {...}}
 
-    except sqlite3.Error as e:
-        return f"ERROR|SQLite error: {str(e)}"
-    except Exception as e:
-        return f"ERROR|{str(e)}"
+    CSV: one row per payment with columns psa, group, date, method, amount
+    and optional clear, clear_method. Rows for the same album and group are
+    merged; clear options are taken from the first row that sets them.
+
+    Raises:
+        ValueError: malformed manifest or payment
+    """
+    with open(manifest_path, encoding="utf-8-sig", newline="") as f:
+        if manifest_path.lower().endswith(".json"):
+            data = json.load(f)
+            entries = data.get("albums", []) if isinstance(data, dict) else data
+            edits = []
+            for entry in entries:
+                psa_path = entry.get("psa") or entry.get("psa_path") or ""
+                if not psa_path:
+                    raise ValueError(f"Manifest entry without a psa path: {entry!r}")
+                edits.append(AlbumEdit(
+                    psa_path=psa_path,
+                    group=int(entry.get("group", 1) or 1),
+                    payments=[_manifest_payment(p) for p in entry.get("payments", [])],
+                    clear=_truthy(entry.get("clear", False)),
+                    clear_method=str(entry.get("clear_method", "") or ""),
+                    meta={str(k): v for k, v in (entry.get("meta") or {}).items()},
+                ))
+            return edits
+
+        by_key = {}
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+            if not row.get("psa"):
+                raise ValueError(f"Line {line_no}: missing psa")
+            key = (row["psa"], int(row.get("group") or 1))
+            edit = by_key.setdefault(key, AlbumEdit(psa_path=key[0], group=key[1]))
+            edit.clear = edit.clear or _truthy(row.get("clear", ""))
+            edit.clear_method = edit.clear_method or row.get("clear_method", "")
+            if row.get("date") or row.get("amount"):
+                try:
+                    edit.payments.append(_row_payment(row.get("date", ""), row.get("method", ""), row.get("amount")))
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"Line {line_no}: {e}") from e
+        return list(by_key.values())
+
+
+def _album_in_use(psa_path, open_albums) -> bool:
+    """True if the album is open in ProSelect or mid-write by another process."""
+    norm = os.path.normcase(os.path.abspath(psa_path))
+    if norm in open_albums:
+        return True
+    return any(os.path.exists(psa_path + suffix) for suffix in ("-journal", "-wal"))
+
+
+def write_payments_batch(edits, dry_run=False, workers=BATCH_WORKERS, open_albums=(),
+                         skip_existing=True, retries=BUSY_RETRIES) -> list:
+    """Apply manifest edits to many albums in parallel, one transaction per album.
+
+    Edits for the same album (several order groups) share its transaction.
+    Albums open in ProSelect (open_albums) or with a hot SQLite journal are
+    reported as busy and left untouched, so ProSelect cannot later save its
+    in-memory copy over the new lines.
+
+    Returns:
+        list: apply_album_edits() results in manifest order.
+    """
+    by_album = {}
+    for edit in edits:
+        by_album.setdefault(edit.psa_path, []).append(edit)
+    open_set = {os.path.normcase(os.path.abspath(p)) for p in open_albums if p}
+
+    def _run(item):
+        psa_path, album_edits = item
+        if not dry_run and _album_in_use(psa_path, open_set):
+            return {"psa_path": psa_path, "status": "busy", "added": 0, "removed": 0, "skipped": 0,
+                    "diff": [], "message": "Album is open in ProSelect"}
+        return apply_album_edits(psa_path, album_edits, dry_run, skip_existing, retries)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(_run, by_album.items()))
+
+
+def _batch_main(argv) -> int:
+    """CLI entry point for --manifest batch mode."""
+    parser = argparse.ArgumentParser(prog="write_psa_payments.py --manifest",
+                                     description="Write payments from a CSV/JSON manifest into many .psa albums")
+    parser.add_argument("--manifest", required=True, help="CSV or JSON manifest of album -> payments")
+    parser.add_argument("--dry-run", action="store_true", help="Show the payment diff per album without writing")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help=f"Albums written in parallel (default: {BATCH_WORKERS})")
+    parser.add_argument("--open-album", action="append", default=[], help="Album open in ProSelect; left untouched (repeatable)")
+    parser.add_argument("--allow-duplicates", action="store_true", help="Add payments even if an identical line exists")
+    parser.add_argument("--report", default="", help="Write the per-album results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    try:
+        edits = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"ERROR|Bad manifest: {e}")
+        return 1
+    if not edits:
+        print("ERROR|Manifest has no albums")
+        return 1
+
+    results = write_payments_batch(edits, dry_run=args.dry_run, workers=args.workers,
+                                   open_albums=args.open_album, skip_existing=not args.allow_duplicates)
+    labels = {"written": "OK", "dry-run": "DRY", "unchanged": "SKIP", "busy": "BUSY", "error": "FAIL"}
+    for r in results:
+        detail = f"+{r['added']} -{r['removed']}" + (f" ({r['skipped']} already present)" if r["skipped"] else "")
+        print(f"[{labels[r['status']]}] {r['psa_path']}: {r['message'] or detail}")
+        for line in r["diff"] if args.dry_run else ():
+            print(f"    {line}")
+
+    counts = {status: sum(1 for r in results if r["status"] == status) for status in labels}
+    added = sum(r["added"] for r in results)
+    print(f"[INFO] {len(results)} album(s): {counts['written']} written, {counts['dry-run']} dry-run, "
+          f"{counts['unchanged']} unchanged, {counts['busy']} busy, {counts['error']} failed; "
+          + (f"would add {added} payment(s)" if args.dry_run else f"{added} payment(s) added"))
+
+    if args.report:
+        try:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump(results, f, indent=2)
+        except OSError as e:
+            print(f"[WARN] Could not write report {args.report}: {e}")
+    return 1 if counts["busy"] or counts["error"] else 0
 
 
 def main() -> None:
     """CLI entry point — parse arguments and write payments into a .psa file."""
+    if "--manifest" in sys.argv:
+        sys.exit(_batch_main(sys.argv[1:]))
+
     if len(sys.argv) < 3:
         print("ERROR|Usage: write_psa_payments.py <psa_path> <payment1> [payment2] ...")
         print("  Payment format: day,month,year,methodName,amount")
         print("  Options: --clear (remove existing payments first)")
         print("           --group N (target order group, default 1)")
+        print("  Batch:   write_psa_payments.py --manifest FILE [--dry-run]")
         sys.exit(1)
 
     psa_path = sys.argv[1]